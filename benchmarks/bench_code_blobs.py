@@ -0,0 +1,84 @@
+"""
+Benchmark database size with plain-text versus blob-stored code records.
+
+Writes record_count records whose bodies are drawn from distinct_count
+generated functions (so most bodies repeat, like helpers copied across
+files and re-scans of unchanged code) into a table with the old
+plain-text layout, then migrates it to code_blobs and compares file sizes.
+
+Usage:
+    python benchmarks/bench_code_blobs.py [record_count] [distinct_count]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.database import CodeBlobRepository, DatabaseConnectionManager, SchemaManager
+
+LEGACY_TABLE = """
+    CREATE TABLE code_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        code_hash TEXT UNIQUE NOT NULL,
+        code_content TEXT NOT NULL,
+        normalized_code TEXT,
+        function_name TEXT,
+        file_path TEXT,
+        timestamp TEXT NOT NULL,
+        metadata TEXT,
+        simhash TEXT
+    )
+"""
+
+
+def make_body(rng: random.Random, index: int) -> str:
+    lines = [f"def function_{index}(self, items, limit={rng.randint(1, 99)}):"]
+    for line in range(rng.randint(5, 30)):
+        lines.append(f"    value_{line} = [item for item in items if item.score > {rng.random():.3f}][:limit]")
+    lines.append("    return value_0")
+    return "\n".join(lines)
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    distinct_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    rng = random.Random(0)
+    bodies = [make_body(rng, index) for index in range(distinct_count)]
+
+    with tempfile.TemporaryDirectory() as root:
+        path = str(Path(root) / "records.db")
+        connection = sqlite3.connect(path)
+        connection.execute(LEGACY_TABLE)
+        connection.executemany(
+            "INSERT INTO code_records (code_hash, code_content, normalized_code, file_path, timestamp, simhash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"hash_{i}", body, body.replace(" ", ""), f"module_{i % 500}.py", "2024-01-01T00:00:00",
+              str(rng.getrandbits(64)))
+             for i, body in enumerate(rng.choice(bodies) for _ in range(record_count)))
+        )
+        connection.commit()
+        connection.close()
+        text_size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        with DatabaseConnectionManager(path) as manager:
+            SchemaManager(manager).initialize_schema()
+            stats = CodeBlobRepository(manager).get_statistics()
+            manager.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        migrate_time = time.perf_counter() - start
+        blob_size = os.path.getsize(path)
+
+    print(f"records:        {record_count} ({distinct_count} distinct bodies)")
+    print(f"plain text:     {text_size / 2**20:.1f} MiB")
+    print(f"code_blobs:     {blob_size / 2**20:.1f} MiB ({text_size / blob_size:.1f}x smaller)")
+    print(f"blobs:          {stats['blob_count']}, {stats['raw_bytes'] / 2**20:.1f} MiB raw, "
+          f"{stats['stored_bytes'] / 2**20:.1f} MiB compressed")
+    print(f"migration:      {migrate_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
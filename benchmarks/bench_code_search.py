@@ -0,0 +1,72 @@
+"""
+Benchmark name and identifier lookups with and without the FTS5 indexes.
+
+Stores record_count functions, then finds the records whose name
+contains a text and the records whose code uses an identifier: once by
+loading every record and checking it in Python, the way rule matching
+worked before, and once through search_code_records().
+
+Usage:
+    python benchmarks/bench_code_search.py [record_count]
+"""
+
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.unified_repository import UnifiedRepository
+
+VERBS = ["get", "set", "load", "save", "fetch", "build", "parse", "render", "validate", "handle"]
+NOUNS = ["user", "order", "item", "email", "config", "event", "report", "token", "session", "invoice"]
+
+
+def records(record_count: int):
+    rng = random.Random(7)
+    for i in range(record_count):
+        name = f"{rng.choice(VERBS)}_{rng.choice(NOUNS)}_{i}"
+        argument = rng.choice(NOUNS)
+        code = f"def {name}({argument}_id):\n    return {rng.choice(NOUNS)}_cache.get({argument}_id)\n"
+        yield {'code_hash': f"h{i}", 'code_content': code, 'function_name': name}
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as root:
+        with DatabaseConnectionManager(str(Path(root) / "search.db")) as manager:
+            SchemaManager(manager).initialize_schema()
+            repository = UnifiedRepository(manager)
+            repository.bulk_insert_records(list(records(record_count)))
+            pattern = re.compile("validate_email", re.IGNORECASE)
+            token = re.compile(r"\binvoice_cache\b")
+
+            def scan():
+                rows = sorted(repository.get_all_code_records().data, key=lambda row: row['id'])
+                return ([row['id'] for row in rows if pattern.search(row['function_name'])],
+                        [row['id'] for row in rows if token.search(row['code_content'])])
+
+            def search():
+                names = repository.search_code_records(name_contains=["validate_email"], columns=('id',)).data
+                tokens = repository.search_code_records(tokens=["invoice_cache"], columns=('id',)).data
+                return [row['id'] for row in names], [row['id'] for row in tokens]
+
+            scanned, scan_time = timed(scan)
+            searched, search_time = timed(search)
+
+    assert scanned == searched
+    print(f"{record_count} records, {len(searched[0])} name and {len(searched[1])} identifier matches")
+    print(f"load and scan: {scan_time:.3f}s")
+    print(f"fts5 search:   {search_time:.3f}s ({scan_time / search_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark memory retained by parsed code units.
+
+Compares two representations of the same units:
+
+* legacy: the previous CodeUnit dataclass, with an eagerly copied dedented
+  source per unit, an MD5 computed at construction and a "|"-joined
+  structure string
+* slots:  the current CodeUnit, holding byte offsets into one shared
+  buffer per file, with source and hash materialized on access, and an
+  array of interned structure token IDs
+
+Files are parsed up front; only building the retained representation is
+measured with tracemalloc. Dependency lists are the same objects in both
+runs and are therefore excluded; the shared token vocabulary is filled
+before measuring. Two corpora are
+measured: the standard library's top-level modules and a generated module
+with large classes, where every method's source is also part of its class.
+
+Usage:
+    python benchmarks/bench_code_unit_memory.py [unit_count]
+"""
+
+import gc
+import hashlib
+import sys
+import sysconfig
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from oopstracker.ast_analyzer import ASTAnalyzer, CodeUnit, SourceBuffer, extract_line_range
+from oopstracker.core.token_vocabulary import get_token_vocabulary
+
+CLASS_TEMPLATE = '''
+class Service{index}:
+{methods}
+'''
+
+METHOD_TEMPLATE = '''    def handle_{index}(self, request, retries=3):
+        for attempt in range(retries):
+            if self.ready(request):
+                return self.process(request, attempt)
+        raise RuntimeError("failed")
+'''
+
+
+@dataclass
+class LegacyCodeUnit:
+    """The CodeUnit dataclass as it was before the slots rewrite."""
+
+    name: str
+    type: str
+    source_code: str
+    start_line: int
+    end_line: int
+    file_path: Optional[str] = None
+    ast_structure: Optional[str] = None
+    complexity_score: Optional[int] = None
+    dependencies: List[str] = None
+    hash: Optional[str] = None
+
+    def __post_init__(self):
+        if self.dependencies is None:
+            self.dependencies = []
+        if self.hash is None:
+            content_for_hash = f"{self.name}:{self.source_code}"
+            self.hash = hashlib.md5(content_for_hash.encode()).hexdigest()
+
+
+def stdlib_sources(unit_count: int) -> list:
+    """Stdlib modules until they hold at least unit_count units."""
+    sources = []
+    total = 0
+    analyzer = ASTAnalyzer()
+    stdlib = Path(sysconfig.get_paths()["stdlib"])
+    for path in sorted(stdlib.glob("*.py")):
+        try:
+            data = path.read_bytes()
+            total += len(analyzer.parse_code(data.decode("utf-8")))
+        except (OSError, UnicodeDecodeError):
+            continue
+        sources.append((str(path), data))
+        if total >= unit_count:
+            break
+    return sources
+
+
+def class_heavy_sources(unit_count: int) -> list:
+    """Generated modules of classes with 50 methods each."""
+    methods = "".join(METHOD_TEMPLATE.format(index=index) for index in range(50))
+    classes_per_file = 20
+    file_count = max(1, unit_count // (51 * classes_per_file))
+    data = "".join(CLASS_TEMPLATE.format(index=index, methods=methods)
+                   for index in range(classes_per_file)).encode()
+    return [(f"generated_{index}.py", data) for index in range(file_count)]
+
+
+def parse_rows(sources) -> list:
+    """Parse every file once, outside the measured region."""
+    analyzer = ASTAnalyzer()
+    return [(path, data, [unit.to_compact() for unit in analyzer.parse_code(data.decode("utf-8"), path)])
+            for path, data in sources]
+
+
+def build_legacy(parsed) -> list:
+    units = []
+    for path, data, rows in parsed:
+        lines = data.decode("utf-8").splitlines()
+        for name, unit_type, start_line, end_line, structure, complexity, dependencies, _, _ in rows:
+            units.append(LegacyCodeUnit(
+                name=name, type=unit_type, source_code=extract_line_range(lines, start_line, end_line),
+                start_line=start_line, end_line=end_line, file_path=path,
+                ast_structure="|".join(structure), complexity_score=complexity, dependencies=dependencies
+            ))
+    return units
+
+
+def build_slots(parsed) -> list:
+    vocabulary = get_token_vocabulary()
+    units = []
+    for path, data, rows in parsed:
+        buffer = SourceBuffer.from_text(data.decode("utf-8"))
+        for name, unit_type, start_line, end_line, structure, complexity, dependencies, _, _ in rows:
+            units.append(CodeUnit(
+                name=name, type=unit_type, start_line=start_line, end_line=end_line, file_path=path,
+                token_ids=vocabulary.intern_many(structure), complexity_score=complexity,
+                dependencies=dependencies, buffer=buffer, span=buffer.span(start_line, end_line)
+            ))
+    return units
+
+
+def retained_bytes(build, parsed):
+    """Memory still allocated once build() has returned its units."""
+    gc.collect()
+    tracemalloc.start()
+    units = build(parsed)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, len(units)
+
+
+def report(label, sources):
+    parsed = parse_rows(sources)
+    legacy_bytes, unit_count = retained_bytes(build_legacy, parsed)
+    slots_bytes, _ = retained_bytes(build_slots, parsed)
+    print(f"{label:<14} {unit_count:>8} {legacy_bytes / unit_count:>12.0f} B {slots_bytes / unit_count:>10.0f} B "
+          f"{legacy_bytes / slots_bytes:>8.1f}x")
+
+
+def main():
+    unit_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"{'corpus':<14} {'units':>8} {'legacy/unit':>14} {'slots/unit':>12} {'saving':>9}")
+    report("stdlib", stdlib_sources(unit_count))
+    report("large classes", class_heavy_sources(unit_count))
+
+
+if __name__ == "__main__":
+    main()
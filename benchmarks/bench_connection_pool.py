@@ -0,0 +1,74 @@
+"""
+Benchmark concurrent reads through a shared connection manager.
+
+Runs query_count lookups from a thread pool, once through a single
+DatabaseConnectionManager guarded by a lock (the only safe way to share
+one sqlite3 connection) and once through a PooledConnectionManager whose
+readers answer queries in parallel.
+
+Usage:
+    python benchmarks/bench_connection_pool.py [query_count] [threads]
+"""
+
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from oopstracker.database import DatabaseConnectionManager, PooledConnectionManager
+
+QUERY = "SELECT COUNT(*) FROM items WHERE value % ? = 0"
+
+
+class SharedConnectionManager(DatabaseConnectionManager):
+    """Single connection that may be used from any thread."""
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), check_same_thread=False)
+
+
+def populate(manager, row_count: int):
+    with manager.transaction():
+        manager.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER)")
+        manager.executemany("INSERT INTO items (value) VALUES (?)", ((i,) for i in range(row_count)))
+
+
+def run(query, query_count: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(query, range(2, query_count + 2)))
+    return time.perf_counter() - start
+
+
+def main():
+    query_count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as root:
+        path = str(Path(root) / "pool.db")
+        single = SharedConnectionManager(path)
+        populate(single, 200_000)
+        lock = threading.Lock()
+
+        def locked_query(modulus):
+            with lock:
+                return single.execute(QUERY, (modulus,)).fetchone()[0]
+
+        single_time = run(locked_query, query_count, threads)
+        single.close()
+
+        with PooledConnectionManager(path, readers=threads) as pool:
+            pooled_time = run(lambda modulus: pool.execute(QUERY, (modulus,)).fetchone()[0], query_count, threads)
+            stats = pool.get_pool_statistics()
+
+    print(f"queries:      {query_count} on {threads} threads")
+    print(f"single+lock:  {single_time:.3f}s")
+    print(f"pooled:       {pooled_time:.3f}s")
+    print(f"speedup:      {single_time / pooled_time:.1f}x")
+    print(f"readers open: {stats['readers_open']}, waits: {stats['reader_waits']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark change detection for an incremental scan of unchanged files.
+
+Writes file_count small modules, tracks them all with one batched upsert
+and then compares a per-file check (one SELECT and one content hash per
+file) with FileTrackingRepository.get_changed_files, which looks up every
+path with a single query and only re-hashes files whose stat changed.
+
+Usage:
+    python benchmarks/bench_file_tracking.py [file_count]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.ast_database import ASTDatabaseManager
+from oopstracker.database import FileTrackingRepository
+
+
+def per_file_changed(db: ASTDatabaseManager, paths: list) -> list:
+    """Changed files found with one lookup and one hash per file."""
+    return [path for path in paths if db.get_file_hash(path) != FileTrackingRepository.hash_file(path)]
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as root:
+        paths = []
+        for index in range(file_count):
+            path = Path(root) / f"module_{index}.py"
+            path.write_text(f"def function_{index}(value):\n    return value + {index}\n")
+            paths.append(str(path))
+
+        with ASTDatabaseManager(str(Path(root) / "tracking.db")) as db:
+            start = time.perf_counter()
+            db.update_file_tracking_batch([(path, FileTrackingRepository.hash_file(path), 1) for path in paths])
+            track_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = per_file_changed(db, paths)
+            per_file_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            changed = db.get_changed_files(paths)
+            batched_time = time.perf_counter() - start
+
+    assert changed == expected == []
+    print(f"files:        {file_count}")
+    print(f"track (bulk): {track_time:.3f}s")
+    print(f"per-file:     {per_file_time:.3f}s")
+    print(f"batched:      {batched_time:.3f}s")
+    print(f"speedup:      {per_file_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark brute-force Hamming scans: Python loop vs NumPy popcount kernels.
+
+Usage:
+    python benchmarks/bench_hamming.py [hash_count]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from oopstracker.core.simhash import SimHashCalculator, hamming_distance_matrix, hamming_distances
+
+
+def main():
+    hash_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, np.iinfo(np.uint64).max, size=hash_count, dtype=np.uint64, endpoint=True)
+    query = int(hashes[0])
+    calculator = SimHashCalculator()
+    
+    python_hashes = hashes.tolist()
+    start = time.perf_counter()
+    scalar = [calculator.hamming_distance(query, value) for value in python_hashes]
+    scalar_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    vectorized = hamming_distances(query, hashes)
+    vector_time = time.perf_counter() - start
+    
+    assert vectorized.tolist() == scalar, "kernel result differs from scalar"
+    
+    queries = hashes[:64]
+    start = time.perf_counter()
+    hamming_distance_matrix(queries, hashes)
+    matrix_time = time.perf_counter() - start
+    
+    print(f"hashes:            {hash_count}")
+    print(f"python one-vs-n:   {scalar_time * 1000:.1f}ms")
+    print(f"numpy one-vs-n:    {vector_time * 1000:.1f}ms ({scalar_time / vector_time:.0f}x)")
+    print(f"numpy 64-vs-n:     {matrix_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark time-to-first-query with and without the index snapshot.
+
+Fills code_records with record_count rows, then measures how long it
+takes from opening the database until the first Hamming query returns:
+rebuilding a SimHashIndex from the rows, reading the rows into arrays,
+and opening the saved memory-mapped snapshot (which still checks the
+database generation and looks for new rows).
+
+Usage:
+    python benchmarks/bench_index_snapshot.py [record_count]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.core.simhash import IndexSnapshot, SimHashIndex, split_bands, to_signed64
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+
+INSERT = """
+    INSERT INTO code_records (code_hash, file_path, timestamp, metadata, simhash,
+                              simhash_band0, simhash_band1, simhash_band2, simhash_band3)
+    VALUES (?, ?, '2024-01-01', ?, ?, ?, ?, ?, ?)
+"""
+
+
+def populate(manager, record_count: int):
+    rng = random.Random(42)
+    with manager.transaction():
+        manager.executemany(INSERT, (
+            (f"h{i}", f"package/module_{i % 5000}.py", f'{{"line_number": {i % 800 + 1}}}',
+             to_signed64(simhash), *split_bands(simhash))
+            for i, simhash in ((i, rng.getrandbits(64)) for i in range(record_count))
+        ))
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as root:
+        path = str(Path(root) / "records.db")
+        manager = DatabaseConnectionManager(path)
+        SchemaManager(manager).initialize_schema()
+        populate(manager, record_count)
+        query = manager.execute("SELECT simhash FROM code_records WHERE id = ?", (record_count // 2,)).fetchone()[0]
+        manager.close()
+
+        def from_rows():
+            with DatabaseConnectionManager(path) as db:
+                index = SimHashIndex()
+                index.build((row[0], row[1]) for row in db.execute("SELECT id, simhash FROM code_records"))
+                return index.query(query, 3)
+
+        def rebuild_arrays():
+            with DatabaseConnectionManager(path) as db:
+                return IndexSnapshot.open(db, save=False, rebuild=True).query(query, 3)
+
+        def from_snapshot():
+            with DatabaseConnectionManager(path) as db:
+                return IndexSnapshot.open(db).query(query, 3)
+
+        expected, index_time = timed(from_rows)
+        rebuilt, rebuild_time = timed(rebuild_arrays)
+        with DatabaseConnectionManager(path) as db:
+            _, export_time = timed(lambda: IndexSnapshot.open(db, rebuild=True))
+        loaded, load_time = timed(from_snapshot)
+
+    assert expected == rebuilt == loaded
+    print(f"{record_count} records, time to first query")
+    print(f"SimHashIndex from rows: {index_time:.2f}s")
+    print(f"arrays from rows:       {rebuild_time:.2f}s (export incl. save: {export_time:.2f}s)")
+    print(f"memory-mapped snapshot: {load_time * 1000:.1f} ms")
+    print(f"speedup: {index_time / load_time:.0f}x over SimHashIndex, {rebuild_time / load_time:.0f}x over arrays")
+
+
+if __name__ == "__main__":
+    main()
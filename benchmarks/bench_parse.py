@@ -0,0 +1,76 @@
+"""
+Benchmark ASTAnalyzer.parse_code scaling with file size.
+
+Generates classes with many methods and compares the previous per-unit
+extraction (every unit re-visits its subtree and re-splits the source)
+with parse_code, which visits the file once and splits it once.
+
+Usage:
+    python benchmarks/bench_parse.py [max_methods]
+"""
+
+import ast
+import sys
+import time
+
+from oopstracker.ast_analyzer import ASTAnalyzer, CompositeVisitor
+
+METHOD_TEMPLATE = '''
+    def method_{index}(self, items, limit=10):
+        total = 0
+        for item in items:
+            if item > limit:
+                total += self.scale(item)
+            elif item < 0:
+                raise ValueError("negative")
+        return total
+'''
+
+
+def generate_source(method_count: int) -> str:
+    """A module with one class holding method_count methods."""
+    body = "".join(METHOD_TEMPLATE.format(index=index) for index in range(method_count))
+    return f"class Generated:\n{body}"
+
+
+def per_unit_extraction(source: str) -> list:
+    """Extract unit signatures the old way."""
+    analyzer = ASTAnalyzer()
+    composite = CompositeVisitor()
+    signatures = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            composite.clear()
+            composite.visit(node)
+            lines = source.splitlines()
+            analyzer._extract_node_source(node, lines)
+            signatures.append(composite.get_structure_signature())
+    return signatures
+
+
+def single_pass_extraction(source: str) -> list:
+    return [unit.ast_structure for unit in ASTAnalyzer().parse_code(source)]
+
+
+def timed(function, source):
+    start = time.perf_counter()
+    result = function(source)
+    return time.perf_counter() - start, result
+
+
+def main():
+    max_methods = int(sys.argv[1]) if len(sys.argv) > 1 else 1600
+    print(f"{'methods':>8} {'lines':>7} {'per-unit':>10} {'single pass':>12} {'speedup':>8}")
+    method_count = 100
+    while method_count <= max_methods:
+        source = generate_source(method_count)
+        old_time, expected = timed(per_unit_extraction, source)
+        new_time, actual = timed(single_pass_extraction, source)
+        assert actual == expected, "single-pass units differ from per-unit extraction"
+        print(f"{method_count:>8} {source.count(chr(10)):>7} {old_time * 1000:>8.1f}ms "
+              f"{new_time * 1000:>10.1f}ms {old_time / new_time:>7.1f}x")
+        method_count *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark walking every AST code record page by page.
+
+Compares LIMIT/OFFSET paging (load_records_batch) with keyset paging
+(iter_record_batches), both in full and projected to id and simhash.
+
+Usage:
+    python benchmarks/bench_record_iteration.py [record_count] [batch_size]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.ast_database import ASTDatabaseManager
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    body = "    return value\n" * 20
+    with tempfile.TemporaryDirectory() as root:
+        with ASTDatabaseManager(str(Path(root) / "ast.db")) as db:
+            with db.connection_manager.transaction():
+                db.connection_manager.executemany(
+                    "INSERT INTO ast_code_records (code_hash, code_content, function_name, file_path, timestamp, "
+                    "simhash, start_line) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((f"hash_{i}", f"def f_{i}(value):\n{body}", f"f_{i}", f"module_{i // 20}.py",
+                      "2024-01-01T00:00:00", str(i), i % 20) for i in range(record_count))
+                )
+
+            start = time.perf_counter()
+            offset_count = 0
+            while True:
+                batch = db.load_records_batch(batch_size, offset_count)
+                if not batch:
+                    break
+                offset_count += len(batch)
+            offset_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            keyset_count = sum(len(batch) for batch in db.iter_record_batches(batch_size))
+            keyset_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            projected_count = sum(len(batch) for batch in db.iter_record_batches(batch_size, ("id", "simhash")))
+            projected_time = time.perf_counter() - start
+
+    assert offset_count == keyset_count == projected_count == record_count
+    print(f"records:           {record_count} in batches of {batch_size}")
+    print(f"LIMIT/OFFSET:      {offset_time:.3f}s")
+    print(f"keyset:            {keyset_time:.3f}s ({offset_time / keyset_time:.1f}x)")
+    print(f"keyset, projected: {projected_time:.3f}s ({offset_time / projected_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark concurrent writers and federated reads on one database versus shards.
+
+writer_count processes (standing in for agents scanning different files)
+each commit record_count records one at a time, first all into one
+database file and then through a ShardedRepository that spreads the
+files over shard_count shards. Afterwards the statistics and a full
+record iteration are timed on both layouts.
+
+Usage:
+    python benchmarks/bench_sharding.py [writer_count] [record_count] [shard_count]
+"""
+
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from oopstracker.database import PooledConnectionManager, SchemaManager, ShardMap
+from oopstracker.sharded_repository import ShardedRepository
+from oopstracker.unified_repository import UnifiedRepository
+
+
+def records(writer: int, record_count: int):
+    return [{
+        'code_hash': f"w{writer}_{i}",
+        'code_content': f"def task_{writer}_{i}(value):\n    return value + {i}\n",
+        'function_name': f"task_{writer}_{i}",
+        'file_path': f"/repos/agent_{writer}/module_{i % 20}.py",
+        'simhash': (writer << 32) | i
+    } for i in range(record_count)]
+
+
+def write_single(path: str, writer: int, record_count: int) -> int:
+    with PooledConnectionManager(path) as manager:
+        repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+        return sum(repository.create_code_record(record).affected_rows for record in records(writer, record_count))
+
+
+def write_sharded(map_path: str, writer: int, record_count: int) -> int:
+    with ShardedRepository(ShardMap.load(map_path), hash_algorithm="xxhash64") as repository:
+        return sum(repository.create_code_record(record).affected_rows for record in records(writer, record_count))
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def run_writers(function, target: str, writer_count: int, record_count: int):
+    with ProcessPoolExecutor(max_workers=writer_count) as executor:
+        futures = [executor.submit(function, target, writer, record_count) for writer in range(writer_count)]
+        return sum(future.result() for future in futures)
+
+
+def main():
+    writer_count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    record_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    shard_count = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    with tempfile.TemporaryDirectory() as root:
+        single_path = str(Path(root) / "single.db")
+        map_path = str(Path(root) / "shards.json")
+        with PooledConnectionManager(single_path) as manager:
+            SchemaManager(manager).initialize_schema()
+        ShardMap.with_shard_count(Path(root) / "shards", shard_count).save(map_path)
+        ShardedRepository(ShardMap.load(map_path)).close()
+
+        single_rows, single_time = timed(lambda: run_writers(write_single, single_path, writer_count, record_count))
+        sharded_rows, sharded_time = timed(lambda: run_writers(write_sharded, map_path, writer_count, record_count))
+        assert single_rows == sharded_rows == writer_count * record_count
+
+        with PooledConnectionManager(single_path) as manager, ShardedRepository(ShardMap.load(map_path)) as shards:
+            single = UnifiedRepository(manager)
+            _, single_stats = timed(single.get_statistics)
+            _, sharded_stats = timed(shards.get_statistics)
+            single_count, single_scan = timed(lambda: sum(1 for _ in single.iter_code_records(('code_hash',))))
+            sharded_count, sharded_scan = timed(lambda: sum(1 for _ in shards.iter_code_records(('code_hash',))))
+            assert single_count == sharded_count
+            spread = [stats['total_records'] for stats in shards.get_statistics().data['shards'].values()]
+
+    print(f"{writer_count} writers x {record_count} single-record commits, {shard_count} shards {spread}")
+    print(f"one database: {single_time:.2f}s ({single_rows / single_time:.0f} commits/s)")
+    print(f"sharded:      {sharded_time:.2f}s ({sharded_rows / sharded_time:.0f} commits/s)")
+    print(f"statistics:   {single_stats * 1000:.1f} ms vs {sharded_stats * 1000:.1f} ms")
+    print(f"iteration:    {single_scan * 1000:.1f} ms vs {sharded_scan * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark handing the hash set to pool workers by pickling versus a sidecar.
+
+Runs task_count Hamming-query tasks on a process pool over hash_count
+hashes. The first variant sends the uint64 array with every task, the
+way a worker pool would without shared state; the second sends only a
+SidecarHandle and the workers map the same file.
+
+Usage:
+    python benchmarks/bench_sidecar.py [hash_count] [task_count] [workers]
+"""
+
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from oopstracker.core.simhash import SimHashSidecar, attached_sidecar, hamming_distances
+
+
+def query_copied(hashes: np.ndarray, queries):
+    return [int((hamming_distances(query, hashes) <= 3).sum()) for query in queries]
+
+
+def query_shared(handle, queries):
+    hashes = attached_sidecar(handle).simhashes
+    return [int((hamming_distances(query, hashes) <= 3).sum()) for query in queries]
+
+
+def run(executor, function, first_argument, query_chunks):
+    start = time.perf_counter()
+    futures = [executor.submit(function, first_argument, chunk) for chunk in query_chunks]
+    results = [count for future in futures for count in future.result()]
+    return results, time.perf_counter() - start
+
+
+def main():
+    hash_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    task_count = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    rng = np.random.default_rng(3)
+    hashes = rng.integers(0, 2 ** 63, size=hash_count, dtype=np.int64).astype(np.uint64)
+    query_chunks = [hashes[i * 2:i * 2 + 2].tolist() for i in range(task_count)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, SimHashSidecar.create(hashes) as sidecar:
+        # Start the workers before timing
+        list(executor.map(abs, range(workers)))
+        copied, copied_time = run(executor, query_copied, hashes, query_chunks)
+        shared, shared_time = run(executor, query_shared, sidecar.handle, query_chunks)
+
+    assert copied == shared
+    print(f"{hash_count} hashes, {task_count} tasks, {workers} workers")
+    print(f"pickled per task: {len(pickle.dumps(hashes)) / 1e6:.1f} MB vs "
+          f"{len(pickle.dumps(sidecar.handle))} bytes")
+    print(f"array per task: {copied_time:.2f}s")
+    print(f"sidecar handle: {shared_time:.2f}s ({copied_time / shared_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
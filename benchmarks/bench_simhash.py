@@ -0,0 +1,69 @@
+"""
+Benchmark scalar vs batch SimHash calculation.
+
+Extracts structure tokens from every function and class in the oopstracker
+sources, replicates them to the requested corpus size and compares
+SimHashCalculator.calculate() in a loop against calculate_batch() on the
+re-split "|"-joined signatures and calculate_token_ids() on the units'
+interned token ID arrays.
+
+Usage:
+    python benchmarks/bench_simhash.py [unit_count]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from oopstracker.ast_analyzer import ASTAnalyzer
+from oopstracker.core.simhash import SimHashCalculator
+from oopstracker.core.token_vocabulary import get_token_vocabulary
+
+SOURCE_ROOT = Path(__file__).resolve().parent.parent / "src" / "oopstracker"
+
+
+def load_token_ids(unit_count: int) -> list:
+    """Collect structure token ID arrays from the package sources."""
+    analyzer = ASTAnalyzer()
+    token_id_arrays = []
+    for path in sorted(SOURCE_ROOT.rglob("*.py")):
+        for unit in analyzer.parse_file(str(path)):
+            if unit.token_ids:
+                token_id_arrays.append(unit.token_ids)
+    
+    repeated = []
+    while len(repeated) < unit_count:
+        repeated.extend(token_id_arrays)
+    return repeated[:unit_count]
+
+
+def main():
+    unit_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    vocabulary = get_token_vocabulary()
+    token_id_arrays = load_token_ids(unit_count)
+    signatures = [vocabulary.join(token_ids) for token_ids in token_id_arrays]
+    calculator = SimHashCalculator()
+    
+    start = time.perf_counter()
+    scalar = [calculator.calculate(signature.split("|")) for signature in signatures]
+    scalar_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    batch = calculator.calculate_batch([signature.split("|") for signature in signatures])
+    batch_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    interned = calculator.calculate_token_ids(token_id_arrays, vocabulary)
+    interned_time = time.perf_counter() - start
+    
+    assert [int(value) for value in batch] == scalar, "batch result differs from scalar"
+    assert [int(value) for value in interned] == scalar, "token id result differs from scalar"
+    
+    print(f"units:     {unit_count}")
+    print(f"scalar:    {scalar_time:.3f}s")
+    print(f"batch:     {batch_time:.3f}s ({scalar_time / batch_time:.1f}x)")
+    print(f"token ids: {interned_time:.3f}s ({scalar_time / interned_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark Hamming lookups against code_records.
+
+Inserts record_count random simhashes, then answers query_count radius
+queries twice: by loading every simhash into Python and scanning it with
+the vectorized Hamming kernel, and with
+UnifiedRepository.find_simhash_candidates, which reads only rows that
+share a band with the query.
+
+Usage:
+    python benchmarks/bench_simhash_candidates.py [record_count] [query_count] [max_distance]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.core.simhash import to_hash_array, within_distance
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.unified_repository import UnifiedRepository
+
+
+def full_scan(manager, query: int, max_distance: int) -> set:
+    rows = manager.execute("SELECT id, simhash FROM code_records").fetchall()
+    hashes = to_hash_array(row[1] for row in rows)
+    return {rows[index][0] for index in within_distance(query, hashes, max_distance)}
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    max_distance = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(record_count)]
+    queries = [hashes[rng.randrange(record_count)] ^ (1 << rng.randrange(64)) for _ in range(query_count)]
+
+    with tempfile.TemporaryDirectory() as root:
+        with DatabaseConnectionManager(str(Path(root) / "bands.db")) as manager:
+            SchemaManager(manager).initialize_schema()
+            repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+            repository.bulk_insert_records([
+                {'code_hash': str(index), 'code_content': "pass", 'simhash': value}
+                for index, value in enumerate(hashes)
+            ])
+
+            start = time.perf_counter()
+            expected = [full_scan(manager, query, max_distance) for query in queries]
+            scan_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = [{record_id for record_id, _ in repository.find_simhash_candidates(query, max_distance).data}
+                     for query in queries]
+            band_time = time.perf_counter() - start
+
+    assert found == expected
+    print(f"records:    {record_count}, queries: {query_count}, max distance: {max_distance}")
+    print(f"full scan:  {scan_time:.3f}s")
+    print(f"bands:      {band_time:.3f}s")
+    print(f"speedup:    {scan_time / band_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark statistics reads from the stats table against aggregate scans.
+
+Bulk inserts record_count code records (timing the cost the statistics
+triggers add to writes), then times get_statistics, which reads three
+stats rows, against the COUNT(*) / COUNT(DISTINCT file_path) scans it
+replaced.
+
+Usage:
+    python benchmarks/bench_statistics.py [record_count] [repeats]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.unified_repository import UnifiedRepository
+
+SCAN_QUERIES = [
+    "SELECT COUNT(*) FROM code_records",
+    "SELECT COUNT(DISTINCT file_path) FROM code_records",
+    "SELECT COUNT(*) FROM code_records WHERE function_name IS NOT NULL"
+]
+
+
+def records(record_count: int):
+    return [{'code_hash': f"h{i}", 'code_content': f"def f{i}(): return {i}", 'function_name': f"f{i}",
+             'file_path': f"package/module_{i % 2000}.py", 'simhash': i} for i in range(record_count)]
+
+
+def insert_time(path: str, data, triggers: bool) -> float:
+    manager = DatabaseConnectionManager(path)
+    SchemaManager(manager).initialize_schema()
+    if not triggers:
+        with manager.transaction():
+            for row in manager.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+                manager.execute(f"DROP TRIGGER {row[0]}")
+    start = time.perf_counter()
+    UnifiedRepository(manager, hash_algorithm="xxhash64").bulk_insert_records(data)
+    elapsed = time.perf_counter() - start
+    manager.close()
+    return elapsed
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    data = records(record_count)
+    with tempfile.TemporaryDirectory() as root:
+        plain_insert = insert_time(str(Path(root) / "plain.db"), data, triggers=False)
+        path = str(Path(root) / "stats.db")
+        trigger_insert = insert_time(path, data, triggers=True)
+
+        manager = DatabaseConnectionManager(path)
+        repository = UnifiedRepository(manager)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            scanned = [manager.execute(query).fetchone()[0] for query in SCAN_QUERIES]
+        scan_time = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            stats = repository.get_statistics().data
+        stats_time = (time.perf_counter() - start) / repeats
+        manager.close()
+
+    assert scanned == [stats['total_records'], stats['total_files'], stats['total_functions']]
+    print(f"{record_count} records")
+    print(f"bulk insert without triggers: {plain_insert:.2f}s, with triggers: {trigger_insert:.2f}s "
+          f"({trigger_insert / plain_insert:.2f}x)")
+    print(f"aggregate scans: {scan_time * 1000:.2f} ms per poll")
+    print(f"stats table:     {stats_time * 1000:.3f} ms per poll")
+    print(f"speedup: {scan_time / stats_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
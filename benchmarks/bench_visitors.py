@@ -0,0 +1,73 @@
+"""
+Benchmark per-unit feature extraction: four visitor walks vs one fused walk.
+
+Runs FunctionVisitor, ClassVisitor, ControlFlowVisitor and ExpressionVisitor
+each over every function and class of a large source file (the previous
+CompositeVisitor behaviour) and compares it with the single-pass
+CompositeVisitor. Defaults to the standard library's typing.py.
+
+Usage:
+    python benchmarks/bench_visitors.py [path/to/file.py] [repeat]
+"""
+
+import ast
+import sys
+import time
+import typing
+
+from oopstracker.ast_analyzer import CompositeVisitor
+from oopstracker.visitors import ClassVisitor, ControlFlowVisitor, ExpressionVisitor, FunctionVisitor
+
+
+def separate_walks(nodes):
+    """Extract features the old way: one full walk per visitor."""
+    visitors = [FunctionVisitor(), ClassVisitor(), ControlFlowVisitor(), ExpressionVisitor()]
+    signatures = []
+    for node in nodes:
+        for visitor in visitors:
+            visitor.clear()
+            visitor.visit(node)
+        signatures.append("|".join(token for visitor in visitors for token in visitor.structure_tokens))
+    return signatures
+
+
+def fused_walk(nodes):
+    """Extract features with a single traversal per unit."""
+    composite = CompositeVisitor()
+    signatures = []
+    for node in nodes:
+        composite.clear()
+        composite.visit(node)
+        signatures.append(composite.get_structure_signature())
+    return signatures
+
+
+def best_of(function, nodes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(nodes)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else typing.__file__
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with open(path, encoding="utf-8") as handle:
+        tree = ast.parse(handle.read())
+    nodes = [node for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.ClassDef))]
+
+    separate_time, expected = best_of(separate_walks, nodes, repeat)
+    fused_time, actual = best_of(fused_walk, nodes, repeat)
+    assert actual == expected, "fused traversal differs from separate walks"
+
+    print(f"file:            {path}")
+    print(f"units:           {len(nodes)}")
+    print(f"separate walks:  {separate_time * 1000:.1f}ms ({separate_time / len(nodes) * 1e6:.0f}us/unit)")
+    print(f"fused walk:      {fused_time * 1000:.1f}ms ({fused_time / len(nodes) * 1e6:.0f}us/unit)")
+    print(f"speedup:         {separate_time / fused_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark many small code record registrations with and without write-behind.
+
+Registers record_count records one create_code_record call at a time,
+first committing each call (the default) and then through a
+WriteBehindQueue that coalesces them into batched transactions, timing
+until everything is durable (flush returned).
+
+Usage:
+    python benchmarks/bench_write_behind.py [record_count] [synchronous]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from oopstracker.database import PooledConnectionManager, SchemaManager, WriteBehindQueue
+from oopstracker.unified_repository import UnifiedRepository
+
+
+def records(record_count: int, prefix: str):
+    for i in range(record_count):
+        yield {'code_hash': f"{prefix}{i}", 'code_content': f"def f{i}():\n    return {i}\n",
+               'function_name': f"f{i}", 'file_path': f"module_{i % 50}.py", 'simhash': i * 2654435761}
+
+
+def open_manager(path: str, synchronous: str) -> PooledConnectionManager:
+    manager = PooledConnectionManager(path)
+    SchemaManager(manager).initialize_schema()
+    manager.execute(f"PRAGMA synchronous = {synchronous}")
+    return manager
+
+
+def run(repository: UnifiedRepository, record_count: int, prefix: str) -> float:
+    start = time.perf_counter()
+    for record in records(record_count, prefix):
+        repository.create_code_record(record)
+    repository.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    synchronous = sys.argv[2] if len(sys.argv) > 2 else "NORMAL"
+    with tempfile.TemporaryDirectory() as root:
+        manager = open_manager(str(Path(root) / "direct.db"), synchronous)
+        direct_time = run(UnifiedRepository(manager, hash_algorithm="xxhash64"), record_count, "direct")
+        manager.close()
+
+        manager = open_manager(str(Path(root) / "queued.db"), synchronous)
+        with WriteBehindQueue(manager) as queue:
+            queued_time = run(UnifiedRepository(manager, write_queue=queue, hash_algorithm="xxhash64"), record_count, "queued")
+            stats = queue.get_statistics()
+        manager.close()
+
+    print(f"{record_count} registrations, synchronous={synchronous}")
+    print(f"commit per record: {direct_time:.3f}s ({record_count / direct_time:,.0f}/s)")
+    print(f"write-behind:      {queued_time:.3f}s ({record_count / queued_time:,.0f}/s), "
+          f"{stats['batches']} batches of {stats['average_batch_rows']:.0f} rows")
+    print(f"speedup: {direct_time / queued_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
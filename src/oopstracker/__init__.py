@@ -5,11 +5,13 @@ __version__ = "0.1.0"
 from .code_record import CodeRecord
 from .unified_detector import UnifiedDetectionService
 from .unified_repository import UnifiedRepository
+from .sharded_repository import ShardedRepository
 from .exceptions import OOPSTrackerError
 
 __all__ = [
     "UnifiedDetectionService",
     "UnifiedRepository",
+    "ShardedRepository",
     "CodeRecord", 
     "OOPSTrackerError",
 ]
\ No newline at end of file
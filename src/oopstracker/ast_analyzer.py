@@ -5,50 +5,322 @@ Extracts semantic structure from code for more accurate duplicate detection.
 
 import ast
 import logging
-from typing import List, Optional
+import os
+import re
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass
 
+from .core.token_vocabulary import TokenVocabulary, get_token_vocabulary
 from .visitors import (
     FunctionVisitor,
     ClassVisitor,
     ControlFlowVisitor,
-    ExpressionVisitor
+    ExpressionVisitor,
+    FusedTraversal,
+    ScopeFeatures
 )
 
+if TYPE_CHECKING:
+    from .parse_cache import ParseCache
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+class SourceBuffer:
+    """
+    UTF-8 bytes of one source file plus the byte offset of every line.
+    
+    All units of a file share one buffer and only keep byte offsets into it,
+    so nested units (a class and its methods) do not hold copies of the
+    same text.
+    """
+    
+    __slots__ = ("data", "line_starts")
+    
+    _LINE_BREAK = re.compile(rb"\r\n?|\n")
+    
+    def __init__(self, data: bytes):
+        """
+        Args:
+            data: Raw UTF-8 encoded file contents
+        """
+        self.data = data
+        # Same line breaks as the tokenizer, so AST line numbers index this
+        # table; an array costs 4-8 bytes per line instead of an int object
+        self.line_starts = array("I" if len(data) < 2**32 else "Q", [0])
+        self.line_starts.extend(match.end() for match in self._LINE_BREAK.finditer(data))
+    
+    @classmethod
+    def from_text(cls, source_code: str) -> "SourceBuffer":
+        """Create a buffer from decoded source text."""
+        return cls(source_code.encode("utf-8"))
+    
+    def span(self, start_line: int, end_line: int) -> Tuple[int, int]:
+        """
+        Byte offsets of the 1-based inclusive line range [start_line, end_line].
+        
+        Returns:
+            (start, end) offsets, or (0, 0) if the range is out of bounds
+        """
+        line_count = len(self.line_starts)
+        if not (1 <= start_line <= line_count and start_line <= end_line <= line_count):
+            return 0, 0
+        end = self.line_starts[end_line] if end_line < line_count else len(self.data)
+        return self.line_starts[start_line - 1], end
+    
+    def text(self, start: int, end: int) -> str:
+        """Dedented source of the lines within a byte span."""
+        if start >= end:
+            return ""
+        return dedent_lines(self.data[start:end].decode("utf-8").splitlines())
+
+
 class CodeUnit:
-    """Represents a single code unit (function, class, or module)."""
-    
-    name: str
-    type: str  # 'function', 'class', 'module'
-    source_code: str
-    start_line: int
-    end_line: int
-    file_path: Optional[str] = None
-    
-    # AST-derived features
-    ast_structure: Optional[str] = None
-    complexity_score: Optional[int] = None
-    dependencies: List[str] = None
-    hash: Optional[str] = None  # Hash for SimHash calculations
-    
-    def __post_init__(self):
-        if self.dependencies is None:
-            self.dependencies = []
-        if self.hash is None:
-            # Generate hash based on content
+    """
+    Represents a single code unit (function, class, or module).
+    
+    Units created by ASTAnalyzer reference a shared SourceBuffer and
+    materialize source_code and hash only when they are read. Units can
+    also be constructed directly with a source_code string.
+    
+    The structure is held as token IDs of the process-wide TokenVocabulary;
+    ast_structure joins the tokens on access.
+    """
+    
+    __slots__ = ("name", "type", "start_line", "end_line", "file_path",
+                 "token_ids", "complexity_score", "dependencies", "simhash",
+                 "_source", "_buffer", "_start", "_end", "_hash")
+    
+    def __init__(self, name: str, type: str, source_code: Optional[str] = None,
+                 start_line: int = 0, end_line: int = 0, file_path: Optional[str] = None,
+                 ast_structure: Optional[str] = None, complexity_score: Optional[int] = None,
+                 dependencies: Optional[List[str]] = None, hash: Optional[str] = None,
+                 simhash: Optional[int] = None, *, buffer: Optional[SourceBuffer] = None,
+                 span: Optional[Tuple[int, int]] = None, token_ids: Optional[array] = None):
+        """
+        Args:
+            name: Function or class name
+            type: 'function', 'class' or 'module'
+            source_code: Source text; omit when buffer and span are given
+            start_line: First line (1-based)
+            end_line: Last line (inclusive)
+            file_path: Optional path of the containing file
+            ast_structure: "|"-joined structure tokens
+            complexity_score: Complexity from the structure visitors
+            dependencies: Names the unit depends on
+            hash: Content hash; computed from name and source when first read
+            simhash: SimHash of the structure tokens, when computed
+            buffer: Shared source buffer of the file
+            span: (start, end) byte offsets of the unit within buffer
+            token_ids: array('I') of structure token IDs; takes precedence
+                over ast_structure
+        """
+        self.name = name
+        self.type = type  # 'function', 'class', 'module'
+        self.start_line = start_line
+        self.end_line = end_line
+        self.file_path = file_path
+        
+        # AST-derived features
+        if token_ids is not None:
+            self.token_ids = token_ids
+        else:
+            self.ast_structure = ast_structure
+        self.complexity_score = complexity_score
+        self.dependencies = dependencies if dependencies is not None else []
+        self.simhash = simhash
+        
+        self._source = source_code
+        self._buffer = buffer
+        self._start, self._end = span if span is not None else (0, 0)
+        self._hash = hash  # Hash for SimHash calculations
+    
+    @property
+    def source_code(self) -> str:
+        """Dedented source of the unit, sliced from the file buffer on access."""
+        if self._source is not None:
+            return self._source
+        if self._buffer is not None:
+            return self._buffer.text(self._start, self._end)
+        return ""
+    
+    @source_code.setter
+    def source_code(self, value: str):
+        self._source = value
+        self._buffer = None
+        self._hash = None
+    
+    @property
+    def ast_structure(self) -> Optional[str]:
+        """"|"-joined structure tokens, rebuilt from the token IDs."""
+        if self.token_ids is None:
+            return None
+        return get_token_vocabulary().join(self.token_ids)
+    
+    @ast_structure.setter
+    def ast_structure(self, value: Optional[str]):
+        if value is None:
+            self.token_ids = None
+        else:
+            self.token_ids = get_token_vocabulary().intern_many(value.split("|") if value else ())
+    
+    @property
+    def structure_tokens(self) -> List[str]:
+        """Structure tokens in order; empty if the unit has no structure."""
+        if self.token_ids is None:
+            return []
+        return get_token_vocabulary().tokens(self.token_ids)
+    
+    @property
+    def hash(self) -> str:
+        """MD5 of name and source, computed on first access."""
+        if self._hash is None:
             import hashlib
             content_for_hash = f"{self.name}:{self.source_code}"
-            self.hash = hashlib.md5(content_for_hash.encode()).hexdigest()
+            self._hash = hashlib.md5(content_for_hash.encode()).hexdigest()
+        return self._hash
+    
+    @hash.setter
+    def hash(self, value: Optional[str]):
+        self._hash = value
+    
+    def __eq__(self, other):
+        if not isinstance(other, CodeUnit):
+            return NotImplemented
+        return self._fields() == other._fields()
+    
+    __hash__ = None  # Mutable, like the dataclass it replaces
+    
+    def __repr__(self) -> str:
+        return (f"CodeUnit(name={self.name!r}, type={self.type!r}, start_line={self.start_line}, "
+                f"end_line={self.end_line}, file_path={self.file_path!r})")
+    
+    def _fields(self) -> tuple:
+        return (self.name, self.type, self.source_code, self.start_line, self.end_line, self.file_path,
+                self.token_ids, self.complexity_score, self.dependencies, self.hash, self.simhash)
+    
+    def to_compact(self) -> tuple:
+        """
+        Pickle-friendly tuple of the unit without its source code.
+        
+        The source is restored from the file buffer by from_compact, so a
+        class and its methods do not each ship a copy of the same text.
+        Structure tokens are included as strings, since token IDs are only
+        valid within this process. The hash is only included if it has
+        already been computed.
+        """
+        structure = None if self.token_ids is None else tuple(self.structure_tokens)
+        return (self.name, self.type, self.start_line, self.end_line, structure,
+                self.complexity_score, tuple(self.dependencies), self._hash, self.simhash)
+    
+    @classmethod
+    def from_compact(cls, row: tuple, buffer: SourceBuffer, file_path: Optional[str] = None) -> "CodeUnit":
+        """Rebuild a unit from to_compact() output and the buffer of its file."""
+        (name, unit_type, start_line, end_line, structure, complexity_score,
+         dependencies, unit_hash, simhash) = row
+        return cls(
+            name=name,
+            type=unit_type,
+            start_line=start_line,
+            end_line=end_line,
+            file_path=file_path,
+            complexity_score=complexity_score,
+            dependencies=list(dependencies),
+            hash=unit_hash,
+            simhash=simhash,
+            buffer=buffer,
+            span=buffer.span(start_line, end_line),
+            token_ids=None if structure is None else get_token_vocabulary().intern_many(structure)
+        )
+
+
+@dataclass
+class ParsedFile:
+    """Outcome of parsing one file with ASTAnalyzer.parse_files."""
+    
+    file_path: str
+    units: List[CodeUnit]
+    error: Optional[str] = None  # Read or syntax error; units is empty when set
+    buffer: Optional[SourceBuffer] = None  # Source the units slice; None when error is set
+
+
+def dedent_lines(node_lines: List[str]) -> str:
+    """Remove the common indentation of non-empty lines and join them."""
+    if not node_lines:
+        return ""
+    
+    # Find minimum indentation (excluding empty lines)
+    min_indent = min(
+        (len(line) - len(line.lstrip()) 
+         for line in node_lines if line.strip()),
+        default=0
+    )
+    
+    # Remove the common indentation
+    dedented_lines = [
+        line[min_indent:] if len(line) > min_indent else line
+        for line in node_lines
+    ]
+    
+    return '\n'.join(dedented_lines)
+
+
+def extract_line_range(lines: List[str], start_line: int, end_line: int) -> str:
+    """
+    Extract and dedent the 1-based inclusive line range [start_line, end_line].
+    
+    Returns:
+        Dedented source, or an empty string if the range is out of bounds
+    """
+    start = start_line - 1
+    end = end_line
+    
+    if 0 <= start < len(lines) and start < end <= len(lines):
+        return dedent_lines(lines[start:end])
+    
+    return ""
+
+
+_worker_analyzer: Optional["ASTAnalyzer"] = None
+
+
+def _parse_files_worker(file_paths: List[str]) -> List[tuple]:
+    """
+    Parse a chunk of files in a worker process.
+    
+    Errors are caught per file and returned, so one bad file neither loses
+    the rest of the chunk nor breaks the pool.
+    
+    Returns:
+        (file_path, file bytes, compact unit rows, error, content hash) per file
+    """
+    from .parse_cache import ParseCache
+    
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = ASTAnalyzer()
+    
+    results = []
+    for file_path in file_paths:
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            tree = ast.parse(data.decode('utf-8'))
+            units = _worker_analyzer._units_from_tree(tree, SourceBuffer(data), file_path)
+            results.append((file_path, data, [unit.to_compact() for unit in units], None,
+                            ParseCache.key_for(data)))
+        except Exception as e:
+            results.append((file_path, None, [], f"{type(e).__name__}: {e}", None))
+    return results
 
 
 class CompositeVisitor:
     """
     Combines multiple specialized visitors to extract comprehensive structural information.
+    All visitors are driven by a single traversal of the tree.
     """
     
     def __init__(self):
@@ -58,11 +330,38 @@ class CompositeVisitor:
             ControlFlowVisitor(),
             ExpressionVisitor()
         ]
+        self.traversal = FusedTraversal(self.visitors)
     
     def visit(self, node):
-        """Visit node with all registered visitors."""
-        for visitor in self.visitors:
-            visitor.visit(node)
+        """Visit node once, dispatching each subnode to all registered visitors."""
+        self.traversal.visit(node)
+    
+    def collect_scope_features(self, tree: ast.AST, scope_types: Tuple[type, ...]) -> Dict[ast.AST, ScopeFeatures]:
+        """
+        Visit a whole tree once and record features for every scope node.
+        
+        Args:
+            tree: Root node (usually the parsed module)
+            scope_types: Node types to record features for
+            
+        Returns:
+            Mapping from scope node to its ScopeFeatures
+        """
+        return self.traversal.visit(tree, scope_types)
+    
+    def get_scope_token_ids(self, features: ScopeFeatures, vocabulary: TokenVocabulary) -> array:
+        """Structure token IDs of a scope recorded by collect_scope_features."""
+        token_ids = array('I')
+        for visitor, (start, end) in zip(self.visitors, features.token_ranges):
+            token_ids.extend(vocabulary.intern_many(visitor.structure_tokens[start:end]))
+        return token_ids
+    
+    def get_scope_signature(self, features: ScopeFeatures) -> str:
+        """Structure signature of a scope recorded by collect_scope_features."""
+        all_tokens = []
+        for visitor, (start, end) in zip(self.visitors, features.token_ranges):
+            all_tokens.extend(visitor.structure_tokens[start:end])
+        return "|".join(all_tokens)
     
     def get_structure_signature(self) -> str:
         """Combine structure signatures from all visitors."""
@@ -96,8 +395,18 @@ class ASTAnalyzer:
     Uses specialized visitors for different aspects of code structure.
     """
     
-    def __init__(self):
+    def __init__(self, parse_cache: Optional["ParseCache"] = None):
+        """
+        Initialize the analyzer.
+        
+        Args:
+            parse_cache: Optional ParseCache; files whose content was parsed
+                before (by the same analyzer version) skip ast.parse
+        """
         self.composite_visitor = CompositeVisitor()
+        self.vocabulary = get_token_vocabulary()
+        self.parse_cache = parse_cache
+        self._simhash_calculator = None
     
     def parse_file(self, file_path: str) -> List[CodeUnit]:
         """
@@ -110,10 +419,22 @@ class ASTAnalyzer:
             List of CodeUnit objects
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source_code = f.read()
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            
+            if self.parse_cache is None:
+                return self._parse_source(data.decode('utf-8'), SourceBuffer(data), file_path)
+            
+            key = self.parse_cache.key_for(data)
+            rows = self.parse_cache.get(key)
+            source_code = data.decode('utf-8')
+            buffer = SourceBuffer(data)
+            if rows is not None:
+                return [CodeUnit.from_compact(row, buffer, file_path) for row in rows]
             
-            return self.parse_code(source_code, file_path)
+            units = self._units_from_tree(ast.parse(source_code), buffer, file_path)
+            self._store_in_cache(key, units)
+            return units
         
         except (FileNotFoundError, PermissionError, UnicodeDecodeError) as e:
             logger.info(f"Error reading file {file_path}: {e}")
@@ -121,6 +442,9 @@ class ASTAnalyzer:
         except SyntaxError as e:
             logger.info(f"Syntax error in {file_path}: {e}")
             return []
+        except Exception as e:
+            logger.warning(f"Error parsing {file_path}: {e}")
+            return []
     
     def extract_code_units(self, source_code: str, file_path: Optional[str] = None) -> List[CodeUnit]:
         """
@@ -147,20 +471,13 @@ class ASTAnalyzer:
         Returns:
             List of CodeUnit objects
         """
+        return self._parse_source(source_code, SourceBuffer.from_text(source_code), file_path)
+    
+    def _parse_source(self, source_code: str, buffer: SourceBuffer, file_path: Optional[str]) -> List[CodeUnit]:
+        """Parse decoded source whose bytes are in buffer, logging errors."""
         try:
             tree = ast.parse(source_code)
-            units = []
-            
-            # Extract functions and classes
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    unit = self._create_function_unit(node, source_code, file_path)
-                    units.append(unit)
-                elif isinstance(node, ast.ClassDef):
-                    unit = self._create_class_unit(node, source_code, file_path)
-                    units.append(unit)
-            
-            return units
+            return self._units_from_tree(tree, buffer, file_path)
         
         except SyntaxError as e:
             logger.debug(f"Syntax error in code: {e}")
@@ -169,81 +486,206 @@ class ASTAnalyzer:
             logger.warning(f"Error parsing code: {e}")
             return []
     
-    def _create_function_unit(self, node: ast.FunctionDef, source_code: str, 
-                            file_path: Optional[str]) -> CodeUnit:
-        """Create a code unit for a function."""
-        # Clear previous visitor state
+    def parse_files(self, file_paths: Iterable[str], workers: Optional[int] = None,
+                    chunksize: int = 4, executor: Optional[Executor] = None) -> Iterator[ParsedFile]:
+        """
+        Parse many files in parallel on a process pool.
+        
+        Files are sent to workers in chunks of chunksize paths. Results are
+        yielded as soon as a chunk completes, so they are not in input order.
+        Workers return each file's source once plus compact unit tuples,
+        which are cheaper to pickle than CodeUnits whose nested sources
+        overlap. With a parse cache, unchanged files are answered from the
+        cache first and only the remaining files go to the pool.
+        
+        Args:
+            file_paths: Paths of Python files to parse
+            workers: Number of worker processes (default: CPU count);
+                1 parses in the current process
+            chunksize: Number of files per worker task
+            executor: Optional existing executor to reuse instead of
+                starting a new pool
+            
+        Yields:
+            ParsedFile per input path; read and syntax errors are reported
+            in ParsedFile.error instead of being raised
+        """
+        file_paths = list(file_paths)
+        if self.parse_cache is not None:
+            file_paths = yield from self._yield_cached(file_paths)
+        chunksize = max(1, chunksize)
+        chunks = [file_paths[i:i + chunksize] for i in range(0, len(file_paths), chunksize)]
+        workers = workers or os.cpu_count() or 1
+        
+        if executor is None and (workers <= 1 or len(chunks) <= 1):
+            for chunk in chunks:
+                yield from self._unpack_parsed_chunk(_parse_files_worker(chunk))
+            return
+        
+        owns_executor = executor is None
+        if owns_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            # Keep a bounded number of chunks in flight so results stream
+            # back without queueing every file up front
+            max_pending = workers * 2
+            pending = {}
+            remaining = iter(chunks)
+            for chunk in remaining:
+                pending[executor.submit(_parse_files_worker, chunk)] = chunk
+                if len(pending) >= max_pending:
+                    break
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    try:
+                        yield from self._unpack_parsed_chunk(future.result())
+                    except Exception as e:
+                        # The worker itself failed (e.g. it was killed)
+                        logger.warning(f"Parse worker failed on {len(chunk)} files: {e}")
+                        for file_path in chunk:
+                            yield ParsedFile(file_path, [], f"{type(e).__name__}: {e}")
+                    next_chunk = next(remaining, None)
+                    if next_chunk is not None:
+                        pending[executor.submit(_parse_files_worker, next_chunk)] = next_chunk
+        finally:
+            if owns_executor:
+                executor.shutdown(cancel_futures=True)
+    
+    def _yield_cached(self, file_paths: List[str]):
+        """
+        Yield ParsedFile results for files found in the parse cache.
+        
+        Returns:
+            Paths that still need parsing (unreadable files included, so the
+            workers report their errors)
+        """
+        misses = []
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                rows = self.parse_cache.get(self.parse_cache.key_for(data))
+                if rows is None:
+                    misses.append(file_path)
+                    continue
+                data.decode('utf-8')
+            except (OSError, UnicodeDecodeError):
+                misses.append(file_path)
+                continue
+            buffer = SourceBuffer(data)
+            yield ParsedFile(file_path, [CodeUnit.from_compact(row, buffer, file_path) for row in rows],
+                             buffer=buffer)
+        return misses
+    
+    def _unpack_parsed_chunk(self, results: List[tuple]) -> Iterator[ParsedFile]:
+        """Turn worker results back into ParsedFile objects."""
+        for file_path, data, rows, error, key in results:
+            if error is not None:
+                logger.info(f"Error parsing {file_path}: {error}")
+                yield ParsedFile(file_path, [], error)
+                continue
+            buffer = SourceBuffer(data)
+            units = [CodeUnit.from_compact(row, buffer, file_path) for row in rows]
+            if self.parse_cache is not None:
+                self._store_in_cache(key, units)
+            yield ParsedFile(file_path, units, buffer=buffer)
+    
+    @property
+    def simhash_algorithm(self) -> Optional[str]:
+        """
+        Feature hash algorithm of the simhashes set on parsed units.
+        
+        Units only carry simhashes when they pass through the parse cache,
+        so this is None without one. Pass it along when storing the units.
+        """
+        return self.parse_cache.simhash_algorithm if self.parse_cache is not None else None
+    
+    def _store_in_cache(self, key: str, units: List[CodeUnit]):
+        """
+        Compute the units' simhashes and store their features in the parse cache.
+        
+        The cache is an optimization, so a failed write (e.g. a locked
+        database) is logged and the scan goes on with the parsed units.
+        """
+        algorithm = self.parse_cache.simhash_algorithm
+        if self._simhash_calculator is None or self._simhash_calculator.hash_algorithm != algorithm:
+            from .core.simhash import SimHashCalculator
+            self._simhash_calculator = SimHashCalculator(hash_algorithm=algorithm)
+        
+        simhashes = self._simhash_calculator.calculate_token_ids(
+            [unit.token_ids for unit in units], self.vocabulary
+        )
+        for unit, simhash in zip(units, simhashes.tolist()):
+            unit.simhash = simhash
+        try:
+            self.parse_cache.put(key, [unit.to_compact() for unit in units])
+        except Exception as e:
+            logger.warning(f"Could not store parsed units in the parse cache: {e}")
+    
+    def _units_from_tree(self, tree: ast.AST, buffer: SourceBuffer, file_path: Optional[str]) -> List[CodeUnit]:
+        """Build function and class units of a parsed module over its source buffer."""
+        units = []
+        
+        # Visit the whole file once; every function and class records
+        # its features on the way, nested definitions included
         self.composite_visitor.clear()
+        features = self.composite_visitor.collect_scope_features(tree, (ast.FunctionDef, ast.ClassDef))
         
-        # Visit the function node
-        self.composite_visitor.visit(node)
+        # Extract functions and classes
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef):
+                unit = self._create_function_unit(node, buffer, features[node], file_path)
+                units.append(unit)
+            elif isinstance(node, ast.ClassDef):
+                unit = self._create_class_unit(node, buffer, features[node], file_path)
+                units.append(unit)
         
-        # Extract source code for the function
-        lines = source_code.splitlines()
-        func_source = self._extract_node_source(node, lines)
+        self.composite_visitor.clear()
+        return units
+    
+    def _create_function_unit(self, node: ast.FunctionDef, buffer: SourceBuffer,
+                            features: ScopeFeatures, file_path: Optional[str]) -> CodeUnit:
+        """Create a code unit for a function from its recorded features."""
+        end_line = node.end_lineno or node.lineno
         
         return CodeUnit(
             name=node.name,
             type="function",
-            source_code=func_source,
             start_line=node.lineno,
-            end_line=node.end_lineno or node.lineno,
+            end_line=end_line,
             file_path=file_path,
-            ast_structure=self.composite_visitor.get_structure_signature(),
-            complexity_score=self.composite_visitor.get_complexity_score(),
-            dependencies=self.composite_visitor.get_dependencies()
+            token_ids=self.composite_visitor.get_scope_token_ids(features, self.vocabulary),
+            complexity_score=features.complexity,
+            dependencies=list(features.dependencies),
+            buffer=buffer,
+            span=buffer.span(node.lineno, end_line)
         )
     
-    def _create_class_unit(self, node: ast.ClassDef, source_code: str,
-                          file_path: Optional[str]) -> CodeUnit:
-        """Create a code unit for a class."""
-        # Clear previous visitor state
-        self.composite_visitor.clear()
-        
-        # Visit the class node
-        self.composite_visitor.visit(node)
-        
-        # Extract source code for the class
-        lines = source_code.splitlines()
-        class_source = self._extract_node_source(node, lines)
+    def _create_class_unit(self, node: ast.ClassDef, buffer: SourceBuffer,
+                          features: ScopeFeatures, file_path: Optional[str]) -> CodeUnit:
+        """Create a code unit for a class from its recorded features."""
+        end_line = node.end_lineno or node.lineno
         
         return CodeUnit(
             name=node.name,
             type="class",
-            source_code=class_source,
             start_line=node.lineno,
-            end_line=node.end_lineno or node.lineno,
+            end_line=end_line,
             file_path=file_path,
-            ast_structure=self.composite_visitor.get_structure_signature(),
-            complexity_score=self.composite_visitor.get_complexity_score(),
-            dependencies=self.composite_visitor.get_dependencies()
+            token_ids=self.composite_visitor.get_scope_token_ids(features, self.vocabulary),
+            complexity_score=features.complexity,
+            dependencies=list(features.dependencies),
+            buffer=buffer,
+            span=buffer.span(node.lineno, end_line)
         )
     
     def _extract_node_source(self, node: ast.AST, lines: List[str]) -> str:
         """Extract source code for a specific AST node."""
         if hasattr(node, 'lineno') and hasattr(node, 'end_lineno'):
-            start = node.lineno - 1
-            end = node.end_lineno or node.lineno
-            
-            if 0 <= start < len(lines) and start < end <= len(lines):
-                # Get the lines and find the minimum indentation
-                node_lines = lines[start:end]
-                if node_lines:
-                    # Find minimum indentation (excluding empty lines)
-                    min_indent = min(
-                        (len(line) - len(line.lstrip()) 
-                         for line in node_lines if line.strip()),
-                        default=0
-                    )
-                    
-                    # Remove the common indentation
-                    dedented_lines = [
-                        line[min_indent:] if len(line) > min_indent else line
-                        for line in node_lines
-                    ]
-                    
-                    return '\n'.join(dedented_lines)
-        
+            return extract_line_range(lines, node.lineno, node.end_lineno or node.lineno)
         return ""
     
     def get_structure_hash(self, structure_signature: str) -> str:
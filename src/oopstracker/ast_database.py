@@ -4,17 +4,22 @@ Handles persistence for CodeUnit and AST-specific metadata.
 """
 
 import logging
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Optional, Any, Tuple, Set
+from typing import List, Dict, Optional, Any, Tuple, Set, Iterator, Sequence
 
 from .models import CodeRecord
 from .ast_analyzer import CodeUnit
 from .database import (
     DatabaseConnectionManager,
-    SchemaManager
-    # FileTrackingRepository,  # Not implemented yet
-    # CodeRecordRepository     # Not implemented yet
+    SchemaManager,
+    FileTrackingRepository,
+    CodeRecordRepository
 )
+from .database.code_record_repository import DEFAULT_ARRAYSIZE, DEFAULT_PAGE_SIZE
+
+# CodeRecord fields read by load_all_records and iter_records
+RECORD_FIELDS = ("id", "code_hash", "code_content", "function_name", "file_path", "timestamp", "simhash")
 
 logger = logging.getLogger(__name__)
 
@@ -25,18 +30,20 @@ class ASTDatabaseManager:
     Provides a unified interface for all database operations.
     """
     
-    def __init__(self, db_path: str = "oopstracker_ast.db"):
+    def __init__(self, db_path: str = "oopstracker_ast.db", hash_algorithm: Optional[str] = None):
         """
         Initialize database manager.
         
         Args:
             db_path: Path to SQLite database file
+            hash_algorithm: Feature hash algorithm of the simhashes inserted,
+                unless an insert names its own (see ASTAnalyzer.simhash_algorithm)
         """
         self.db_path = Path(db_path)
         self.connection_manager = DatabaseConnectionManager(db_path)
         self.schema_manager = SchemaManager(self.connection_manager)
         self.file_tracking = FileTrackingRepository(self.connection_manager)
-        self.code_records = CodeRecordRepository(self.connection_manager)
+        self.code_records = CodeRecordRepository(self.connection_manager, hash_algorithm)
         
         self._initialize_database()
         logger.info(f"Initialized AST database: {db_path}")
@@ -54,18 +61,40 @@ class ASTDatabaseManager:
         """Get database connection for backward compatibility."""
         return self.connection_manager.connection
     
-    def insert_record(self, record: CodeRecord, unit: CodeUnit) -> bool:
+    def insert_record(self, record: CodeRecord, unit: CodeUnit, hash_algorithm: Optional[str] = None) -> bool:
         """
         Insert a new code record and unit.
         
         Args:
             record: CodeRecord to insert
             unit: CodeUnit with AST data
+            hash_algorithm: Algorithm of the calculator that produced the simhash
             
         Returns:
             True if inserted successfully, False if already exists
+        
+        Raises:
+            ConfigurationError: If a simhash is written without an algorithm
+                or with another one than the database is bound to
         """
-        return self.code_records.insert_record(record, unit)
+        return self.code_records.insert_record(record, unit, hash_algorithm)
+    
+    def insert_records(self, pairs: List[Tuple[CodeRecord, CodeUnit]], hash_algorithm: Optional[str] = None) -> int:
+        """
+        Insert many records and units in a single transaction.
+        
+        Args:
+            pairs: (CodeRecord, CodeUnit) tuples
+            hash_algorithm: Algorithm of the calculator that produced the simhashes
+            
+        Returns:
+            Number of newly inserted records
+        
+        Raises:
+            ConfigurationError: If simhashes are written without an algorithm
+                or with another one than the database is bound to
+        """
+        return self.code_records.insert_records(pairs, hash_algorithm)
     
     def get_all_records(self) -> List[Tuple[CodeRecord, CodeUnit]]:
         """
@@ -125,9 +154,8 @@ class ASTDatabaseManager:
             # Add compatibility field
             stats['total_units'] = stats.get('total_records', 0)
             
-            # Count deleted files
-            existing_files = self.get_existing_files()
-            stats['deleted_files'] = sum(1 for f in existing_files if not Path(f).exists())
+            # Files that scans found missing, without stat'ing every file
+            stats['deleted_files'] = self.file_tracking.count_deleted_files()
             
             return stats
             
@@ -171,10 +199,25 @@ class ASTDatabaseManager:
         """
         return self.file_tracking.update_file_tracking(file_path, file_hash, unit_count)
     
+    def update_file_tracking_batch(self, entries: List[Tuple[str, str, int]]) -> int:
+        """
+        Update tracking information of many files in a single transaction.
+        
+        Args:
+            entries: (file_path, file_hash, unit_count) tuples
+            
+        Returns:
+            Number of tracked files written
+        """
+        return self.file_tracking.update_file_tracking_batch(entries)
+    
     def get_changed_files(self, file_paths: List[str]) -> List[str]:
         """
         Get list of files that have changed since last scan.
         
+        Answered with one query for all paths; only files whose size or
+        modification time differ from the tracked values are re-hashed.
+        
         Args:
             file_paths: List of file paths to check
             
@@ -223,7 +266,7 @@ class ASTDatabaseManager:
     
     def check_and_mark_deleted_files(self, current_files: Set[str]) -> List[str]:
         """
-        Check which tracked files no longer exist and optionally mark them.
+        Check which tracked files no longer exist and mark them deleted.
         
         Args:
             current_files: Set of currently existing file paths
@@ -241,31 +284,68 @@ class ASTDatabaseManager:
             List of CodeRecord objects
         """
         try:
-            cursor = self.connection_manager.execute(
-                "SELECT id, code_hash, code_content, function_name, file_path, timestamp, simhash, unit_type, start_line, end_line, complexity_score, metadata FROM ast_code_records ORDER BY file_path, start_line"
-            )
-            records = []
-            for row in cursor.fetchall():
-                record = CodeRecord(
-                    id=row[0],
-                    code_hash=row[1],
-                    code_content=row[2],
-                    function_name=row[3],
-                    file_path=row[4],
-                    timestamp=row[5],
-                    simhash=row[6],
-                    metadata={}
-                )
-                records.append(record)
-            return records
+            return list(self.iter_records())
         except Exception as e:
             logger.error(f"Failed to load all records: {e}")
             return []
     
+    def iter_records(self, columns: Optional[Sequence[str]] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                     arraysize: int = DEFAULT_ARRAYSIZE) -> Iterator[CodeRecord]:
+        """
+        Stream code records ordered by file and line with keyset pagination.
+        
+        Args:
+            columns: CodeRecord fields to read (default: RECORD_FIELDS); fields
+                left out stay None, e.g. ("id", "simhash") never reads source
+            page_size: Rows fetched per keyset page
+            arraysize: Rows fetched from SQLite per fetchmany call
+            
+        Yields:
+            CodeRecord objects
+            
+        Raises:
+            ValueError: If a field is not a CodeRecord column of the table
+        """
+        fields = tuple(RECORD_FIELDS if columns is None else columns)
+        unknown = set(fields) - set(RECORD_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown record fields: {sorted(unknown)}")
+        
+        for row in self.code_records.iter_rows(fields, page_size, arraysize):
+            values = {field: row[field] for field in fields}
+            if values.get('simhash') is not None:
+                values['simhash'] = int(values['simhash'])
+            yield CodeRecord(metadata={}, **values)
+    
+    def iter_record_batches(self, batch_size: int = 100,
+                            columns: Optional[Sequence[str]] = None) -> Iterator[List[CodeRecord]]:
+        """
+        Stream code records in lists of batch_size.
+        
+        Unlike load_records_batch, every batch continues from the last key
+        instead of an OFFSET, so walking the whole table stays linear.
+        
+        Args:
+            batch_size: Maximum number of records per batch
+            columns: CodeRecord fields to read (default: RECORD_FIELDS)
+            
+        Yields:
+            Lists of CodeRecord objects
+        """
+        records = self.iter_records(columns, page_size=batch_size, arraysize=batch_size)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            yield batch
+    
     def load_records_batch(self, limit: int = 100, offset: int = 0) -> List[CodeRecord]:
         """
         Load code records in batches for memory efficiency.
         
+        Deep offsets get slower with every page; iter_record_batches walks
+        the table with keyset pagination instead.
+        
         Args:
             limit: Maximum number of records to return
             offset: Number of records to skip
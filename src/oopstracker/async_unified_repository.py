@@ -0,0 +1,192 @@
+"""
+Asyncio counterpart of UnifiedRepository on top of aiosqlite.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiosqlite
+
+from .core.simhash.hamming import hamming_distances, to_hash_array
+from .database.connection_manager import DatabaseConnectionManager
+from .database.schema_manager import SchemaManager
+from .exceptions import ConfigurationError
+from .unified_repository import (
+    OperationResult, QUERIES, STATISTICS_QUERIES, _code_record_rows, _record_dict, _simhash_candidate_params
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUnifiedRepository:
+    """
+    Repository for code records whose queries never block the event loop.
+    
+    aiosqlite runs the connection on its own thread, so while a write is
+    in flight the loop keeps serving other tasks such as LLM requests.
+    Results use the same OperationResult pattern as UnifiedRepository.
+    Schema setup and the simhash algorithm check reuse SchemaManager on a
+    short-lived synchronous connection in a worker thread.
+    """
+    
+    def __init__(self, db_path: str = "oopstracker.db", hash_algorithm: Optional[str] = None):
+        """
+        Args:
+            db_path: Path to SQLite database file; its schema is created or
+                migrated on connect
+            hash_algorithm: Feature hash algorithm of the simhashes written
+                (see UnifiedRepository)
+        """
+        self.db_path = Path(db_path)
+        self.hash_algorithm = hash_algorithm
+        self._hash_algorithm_checked = False
+        self.queries = dict(QUERIES)
+        self._connection: Optional[aiosqlite.Connection] = None
+    
+    async def connect(self) -> aiosqlite.Connection:
+        """Get or open the database connection, initializing the schema first."""
+        if self._connection is None:
+            await asyncio.to_thread(self._with_schema_manager, lambda schema: schema.initialize_schema())
+            conn = await aiosqlite.connect(str(self.db_path))
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA journal_mode = WAL")
+            await conn.execute("PRAGMA synchronous = NORMAL")
+            await conn.execute("PRAGMA busy_timeout = 5000")
+            self._connection = conn
+            logger.info(f"Created async database connection: {self.db_path}")
+        return self._connection
+    
+    async def close(self):
+        """Close the database connection."""
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+            logger.debug("Async database connection closed")
+    
+    async def __aenter__(self):
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    def _with_schema_manager(self, function):
+        """Run a function on a SchemaManager of a synchronous connection."""
+        with DatabaseConnectionManager(str(self.db_path)) as manager:
+            return function(SchemaManager(manager))
+    
+    async def _check_hash_algorithm(self, records_data: List[Dict[str, Any]]):
+        """
+        Record or verify the simhash algorithm before the first simhash write.
+        
+        Raises:
+            ConfigurationError: If simhashes are written without an algorithm,
+                or the database holds simhashes of another one
+        """
+        if self._hash_algorithm_checked or all(record.get('simhash') is None for record in records_data):
+            return
+        if self.hash_algorithm is None:
+            raise ConfigurationError("Simhashes must be written with the algorithm that produced them")
+        await asyncio.to_thread(self._with_schema_manager,
+                                lambda schema: schema.ensure_simhash_algorithm(self.hash_algorithm))
+        self._hash_algorithm_checked = True
+    
+    async def create_code_record(self, record_data: Dict[str, Any]) -> OperationResult:
+        """Create a code record."""
+        conn = await self.connect()
+        await self._check_hash_algorithm([record_data])
+        blob_rows, record_rows = _code_record_rows([record_data])
+        try:
+            await conn.executemany(self.queries['insert_code_blob'], blob_rows)
+            cursor = await conn.execute(self.queries['insert_code_record'], record_rows[0])
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        
+        success = cursor.rowcount > 0
+        return OperationResult(
+            success=success,
+            affected_rows=cursor.rowcount,
+            error_message="" if success else "Record already exists or insert failed"
+        )
+    
+    async def bulk_insert_records(self, records_data: List[Dict[str, Any]]) -> OperationResult:
+        """Bulk insert multiple records in one transaction."""
+        conn = await self.connect()
+        await self._check_hash_algorithm(records_data)
+        blob_rows, insert_data = _code_record_rows(records_data)
+        
+        try:
+            await conn.executemany(self.queries['insert_code_blob'], blob_rows)
+            await conn.executemany(self.queries['insert_code_record'], insert_data)
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        
+        return OperationResult(True, affected_rows=len(insert_data))
+    
+    async def get_code_record(self, code_hash: str) -> OperationResult:
+        """Get a code record by hash."""
+        conn = await self.connect()
+        async with conn.execute(self.queries['select_code_record'], (code_hash,)) as cursor:
+            record = await cursor.fetchone()
+        
+        if record:
+            return OperationResult(True, data=_record_dict(record))
+        else:
+            return OperationResult(False, error_message="Record not found")
+    
+    async def get_all_code_records(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over all code records, newest first.
+        
+        Rows are fetched in chunks, so the whole table is never held in
+        memory at once.
+        
+        Yields:
+            One dict per code record
+        """
+        conn = await self.connect()
+        async with conn.execute(self.queries['select_all_records']) as cursor:
+            async for row in cursor:
+                yield _record_dict(row)
+    
+    async def find_simhash_candidates(self, simhash: int, max_distance: int) -> OperationResult:
+        """Find records within a Hamming radius; see UnifiedRepository.find_simhash_candidates."""
+        conn = await self.connect()
+        async with conn.execute(self.queries['select_simhash_candidates'],
+                                _simhash_candidate_params(simhash, max_distance)) as cursor:
+            rows = await cursor.fetchall()
+        
+        distances = hamming_distances(simhash, to_hash_array(row[1] for row in rows))
+        matches = sorted(
+            ((row[0], int(distance)) for row, distance in zip(rows, distances) if distance <= max_distance),
+            key=lambda match: (match[1], match[0])
+        )
+        return OperationResult(True, data=matches, affected_rows=len(matches))
+    
+    async def execute_custom_query(self, query: str, params: Tuple = ()) -> OperationResult:
+        """Execute custom query with parameters."""
+        conn = await self.connect()
+        async with conn.execute(query, params) as cursor:
+            if query.strip().upper().startswith('SELECT'):
+                data = [dict(row) for row in await cursor.fetchall()]
+                return OperationResult(True, data=data, affected_rows=len(data))
+            await conn.commit()
+            return OperationResult(True, affected_rows=cursor.rowcount)
+    
+    async def get_statistics(self) -> OperationResult:
+        """Get database statistics."""
+        conn = await self.connect()
+        
+        stats = {}
+        for stat_name, query in STATISTICS_QUERIES.items():
+            async with conn.execute(query) as cursor:
+                row = await cursor.fetchone()
+            stats[stat_name] = row[0] if row else 0
+        
+        return OperationResult(True, data=stats)
@@ -10,6 +10,8 @@ from typing import Optional
 from .unified_detector import UnifiedDetectionService
 from .commands.base import BaseCommand, CommandContext
 from .commands.check import CheckCommand
+from .commands.index import IndexCommand
+from .commands.shards import ShardsCommand
 
 
 def validate_llm_environment() -> bool:
@@ -45,6 +47,8 @@ def create_parser() -> argparse.ArgumentParser:
     # Register commands
     commands = {
         "check": CheckCommand,
+        "index": IndexCommand,
+        "shards": ShardsCommand,
     }
     
     for name, command_class in commands.items():
@@ -58,9 +62,10 @@ async def main(argv: Optional[list] = None) -> int:
     """Main CLI entry point."""
     parser, commands = create_parser()
     args = parser.parse_args(argv)
+    command_class = commands[args.command]
     
     # Early LLM environment validation
-    if not validate_llm_environment():
+    if command_class.requires_llm and not validate_llm_environment():
         return 1
     
     # Configure logging
@@ -70,7 +75,7 @@ async def main(argv: Optional[list] = None) -> int:
     )
     
     # Initialize detector
-    detector = UnifiedDetectionService()
+    detector = UnifiedDetectionService() if command_class.requires_llm else None
     
     # Create command context
     context = CommandContext(
@@ -80,7 +85,6 @@ async def main(argv: Optional[list] = None) -> int:
     )
     
     # Execute command
-    command_class = commands[args.command]
     command = command_class(context)
     
     try:
@@ -19,6 +19,9 @@ class CommandContext:
 class BaseCommand(ABC):
     """Base class for all CLI commands."""
     
+    # Whether the command needs the detector and a configured LLM
+    requires_llm = True
+    
     def __init__(self, context: CommandContext):
         self.context = context
         self.detector = context.detector
@@ -4,13 +4,17 @@ Refactored check command using new architecture.
 
 import argparse
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 from ..component_registry import ComponentRegistry
+from ..database.shard_map import ShardMap
+from ..sharded_repository import ShardedRepository
 from ..unified_detector import UnifiedDetectionService
 from ..unified_repository import UnifiedRepository
 from ..refactored_analysis_service import RefactoredAnalysisService
+from ..parse_cache import ParseCache
 from .base import BaseCommand
 
 
@@ -31,6 +35,22 @@ class CheckCommand(BaseCommand):
             default=".",
             help="Directory or file to analyze (default: current directory)"
         )
+        parser.add_argument(
+            "-j", "--jobs",
+            type=int,
+            default=1,
+            help="Number of processes used to parse files (default: 1, 0 = all CPUs)"
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Re-parse every file instead of reusing cached results for unchanged files"
+        )
+        parser.add_argument(
+            "--shard-map",
+            help="Store records in the shards of this map (see the shards command) "
+                 "instead of oopstracker.db, which keeps only the parse cache"
+        )
         
     async def execute(self) -> int:
         """Execute the check command using new architecture."""
@@ -48,13 +68,27 @@ class CheckCommand(BaseCommand):
         # Initialize database schema
         from ..database.schema_manager import SchemaManager
         schema_manager = SchemaManager(db_manager)
-        schema_manager._create_tables()
+        schema_manager.initialize_schema()
         
-        # Initialize services
-        repository = UnifiedRepository(db_manager)
+        # Initialize services. check stores no simhashes, so no BK-tree is attached;
+        # simhash lookups over the database go through the index command
+        if args.shard_map:
+            repository = ShardedRepository(ShardMap.load(args.shard_map))
+        else:
+            repository = UnifiedRepository(db_manager)
         detector = UnifiedDetectionService()
-        analysis_service = RefactoredAnalysisService(repository, detector)
-        
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        parse_cache = None if args.no_cache else ParseCache(db_manager)
+        analysis_service = RefactoredAnalysisService(repository, detector, jobs=jobs, parse_cache=parse_cache,
+                                                    rule_db_manager=db_manager)
+        try:
+            return self._analyze(args, analysis_service)
+        finally:
+            analysis_service.close()
+            repository.close()
+    
+    def _analyze(self, args, analysis_service: RefactoredAnalysisService) -> int:
+        """Analyze the requested files in batches and print a summary."""
         # Find Python files
         files = self._find_python_files(args.code)
         if not files:
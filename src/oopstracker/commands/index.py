@@ -0,0 +1,70 @@
+"""
+Index command: export and load the columnar index snapshot.
+"""
+
+import argparse
+import time
+
+from ..core.simhash.snapshot import IndexSnapshot
+from ..database import DatabaseConnectionManager, SchemaManager
+from .base import BaseCommand
+
+
+class IndexCommand(BaseCommand):
+    """Write or load the memory-mapped snapshot of the SimHash index next to the database."""
+    
+    # Works on the stored records only; no detector or LLM is needed
+    requires_llm = False
+    
+    @classmethod
+    def help(cls) -> str:
+        """Return help text for the index command."""
+        return "Export or load the index snapshot used for fast startup"
+    
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser):
+        """Add command-specific arguments."""
+        parser.add_argument(
+            "action",
+            choices=["export", "load"],
+            help="export: rebuild the snapshot from the database; "
+                 "load: open the snapshot, extending or rebuilding it if the database moved on"
+        )
+        parser.add_argument(
+            "--db",
+            default="oopstracker.db",
+            help="Database file (default: oopstracker.db)"
+        )
+        parser.add_argument(
+            "--query",
+            type=lambda value: int(value, 0),
+            help="SimHash to look up after loading (decimal or 0x-prefixed hex)"
+        )
+        parser.add_argument(
+            "--distance",
+            type=int,
+            default=5,
+            help="Maximum Hamming distance of --query matches (default: 5)"
+        )
+    
+    async def execute(self) -> int:
+        """Execute the index command."""
+        args = self.args
+        start = time.perf_counter()
+        with DatabaseConnectionManager(args.db) as db_manager:
+            SchemaManager(db_manager).initialize_schema()
+            snapshot = IndexSnapshot.open(db_manager, rebuild=args.action == "export")
+            elapsed = time.perf_counter() - start
+        
+        print(f"📦 {snapshot.snapshot_path}: {len(snapshot)} records, {len(snapshot.files)} files, "
+              f"generation {snapshot.generation} ({elapsed * 1000:.1f} ms)")
+        
+        if args.query is not None:
+            start = time.perf_counter()
+            rows, distances = snapshot.query_rows(args.query, args.distance)
+            elapsed = time.perf_counter() - start
+            print(f"🔍 {len(rows)} records within distance {args.distance} ({elapsed * 1000:.1f} ms)")
+            for row, distance in zip(rows[:20].tolist(), distances[:20].tolist()):
+                file_path, line = snapshot.location(row)
+                print(f"   #{snapshot.ids[row]} d={distance} {file_path or '?'}:{line or '?'}")
+        return 0
@@ -0,0 +1,99 @@
+"""
+Shards command: create shard maps, show shard statistics and rebalance.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from ..database.shard_map import ROUTING_KEYS, ShardMap
+from ..sharded_repository import ShardedRepository
+from .base import BaseCommand
+
+
+class ShardsCommand(BaseCommand):
+    """Manage the shard databases records are spread over."""
+    
+    # Works on the stored records only; no detector or LLM is needed
+    requires_llm = False
+    
+    @classmethod
+    def help(cls) -> str:
+        """Return help text for the shards command."""
+        return "Create a shard map, show per-shard statistics or move records between shards"
+    
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser):
+        """Add command-specific arguments."""
+        parser.add_argument(
+            "action",
+            choices=["init", "status", "rebalance"],
+            help="init: write a new shard map; status: show record counts per shard; "
+                 "rebalance: move records to the shards of the --to map and make it the current map"
+        )
+        parser.add_argument(
+            "--map",
+            default="oopstracker-shards.json",
+            help="Shard map file (default: oopstracker-shards.json)"
+        )
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=4,
+            help="Number of shards created by init (default: 4)"
+        )
+        parser.add_argument(
+            "--key",
+            choices=ROUTING_KEYS,
+            default="file",
+            help="What init routes records by (default: file)"
+        )
+        parser.add_argument(
+            "--project",
+            action="append",
+            default=[],
+            help="Project root directory for --key project (repeatable)"
+        )
+        parser.add_argument(
+            "--to",
+            help="Shard map to rebalance to"
+        )
+    
+    async def execute(self) -> int:
+        """Execute the shards command."""
+        args = self.args
+        if args.action == "init":
+            map_path = Path(args.map)
+            if map_path.exists():
+                print(f"❌ {map_path} already exists")
+                return 1
+            shard_map = ShardMap.with_shard_count(map_path.parent / "shards", args.count,
+                                                  key=args.key, projects=args.project)
+            shard_map.save(map_path)
+            print(f"🗂️  {map_path}: {len(shard_map.shards)} shards routed by {shard_map.key}")
+            return 0
+        
+        if args.action == "rebalance" and not args.to:
+            print("❌ rebalance needs --to <shard map>")
+            return 1
+        
+        with ShardedRepository(ShardMap.load(args.map)) as repository:
+            if args.action == "rebalance":
+                target = ShardMap.load(args.to)
+                start = time.perf_counter()
+                result = repository.rebalance(target)
+                elapsed = time.perf_counter() - start
+                target.save(args.map)
+                print(f"🔀 Moved {result.affected_rows} records in {elapsed:.1f}s; {args.map} now maps "
+                      f"{len(target.shards)} shards")
+                for source, counts in result.data.items():
+                    for destination, count in counts.items():
+                        print(f"   {source} → {destination}: {count}")
+            
+            stats = repository.get_statistics().data
+            print(f"📊 {stats['total_records']} records, {stats['total_files']} files "
+                  f"in {len(stats['shards'])} shards")
+            for name, shard_stats in stats['shards'].items():
+                print(f"   {name} ({repository.shard_map.shards[name]}): {shard_stats['total_records']} records, "
+                      f"{shard_stats['total_files']} files")
+        return 0
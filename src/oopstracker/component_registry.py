@@ -42,9 +42,9 @@ class DatabaseManagerProvider(ComponentProvider):
         return "database_manager"
     
     def create_component(self, **params) -> Any:
-        from .database.connection_manager import DatabaseConnectionManager
+        from .database.connection_pool import PooledConnectionManager
         db_path = params.get('db_path', 'oopstracker.db')
-        return DatabaseConnectionManager(db_path)
+        return PooledConnectionManager(db_path, readers=params.get('readers', 4))
     
     def is_available(self) -> bool:
         return True
@@ -5,10 +5,15 @@ Provides essential components for AST analysis and SimHash calculation.
 
 from .simhash import SimHashCalculator
 from .analyzer import CodeAnalyzer
+from .union_find import UnionFind
+from .token_vocabulary import TokenVocabulary, get_token_vocabulary
 
 # 削除済み - DuplicateDetectorとSimilarityGraphBuilderのダミー実装は不要
 
 __all__ = [
     'SimHashCalculator',
-    'CodeAnalyzer'
+    'CodeAnalyzer',
+    'UnionFind',
+    'TokenVocabulary',
+    'get_token_vocabulary'
 ]
\ No newline at end of file
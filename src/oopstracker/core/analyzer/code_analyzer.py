@@ -384,8 +384,7 @@ class CodeAnalyzer:
                 features.append(f"class:{unit.name}")
             
             # Add structural features from unit
-            if unit.ast_structure:
-                features.extend(unit.ast_structure.split("|"))
+            features.extend(unit.structure_tokens)
         
         # Parse AST for additional features
         try:
@@ -1,5 +1,53 @@
 """SimHash calculation module."""
 
 from .calculator import SimHashCalculator
+from .feature_hash import FeatureHasher, get_feature_hasher
+from .index import SimHashIndex
+from .bktree import BKTree
+from .snapshot import IndexSnapshot
+from .sidecar import SidecarHandle, SimHashSidecar, attached_sidecar, cleanup_stale_sidecars
+from .bands import BAND_COLUMNS, band_neighbors, band_radius, split_bands, to_signed64
+from .self_join import (
+    iter_block_pairs,
+    iter_distinct_block_pairs,
+    iter_near_duplicate_pairs,
+    join_blocks,
+    link_identical_rows,
+    near_duplicate_clusters
+)
+from .hamming import (
+    hamming_distances,
+    hamming_distance_matrix,
+    popcount64,
+    to_hash_array,
+    within_distance
+)
 
-__all__ = ['SimHashCalculator']
\ No newline at end of file
+__all__ = [
+    'SimHashCalculator',
+    'FeatureHasher',
+    'get_feature_hasher',
+    'SimHashIndex',
+    'BKTree',
+    'IndexSnapshot',
+    'SidecarHandle',
+    'SimHashSidecar',
+    'attached_sidecar',
+    'cleanup_stale_sidecars',
+    'iter_block_pairs',
+    'iter_distinct_block_pairs',
+    'iter_near_duplicate_pairs',
+    'join_blocks',
+    'link_identical_rows',
+    'near_duplicate_clusters',
+    'BAND_COLUMNS',
+    'band_neighbors',
+    'band_radius',
+    'split_bands',
+    'to_signed64',
+    'hamming_distances',
+    'hamming_distance_matrix',
+    'popcount64',
+    'to_hash_array',
+    'within_distance'
+]
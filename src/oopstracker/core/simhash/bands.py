@@ -0,0 +1,74 @@
+"""
+Band decomposition of 64-bit SimHashes for SQL-side candidate lookup.
+
+A hash is split into BAND_COUNT bands of BAND_BITS bits. Two hashes that
+differ in at most d bits must agree within d // BAND_COUNT bits on at
+least one band (pigeonhole), so indexed band columns narrow a Hamming
+query down to a few candidate rows before any distance is computed.
+"""
+
+from itertools import combinations
+from typing import List, Tuple
+
+from .hamming import HASH_MASK
+
+BAND_COUNT = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Column names of the bands in code_records
+BAND_COLUMNS = tuple(f"simhash_band{band}" for band in range(BAND_COUNT))
+
+
+def to_signed64(simhash: int) -> int:
+    """
+    Signed 64-bit representation of a hash, as stored in a SQLite INTEGER.
+
+    Args:
+        simhash: Hash value (signed or unsigned)
+
+    Returns:
+        Value in [-2**63, 2**63)
+    """
+    simhash = int(simhash) & HASH_MASK
+    return simhash - (1 << 64) if simhash >> 63 else simhash
+
+
+def split_bands(simhash: int) -> Tuple[int, ...]:
+    """
+    Split a hash into its bands, lowest bits first.
+
+    Args:
+        simhash: Hash value (signed or unsigned)
+
+    Returns:
+        BAND_COUNT integers in [0, 2**BAND_BITS)
+    """
+    simhash = int(simhash) & HASH_MASK
+    return tuple((simhash >> (band * BAND_BITS)) & BAND_MASK for band in range(BAND_COUNT))
+
+
+def band_radius(max_distance: int) -> int:
+    """Largest distance at least one band of a match is guaranteed to be within."""
+    return max(0, max_distance) // BAND_COUNT
+
+
+def band_neighbors(band: int, radius: int) -> List[int]:
+    """
+    All band values within a Hamming radius of a band.
+
+    Args:
+        band: Band value
+        radius: Maximum number of flipped bits
+
+    Returns:
+        Band values, the band itself first
+    """
+    neighbors = [band]
+    for flipped in range(1, min(radius, BAND_BITS) + 1):
+        for bits in combinations(range(BAND_BITS), flipped):
+            value = band
+            for bit in bits:
+                value ^= 1 << bit
+            neighbors.append(value)
+    return neighbors
@@ -0,0 +1,408 @@
+"""
+BK-tree over Hamming distance with a compact on-disk snapshot.
+"""
+
+import heapq
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ...database.schema_manager import SchemaManager
+from .feature_hash import DEFAULT_HASH_ALGORITHM
+
+logger = logging.getLogger(__name__)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree keyed by SimHash Hamming distance.
+
+    Nodes are stored in flat lists indexed by node number (parents always
+    precede their children), which keeps the tree cheap to serialize: a
+    snapshot is just the node hashes, parent links, edge distances and
+    record ids as packed arrays, and loading it relinks children without
+    recomputing a single distance.
+
+    The tree remembers the highest ``code_records.id`` it has seen so that
+    ``sync()`` only pulls rows inserted after the snapshot was written, and
+    the database generation (see SchemaManager.get_generation) its rows
+    were read at. Deleted or rewritten rows cannot be removed from the tree
+    one by one, so ``sync()`` rebuilds it when the generation moves.
+    """
+
+    MAGIC = b"OTBK"
+    FORMAT_VERSION = 3
+    SNAPSHOT_SUFFIX = ".bktree"
+    # magic, version, hash_size, hash_algorithm, node_count, id_count, max_record_id, generation
+    _HEADER = struct.Struct("<4sHH16sQQqq")
+
+    def __init__(self, hash_size: int = 64, snapshot_path: Optional[Union[str, Path]] = None,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM):
+        """
+        Initialize an empty tree.
+
+        Args:
+            hash_size: Size of the stored hashes in bits (default: 64)
+            snapshot_path: Default file used by save()
+            hash_algorithm: Feature hash algorithm the stored simhashes use
+
+        Raises:
+            ValueError: If hash_size is not in 1..255
+        """
+        if not 0 < hash_size < 256:
+            raise ValueError(f"hash_size must be in 1..255, got {hash_size}")
+        self.hash_size = hash_size
+        self.hash_algorithm = hash_algorithm
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.generation = 0
+        self._mask = (1 << hash_size) - 1
+        self._clear()
+        self._dirty = False
+
+    def _clear(self):
+        """Remove every node."""
+        self.max_record_id = 0
+        self._hashes: List[int] = []
+        self._parents: List[int] = []
+        self._edges: List[int] = []
+        self._record_ids: List[List[int]] = []
+        self._children: List[Dict[int, int]] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Number of record ids stored in the tree."""
+        return self._size
+
+    @property
+    def node_count(self) -> int:
+        """Number of distinct hashes stored in the tree."""
+        return len(self._hashes)
+
+    @property
+    def is_dirty(self) -> bool:
+        """Whether the tree changed since it was last loaded or saved."""
+        return self._dirty
+
+    def insert(self, record_id: int, simhash: int):
+        """
+        Insert a record hash into the tree.
+
+        Args:
+            record_id: Identifier returned by queries (e.g. code_records.id)
+            simhash: SimHash value of the record
+        """
+        simhash = int(simhash) & self._mask
+        self._size += 1
+        self._dirty = True
+        if record_id > self.max_record_id:
+            self.max_record_id = record_id
+
+        if not self._hashes:
+            self._add_node(simhash, record_id, -1, 0)
+            return
+
+        node = 0
+        while True:
+            distance = (self._hashes[node] ^ simhash).bit_count()
+            if distance == 0:
+                self._record_ids[node].append(record_id)
+                return
+            child = self._children[node].get(distance)
+            if child is None:
+                self._children[node][distance] = self._add_node(simhash, record_id, node, distance)
+                return
+            node = child
+
+    def build(self, items: Iterable[Tuple[int, int]]) -> int:
+        """
+        Bulk-insert (record_id, simhash) pairs.
+
+        Args:
+            items: Iterable of (record_id, simhash) pairs
+
+        Returns:
+            Number of pairs inserted
+        """
+        count = 0
+        for record_id, simhash in items:
+            self.insert(record_id, simhash)
+            count += 1
+        return count
+
+    def query(self, simhash: int, max_distance: int) -> List[Tuple[int, int]]:
+        """
+        Find all records within a Hamming radius of a hash.
+
+        Args:
+            simhash: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+
+        Returns:
+            List of (record_id, distance) pairs sorted by distance
+        """
+        if not self._hashes or max_distance < 0:
+            return []
+
+        simhash = int(simhash) & self._mask
+        matches = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            distance = (self._hashes[node] ^ simhash).bit_count()
+            if distance <= max_distance:
+                matches.extend((record_id, distance) for record_id in self._record_ids[node])
+            low, high = distance - max_distance, distance + max_distance
+            for edge, child in self._children[node].items():
+                if low <= edge <= high:
+                    stack.append(child)
+
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+
+    def nearest(self, simhash: int, k: int = 1) -> List[Tuple[int, int]]:
+        """
+        Find the k records closest to a hash.
+
+        Args:
+            simhash: Query hash
+            k: Number of records to return
+
+        Returns:
+            Up to k (record_id, distance) pairs sorted by distance
+        """
+        if not self._hashes or k <= 0:
+            return []
+
+        simhash = int(simhash) & self._mask
+        # Max-heap of the best k matches as (-distance, -record_id)
+        best: List[Tuple[int, int]] = []
+        # Min-heap of nodes to visit, ordered by their distance lower bound
+        frontier = [(0, 0)]
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(best) == k and bound > -best[0][0]:
+                break
+
+            distance = (self._hashes[node] ^ simhash).bit_count()
+            for record_id in self._record_ids[node]:
+                entry = (-distance, -record_id)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+
+            radius = -best[0][0] if len(best) == k else self.hash_size
+            for edge, child in self._children[node].items():
+                child_bound = max(bound, abs(edge - distance))
+                if child_bound <= radius:
+                    heapq.heappush(frontier, (child_bound, child))
+
+        return sorted(((-neg_id, -neg_distance) for neg_distance, neg_id in best),
+                      key=lambda match: (match[1], match[0]))
+
+    def sync(self, connection_manager) -> int:
+        """
+        Insert code_records rows added since the tree was last synced.
+
+        If rows were deleted or rewritten since then (the database
+        generation moved), the tree is emptied and rebuilt from every row.
+
+        Args:
+            connection_manager: DatabaseConnectionManager for the code_records DB
+
+        Returns:
+            Number of records inserted
+        """
+        schema_manager = SchemaManager(connection_manager)
+        while True:
+            generation = schema_manager.get_generation()
+            if generation != self.generation:
+                if self._size:
+                    logger.info(f"Rebuilding BK-tree of generation {self.generation} for generation {generation}")
+                self._clear()
+                self.generation = generation
+                self._dirty = True
+            cursor = connection_manager.execute(
+                "SELECT id, simhash FROM code_records "
+                "WHERE id > ? AND simhash IS NOT NULL ORDER BY id",
+                (self.max_record_id,)
+            )
+            inserted = self.build((row[0], int(row[1])) for row in cursor)
+            # Rows deleted or rewritten while reading would be stale
+            if schema_manager.get_generation() == generation:
+                break
+        if inserted:
+            logger.debug(f"Synced {inserted} records into BK-tree")
+        return inserted
+
+    def save(self, path: Optional[Union[str, Path]] = None) -> Path:
+        """
+        Write a binary snapshot of the tree.
+
+        The snapshot is written to a temporary file and atomically renamed,
+        so readers never observe a partially written file.
+
+        Args:
+            path: Target file (defaults to snapshot_path)
+
+        Returns:
+            Path of the written snapshot
+
+        Raises:
+            ValueError: If no path is given and no snapshot_path is set
+        """
+        target = Path(path) if path else self.snapshot_path
+        if target is None:
+            raise ValueError("No snapshot path configured for BK-tree")
+
+        counts = np.fromiter((len(ids) for ids in self._record_ids),
+                             dtype=np.uint32, count=self.node_count)
+        record_ids = np.fromiter((record_id for ids in self._record_ids for record_id in ids),
+                                 dtype=np.int64, count=self._size)
+        header = self._HEADER.pack(self.MAGIC, self.FORMAT_VERSION, self.hash_size,
+                                   self.hash_algorithm.encode("ascii"), self.node_count, self._size, self.max_record_id,
+                                   self.generation)
+
+        temp_path = target.with_name(target.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(self._pack_hashes().tobytes())
+            f.write(np.asarray(self._parents, dtype=np.int32).tobytes())
+            f.write(np.asarray(self._edges, dtype=np.uint8).tobytes())
+            f.write(counts.tobytes())
+            f.write(record_ids.tobytes())
+        os.replace(temp_path, target)
+
+        self._dirty = False
+        logger.debug(f"Saved BK-tree snapshot with {self.node_count} nodes: {target}")
+        return target
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'BKTree':
+        """
+        Load a tree from a snapshot written by save().
+
+        Args:
+            path: Snapshot file
+
+        Returns:
+            Loaded BKTree
+
+        Raises:
+            ValueError: If the file is not a compatible BK-tree snapshot
+        """
+        path = Path(path)
+        data = path.read_bytes()
+        if len(data) < cls._HEADER.size:
+            raise ValueError(f"Truncated BK-tree snapshot: {path}")
+        (magic, version, hash_size, algorithm,
+         node_count, id_count, max_record_id, generation) = cls._HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported BK-tree snapshot: {path}")
+
+        tree = cls(hash_size=hash_size, snapshot_path=path,
+                   hash_algorithm=algorithm.rstrip(b"\0").decode("ascii"))
+        words = (hash_size + 63) // 64
+        offset = cls._HEADER.size
+        arrays = []
+        for dtype, count in ((np.uint64, node_count * words), (np.int32, node_count),
+                             (np.uint8, node_count), (np.uint32, node_count),
+                             (np.int64, id_count)):
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            arrays.append(array)
+        packed_hashes, parents, edges, counts, record_ids = arrays
+
+        tree._hashes = cls._unpack_hashes(packed_hashes, words)
+        tree._parents = parents.tolist()
+        tree._edges = edges.tolist()
+        flat_ids = record_ids.tolist()
+        bounds = np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).tolist()
+        tree._record_ids = [flat_ids[bounds[i]:bounds[i + 1]] for i in range(node_count)]
+        tree._children = [{} for _ in range(node_count)]
+        for node in range(1, node_count):
+            tree._children[tree._parents[node]][tree._edges[node]] = node
+        tree._size = id_count
+        tree.max_record_id = max_record_id
+        tree.generation = generation
+        return tree
+
+    @classmethod
+    def snapshot_path_for(cls, db_path: Union[str, Path]) -> Path:
+        """Return the snapshot file that lives next to a SQLite database."""
+        db_path = Path(db_path)
+        return db_path.with_name(db_path.name + cls.SNAPSHOT_SUFFIX)
+
+    @classmethod
+    def open(cls, connection_manager, hash_size: int = 64,
+             hash_algorithm: Optional[str] = None) -> 'BKTree':
+        """
+        Load the snapshot next to a database and catch up with new rows.
+
+        Falls back to building from scratch when the snapshot is missing,
+        unreadable or was written for a different hash size or algorithm;
+        a snapshot of an older database generation is rebuilt by sync().
+
+        Args:
+            connection_manager: DatabaseConnectionManager for the code_records DB
+            hash_size: Size of the stored hashes in bits
+            hash_algorithm: Feature hash algorithm the simhashes were built with;
+                defaults to the one recorded in the database
+
+        Returns:
+            BKTree synced with the database
+
+        Raises:
+            ConfigurationError: If the database records a different algorithm
+        """
+        hash_algorithm = SchemaManager(connection_manager).ensure_simhash_algorithm(hash_algorithm)
+
+        snapshot_path = cls.snapshot_path_for(connection_manager.db_path)
+        tree = None
+        if snapshot_path.exists():
+            try:
+                tree = cls.load(snapshot_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring BK-tree snapshot {snapshot_path}: {e}")
+            else:
+                if (tree.hash_size, tree.hash_algorithm) != (hash_size, hash_algorithm):
+                    logger.warning(
+                        f"Ignoring BK-tree snapshot built for {tree.hash_algorithm}/{tree.hash_size}"
+                    )
+                    tree = None
+
+        if tree is None:
+            tree = cls(hash_size=hash_size, snapshot_path=snapshot_path,
+                       hash_algorithm=hash_algorithm)
+        tree.sync(connection_manager)
+        return tree
+
+    def _add_node(self, simhash: int, record_id: int, parent: int, edge: int) -> int:
+        """Append a node and return its index."""
+        self._hashes.append(simhash)
+        self._parents.append(parent)
+        self._edges.append(edge)
+        self._record_ids.append([record_id])
+        self._children.append({})
+        return len(self._hashes) - 1
+
+    def _pack_hashes(self) -> np.ndarray:
+        """Pack node hashes into little-endian 64-bit words."""
+        words = (self.hash_size + 63) // 64
+        packed = np.empty((self.node_count, words), dtype=np.uint64)
+        for word in range(words):
+            shift = 64 * word
+            packed[:, word] = [(value >> shift) & 0xFFFFFFFFFFFFFFFF for value in self._hashes]
+        return packed.reshape(-1)
+
+    @staticmethod
+    def _unpack_hashes(packed: np.ndarray, words: int) -> List[int]:
+        """Inverse of _pack_hashes()."""
+        if words == 1:
+            return packed.tolist()
+        rows = packed.reshape(-1, words).tolist()
+        return [sum(word << (64 * i) for i, word in enumerate(row)) for row in rows]
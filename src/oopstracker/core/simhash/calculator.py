@@ -2,8 +2,15 @@
 SimHash calculation for code similarity detection.
 """
 
-import hashlib
-from typing import List, Union
+from typing import TYPE_CHECKING, Collection, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .feature_hash import DEFAULT_HASH_ALGORITHM, get_feature_hasher
+from .hamming import HASH_MASK, hamming_distances
+
+if TYPE_CHECKING:
+    from ..token_vocabulary import TokenVocabulary
 
 
 class SimHashCalculator:
@@ -11,19 +18,36 @@ class SimHashCalculator:
     Calculates SimHash values for code similarity detection.
     """
     
-    def __init__(self, hash_size: int = 64):
+    # Number of feature occurrences accumulated per vectorized step in
+    # calculate_batch; bounds the temporary (occurrences x hash_size) matrix.
+    BATCH_CHUNK_SIZE = 16384
+    
+    def __init__(self, hash_size: int = 64, hash_algorithm: Optional[str] = None):
         """
         Initialize SimHash calculator.
         
         Args:
             hash_size: Size of the hash in bits (default: 64)
+            hash_algorithm: Feature hash backend ("xxhash64" or "md5"). Defaults
+                to xxhash64, or md5 when hash_size needs more than 64 bits.
         
         Raises:
-            ValueError: If hash_size is not positive
+            ValueError: If hash_size is not positive, the algorithm is unknown
+                or its digest is narrower than hash_size
         """
         if hash_size <= 0:
             raise ValueError(f"hash_size must be positive, got {hash_size}")
+        if hash_algorithm is None:
+            hash_algorithm = DEFAULT_HASH_ALGORITHM if hash_size <= 64 else "md5"
+        
+        self.feature_hasher = get_feature_hasher(hash_algorithm)
+        if hash_size > self.feature_hasher.digest_bits:
+            raise ValueError(
+                f"hash algorithm '{hash_algorithm}' provides {self.feature_hasher.digest_bits} bits, "
+                f"hash_size {hash_size} requested"
+            )
         self.hash_size = hash_size
+        self.hash_algorithm = hash_algorithm
     
     def calculate(self, features: Union[str, List[str]], weights: List[int] = None) -> int:
         """
@@ -58,9 +82,10 @@ class SimHashCalculator:
         bit_vector = [0] * self.hash_size
         
         # Process each feature
+        feature_hash_of = self.feature_hasher.hash
         for feature, weight in zip(features, weights):
-            # Get hash of feature
-            feature_hash = int(hashlib.md5(feature.encode()).hexdigest(), 16)
+            # Get hash of feature (memoized per token)
+            feature_hash = feature_hash_of(feature)
             
             # Update bit vector based on hash bits
             for i in range(self.hash_size):
@@ -78,6 +103,144 @@ class SimHashCalculator:
         
         return simhash
     
+    def calculate_batch(self, feature_lists: Sequence[Union[str, List[str]]],
+                        weights: Optional[Sequence[Optional[List[int]]]] = None) -> np.ndarray:
+        """
+        Calculate SimHash values for many feature lists in one vectorized pass.
+        
+        Produces exactly the same values as calling calculate() on each
+        feature list, but hashes every distinct feature only once and sums
+        the weighted bit votes with NumPy instead of per-bit Python loops.
+        
+        Args:
+            feature_lists: Sequence of feature lists (or single feature strings)
+            weights: Optional sequence of per-list weights, aligned with feature_lists
+            
+        Returns:
+            uint64 array with one SimHash per feature list
+        
+        Raises:
+            ValueError: If hash_size exceeds 64 bits or weights are misaligned
+        """
+        if self.hash_size > 64:
+            raise ValueError(f"calculate_batch supports hash_size <= 64, got {self.hash_size}")
+        if weights is not None and len(weights) != len(feature_lists):
+            raise ValueError(
+                f"weights must align with feature_lists: {len(weights)} != {len(feature_lists)}"
+            )
+        
+        result = np.zeros(len(feature_lists), dtype=np.uint64)
+        if not len(feature_lists):
+            return result
+        
+        # Flatten all occurrences in document order, interning features so
+        # each distinct one is hashed a single time.
+        vocabulary = {}
+        token_ids = []
+        token_weights = []
+        doc_ids = []
+        for doc_index, features in enumerate(feature_lists):
+            if not features:
+                continue
+            if isinstance(features, str):
+                features = [features]
+            doc_weights = weights[doc_index] if weights is not None else None
+            for position, feature in enumerate(features):
+                token_id = vocabulary.get(feature)
+                if token_id is None:
+                    token_id = vocabulary[feature] = len(vocabulary)
+                token_ids.append(token_id)
+                if doc_weights is not None and position < len(doc_weights):
+                    token_weights.append(doc_weights[position])
+                else:
+                    token_weights.append(1)
+                doc_ids.append(doc_index)
+        
+        if not token_ids:
+            return result
+        
+        return self._vote(
+            vocabulary,
+            np.asarray(token_ids, dtype=np.int64),
+            np.asarray(token_weights, dtype=np.float64),
+            np.asarray(doc_ids, dtype=np.int64),
+            len(feature_lists)
+        )
+    
+    def calculate_token_ids(self, token_id_arrays: Sequence[Optional[Sequence[int]]],
+                            vocabulary: "TokenVocabulary") -> np.ndarray:
+        """
+        Calculate SimHash values for many token ID streams in one vectorized pass.
+        
+        Produces the same values as calculate_batch() on the corresponding
+        token strings, without materializing the strings: the ID arrays are
+        concatenated as they are and only the distinct IDs are looked up
+        and hashed.
+        
+        Args:
+            token_id_arrays: One array('I') (or None) of token IDs per unit
+            vocabulary: TokenVocabulary the IDs belong to
+            
+        Returns:
+            uint64 array with one SimHash per ID array
+        
+        Raises:
+            ValueError: If hash_size exceeds 64 bits
+        """
+        if self.hash_size > 64:
+            raise ValueError(f"calculate_token_ids supports hash_size <= 64, got {self.hash_size}")
+        
+        arrays = [np.asarray(ids if ids is not None else (), dtype=np.int64) for ids in token_id_arrays]
+        lengths = np.fromiter((len(ids) for ids in arrays), dtype=np.int64, count=len(arrays))
+        if not lengths.sum():
+            return np.zeros(len(arrays), dtype=np.uint64)
+        
+        distinct_ids, token_ids = np.unique(np.concatenate(arrays), return_inverse=True)
+        return self._vote(
+            vocabulary.tokens(distinct_ids.tolist()),
+            token_ids.reshape(-1),
+            np.ones(len(token_ids), dtype=np.float64),
+            np.repeat(np.arange(len(arrays), dtype=np.int64), lengths),
+            len(arrays)
+        )
+    
+    def _vote(self, features: Collection[str], token_ids: np.ndarray, token_weights: np.ndarray,
+              doc_ids: np.ndarray, doc_count: int) -> np.ndarray:
+        """
+        Sum weighted bit votes of feature occurrences into per-document SimHashes.
+        
+        Args:
+            features: Distinct features; token_ids index into them
+            token_ids: Feature index of every occurrence, grouped by document
+            token_weights: Weight of every occurrence
+            doc_ids: Document of every occurrence, non-decreasing
+            doc_count: Number of documents
+        """
+        # Unpack each distinct feature hash into a +1/-1 vote matrix
+        feature_hash_of = self.feature_hasher.hash
+        feature_hashes = np.fromiter(
+            (feature_hash_of(feature) & HASH_MASK for feature in features),
+            dtype=np.uint64, count=len(features)
+        )
+        shifts = np.arange(self.hash_size, dtype=np.uint64)
+        bits = ((feature_hashes[:, None] >> shifts) & np.uint64(1)).astype(np.int8)
+        votes = (bits * 2 - 1).astype(np.float64)
+        
+        # Occurrences are grouped by document, so each chunk reduces over
+        # contiguous segments; a document split across chunks simply
+        # accumulates twice.
+        totals = np.zeros((doc_count, self.hash_size), dtype=np.float64)
+        for start in range(0, len(token_ids), self.BATCH_CHUNK_SIZE):
+            stop = start + self.BATCH_CHUNK_SIZE
+            chunk_docs = doc_ids[start:stop]
+            weighted = votes[token_ids[start:stop]] * token_weights[start:stop, None]
+            boundaries = np.flatnonzero(np.diff(chunk_docs)) + 1
+            segment_starts = np.concatenate(([0], boundaries))
+            totals[chunk_docs[segment_starts]] += np.add.reduceat(weighted, segment_starts, axis=0)
+        
+        positive = (totals > 0).astype(np.uint64)
+        return (positive << shifts).sum(axis=1, dtype=np.uint64)
+    
     def hamming_distance(self, hash1: int, hash2: int) -> int:
         """
         Calculate Hamming distance between two hashes.
@@ -89,12 +252,25 @@ class SimHashCalculator:
         Returns:
             Hamming distance
         """
-        xor = hash1 ^ hash2
-        distance = 0
-        while xor:
-            distance += xor & 1
-            xor >>= 1
-        return distance
+        return (hash1 ^ hash2).bit_count()
+    
+    def hamming_distances(self, query: int, hashes: Union[np.ndarray, Iterable[int]]) -> np.ndarray:
+        """
+        Calculate Hamming distances from one hash to many stored hashes.
+        
+        Args:
+            query: Query hash value
+            hashes: uint64 array (or iterable of ints) of stored hashes
+            
+        Returns:
+            uint8 array of distances aligned with hashes
+        
+        Raises:
+            ValueError: If hash_size exceeds 64 bits
+        """
+        if self.hash_size > 64:
+            raise ValueError(f"hamming_distances supports hash_size <= 64, got {self.hash_size}")
+        return hamming_distances(query, hashes)
     
     def calc_similarity(self, hash1: int, hash2: int) -> float:
         """
@@ -0,0 +1,87 @@
+"""
+Pluggable, memoized feature hashing for SimHash.
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+import xxhash
+
+
+def _md5_hash(feature: str) -> int:
+    return int(hashlib.md5(feature.encode()).hexdigest(), 16)
+
+
+def _xxhash64_hash(feature: str) -> int:
+    return xxhash.xxh64_intdigest(feature.encode())
+
+
+# Algorithm name -> (hash function, digest size in bits)
+HASH_ALGORITHMS: Dict[str, Tuple[Callable[[str], int], int]] = {
+    "md5": (_md5_hash, 128),
+    "xxhash64": (_xxhash64_hash, 64),
+}
+
+DEFAULT_HASH_ALGORITHM = "xxhash64"
+DEFAULT_CACHE_SIZE = 1 << 16
+
+
+class FeatureHasher:
+    """
+    Maps feature tokens to integer hashes with a bounded LRU memo.
+
+    Structural tokens such as ``CALL:len`` or ``IF`` come from a small
+    vocabulary but occur in almost every function, so caching token ->
+    hash avoids re-hashing the same strings across the whole corpus.
+    """
+
+    def __init__(self, algorithm: str = DEFAULT_HASH_ALGORITHM, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Initialize feature hasher.
+
+        Args:
+            algorithm: Name of the hash algorithm (see HASH_ALGORITHMS)
+            cache_size: Maximum number of memoized tokens
+
+        Raises:
+            ValueError: If the algorithm is unknown
+        """
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(
+                f"Unknown hash algorithm '{algorithm}', expected one of {sorted(HASH_ALGORITHMS)}"
+            )
+        hash_function, digest_bits = HASH_ALGORITHMS[algorithm]
+        self.algorithm = algorithm
+        self.digest_bits = digest_bits
+        self.hash = lru_cache(maxsize=cache_size)(hash_function)
+
+    def cache_info(self):
+        """Return LRU statistics of the token memo."""
+        return self.hash.cache_info()
+
+    def cache_clear(self):
+        """Drop all memoized token hashes."""
+        self.hash.cache_clear()
+
+
+_shared_hashers: Dict[str, FeatureHasher] = {}
+
+
+def get_feature_hasher(algorithm: str = DEFAULT_HASH_ALGORITHM) -> FeatureHasher:
+    """
+    Return the process-wide hasher for an algorithm.
+
+    Sharing one hasher per algorithm lets every SimHashCalculator reuse
+    the same token memo.
+
+    Args:
+        algorithm: Name of the hash algorithm
+
+    Returns:
+        Shared FeatureHasher instance
+    """
+    hasher = _shared_hashers.get(algorithm)
+    if hasher is None:
+        hasher = _shared_hashers[algorithm] = FeatureHasher(algorithm)
+    return hasher
@@ -0,0 +1,105 @@
+"""
+Vectorized Hamming distance kernels over contiguous uint64 hash arrays.
+"""
+
+from typing import Iterable, Union
+
+import numpy as np
+
+HASH_MASK = (1 << 64) - 1
+
+# Population count of every byte value, used when np.bitwise_count is missing
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+# Bounds the (queries x hashes) temporary in hamming_distance_matrix
+MATRIX_CHUNK_ELEMENTS = 1 << 22
+
+
+def to_hash_array(values: Iterable[int]) -> np.ndarray:
+    """
+    Convert Python integers to a contiguous uint64 hash array.
+
+    Values are reduced modulo 2**64, so both unsigned hashes and their
+    signed 64-bit (SQLite INTEGER) representation map to the same bits.
+
+    Args:
+        values: Iterable of hash values
+
+    Returns:
+        uint64 array
+    """
+    if isinstance(values, np.ndarray):
+        return np.ascontiguousarray(values, dtype=np.uint64)
+    return np.fromiter((int(value) & HASH_MASK for value in values), dtype=np.uint64)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """
+    Count set bits of every element of a uint64 array.
+
+    Args:
+        values: uint64 array of any shape
+
+    Returns:
+        uint8 array of the same shape
+    """
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    as_bytes = values.view(np.uint8).reshape(values.shape + (8,))
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+def hamming_distances(query: int, hashes: np.ndarray) -> np.ndarray:
+    """
+    Hamming distances from one hash to every hash in an array.
+
+    Args:
+        query: Query hash
+        hashes: uint64 array of stored hashes
+
+    Returns:
+        uint8 array of distances aligned with hashes
+    """
+    hashes = to_hash_array(hashes)
+    return popcount64(hashes ^ np.uint64(int(query) & HASH_MASK))
+
+
+def hamming_distance_matrix(queries: Union[np.ndarray, Iterable[int]],
+                            hashes: np.ndarray) -> np.ndarray:
+    """
+    Hamming distances between every query and every stored hash.
+
+    Args:
+        queries: uint64 array (or iterable of ints) of query hashes
+        hashes: uint64 array of stored hashes
+
+    Returns:
+        uint8 array of shape (len(queries), len(hashes))
+    """
+    queries = to_hash_array(queries)
+    hashes = to_hash_array(hashes)
+    result = np.empty((len(queries), len(hashes)), dtype=np.uint8)
+    if not len(hashes):
+        return result
+
+    rows_per_chunk = max(1, MATRIX_CHUNK_ELEMENTS // len(hashes))
+    for start in range(0, len(queries), rows_per_chunk):
+        stop = start + rows_per_chunk
+        result[start:stop] = popcount64(queries[start:stop, None] ^ hashes[None, :])
+    return result
+
+
+def within_distance(query: int, hashes: np.ndarray, max_distance: int) -> np.ndarray:
+    """
+    Indices of stored hashes within a Hamming radius of a query.
+
+    Args:
+        query: Query hash
+        hashes: uint64 array of stored hashes
+        max_distance: Maximum Hamming distance (inclusive)
+
+    Returns:
+        int64 array of matching positions in hashes
+    """
+    return np.flatnonzero(hamming_distances(query, hashes) <= max_distance)
@@ -0,0 +1,220 @@
+"""
+Multi-index hashing (MIH) near-neighbour index over SimHash values.
+"""
+
+import logging
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SimHashIndex:
+    """
+    Hamming-radius index over SimHash values using multi-index hashing.
+
+    Each hash is split into ``block_count`` contiguous bit blocks and every
+    block is stored in its own exact-match table (Manku-style permuted
+    tables). By the pigeonhole principle, any hash within distance ``r`` of
+    the query agrees with it to within ``r // block_count`` bits on at least
+    one block, so a query only probes those buckets and verifies the few
+    candidates it finds instead of scanning every stored hash.
+    """
+
+    def __init__(self, hash_size: int = 64, block_count: int = 4):
+        """
+        Initialize an empty index.
+
+        Args:
+            hash_size: Size of the indexed hashes in bits (default: 64)
+            block_count: Number of blocks (and tables) each hash is split into
+
+        Raises:
+            ValueError: If hash_size or block_count is out of range
+        """
+        if hash_size <= 0:
+            raise ValueError(f"hash_size must be positive, got {hash_size}")
+        if not 0 < block_count <= hash_size:
+            raise ValueError(f"block_count must be in 1..{hash_size}, got {block_count}")
+
+        self.hash_size = hash_size
+        self.block_count = block_count
+        self._mask = (1 << hash_size) - 1
+
+        # Spread the remainder bits over the leading blocks
+        base, extra = divmod(hash_size, block_count)
+        self._blocks: List[Tuple[int, int]] = []
+        offset = 0
+        for block in range(block_count):
+            width = base + (1 if block < extra else 0)
+            self._blocks.append((offset, width))
+            offset += width
+
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(block_count)]
+        self._hashes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, record_id: int) -> bool:
+        return record_id in self._hashes
+
+    def insert(self, record_id: int, simhash: int):
+        """
+        Add or replace the hash stored for a record.
+
+        Args:
+            record_id: Identifier returned by queries (e.g. code_records.id)
+            simhash: SimHash value of the record
+        """
+        if record_id in self._hashes:
+            self.delete(record_id)
+
+        simhash = int(simhash) & self._mask
+        self._hashes[record_id] = simhash
+        for table, key in zip(self._tables, self._split(simhash)):
+            bucket = table.get(key)
+            if bucket is None:
+                table[key] = {record_id}
+            else:
+                bucket.add(record_id)
+
+    def delete(self, record_id: int) -> bool:
+        """
+        Remove a record from the index.
+
+        Args:
+            record_id: Identifier of the record to remove
+
+        Returns:
+            True if the record was indexed, False otherwise
+        """
+        simhash = self._hashes.pop(record_id, None)
+        if simhash is None:
+            return False
+
+        for table, key in zip(self._tables, self._split(simhash)):
+            bucket = table[key]
+            bucket.discard(record_id)
+            if not bucket:
+                del table[key]
+        return True
+
+    def build(self, items: Iterable[Tuple[int, int]]) -> int:
+        """
+        Bulk-insert (record_id, simhash) pairs.
+
+        Args:
+            items: Iterable of (record_id, simhash) pairs
+
+        Returns:
+            Number of pairs inserted
+        """
+        count = 0
+        for record_id, simhash in items:
+            self.insert(record_id, simhash)
+            count += 1
+        return count
+
+    def query(self, simhash: int, max_distance: int) -> List[Tuple[int, int]]:
+        """
+        Find all records within a Hamming radius of a hash.
+
+        Args:
+            simhash: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+
+        Returns:
+            List of (record_id, distance) pairs sorted by distance
+        """
+        if max_distance < 0:
+            return []
+
+        simhash = int(simhash) & self._mask
+        block_radius = max_distance // self.block_count
+
+        candidates: Set[int] = set()
+        for table, (_, width), key in zip(self._tables, self._blocks, self._split(simhash)):
+            for probe in self._neighbours(key, width, block_radius):
+                bucket = table.get(probe)
+                if bucket:
+                    candidates.update(bucket)
+
+        matches = []
+        for record_id in candidates:
+            distance = (self._hashes[record_id] ^ simhash).bit_count()
+            if distance <= max_distance:
+                matches.append((record_id, distance))
+
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+
+    def clear(self):
+        """Remove all records from the index."""
+        for table in self._tables:
+            table.clear()
+        self._hashes.clear()
+
+    @classmethod
+    def from_records(cls, records: Iterable, hash_size: int = 64,
+                     block_count: int = 4) -> 'SimHashIndex':
+        """
+        Build an index from CodeRecord-like objects with ``id`` and ``simhash``.
+
+        Records without an id or simhash are skipped.
+
+        Args:
+            records: Iterable of records
+            hash_size: Size of the indexed hashes in bits
+            block_count: Number of blocks each hash is split into
+
+        Returns:
+            Populated SimHashIndex
+        """
+        index = cls(hash_size=hash_size, block_count=block_count)
+        index.build(
+            (record.id, int(record.simhash))
+            for record in records
+            if record.id is not None and record.simhash is not None
+        )
+        return index
+
+    @classmethod
+    def from_database(cls, db_manager, hash_size: int = 64, block_count: int = 4,
+                      hash_algorithm: Optional[str] = None) -> 'SimHashIndex':
+        """
+        Build an index from every record stored in an ASTDatabaseManager.
+
+        Args:
+            db_manager: ASTDatabaseManager providing iter_records()
+            hash_size: Size of the indexed hashes in bits
+            block_count: Number of blocks each hash is split into
+            hash_algorithm: Feature hash algorithm the simhashes were built with;
+                defaults to the one recorded in the database
+
+        Returns:
+            Populated SimHashIndex
+
+        Raises:
+            ConfigurationError: If the database records a different algorithm
+        """
+        db_manager.schema_manager.ensure_simhash_algorithm(hash_algorithm)
+        records = db_manager.iter_records(columns=("id", "simhash"))
+        index = cls.from_records(records, hash_size, block_count)
+        logger.info(f"Built SimHash index with {len(index)} records")
+        return index
+
+    def _split(self, simhash: int) -> List[int]:
+        """Split a hash into its block keys."""
+        return [(simhash >> offset) & ((1 << width) - 1) for offset, width in self._blocks]
+
+    @staticmethod
+    def _neighbours(key: int, width: int, radius: int) -> Iterable[int]:
+        """Yield every block value within ``radius`` bit flips of ``key``."""
+        yield key
+        for flips in range(1, min(radius, width) + 1):
+            for positions in combinations(range(width), flips):
+                probe = key
+                for position in positions:
+                    probe ^= 1 << position
+                yield probe
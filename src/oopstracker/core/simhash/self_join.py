@@ -0,0 +1,218 @@
+"""
+Corpus-wide near-duplicate self-join over SimHash values.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..union_find import UnionFind
+from .hamming import popcount64, to_hash_array
+
+# Runs of equal block keys up to this length are joined with shifted
+# comparisons over the whole sorted table; longer runs use a per-run matrix.
+SMALL_RUN_LENGTH = 32
+
+# Bounds the temporary (rows x run length) matrix for long runs
+JOIN_CHUNK_ELEMENTS = 1 << 20
+
+PairChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _block_layout(hash_size: int, block_count: int) -> List[Tuple[int, int]]:
+    """Split hash_size bits into block_count contiguous (offset, width) blocks."""
+    base, extra = divmod(hash_size, block_count)
+    blocks = []
+    offset = 0
+    for block in range(block_count):
+        width = base + (1 if block < extra else 0)
+        blocks.append((offset, width))
+        offset += width
+    return blocks
+
+
+def iter_near_duplicate_pairs(hashes, max_distance: int, hash_size: int = 64,
+                              block_count: Optional[int] = None) -> Iterator[PairChunk]:
+    """
+    Find every pair of hashes within a Hamming radius.
+
+    With ``block_count > max_distance`` blocks, any two hashes within the
+    radius share at least one identical block (pigeonhole). For each block
+    the table is sorted by that block's key and only hashes inside the same
+    run of equal keys are compared. A pair is reported only for the first
+    block it agrees on, so it is emitted exactly once without keeping a
+    global set of seen pairs.
+
+    Args:
+        hashes: uint64 array (or iterable of ints) of hashes
+        max_distance: Maximum Hamming distance (inclusive)
+        hash_size: Number of significant bits in each hash
+        block_count: Number of blocks (default: max_distance + 1)
+
+    Yields:
+        (left, right, distance) arrays with left < right indices into hashes
+
+    Raises:
+        ValueError: If the block count cannot guarantee exact results
+    """
+    hashes = to_hash_array(hashes)
+    if max_distance < 0 or len(hashes) < 2:
+        return
+
+    blocks = join_blocks(max_distance, hash_size, block_count)
+    for block in range(len(blocks)):
+        yield from iter_block_pairs(hashes, max_distance, blocks, block)
+
+
+def join_blocks(max_distance: int, hash_size: int = 64,
+                block_count: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Return the (offset, width) blocks used to self-join hashes.
+
+    Args:
+        max_distance: Maximum Hamming distance (inclusive)
+        hash_size: Number of significant bits in each hash
+        block_count: Number of blocks (default: max_distance + 1)
+
+    Raises:
+        ValueError: If the block count cannot guarantee exact results
+    """
+    if block_count is None:
+        block_count = min(max_distance + 1, hash_size)
+    if block_count <= max_distance and block_count < hash_size:
+        raise ValueError(
+            f"block_count must exceed max_distance for exact results, got {block_count} <= {max_distance}"
+        )
+    return _block_layout(hash_size, block_count)
+
+
+def iter_block_pairs(hashes: np.ndarray, max_distance: int, blocks: List[Tuple[int, int]],
+                     block: int) -> Iterator[PairChunk]:
+    """
+    Find the pairs within a Hamming radius first reported by one block.
+
+    Blocks are independent of each other, so they can be joined in
+    separate worker processes and their pairs simply concatenated.
+
+    Args:
+        hashes: uint64 array of hashes
+        max_distance: Maximum Hamming distance (inclusive)
+        blocks: Block layout from join_blocks()
+        block: Index of the block to join on
+
+    Yields:
+        (left, right, distance) arrays with left < right indices into hashes
+    """
+    offset, width = blocks[block]
+    keys = (hashes >> np.uint64(offset)) & np.uint64((1 << width) - 1)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    run_starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    run_lengths = np.diff(np.concatenate((run_starts, [len(sorted_keys)])))
+    if run_lengths.max() < 2:
+        return
+
+    # Runs of moderate size: compare each position with the next w
+    # positions of the same run, vectorized over the whole table.
+    run_ids = np.repeat(np.arange(len(run_starts)), run_lengths)
+    small = np.repeat(run_lengths <= SMALL_RUN_LENGTH, run_lengths)
+    for shift in range(1, min(int(run_lengths.max()), SMALL_RUN_LENGTH)):
+        valid = (run_ids[shift:] == run_ids[:-shift]) & small[:-shift]
+        if not valid.any():
+            break
+        chunk = _filter_pairs(hashes, order[:-shift][valid], order[shift:][valid],
+                              max_distance, blocks[:block])
+        if chunk is not None:
+            yield chunk
+
+    # Long runs: compare in bounded row chunks
+    for start, length in zip(run_starts[run_lengths > SMALL_RUN_LENGTH],
+                             run_lengths[run_lengths > SMALL_RUN_LENGTH]):
+        members = order[start:start + length]
+        rows_per_chunk = max(1, JOIN_CHUNK_ELEMENTS // int(length))
+        for row_start in range(0, int(length) - 1, rows_per_chunk):
+            rows = np.arange(row_start, min(row_start + rows_per_chunk, int(length)))
+            row_index, column_index = np.nonzero(rows[:, None] < np.arange(length)[None, :])
+            chunk = _filter_pairs(hashes, members[rows[row_index]], members[column_index],
+                                  max_distance, blocks[:block])
+            if chunk is not None:
+                yield chunk
+
+
+def iter_distinct_block_pairs(hashes: np.ndarray, max_distance: int, blocks: List[Tuple[int, int]],
+                              block: int) -> Iterator[PairChunk]:
+    """
+    Like iter_block_pairs(), but join each distinct hash only once.
+
+    Pairs link the first rows holding two different hashes, so a run of k
+    identical hashes adds no pairs instead of k * (k - 1) / 2 per block;
+    link_identical_rows() connects the rows sharing a hash.
+
+    Yields:
+        (left, right, distance) arrays with left < right indices into hashes
+    """
+    unique, first_rows = np.unique(hashes, return_index=True)
+    for left, right, distances in iter_block_pairs(unique, max_distance, blocks, block):
+        left, right = first_rows[left], first_rows[right]
+        yield np.minimum(left, right), np.maximum(left, right), distances
+
+
+def link_identical_rows(clusters: UnionFind, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Union every row with the first row holding the same hash.
+
+    Args:
+        clusters: UnionFind over the rows of hashes
+        hashes: uint64 array of hashes
+
+    Returns:
+        (unique hashes, first row holding each unique hash)
+    """
+    unique, first_rows, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    representatives = first_rows[inverse.ravel()]
+    rows = np.flatnonzero(representatives != np.arange(len(hashes)))
+    clusters.union_pairs(zip(representatives[rows].tolist(), rows.tolist()))
+    return unique, first_rows
+
+
+def _filter_pairs(hashes: np.ndarray, left: np.ndarray, right: np.ndarray, max_distance: int,
+                  earlier_blocks: List[Tuple[int, int]]) -> Optional[PairChunk]:
+    """Keep candidate pairs within the radius that no earlier block already reported."""
+    xor = hashes[left] ^ hashes[right]
+    distances = popcount64(xor)
+    keep = distances <= max_distance
+    for offset, width in earlier_blocks:
+        keep &= ((xor >> np.uint64(offset)) & np.uint64((1 << width) - 1)) != 0
+    if not keep.any():
+        return None
+    left, right = left[keep], right[keep]
+    return np.minimum(left, right), np.maximum(left, right), distances[keep]
+
+
+def near_duplicate_clusters(hashes, max_distance: int, hash_size: int = 64,
+                            block_count: Optional[int] = None) -> List[List[int]]:
+    """
+    Group hashes into clusters connected by near-duplicate pairs.
+
+    Identical hashes are collapsed before the join, so the pairs examined
+    grow with the number of distinct hashes rather than the square of the
+    largest run of equal ones.
+
+    Args:
+        hashes: uint64 array (or iterable of ints) of hashes
+        max_distance: Maximum Hamming distance (inclusive) for a pair
+        hash_size: Number of significant bits in each hash
+        block_count: Number of blocks (default: max_distance + 1)
+
+    Returns:
+        Clusters of at least two indices into hashes, ordered by first member
+    """
+    hashes = to_hash_array(hashes)
+    if max_distance < 0:
+        return []
+    clusters = UnionFind(len(hashes))
+    unique, first_rows = link_identical_rows(clusters, hashes)
+    for left, right, _ in iter_near_duplicate_pairs(unique, max_distance, hash_size, block_count):
+        clusters.union_pairs(zip(first_rows[left].tolist(), first_rows[right].tolist()))
+    return clusters.groups(min_size=2)
@@ -0,0 +1,353 @@
+"""
+Memory-mapped simhash sidecar shared zero-copy with worker processes.
+"""
+
+import logging
+import os
+import secrets
+import tempfile
+import weakref
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ..union_find import UnionFind
+from .hamming import hamming_distances, to_hash_array
+from .self_join import PairChunk, iter_block_pairs, iter_distinct_block_pairs, join_blocks, link_identical_rows
+
+logger = logging.getLogger(__name__)
+
+# Sidecar files are named <prefix><creator pid>-<token>.bin
+SIDECAR_PREFIX = "oopstracker-simhash-"
+SIDECAR_SUFFIX = ".bin"
+
+# RAM-backed on Linux, so mapping a sidecar never touches a disk
+SHARED_MEMORY_DIR = Path("/dev/shm")
+
+# Queries per worker task in query_many
+QUERY_CHUNK_SIZE = 256
+
+
+class SidecarHandle(NamedTuple):
+    """Picklable reference to a sidecar, sent to workers instead of the hashes."""
+    path: str
+    count: int
+
+
+def sidecar_directory() -> Path:
+    """Directory sidecar files are created in."""
+    if SHARED_MEMORY_DIR.is_dir() and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return Path(tempfile.gettempdir())
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_stale_sidecars(directory: Optional[Path] = None) -> List[Path]:
+    """
+    Remove sidecar files left behind by processes that no longer run.
+
+    Owners delete their sidecar on close and at interpreter exit; this
+    sweep catches the files of runs that were killed or crashed.
+
+    Args:
+        directory: Directory to sweep (default: sidecar_directory())
+
+    Returns:
+        Paths of the removed files
+    """
+    directory = directory or sidecar_directory()
+    removed = []
+    for path in directory.glob(f"{SIDECAR_PREFIX}*{SIDECAR_SUFFIX}"):
+        pid = path.name[len(SIDECAR_PREFIX):].split("-", 1)[0]
+        if not pid.isdigit() or _process_alive(int(pid)):
+            continue
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed.append(path)
+    if removed:
+        logger.info(f"Removed {len(removed)} stale simhash sidecar files from {directory}")
+    return removed
+
+
+def _remove_file(path: Path, owner_pid: int):
+    """Delete an owned sidecar file; mappings that are still open stay valid."""
+    # Forked children inherit the owner object but must not delete its file
+    if os.getpid() != owner_pid:
+        return
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class SimHashSidecar:
+    """
+    Record ids and simhashes in one memory-mapped file shared by processes.
+
+    The owner writes the arrays once; workers attach by a SidecarHandle
+    (a path and a row count) and map the same pages read-only, so a pool
+    never pickles or re-queries the hash set. The owner deletes the file
+    on close(), when it is garbage collected, or at interpreter exit;
+    files of crashed runs are removed by cleanup_stale_sidecars(), which
+    create() runs first.
+
+    Layout: ``count`` uint64 simhashes followed by ``count`` int64 ids.
+    """
+
+    def __init__(self, path: Path, count: int, owner: bool):
+        """
+        Map a sidecar file; use create() or attach() instead.
+
+        Args:
+            path: Sidecar file
+            count: Number of rows
+            owner: Whether this object deletes the file on close
+        """
+        self.path = path
+        self.count = count
+        self.owner = owner
+        if count:
+            self._data = np.memmap(path, dtype=np.uint64, mode="r", shape=(2 * count,))
+        else:
+            self._data = np.empty(0, dtype=np.uint64)
+        self.simhashes = self._data[:count]
+        self.ids = self._data[count:].view(np.int64)
+        self._finalizer = weakref.finalize(self, _remove_file, path, os.getpid()) if owner else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def handle(self) -> SidecarHandle:
+        """Handle workers pass to attach()."""
+        return SidecarHandle(str(self.path), self.count)
+
+    @property
+    def closed(self) -> bool:
+        """Whether close() was called."""
+        return self._data is None
+
+    @classmethod
+    def create(cls, simhashes, ids=None, directory: Optional[Path] = None) -> 'SimHashSidecar':
+        """
+        Write hashes to a new sidecar file owned by this process.
+
+        Args:
+            simhashes: uint64 array (or iterable of ints) of hashes
+            ids: Record id per hash (default: row numbers)
+            directory: Directory for the file (default: sidecar_directory())
+
+        Returns:
+            Owning SimHashSidecar
+
+        Raises:
+            ValueError: If ids and simhashes differ in length
+        """
+        simhashes = to_hash_array(simhashes)
+        ids = np.arange(len(simhashes), dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        if len(ids) != len(simhashes):
+            raise ValueError(f"Got {len(ids)} ids for {len(simhashes)} simhashes")
+
+        directory = Path(directory) if directory else sidecar_directory()
+        cleanup_stale_sidecars(directory)
+        path = directory / f"{SIDECAR_PREFIX}{os.getpid()}-{secrets.token_hex(8)}{SIDECAR_SUFFIX}"
+        with open(path, "xb") as f:
+            f.write(simhashes.tobytes())
+            f.write(ids.tobytes())
+        try:
+            return cls(path, len(simhashes), owner=True)
+        except BaseException:
+            _remove_file(path, os.getpid())
+            raise
+
+    @classmethod
+    def from_snapshot(cls, snapshot, directory: Optional[Path] = None) -> 'SimHashSidecar':
+        """Share the ids and simhashes of an IndexSnapshot."""
+        return cls.create(snapshot.simhashes, snapshot.ids, directory)
+
+    @classmethod
+    def attach(cls, handle: SidecarHandle) -> 'SimHashSidecar':
+        """
+        Map an existing sidecar read-only.
+
+        Args:
+            handle: Handle of the owning sidecar
+
+        Returns:
+            Non-owning SimHashSidecar; close() unmaps but keeps the file
+
+        Raises:
+            ValueError: If the file does not match the handle
+        """
+        path = Path(handle.path)
+        size = path.stat().st_size
+        if size != 16 * handle.count:
+            raise ValueError(f"Sidecar {path} holds {size} bytes, expected {16 * handle.count}")
+        return cls(path, handle.count, owner=False)
+
+    def close(self):
+        """Drop the mapping; the owner also deletes the file."""
+        if self._data is None:
+            return
+        self._data = self.simhashes = self.ids = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def query_rows(self, simhash: int, max_distance: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rows within a Hamming radius of a hash.
+
+        Args:
+            simhash: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+
+        Returns:
+            Row numbers and their distances, in row order
+        """
+        if max_distance < 0 or not self.count:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.uint8)
+        distances = hamming_distances(simhash, self.simhashes)
+        rows = np.flatnonzero(distances <= max_distance)
+        return rows, distances[rows]
+
+    def query_many(self, queries: Iterable[int], max_distance: int,
+                   executor: Optional[Executor] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Run query_rows() for many hashes, optionally on a process pool.
+
+        Workers receive only the handle and their chunk of queries.
+
+        Args:
+            queries: Query hashes
+            max_distance: Maximum Hamming distance (inclusive)
+            executor: Pool to fan out on (default: run here)
+
+        Returns:
+            (rows, distances) per query, in query order
+        """
+        queries = [int(query) for query in queries]
+        chunks = [queries[i:i + QUERY_CHUNK_SIZE] for i in range(0, len(queries), QUERY_CHUNK_SIZE)]
+        if executor is None:
+            return [match for chunk in chunks for match in _query_chunk(self, chunk, max_distance)]
+        futures = [executor.submit(_query_worker, self.handle, chunk, max_distance) for chunk in chunks]
+        return [match for future in futures for match in future.result()]
+
+    def near_duplicate_pairs(self, max_distance: int, hash_size: int = 64, block_count: Optional[int] = None,
+                             executor: Optional[Executor] = None, distinct: bool = False) -> Iterable[PairChunk]:
+        """
+        Self-join the hashes, one pigeonhole block per worker task.
+
+        Args:
+            max_distance: Maximum Hamming distance (inclusive)
+            hash_size: Number of significant bits in each hash
+            block_count: Number of blocks (default: max_distance + 1)
+            executor: Pool to fan out on (default: run here)
+            distinct: Join each distinct hash once, pairing the first rows
+                holding them (see iter_distinct_block_pairs())
+
+        Yields:
+            (left, right, distance) arrays with left < right row numbers
+
+        Raises:
+            ValueError: If the block count cannot guarantee exact results
+        """
+        if max_distance < 0 or self.count < 2:
+            return
+        blocks = join_blocks(max_distance, hash_size, block_count)
+        join = iter_distinct_block_pairs if distinct else iter_block_pairs
+        if executor is None:
+            for block in range(len(blocks)):
+                yield from join(self.simhashes, max_distance, blocks, block)
+            return
+        futures = [executor.submit(_block_pairs_worker, self.handle, max_distance, blocks, block, distinct)
+                   for block in range(len(blocks))]
+        for future in futures:
+            yield from future.result()
+
+    def near_duplicate_clusters(self, max_distance: int, hash_size: int = 64, block_count: Optional[int] = None,
+                                executor: Optional[Executor] = None) -> List[List[int]]:
+        """
+        Group rows into clusters connected by near-duplicate pairs.
+
+        Args:
+            max_distance: Maximum Hamming distance (inclusive) for a pair
+            hash_size: Number of significant bits in each hash
+            block_count: Number of blocks (default: max_distance + 1)
+            executor: Pool to fan out on (default: run here)
+
+        Returns:
+            Clusters of at least two row numbers, ordered by first member
+        """
+        if max_distance < 0:
+            return []
+        clusters = UnionFind(self.count)
+        link_identical_rows(clusters, self.simhashes)
+        for left, right, _ in self.near_duplicate_pairs(max_distance, hash_size, block_count, executor,
+                                                        distinct=True):
+            clusters.union_pairs(zip(left.tolist(), right.tolist()))
+        return clusters.groups(min_size=2)
+
+
+# Sidecars mapped by this worker process, by path
+_attached: Dict[str, SimHashSidecar] = {}
+
+
+def attached_sidecar(handle: SidecarHandle) -> SimHashSidecar:
+    """
+    Map a sidecar in a worker process, reusing the mapping across tasks.
+
+    A worker keeps only the sidecar it was last handed, so pools reused
+    across runs do not accumulate mappings of deleted files.
+
+    Args:
+        handle: Handle of the owning sidecar
+
+    Returns:
+        Read-only SimHashSidecar
+    """
+    sidecar = _attached.get(handle.path)
+    if sidecar is None or sidecar.count != handle.count:
+        for previous in _attached.values():
+            previous.close()
+        _attached.clear()
+        sidecar = _attached[handle.path] = SimHashSidecar.attach(handle)
+    return sidecar
+
+
+def _query_chunk(sidecar: SimHashSidecar, queries: List[int],
+                 max_distance: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Run query_rows() for a chunk of queries."""
+    return [sidecar.query_rows(query, max_distance) for query in queries]
+
+
+def _query_worker(handle: SidecarHandle, queries: List[int],
+                  max_distance: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Process pool entry point for query_many()."""
+    return _query_chunk(attached_sidecar(handle), queries, max_distance)
+
+
+def _block_pairs_worker(handle: SidecarHandle, max_distance: int, blocks: List[Tuple[int, int]],
+                        block: int, distinct: bool = False) -> List[PairChunk]:
+    """Process pool entry point for near_duplicate_pairs()."""
+    join = iter_distinct_block_pairs if distinct else iter_block_pairs
+    return list(join(attached_sidecar(handle).simhashes, max_distance, blocks, block))
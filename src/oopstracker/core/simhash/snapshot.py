@@ -0,0 +1,349 @@
+"""
+Columnar snapshot of the code_records SimHash index, memory-mapped on load.
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ...database.schema_manager import SchemaManager
+from .feature_hash import DEFAULT_HASH_ALGORITHM
+from .hamming import hamming_distances, to_hash_array
+
+logger = logging.getLogger(__name__)
+
+# Arrays of the snapshot, aligned by row
+COLUMN_DTYPES = {
+    'ids': np.int64,
+    'simhashes': np.uint64,
+    'file_ids': np.int32,
+    'lines': np.int32
+}
+
+# Local file header of a zip member: fixed part, then name and extra field
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+
+
+def _mapped_member(archive_path: Path, info: zipfile.ZipInfo) -> np.ndarray:
+    """Memory-map one uncompressed .npy member of a .npz archive."""
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"Compressed snapshot member {info.filename}: {archive_path}")
+    with open(archive_path, "rb") as f:
+        f.seek(info.header_offset)
+        fields = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+        if fields[0] != b"PK\x03\x04":
+            raise ValueError(f"Corrupt snapshot member {info.filename}: {archive_path}")
+        f.seek(fields[-2] + fields[-1], os.SEEK_CUR)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if fortran_order or dtype.hasobject:
+        raise ValueError(f"Unsupported snapshot member {info.filename}: {archive_path}")
+    if not shape or shape[0] == 0:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(archive_path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+
+class IndexSnapshot:
+    """
+    Record ids, simhashes, file ids and line numbers of code_records as arrays.
+
+    Rebuilding in-memory state from SQLite rows costs seconds on a large
+    corpus. A snapshot saved next to the database is instead mapped into
+    memory on load, so the first query only touches the pages it reads.
+
+    The snapshot records the database generation (see
+    SchemaManager.get_generation) and the highest record id it holds.
+    ``open()`` extends it with newer rows while the generation is
+    unchanged, and rebuilds it once rows were deleted or rewritten.
+    """
+
+    FORMAT_VERSION = 1
+    SNAPSHOT_SUFFIX = ".index.npz"
+
+    def __init__(self, ids: np.ndarray, simhashes: np.ndarray, file_ids: np.ndarray, lines: np.ndarray,
+                 files: List[str], generation: int = 0, max_record_id: int = 0,
+                 hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+                 snapshot_path: Optional[Union[str, Path]] = None):
+        """
+        Initialize a snapshot from its columns.
+
+        Args:
+            ids: code_records ids (int64)
+            simhashes: Unsigned 64-bit simhashes (uint64)
+            file_ids: Index into files per row, -1 without a file (int32)
+            lines: Line number per row, -1 when unknown (int32)
+            files: Distinct file paths
+            generation: Database generation the rows were read at
+            max_record_id: Highest record id read
+            hash_algorithm: Feature hash algorithm the simhashes use
+            snapshot_path: Default file used by save()
+        """
+        self.ids = ids
+        self.simhashes = simhashes
+        self.file_ids = file_ids
+        self.lines = lines
+        self.files = list(files)
+        self.generation = generation
+        self.max_record_id = max_record_id
+        self.hash_algorithm = hash_algorithm
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._file_index = None
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def is_dirty(self) -> bool:
+        """Whether the snapshot changed since it was last loaded or saved."""
+        return self._dirty
+
+    @classmethod
+    def empty(cls, generation: int = 0, hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+              snapshot_path: Optional[Union[str, Path]] = None) -> 'IndexSnapshot':
+        """Create a snapshot without rows."""
+        columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        return cls(files=[], generation=generation, hash_algorithm=hash_algorithm,
+                   snapshot_path=snapshot_path, **columns)
+
+    def extend(self, connection_manager, batch_size: int = 100_000) -> int:
+        """
+        Append code_records rows added after max_record_id.
+
+        Args:
+            connection_manager: DatabaseConnectionManager for the code_records DB
+            batch_size: Rows fetched per round trip
+
+        Returns:
+            Number of rows appended
+        """
+        if self._file_index is None:
+            self._file_index = {path: file_id for file_id, path in enumerate(self.files)}
+        cursor = connection_manager.execute("""
+            SELECT id, simhash, file_path,
+                   CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.line_number') END
+            FROM code_records WHERE id > ? AND simhash IS NOT NULL ORDER BY id
+        """, (self.max_record_id,))
+
+        chunks: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMN_DTYPES}
+        appended = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            ids, simhashes, paths, lines = zip(*rows)
+            chunks['ids'].append(np.array(ids, dtype=np.int64))
+            chunks['simhashes'].append(to_hash_array(simhashes))
+            chunks['file_ids'].append(np.fromiter(
+                (self._file_id(path) for path in paths), dtype=np.int32, count=len(rows)
+            ))
+            chunks['lines'].append(np.array(
+                [line if isinstance(line, int) else -1 for line in lines], dtype=np.int32
+            ))
+            appended += len(rows)
+
+        if appended:
+            for name, parts in chunks.items():
+                setattr(self, name, np.concatenate([getattr(self, name)] + parts))
+            self.max_record_id = int(self.ids[-1])
+            self._dirty = True
+        return appended
+
+    def _file_id(self, path: Optional[str]) -> int:
+        """Index of a file path in files, adding it if new."""
+        if path is None:
+            return -1
+        file_id = self._file_index.get(path)
+        if file_id is None:
+            file_id = self._file_index[path] = len(self.files)
+            self.files.append(path)
+        return file_id
+
+    def query(self, simhash: int, max_distance: int) -> List[Tuple[int, int]]:
+        """
+        Find all records within a Hamming radius of a hash.
+
+        Args:
+            simhash: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+
+        Returns:
+            List of (record_id, distance) pairs sorted by distance
+        """
+        rows, distances = self.query_rows(simhash, max_distance)
+        return list(zip(self.ids[rows].tolist(), distances.tolist()))
+
+    def query_rows(self, simhash: int, max_distance: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rows within a Hamming radius of a hash.
+
+        Args:
+            simhash: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+
+        Returns:
+            Row numbers and their distances, sorted by distance and record id
+        """
+        if max_distance < 0 or not len(self):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.uint8)
+        distances = hamming_distances(simhash, self.simhashes)
+        rows = np.flatnonzero(distances <= max_distance)
+        rows = rows[np.lexsort((self.ids[rows], distances[rows]))]
+        return rows, distances[rows]
+
+    def location(self, row: int) -> Tuple[Optional[str], Optional[int]]:
+        """File path and line number of a row, None where unknown."""
+        file_id, line = int(self.file_ids[row]), int(self.lines[row])
+        return (self.files[file_id] if file_id >= 0 else None), (line if line >= 0 else None)
+
+    def save(self, path: Optional[Union[str, Path]] = None) -> Path:
+        """
+        Write the snapshot as one uncompressed .npz archive.
+
+        The archive is written to a temporary file and atomically renamed,
+        so readers never observe a partially written snapshot.
+
+        Args:
+            path: Target file (defaults to snapshot_path)
+
+        Returns:
+            Path of the written snapshot
+
+        Raises:
+            ValueError: If no path is given and no snapshot_path is set
+        """
+        target = Path(path) if path else self.snapshot_path
+        if target is None:
+            raise ValueError("No snapshot path configured for index snapshot")
+
+        meta = {
+            'format_version': self.FORMAT_VERSION,
+            'generation': self.generation,
+            'max_record_id': self.max_record_id,
+            'hash_algorithm': self.hash_algorithm
+        }
+        temp_path = target.with_name(target.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), files=np.array(self.files, dtype=str),
+                     **{name: np.ascontiguousarray(getattr(self, name), dtype=dtype)
+                        for name, dtype in COLUMN_DTYPES.items()})
+        os.replace(temp_path, target)
+
+        self._dirty = False
+        logger.debug(f"Saved index snapshot with {len(self)} records: {target}")
+        return target
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'IndexSnapshot':
+        """
+        Load a snapshot written by save(), memory-mapping its columns.
+
+        Args:
+            path: Snapshot file
+
+        Returns:
+            Loaded IndexSnapshot
+
+        Raises:
+            ValueError: If the file is not a compatible index snapshot
+        """
+        path = Path(path)
+        try:
+            with zipfile.ZipFile(path) as archive:
+                members = {info.filename[:-len(".npy")]: info for info in archive.infolist()}
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Unreadable index snapshot {path}: {e}") from e
+        if set(members) != {'meta', 'files'} | set(COLUMN_DTYPES):
+            raise ValueError(f"Unexpected index snapshot members in {path}")
+
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(str(archive['meta']))
+            files = archive['files'].tolist()
+        if meta.get('format_version') != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported index snapshot: {path}")
+
+        columns = {name: _mapped_member(path, members[name]) for name in COLUMN_DTYPES}
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Index snapshot columns differ in length: {path}")
+        for name, dtype in COLUMN_DTYPES.items():
+            if columns[name].dtype != dtype:
+                raise ValueError(f"Index snapshot column {name} is {columns[name].dtype}: {path}")
+
+        return cls(files=files, generation=meta['generation'], max_record_id=meta['max_record_id'],
+                   hash_algorithm=meta['hash_algorithm'], snapshot_path=path, **columns)
+
+    @classmethod
+    def snapshot_path_for(cls, db_path: Union[str, Path]) -> Path:
+        """Return the snapshot file that lives next to a SQLite database."""
+        db_path = Path(db_path)
+        return db_path.with_name(db_path.name + cls.SNAPSHOT_SUFFIX)
+
+    @classmethod
+    def open(cls, connection_manager, hash_algorithm: Optional[str] = None,
+             save: bool = True, rebuild: bool = False) -> 'IndexSnapshot':
+        """
+        Load the snapshot next to a database and bring it up to date.
+
+        A snapshot of the current generation is extended with rows added
+        since it was written. A missing, unreadable or outdated snapshot,
+        or one for another hash algorithm, is rebuilt from the table.
+
+        Args:
+            connection_manager: DatabaseConnectionManager for the code_records DB
+            hash_algorithm: Feature hash algorithm the simhashes were built with;
+                defaults to the one recorded in the database
+            save: Write the snapshot back if it had to be extended or rebuilt
+            rebuild: Ignore the existing snapshot and read every row
+
+        Returns:
+            IndexSnapshot current with the database
+
+        Raises:
+            ConfigurationError: If the database records a different algorithm
+        """
+        schema_manager = SchemaManager(connection_manager)
+        hash_algorithm = schema_manager.ensure_simhash_algorithm(hash_algorithm)
+
+        snapshot_path = cls.snapshot_path_for(connection_manager.db_path)
+        snapshot = None
+        if snapshot_path.exists() and not rebuild:
+            try:
+                snapshot = cls.load(snapshot_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring index snapshot {snapshot_path}: {e}")
+            else:
+                if snapshot.hash_algorithm != hash_algorithm:
+                    logger.warning(f"Ignoring index snapshot built for {snapshot.hash_algorithm}")
+                    snapshot = None
+
+        start = time.perf_counter()
+        while True:
+            generation = schema_manager.get_generation()
+            if snapshot is None or snapshot.generation != generation:
+                if snapshot is not None:
+                    logger.info(f"Rebuilding index snapshot of generation {snapshot.generation} "
+                                f"for generation {generation}")
+                snapshot = cls.empty(generation, hash_algorithm, snapshot_path)
+                snapshot._dirty = True
+            appended = snapshot.extend(connection_manager)
+            # Rows deleted or rewritten while reading would be stale
+            if schema_manager.get_generation() == generation:
+                break
+        if appended:
+            logger.debug(f"Read {appended} records into index snapshot in {time.perf_counter() - start:.2f}s")
+
+        if save and snapshot.is_dirty:
+            snapshot.save()
+        return snapshot
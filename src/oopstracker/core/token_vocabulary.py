@@ -0,0 +1,239 @@
+"""
+Interning of structure tokens as small integers.
+"""
+
+import threading
+from array import array
+from typing import Dict, Iterable, List, Sequence
+
+from ..exceptions import ConfigurationError
+
+# Bump when the meaning of persisted token IDs changes
+TOKEN_VOCABULARY_VERSION = "1"
+
+
+class TokenVocabulary:
+    """
+    Append-only mapping between structure tokens and dense integer IDs.
+
+    Visitors emit tokens such as ``CALL_ATTR:append`` that repeat across
+    almost every unit. Units store their structure as an ``array('I')`` of
+    IDs instead, so each distinct token string exists once per vocabulary.
+    IDs are never reassigned, which keeps every issued array valid while the
+    vocabulary grows. IDs are local to a vocabulary: arrays that cross a
+    process or database boundary travel as token strings and are interned
+    again on arrival.
+    """
+
+    def __init__(self, tokens: Iterable[str] = ()):
+        """
+        Initialize the vocabulary.
+
+        Args:
+            tokens: Initial tokens, assigned IDs in order
+        """
+        self._ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        self._persisted = 0
+        self._lock = threading.Lock()
+        for token in tokens:
+            self.intern(token)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._ids
+
+    def intern(self, token: str) -> int:
+        """Return the ID of a token, assigning the next free one if it is new."""
+        token_id = self._ids.get(token)
+        if token_id is None:
+            with self._lock:
+                token_id = self._ids.get(token)
+                if token_id is None:
+                    token_id = len(self._tokens)
+                    self._tokens.append(token)
+                    self._ids[token] = token_id
+        return token_id
+
+    def intern_many(self, tokens: Iterable[str]) -> array:
+        """
+        Intern a token stream.
+
+        Args:
+            tokens: Tokens in order
+
+        Returns:
+            array('I') of token IDs aligned with tokens
+        """
+        ids = self._ids
+        token_ids = array('I')
+        for token in tokens:
+            token_id = ids.get(token)
+            token_ids.append(token_id if token_id is not None else self.intern(token))
+        return token_ids
+
+    def token(self, token_id: int) -> str:
+        """Return the token of an ID."""
+        return self._tokens[token_id]
+
+    def tokens(self, token_ids: Sequence[int]) -> List[str]:
+        """Return the tokens of a sequence of IDs."""
+        tokens = self._tokens
+        return [tokens[token_id] for token_id in token_ids]
+
+    def join(self, token_ids: Sequence[int], separator: str = "|") -> str:
+        """Return the "|"-joined structure signature of a sequence of IDs."""
+        return separator.join(self.tokens(token_ids))
+
+    @classmethod
+    def load(cls, connection_manager) -> "TokenVocabulary":
+        """
+        Load the vocabulary persisted in a database.
+
+        Args:
+            connection_manager: DatabaseConnectionManager instance
+
+        Returns:
+            Vocabulary holding the stored tokens under their stored IDs
+
+        Raises:
+            ConfigurationError: If the stored vocabulary has another format version
+        """
+        from ..database.schema_manager import SchemaManager
+
+        schema = SchemaManager(connection_manager)
+        schema.create_tables()
+        schema.ensure_token_vocabulary_version(TOKEN_VOCABULARY_VERSION)
+        vocabulary = cls()
+        vocabulary.sync(connection_manager)
+        return vocabulary
+
+    def sync(self, connection_manager) -> int:
+        """
+        Pick up tokens another writer has persisted since the last sync or save.
+
+        Call before interning tokens that will be saved, so new tokens are
+        appended after the stored ones.
+
+        Args:
+            connection_manager: DatabaseConnectionManager instance
+
+        Returns:
+            Number of tokens read
+
+        Raises:
+            ConfigurationError: If this vocabulary holds unsaved tokens or
+                the stored IDs are not dense
+        """
+        if self._persisted != len(self._tokens):
+            raise ConfigurationError(
+                f"Cannot sync a token vocabulary with {len(self._tokens) - self._persisted} unsaved tokens"
+            )
+        cursor = connection_manager.execute(
+            "SELECT id, token FROM token_vocabulary WHERE id >= ? ORDER BY id",
+            (self._persisted,)
+        )
+        rows = cursor.fetchall()
+        for row in rows:
+            if row['id'] != len(self._tokens):
+                raise ConfigurationError(f"Token vocabulary has a gap at id {len(self._tokens)}")
+            self.intern(row['token'])
+        self._persisted = len(self._tokens)
+        return len(rows)
+
+    def save(self, connection_manager, commit: bool = True) -> int:
+        """
+        Append tokens interned since the last load, sync or save to the database.
+
+        The new tokens keep the IDs they were interned under, so no other
+        writer may have saved tokens since the last sync. To intern and
+        save without that race, sync, intern and save with commit=False
+        inside one connection_manager.transaction(immediate=True).
+
+        Args:
+            connection_manager: DatabaseConnectionManager instance
+            commit: Save in a transaction of its own; pass False to leave
+                the insert in the caller's transaction, and truncate() if
+                that rolls back
+
+        Returns:
+            Number of tokens written
+
+        Raises:
+            ConfigurationError: If another writer saved tokens since the
+                last sync, which took the IDs of the unsaved ones
+        """
+        if commit:
+            persisted = self._persisted
+            try:
+                with connection_manager.transaction(immediate=True):
+                    return self.save(connection_manager, commit=False)
+            except Exception:
+                self._persisted = persisted
+                raise
+
+        new_tokens = list(enumerate(self._tokens[self._persisted:], start=self._persisted))
+        if new_tokens:
+            clashing = connection_manager.execute(
+                "SELECT COUNT(*) FROM token_vocabulary WHERE id >= ?",
+                (self._persisted,)
+            ).fetchone()[0]
+            if clashing:
+                raise ConfigurationError(
+                    f"{clashing} tokens were saved by another writer since the last sync; "
+                    f"they hold the IDs of the {len(new_tokens)} unsaved ones"
+                )
+            connection_manager.executemany(
+                "INSERT INTO token_vocabulary (id, token) VALUES (?, ?)",
+                new_tokens
+            )
+            self._persisted += len(new_tokens)
+        return len(new_tokens)
+
+    def truncate(self, length: int):
+        """
+        Forget the tokens from ID length on.
+
+        Used when the transaction that saved them was rolled back; the
+        forgotten IDs must not have been handed out beyond that transaction.
+
+        Args:
+            length: Number of tokens to keep
+        """
+        with self._lock:
+            for token in self._tokens[length:]:
+                del self._ids[token]
+            del self._tokens[length:]
+            self._persisted = min(self._persisted, length)
+
+
+_shared_vocabulary = TokenVocabulary()
+
+
+def get_token_vocabulary() -> TokenVocabulary:
+    """
+    Return the process-wide vocabulary that CodeUnit token IDs refer to.
+
+    Returns:
+        Shared TokenVocabulary instance
+    """
+    return _shared_vocabulary
+
+
+def jaccard_similarity(first: Iterable[int], second: Iterable[int]) -> float:
+    """
+    Jaccard similarity of the token sets of two ID streams.
+
+    Args:
+        first: Token IDs (duplicates are ignored)
+        second: Token IDs (duplicates are ignored)
+
+    Returns:
+        Similarity between 0 and 1; two empty streams are identical
+    """
+    first, second = set(first), set(second)
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
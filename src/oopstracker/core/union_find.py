@@ -0,0 +1,71 @@
+"""
+Disjoint-set (union-find) structure for merging duplicate pairs into clusters.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+
+class UnionFind:
+    """
+    Union-find over the integers 0..size-1 with path halving and union by size.
+    """
+
+    def __init__(self, size: int):
+        """
+        Initialize with every element in its own set.
+
+        Args:
+            size: Number of elements
+        """
+        self._parent = list(range(size))
+        self._size = [1] * size
+
+    def find(self, element: int) -> int:
+        """Return the representative of the set containing element."""
+        parent = self._parent
+        while parent[element] != element:
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, first: int, second: int) -> bool:
+        """
+        Merge the sets containing two elements.
+
+        Returns:
+            True if the sets were distinct and have been merged
+        """
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        if self._size[first] < self._size[second]:
+            first, second = second, first
+        self._parent[second] = first
+        self._size[first] += self._size[second]
+        return True
+
+    def union_pairs(self, pairs: Iterable[Tuple[int, int]]) -> int:
+        """
+        Merge every pair of elements.
+
+        Returns:
+            Number of merges that joined previously separate sets
+        """
+        merged = 0
+        for first, second in pairs:
+            if self.union(first, second):
+                merged += 1
+        return merged
+
+    def groups(self, min_size: int = 2) -> List[List[int]]:
+        """
+        Return the sets with at least min_size elements.
+
+        Members are sorted and groups are ordered by their smallest member.
+        """
+        members: Dict[int, List[int]] = {}
+        for element in range(len(self._parent)):
+            root = self.find(element)
+            if self._size[root] >= min_size:
+                members.setdefault(root, []).append(element)
+        return sorted(members.values(), key=lambda group: group[0])
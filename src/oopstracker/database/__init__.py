@@ -4,11 +4,24 @@ Provides modular database components.
 """
 
 from .connection_manager import DatabaseConnectionManager
+from .connection_pool import PooledConnectionManager, PooledCursor
 from .schema_manager import SchemaManager
 from .decorators import with_retry
+from .file_tracking_repository import FileTrackingRepository
+from .code_record_repository import CodeRecordRepository
+from .code_blob_repository import CodeBlobRepository
+from .write_behind_queue import WriteBehindQueue
+from .shard_map import ShardMap
 
 __all__ = [
     'DatabaseConnectionManager',
+    'PooledConnectionManager',
+    'PooledCursor',
     'SchemaManager',
-    'with_retry'
+    'with_retry',
+    'FileTrackingRepository',
+    'CodeRecordRepository',
+    'CodeBlobRepository',
+    'WriteBehindQueue',
+    'ShardMap'
 ]
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Code blob repository.
+Content-addressed, zlib-compressed storage of source texts shared by code records.
+"""
+
+import hashlib
+import json
+import keyword
+import logging
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVEL = 6
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def identifier_text(text: str) -> str:
+    """
+    Distinct identifiers of a source text, as indexed by code search.
+    
+    Keywords are left out.
+    
+    Args:
+        text: Source text
+    
+    Returns:
+        Space-separated identifiers in order of first use
+    """
+    return " ".join(dict.fromkeys(
+        name for name in IDENTIFIER_PATTERN.findall(text) if not keyword.iskeyword(name)
+    ))
+
+
+def blob_row(text: str) -> Tuple[str, bytes, int, str]:
+    """
+    Row of the code_blobs table for a text.
+    
+    Args:
+        text: Source text
+    
+    Returns:
+        (content_hash, compressed data, uncompressed size in bytes, identifiers)
+    """
+    raw = text.encode('utf-8')
+    return (hashlib.sha256(raw).hexdigest(), zlib.compress(raw, COMPRESSION_LEVEL), len(raw),
+            identifier_text(text))
+
+
+def decompress_text(data: Union[bytes, str, None]) -> Optional[str]:
+    """
+    Text of a stored blob.
+    
+    Plain strings are returned unchanged, so columns that still hold
+    uncompressed text (rows written before code_blobs existed) read the same.
+    """
+    if data is None or isinstance(data, str):
+        return data
+    return zlib.decompress(data).decode('utf-8')
+
+
+class CodeBlobRepository:
+    """
+    Stores each distinct source text once, compressed, keyed by its hash.
+    
+    Identical helpers in many files and unchanged bodies re-stored after
+    a re-scan all point at the same blob, so duplicated text costs one
+    compressed copy instead of one full copy per row.
+    """
+    
+    def __init__(self, connection_manager):
+        """
+        Initialize repository.
+        
+        Args:
+            connection_manager: DatabaseConnectionManager instance
+        """
+        self.connection_manager = connection_manager
+        self._setup_queries()
+    
+    def _setup_queries(self):
+        """Pre-define all SQL queries so statements are reused from the cache."""
+        self.queries = {
+            'insert_blob': """
+                INSERT OR IGNORE INTO code_blobs (content_hash, data, size, identifiers) VALUES (?, ?, ?, ?)
+            """,
+            'select_blob': """
+                SELECT data FROM code_blobs WHERE content_hash = ?
+            """,
+            'select_blobs': """
+                SELECT content_hash, data FROM code_blobs
+                WHERE content_hash IN (SELECT value FROM json_each(?))
+            """,
+            'delete_unreferenced': """
+                DELETE FROM code_blobs
+                WHERE content_hash NOT IN (SELECT code_blob FROM code_records WHERE code_blob IS NOT NULL)
+                AND content_hash NOT IN (SELECT normalized_blob FROM code_records WHERE normalized_blob IS NOT NULL)
+            """,
+            'select_statistics': """
+                SELECT COUNT(*) AS blob_count,
+                       COALESCE(SUM(size), 0) AS raw_bytes,
+                       COALESCE(SUM(LENGTH(data)), 0) AS stored_bytes
+                FROM code_blobs
+            """
+        }
+    
+    def put_many(self, texts: Iterable[str]) -> List[str]:
+        """
+        Store texts that are not stored yet.
+        
+        Runs in the caller's transaction; wrap it in one together with the
+        rows referencing the blobs.
+        
+        Args:
+            texts: Source texts
+        
+        Returns:
+            Content hashes aligned with texts
+        """
+        rows = {}
+        hashes = []
+        for text in texts:
+            row = blob_row(text)
+            rows.setdefault(row[0], row)
+            hashes.append(row[0])
+        if rows:
+            self.connection_manager.executemany(self.queries['insert_blob'], list(rows.values()))
+        return hashes
+    
+    def get(self, content_hash: str) -> Optional[str]:
+        """
+        Get the text stored under a hash.
+        
+        Args:
+            content_hash: Hash returned by put_many
+        
+        Returns:
+            Decompressed text, or None if no blob has that hash
+        """
+        row = self.connection_manager.execute(self.queries['select_blob'], (content_hash,)).fetchone()
+        return decompress_text(row['data']) if row else None
+    
+    def get_many(self, content_hashes: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the texts of many hashes with a single query.
+        
+        Args:
+            content_hashes: Hashes returned by put_many
+        
+        Returns:
+            Mapping from stored hash to decompressed text
+        """
+        cursor = self.connection_manager.execute(
+            self.queries['select_blobs'], (json.dumps(list(content_hashes)),)
+        )
+        return {row['content_hash']: decompress_text(row['data']) for row in cursor.fetchall()}
+    
+    def delete_unreferenced(self) -> int:
+        """
+        Delete blobs no code record refers to any more.
+        
+        Returns:
+            Number of deleted blobs
+        """
+        with self.connection_manager.transaction():
+            cursor = self.connection_manager.execute(self.queries['delete_unreferenced'])
+        if cursor.rowcount:
+            logger.info(f"Deleted {cursor.rowcount} unreferenced code blobs")
+        return cursor.rowcount
+    
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        Get blob statistics.
+        
+        Returns:
+            Dictionary with the blob count and the uncompressed and stored
+            sizes in bytes
+        """
+        row = self.connection_manager.execute(self.queries['select_statistics']).fetchone()
+        return {
+            'blob_count': row['blob_count'],
+            'raw_bytes': row['raw_bytes'],
+            'stored_bytes': row['stored_bytes']
+        }
@@ -0,0 +1,356 @@
+"""
+AST code record repository.
+Stores code records together with the CodeUnit features they were built from.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..ast_analyzer import CodeUnit
+from ..exceptions import ConfigurationError
+from ..models import CodeRecord
+from .schema_manager import SchemaManager
+
+logger = logging.getLogger(__name__)
+
+RECORD_COLUMNS = ("id, code_hash, code_content, function_name, file_path, timestamp, simhash, unit_type, "
+                  "start_line, end_line, complexity_score, ast_structure, dependencies, metadata")
+RECORD_COLUMN_NAMES = tuple(RECORD_COLUMNS.split(", "))
+
+# Sort key of iter_rows, backed by idx_ast_keyset
+KEYSET_COLUMNS = ("file_path", "start_line", "id")
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_ARRAYSIZE = 100
+
+
+def _keyset_condition(columns: Sequence[str], key: Sequence[Any]) -> Tuple[str, List[Any]]:
+    """
+    SQL condition selecting rows that sort after key on columns (NULLs first).
+    
+    A key without NULLs becomes one row-value comparison, which SQLite
+    answers with an index seek. NULLs compare as unknown, so keys holding
+    them are expanded column by column.
+    """
+    if None not in key:
+        return f"({', '.join(columns)}) > ({', '.join('?' * len(key))})", list(key)
+    
+    column, value = columns[0], key[0]
+    params = [] if value is None else [value]
+    after = f"{column} IS NOT NULL" if value is None else f"{column} > ?"
+    if len(columns) == 1:
+        return after, params
+    equal = f"{column} IS NULL" if value is None else f"{column} = ?"
+    rest, rest_params = _keyset_condition(columns[1:], key[1:])
+    return f"({after} OR ({equal} AND {rest}))", params + params + rest_params
+
+
+class CodeRecordRepository:
+    """
+    Persists (CodeRecord, CodeUnit) pairs in the ast_code_records table.
+    
+    Records are keyed by code hash; inserting an already stored hash is a
+    no-op. Bulk inserts run as one executemany inside a single transaction.
+    """
+    
+    def __init__(self, connection_manager, hash_algorithm: Optional[str] = None):
+        """
+        Initialize repository.
+        
+        Args:
+            connection_manager: DatabaseConnectionManager instance
+            hash_algorithm: Feature hash algorithm of the simhashes written,
+                unless an insert names its own; recorded in (or checked
+                against) the database on the first simhash write
+        """
+        self.connection_manager = connection_manager
+        self.hash_algorithm = hash_algorithm
+        self._checked_algorithms = set()
+        self._setup_queries()
+    
+    def _setup_queries(self):
+        """Pre-define all SQL queries so statements are reused from the cache."""
+        self.queries = {
+            'insert_record': """
+                INSERT OR IGNORE INTO ast_code_records
+                (code_hash, code_content, function_name, file_path, timestamp, simhash, unit_type,
+                 start_line, end_line, complexity_score, ast_structure, dependencies, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            'select_by_file_path': f"""
+                SELECT {RECORD_COLUMNS} FROM ast_code_records WHERE file_path = ? ORDER BY start_line
+            """,
+            'delete_by_file_path': """
+                DELETE FROM ast_code_records WHERE file_path = ?
+            """,
+            'delete_by_file_paths': """
+                DELETE FROM ast_code_records WHERE file_path IN (SELECT value FROM json_each(?))
+            """,
+            'select_any_record': """
+                SELECT 1 FROM ast_code_records LIMIT 1
+            """,
+            'select_statistics': """
+                SELECT name, value FROM stats WHERE name IN (
+                    'ast_code_records.total_records', 'ast_code_records.total_files',
+                    'ast_code_records.total_functions', 'ast_code_records.total_classes',
+                    'ast_code_records.complexity_sum', 'ast_code_records.complexity_count'
+                )
+            """
+        }
+    
+    def insert_record(self, record: CodeRecord, unit: CodeUnit, hash_algorithm: Optional[str] = None) -> bool:
+        """
+        Insert a code record and its unit.
+        
+        Args:
+            record: CodeRecord to insert
+            unit: CodeUnit with AST data
+            hash_algorithm: Algorithm of the calculator that produced the
+                simhash (default: the repository's)
+        
+        Returns:
+            True if inserted, False if the code hash already exists
+        """
+        return self.insert_records([(record, unit)], hash_algorithm) == 1
+    
+    def insert_records(self, pairs: Iterable[Tuple[CodeRecord, CodeUnit]],
+                       hash_algorithm: Optional[str] = None) -> int:
+        """
+        Insert many (CodeRecord, CodeUnit) pairs in one transaction.
+        
+        Args:
+            pairs: Records with the units they were built from
+            hash_algorithm: Algorithm of the calculator that produced the
+                simhashes (default: the repository's)
+        
+        Returns:
+            Number of newly inserted records
+        
+        Raises:
+            ConfigurationError: If simhashes are written without an algorithm
+                or with another one than the database is bound to
+        """
+        rows = [self._to_row(record, unit) for record, unit in pairs]
+        if not rows:
+            return 0
+        if any(row[5] is not None for row in rows):
+            self._check_hash_algorithm(hash_algorithm or self.hash_algorithm)
+        
+        with self.connection_manager.transaction():
+            # rowcount leaves out the rows the statistics triggers touch
+            cursor = self.connection_manager.executemany(self.queries['insert_record'], rows)
+        return cursor.rowcount
+    
+    def get_all_records(self) -> List[Tuple[CodeRecord, CodeUnit]]:
+        """
+        Get all records with their corresponding CodeUnits.
+        
+        Returns:
+            List of (CodeRecord, CodeUnit) tuples ordered by file and line
+        """
+        return list(self.iter_records())
+    
+    def iter_records(self, page_size: int = DEFAULT_PAGE_SIZE,
+                     arraysize: int = DEFAULT_ARRAYSIZE) -> Iterator[Tuple[CodeRecord, CodeUnit]]:
+        """
+        Iterate over all records with their CodeUnits, ordered by file and line.
+        
+        Args:
+            page_size: Rows fetched per keyset page
+            arraysize: Rows fetched from SQLite per fetchmany call
+        
+        Yields:
+            (CodeRecord, CodeUnit) tuples
+        """
+        for row in self.iter_rows(page_size=page_size, arraysize=arraysize):
+            yield self._from_row(row)
+    
+    def iter_rows(self, columns: Optional[Sequence[str]] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                  arraysize: int = DEFAULT_ARRAYSIZE) -> Iterator[Any]:
+        """
+        Stream rows page by page with keyset pagination.
+        
+        Each page continues after the (file_path, start_line, id) of the
+        last row instead of skipping an OFFSET, so deep pages cost the same
+        as the first one. Only the projected columns are read, so callers
+        that need hashes never pull source text.
+        
+        Args:
+            columns: Columns to select (default: all of RECORD_COLUMNS); the
+                keyset columns are always selected as well
+            page_size: Rows fetched per keyset page
+            arraysize: Rows fetched from SQLite per fetchmany call
+        
+        Yields:
+            sqlite3.Row objects ordered by file_path, start_line and id
+        
+        Raises:
+            ValueError: If an unknown column is requested
+        """
+        columns = list(RECORD_COLUMN_NAMES if columns is None else columns)
+        unknown = set(columns) - set(RECORD_COLUMN_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown ast_code_records columns: {sorted(unknown)}")
+        selected = ", ".join(columns + [column for column in KEYSET_COLUMNS if column not in columns])
+        order = ", ".join(KEYSET_COLUMNS)
+        
+        key = None
+        while True:
+            if key is None:
+                condition, params = "1", []
+            else:
+                condition, params = _keyset_condition(KEYSET_COLUMNS, key)
+            cursor = self.connection_manager.execute(
+                f"SELECT {selected} FROM ast_code_records WHERE {condition} ORDER BY {order} LIMIT ?",
+                tuple(params) + (page_size,)
+            )
+            count = 0
+            last_row = None
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                if not rows:
+                    break
+                count += len(rows)
+                last_row = rows[-1]
+                yield from rows
+            if count < page_size:
+                return
+            key = tuple(last_row[column] for column in KEYSET_COLUMNS)
+    
+    def get_by_file_path(self, file_path: str) -> List[Tuple[CodeRecord, CodeUnit]]:
+        """
+        Get all records of a file.
+        
+        Args:
+            file_path: File path to search for
+        
+        Returns:
+            List of (CodeRecord, CodeUnit) tuples ordered by line
+        """
+        cursor = self.connection_manager.execute(self.queries['select_by_file_path'], (file_path,))
+        return [self._from_row(row) for row in cursor.fetchall()]
+    
+    def delete_by_file_path(self, file_path: str) -> int:
+        """
+        Delete all records of a file.
+        
+        Args:
+            file_path: File path to delete records for
+        
+        Returns:
+            Number of deleted records
+        """
+        with self.connection_manager.transaction():
+            cursor = self.connection_manager.execute(self.queries['delete_by_file_path'], (file_path,))
+        return cursor.rowcount
+    
+    def delete_by_file_paths(self, file_paths: Iterable[str]) -> int:
+        """
+        Delete all records of many files with a single statement.
+        
+        Args:
+            file_paths: File paths to delete records for
+        
+        Returns:
+            Number of deleted records
+        """
+        with self.connection_manager.transaction():
+            cursor = self.connection_manager.execute(
+                self.queries['delete_by_file_paths'], (json.dumps(list(file_paths)),)
+            )
+        return cursor.rowcount
+    
+    def clear_all(self):
+        """Delete all records."""
+        with self.connection_manager.transaction():
+            self.connection_manager.execute("DELETE FROM ast_code_records")
+    
+    def has_any_records(self) -> bool:
+        """Check whether any record is stored."""
+        return self.connection_manager.execute(self.queries['select_any_record']).fetchone() is not None
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get record statistics.
+        
+        Read from the trigger-maintained stats table, so the cost does not
+        grow with the number of records.
+        
+        Returns:
+            Dictionary with record, file, function and class counts and the
+            average complexity
+        """
+        cursor = self.connection_manager.execute(self.queries['select_statistics'])
+        stats = {row['name'].split('.', 1)[1]: row['value'] for row in cursor.fetchall()}
+        complexity_count = stats.get('complexity_count', 0)
+        return {
+            'total_records': stats.get('total_records', 0),
+            'total_files': stats.get('total_files', 0),
+            'total_functions': stats.get('total_functions', 0),
+            'total_classes': stats.get('total_classes', 0),
+            'average_complexity': round(stats.get('complexity_sum', 0) / complexity_count, 2)
+                                  if complexity_count else 0
+        }
+    
+    def _check_hash_algorithm(self, algorithm: Optional[str]):
+        """Record or verify the algorithm of simhashes about to be written."""
+        if algorithm is None:
+            raise ConfigurationError("Simhashes must be written with the algorithm that produced them")
+        if algorithm not in self._checked_algorithms:
+            SchemaManager(self.connection_manager).ensure_simhash_algorithm(algorithm)
+            self._checked_algorithms.add(algorithm)
+    
+    @staticmethod
+    def _to_row(record: CodeRecord, unit: CodeUnit) -> tuple:
+        """Column values of a record and its unit."""
+        code_content = record.code_content if record.code_content is not None else unit.source_code
+        if not record.code_hash:
+            record.code_content = code_content
+            record.generate_hash()
+        timestamp = record.timestamp.isoformat() if isinstance(record.timestamp, datetime) else record.timestamp
+        simhash = record.simhash if record.simhash is not None else unit.simhash
+        return (
+            record.code_hash,
+            code_content,
+            record.function_name or unit.name,
+            record.file_path or unit.file_path,
+            timestamp,
+            str(simhash) if simhash is not None else None,
+            unit.type,
+            unit.start_line,
+            unit.end_line,
+            unit.complexity_score,
+            unit.ast_structure,
+            json.dumps(unit.dependencies),
+            json.dumps(record.metadata or {})
+        )
+    
+    @staticmethod
+    def _from_row(row) -> Tuple[CodeRecord, CodeUnit]:
+        """Rebuild a record and its unit from a row of RECORD_COLUMNS."""
+        simhash = int(row['simhash']) if row['simhash'] is not None else None
+        record = CodeRecord(
+            id=row['id'],
+            code_hash=row['code_hash'],
+            code_content=row['code_content'],
+            function_name=row['function_name'],
+            file_path=row['file_path'],
+            timestamp=datetime.fromisoformat(row['timestamp']),
+            metadata=json.loads(row['metadata']) if row['metadata'] else {},
+            simhash=simhash
+        )
+        unit = CodeUnit(
+            name=row['function_name'],
+            type=row['unit_type'],
+            source_code=row['code_content'],
+            start_line=row['start_line'],
+            end_line=row['end_line'],
+            file_path=row['file_path'],
+            ast_structure=row['ast_structure'],
+            complexity_score=row['complexity_score'],
+            dependencies=json.loads(row['dependencies']) if row['dependencies'] else [],
+            simhash=simhash
+        )
+        return record, unit
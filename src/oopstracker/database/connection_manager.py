@@ -37,7 +37,7 @@ class DatabaseConnectionManager:
     def _create_connection(self) -> sqlite3.Connection:
         """Create and configure a new database connection."""
         try:
-            conn = sqlite3.connect(str(self.db_path))
+            conn = self._connect()
             conn.row_factory = sqlite3.Row  # Enable column access by name
             
             # Enable foreign keys
@@ -57,6 +57,10 @@ class DatabaseConnectionManager:
             logger.error(f"Failed to create database connection: {e}")
             raise
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the underlying sqlite3 connection."""
+        return sqlite3.connect(str(self.db_path))
+    
     def execute(self, query: str, params: Optional[tuple] = None) -> sqlite3.Cursor:
         """
         Execute a database query.
@@ -73,6 +77,19 @@ class DatabaseConnectionManager:
             return cursor.execute(query, params)
         return cursor.execute(query)
     
+    def executemany(self, query: str, params_seq) -> sqlite3.Cursor:
+        """
+        Execute a query once per parameter tuple in a single call.
+        
+        Args:
+            query: SQL query to execute
+            params_seq: Iterable of query parameter tuples
+        
+        Returns:
+            Cursor of the executed statement
+        """
+        return self.connection.cursor().executemany(query, params_seq)
+    
     def commit(self):
         """Commit current transaction."""
         if self._connection:
@@ -84,13 +101,39 @@ class DatabaseConnectionManager:
             self._connection.rollback()
     
     @contextmanager
-    def transaction(self):
+    def reader(self, timeout: Optional[float] = None):
+        """
+        Context manager yielding a connection for read-only queries.
+        
+        The single connection is shared; PooledConnectionManager hands out
+        a separate read-only connection instead.
+        
+        Args:
+            timeout: Unused; accepted for compatibility with pooled managers
+        """
+        yield self.connection
+    
+    def _begin_immediate(self):
+        """Start a transaction holding the database write lock, unless one is open."""
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN IMMEDIATE")
+    
+    @contextmanager
+    def transaction(self, immediate: bool = False):
         """
         Context manager for database transactions.
         
         Automatically commits on success, rolls back on error.
+        
+        Args:
+            immediate: Take the write lock up front, so rows read in the
+                transaction cannot be changed by another process before
+                its writes. Otherwise sqlite3 only begins the transaction
+                at the first write.
         """
         try:
+            if immediate:
+                self._begin_immediate()
             yield self
             self.commit()
         except Exception:
@@ -0,0 +1,427 @@
+"""
+Pooled database connections.
+One writer connection plus read-only WAL readers shared across threads.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from ..exceptions import PoolTimeoutError
+from .connection_manager import DatabaseConnectionManager
+
+logger = logging.getLogger(__name__)
+
+# Statements tried on a reader unless the calling thread holds the writer; a
+# WITH can also start a write, which the reader refuses with SQLITE_READONLY
+READ_STATEMENTS = ("SELECT", "WITH", "EXPLAIN")
+
+# Rows fetched when a read starts; results that fit return the reader at once
+PREFETCH_ROWS = 256
+
+
+class PooledCursor:
+    """
+    Cursor of a read running on a pooled reader.
+    
+    The first PREFETCH_ROWS rows are fetched right away, and a result that
+    fits gives the reader back to the pool immediately. Larger results keep
+    the reader checked out while the caller fetches, so fetchmany() streams
+    them page by page; the reader is returned once the rows run out or the
+    cursor is closed.
+    """
+    
+    def __init__(self, cursor: sqlite3.Cursor, release: Callable[[], None]):
+        self.description = cursor.description
+        self.rowcount = cursor.rowcount
+        self.lastrowid = cursor.lastrowid
+        self.arraysize = cursor.arraysize
+        self._cursor: Optional[sqlite3.Cursor] = cursor
+        self._release = release
+        self._rows = deque(cursor.fetchmany(PREFETCH_ROWS))
+        if len(self._rows) < PREFETCH_ROWS:
+            self.close()
+    
+    @property
+    def attached(self) -> bool:
+        """Whether the cursor still holds its reader."""
+        return self._cursor is not None
+    
+    def fetchone(self) -> Optional[Any]:
+        if self._rows:
+            return self._rows.popleft()
+        if self._cursor is None:
+            return None
+        row = self._cursor.fetchone()
+        if row is None:
+            self.close()
+        return row
+    
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        size = self.arraysize if size is None else size
+        rows = [self._rows.popleft() for _ in range(min(size, len(self._rows)))]
+        if len(rows) < size and self._cursor is not None:
+            missing = size - len(rows)
+            fetched = self._cursor.fetchmany(missing)
+            rows.extend(fetched)
+            if len(fetched) < missing:
+                self.close()
+        return rows
+    
+    def fetchall(self) -> List[Any]:
+        rows = list(self._rows)
+        self._rows.clear()
+        if self._cursor is not None:
+            rows.extend(self._cursor.fetchall())
+            self.close()
+        return rows
+    
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+    
+    def close(self):
+        """Give the reader back to the pool; buffered rows stay readable."""
+        cursor, self._cursor = self._cursor, None
+        if cursor is not None:
+            cursor.close()
+            self._release()
+    
+    def __del__(self):
+        self.close()
+
+
+class PooledConnectionManager(DatabaseConnectionManager):
+    """
+    Connection manager safe to share between threads.
+    
+    Writes go through a single writer connection. The first write statement
+    of a thread makes it the writer's owner until it commits or rolls back,
+    so transactions of different threads never interleave on the handle.
+    Reads of other threads are served by up to ``readers`` read-only
+    connections, which WAL mode lets run alongside the writer. A thread that
+    owns the writer reads through it and sees its own uncommitted changes.
+    """
+    
+    def __init__(self, db_path: str = "oopstracker_ast.db", readers: int = 4,
+                 checkout_timeout: float = 5.0):
+        """
+        Initialize pooled connection manager.
+        
+        Args:
+            db_path: Path to SQLite database file
+            readers: Maximum number of read-only connections; in-memory
+                databases cannot be shared and always read through the writer
+            checkout_timeout: Seconds to wait for a connection before
+                raising PoolTimeoutError
+        """
+        super().__init__(db_path)
+        self.max_readers = 0 if str(db_path) == ":memory:" else max(0, readers)
+        self.checkout_timeout = checkout_timeout
+        
+        self._connect_lock = threading.Lock()
+        self._writer_lock = threading.Lock()
+        self._writer_owner: Optional[int] = None
+        self._transaction_depth = 0
+        
+        self._pool_lock = threading.Lock()
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_in_use = 0
+        self._stats = {
+            'reader_checkouts': 0,
+            'reader_waits': 0,
+            'reader_timeouts': 0,
+            'reader_wait_seconds': 0.0,
+            'peak_readers_in_use': 0,
+            'writer_acquisitions': 0,
+            'writer_waits': 0,
+            'writer_timeouts': 0,
+            'writer_wait_seconds': 0.0
+        }
+    
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get or create the writer connection."""
+        if self._connection is None:
+            with self._connect_lock:
+                if self._connection is None:
+                    self._connection = self._create_connection()
+        return self._connection
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the writer, usable from whichever thread owns it."""
+        return sqlite3.connect(str(self.db_path), check_same_thread=False)
+    
+    def _create_reader(self) -> sqlite3.Connection:
+        """Open a read-only connection to the database file."""
+        # The writer creates the file and switches it to WAL first
+        self.connection
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        logger.debug(f"Opened reader {len(self._readers) + 1}/{self.max_readers}: {self.db_path}")
+        return conn
+    
+    def _owns_writer(self) -> bool:
+        return self._writer_owner == threading.get_ident()
+    
+    def _acquire_writer(self, timeout: Optional[float] = None) -> bool:
+        """
+        Make the calling thread the owner of the writer.
+        
+        Returns:
+            False if the thread already owned it
+        
+        Raises:
+            PoolTimeoutError: If another thread kept the writer for too long
+        """
+        if self._owns_writer():
+            return False
+        
+        waited = 0.0
+        if not self._writer_lock.acquire(blocking=False):
+            start = time.perf_counter()
+            acquired = self._writer_lock.acquire(
+                timeout=self.checkout_timeout if timeout is None else timeout
+            )
+            waited = time.perf_counter() - start
+            with self._pool_lock:
+                self._stats['writer_waits'] += 1
+                self._stats['writer_wait_seconds'] += waited
+                if not acquired:
+                    self._stats['writer_timeouts'] += 1
+            if not acquired:
+                raise PoolTimeoutError(f"Timed out after {waited:.2f}s waiting for the writer of {self.db_path}")
+        
+        self._writer_owner = threading.get_ident()
+        with self._pool_lock:
+            self._stats['writer_acquisitions'] += 1
+        return True
+    
+    def _release_writer(self):
+        self._writer_owner = None
+        self._writer_lock.release()
+    
+    def _release_writer_if_idle(self):
+        """Release the writer once its owner has no open transaction left."""
+        if (self._owns_writer() and self._transaction_depth == 0
+                and not (self._connection is not None and self._connection.in_transaction)):
+            self._release_writer()
+    
+    @staticmethod
+    def _is_read(query: str) -> bool:
+        words = query.lstrip().split(None, 1)
+        return bool(words) and words[0].upper() in READ_STATEMENTS
+    
+    @contextmanager
+    def reader(self, timeout: Optional[float] = None):
+        """
+        Context manager checking out a read-only connection.
+        
+        Args:
+            timeout: Seconds to wait for a free reader (default: checkout_timeout)
+        
+        Raises:
+            PoolTimeoutError: If every reader stayed checked out for too long
+        """
+        if self.max_readers == 0 or self._owns_writer():
+            # Read-your-writes for the writer's owner; in-memory databases
+            # have nothing to pool
+            acquired = self._acquire_writer(timeout)
+            try:
+                yield self.connection
+            finally:
+                if acquired:
+                    self._release_writer_if_idle()
+            return
+        
+        conn = self._checkout_reader(timeout)
+        try:
+            yield conn
+        finally:
+            self._return_reader(conn)
+    
+    def _return_reader(self, conn: sqlite3.Connection):
+        """Put a checked out reader back into the pool."""
+        with self._pool_lock:
+            if conn not in self._readers:
+                # Closed with the pool while a cursor still held it
+                return
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers_in_use -= 1
+        self._idle_readers.put(conn)
+    
+    def _checkout_reader(self, timeout: Optional[float]) -> sqlite3.Connection:
+        """Take an idle reader, open a new one, or wait for one to be returned."""
+        conn = None
+        with self._pool_lock:
+            try:
+                conn = self._idle_readers.get_nowait()
+            except queue.Empty:
+                if len(self._readers) < self.max_readers:
+                    conn = self._create_reader()
+                    self._readers.append(conn)
+            if conn is not None:
+                self._note_checkout()
+                return conn
+        
+        start = time.perf_counter()
+        try:
+            conn = self._idle_readers.get(timeout=self.checkout_timeout if timeout is None else timeout)
+        except queue.Empty:
+            conn = None
+        waited = time.perf_counter() - start
+        with self._pool_lock:
+            self._stats['reader_waits'] += 1
+            self._stats['reader_wait_seconds'] += waited
+            if conn is None:
+                self._stats['reader_timeouts'] += 1
+                raise PoolTimeoutError(
+                    f"Timed out after {waited:.2f}s waiting for one of {self.max_readers} readers of {self.db_path}"
+                )
+            self._note_checkout()
+        return conn
+    
+    def _note_checkout(self):
+        """Update checkout metrics; the caller holds the pool lock."""
+        self._readers_in_use += 1
+        self._stats['reader_checkouts'] += 1
+        self._stats['peak_readers_in_use'] = max(self._stats['peak_readers_in_use'], self._readers_in_use)
+    
+    def execute(self, query: str, params: Optional[tuple] = None):
+        """
+        Execute a database query on a reader or the writer.
+        
+        Reads of threads that do not own the writer run on a pooled reader
+        and return a PooledCursor, which holds the reader until its rows are
+        consumed or it is closed. Everything else runs on the writer, which
+        the calling thread keeps until its transaction is committed or
+        rolled back; so do statements that looked like reads but were
+        refused by the read-only reader, such as a WITH ... INSERT.
+        
+        Args:
+            query: SQL query to execute
+            params: Query parameters
+        
+        Returns:
+            Cursor with query results
+        """
+        if self._is_read(query) and self.max_readers > 0 and not self._owns_writer():
+            conn = self._checkout_reader(None)
+            try:
+                cursor = conn.execute(query, params or ())
+            except sqlite3.OperationalError as e:
+                self._return_reader(conn)
+                if e.sqlite_errorcode != sqlite3.SQLITE_READONLY:
+                    raise
+            except Exception:
+                self._return_reader(conn)
+                raise
+            else:
+                return PooledCursor(cursor, lambda: self._return_reader(conn))
+        
+        self._acquire_writer()
+        try:
+            return super().execute(query, params)
+        finally:
+            self._release_writer_if_idle()
+    
+    def executemany(self, query: str, params_seq) -> sqlite3.Cursor:
+        """
+        Execute a query once per parameter tuple on the writer.
+        
+        Args:
+            query: SQL query to execute
+            params_seq: Iterable of query parameter tuples
+        
+        Returns:
+            Cursor of the executed statement
+        """
+        self._acquire_writer()
+        try:
+            return super().executemany(query, params_seq)
+        finally:
+            self._release_writer_if_idle()
+    
+    def commit(self):
+        """Commit the writer's transaction and release the writer."""
+        acquired = self._acquire_writer()
+        try:
+            super().commit()
+        finally:
+            if acquired or self._transaction_depth == 0:
+                self._release_writer_if_idle()
+    
+    def rollback(self):
+        """Roll back the writer's transaction and release the writer."""
+        acquired = self._acquire_writer()
+        try:
+            super().rollback()
+        finally:
+            if acquired or self._transaction_depth == 0:
+                self._release_writer_if_idle()
+    
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """
+        Context manager holding the writer for a whole transaction.
+        
+        Automatically commits on success, rolls back on error.
+        
+        Args:
+            immediate: Also take the database write lock up front (see
+                DatabaseConnectionManager.transaction)
+        """
+        self._acquire_writer()
+        self._transaction_depth += 1
+        try:
+            if immediate:
+                self._begin_immediate()
+            yield self
+            super().commit()
+        except Exception:
+            super().rollback()
+            raise
+        finally:
+            self._transaction_depth -= 1
+            self._release_writer_if_idle()
+    
+    def get_pool_statistics(self) -> Dict[str, Any]:
+        """
+        Get pool utilization metrics.
+        
+        Returns:
+            Dictionary with reader and writer counters, wait times and the
+            share of readers currently checked out
+        """
+        with self._pool_lock:
+            stats = dict(self._stats)
+            stats['max_readers'] = self.max_readers
+            stats['readers_open'] = len(self._readers)
+            stats['readers_in_use'] = self._readers_in_use
+            stats['reader_utilization'] = (self._readers_in_use / self.max_readers
+                                           if self.max_readers else 0.0)
+            stats['writer_busy'] = self._writer_lock.locked()
+        return stats
+    
+    def close(self):
+        """Close the writer and all readers."""
+        with self._pool_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            self._idle_readers = queue.LifoQueue()
+            self._readers_in_use = 0
+        super().close()
@@ -0,0 +1,265 @@
+"""
+File tracking repository.
+Remembers scanned files so incremental scans only re-analyze changed ones.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _signature(stat: os.stat_result) -> str:
+    """Stat signature stored in file_tracking.stat_signature."""
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class FileTrackingRepository:
+    """
+    Persists the content hash and stat signature of every scanned file.
+    
+    A file whose size and modification time still match the stored stat
+    signature is unchanged without being read; only files whose signature
+    differs are hashed and compared by content.
+    """
+    
+    def __init__(self, connection_manager):
+        """
+        Initialize repository.
+        
+        Args:
+            connection_manager: DatabaseConnectionManager instance
+        """
+        self.connection_manager = connection_manager
+        self._setup_queries()
+    
+    def _setup_queries(self):
+        """Pre-define all SQL queries so statements are reused from the cache."""
+        self.queries = {
+            'upsert_file': """
+                INSERT INTO file_tracking
+                (file_path, last_modified, stat_signature, file_hash, scan_timestamp, unit_count)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(file_path) DO UPDATE SET
+                    last_modified = excluded.last_modified,
+                    stat_signature = excluded.stat_signature,
+                    file_hash = excluded.file_hash,
+                    scan_timestamp = excluded.scan_timestamp,
+                    unit_count = excluded.unit_count,
+                    deleted = 0
+            """,
+            'select_file_hash': """
+                SELECT file_hash FROM file_tracking WHERE file_path = ?
+            """,
+            'select_files': """
+                SELECT file_path, stat_signature, file_hash FROM file_tracking
+                WHERE file_path IN (SELECT value FROM json_each(?))
+            """,
+            'select_all_paths': """
+                SELECT file_path FROM file_tracking
+            """,
+            'delete_file': """
+                DELETE FROM file_tracking WHERE file_path = ?
+            """,
+            'mark_deleted': """
+                UPDATE file_tracking SET deleted = 1
+                WHERE deleted = 0 AND file_path IN (SELECT value FROM json_each(?))
+            """,
+            'mark_present': """
+                UPDATE file_tracking SET deleted = 0
+                WHERE deleted = 1 AND file_path IN (SELECT value FROM json_each(?))
+            """,
+            'select_deleted_count': """
+                SELECT value FROM stats WHERE name = 'file_tracking.deleted_files'
+            """
+        }
+    
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """
+        Content hash that file_hash values are compared against.
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            SHA-256 hex digest of the file bytes
+        """
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    
+    @staticmethod
+    def stat_signature(file_path: str) -> Optional[str]:
+        """Modification time and size of a file, or None if it cannot be stat'ed."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return _signature(stat)
+    
+    def get_file_hash(self, file_path: str) -> Optional[str]:
+        """
+        Get stored file hash for a given file path.
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            File hash if tracked, None otherwise
+        """
+        cursor = self.connection_manager.execute(self.queries['select_file_hash'], (file_path,))
+        row = cursor.fetchone()
+        return row['file_hash'] if row else None
+    
+    def update_file_tracking(self, file_path: str, file_hash: str, unit_count: int = 0) -> bool:
+        """
+        Insert or update tracking information of one file.
+        
+        Args:
+            file_path: Path to the file
+            file_hash: Hash of the file contents (see hash_file)
+            unit_count: Number of code units in the file
+        
+        Returns:
+            True if updated successfully
+        """
+        return self.update_file_tracking_batch([(file_path, file_hash, unit_count)]) == 1
+    
+    def update_file_tracking_batch(self, entries: Iterable[Tuple[str, str, int]]) -> int:
+        """
+        Insert or update tracking information of many files in one transaction.
+        
+        The modification time and stat signature of each file are taken
+        now, so call this right after the files have been hashed.
+        
+        Args:
+            entries: (file_path, file_hash, unit_count) tuples
+        
+        Returns:
+            Number of tracked files written
+        """
+        scan_timestamp = datetime.now().isoformat()
+        rows = []
+        for file_path, file_hash, unit_count in entries:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                rows.append((file_path, scan_timestamp, None, file_hash, scan_timestamp, unit_count))
+                continue
+            last_modified = datetime.fromtimestamp(stat.st_mtime).isoformat()
+            rows.append((file_path, last_modified, _signature(stat), file_hash, scan_timestamp, unit_count))
+        if not rows:
+            return 0
+        
+        with self.connection_manager.transaction():
+            self.connection_manager.executemany(self.queries['upsert_file'], rows)
+        return len(rows)
+    
+    def get_tracked_files(self, file_paths: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        Look up the tracking entries of many files with a single query.
+        
+        Args:
+            file_paths: Paths to look up
+        
+        Returns:
+            Mapping from tracked path to (stat signature, file hash)
+        """
+        cursor = self.connection_manager.execute(
+            self.queries['select_files'], (json.dumps(list(file_paths)),)
+        )
+        return {row['file_path']: (row['stat_signature'], row['file_hash']) for row in cursor.fetchall()}
+    
+    def get_changed_files(self, file_paths: List[str]) -> List[str]:
+        """
+        Get files that are new or have changed since they were last tracked.
+        
+        Tracked files that can no longer be stat'ed are marked deleted, and
+        tracked files seen again are unmarked.
+        
+        Args:
+            file_paths: Paths to check; files that no longer exist are skipped
+        
+        Returns:
+            Changed file paths, in input order
+        """
+        tracked = self.get_tracked_files(file_paths)
+        changed = []
+        missing = []
+        for file_path in file_paths:
+            signature = self.stat_signature(file_path)
+            if signature is None:
+                if file_path in tracked:
+                    missing.append(file_path)
+                continue
+            entry = tracked.get(file_path)
+            if entry is None:
+                changed.append(file_path)
+                continue
+            stored_signature, stored_hash = entry
+            if signature == stored_signature:
+                continue
+            try:
+                if self.hash_file(file_path) != stored_hash:
+                    changed.append(file_path)
+            except OSError as e:
+                logger.info(f"Cannot read {file_path}: {e}")
+        
+        self.mark_deleted_files(missing, [file_path for file_path in tracked if file_path not in missing])
+        return changed
+    
+    def remove_file_tracking(self, file_path: str) -> bool:
+        """
+        Stop tracking a file.
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            True if the file was tracked
+        """
+        with self.connection_manager.transaction():
+            cursor = self.connection_manager.execute(self.queries['delete_file'], (file_path,))
+        return cursor.rowcount > 0
+    
+    def check_deleted_files(self, current_files: Set[str]) -> List[str]:
+        """
+        Get tracked files that are not among the current files and mark them deleted.
+        
+        Args:
+            current_files: Set of currently existing file paths
+        
+        Returns:
+            Tracked paths missing from current_files
+        """
+        cursor = self.connection_manager.execute(self.queries['select_all_paths'])
+        paths = [row['file_path'] for row in cursor.fetchall()]
+        deleted = [file_path for file_path in paths if file_path not in current_files]
+        self.mark_deleted_files(deleted, [file_path for file_path in paths if file_path in current_files])
+        return deleted
+    
+    def mark_deleted_files(self, deleted: Iterable[str], present: Iterable[str] = ()):
+        """
+        Record which tracked files a scan found missing or present.
+        
+        Args:
+            deleted: Tracked paths that no longer exist
+            present: Tracked paths that exist (again)
+        """
+        deleted, present = list(deleted), list(present)
+        if not deleted and not present:
+            return
+        with self.connection_manager.transaction():
+            if deleted:
+                self.connection_manager.execute(self.queries['mark_deleted'], (json.dumps(deleted),))
+            if present:
+                self.connection_manager.execute(self.queries['mark_present'], (json.dumps(present),))
+    
+    def count_deleted_files(self) -> int:
+        """Number of tracked files the last scans found missing, read from the stats table."""
+        row = self.connection_manager.execute(self.queries['select_deleted_count']).fetchone()
+        return row['value'] if row else 0
@@ -4,18 +4,69 @@ Handles table creation, indexes, and schema versioning.
 """
 
 import logging
+import re
+import sqlite3
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from ..exceptions import ConfigurationError
 
 logger = logging.getLogger(__name__)
 
+# Counters kept in the stats table as '<table>.<name>': each adds up an
+# expression over the rows ({row} is NEW or OLD in the triggers)
+STATISTICS = {
+    'code_records': {
+        'total_records': "1",
+        'total_functions': "{row}.function_name IS NOT NULL"
+    },
+    'ast_code_records': {
+        'total_records': "1",
+        'total_functions': "{row}.unit_type IS 'function'",
+        'total_classes': "{row}.unit_type IS 'class'",
+        'complexity_sum': "COALESCE({row}.complexity_score, 0)",
+        'complexity_count': "{row}.complexity_score IS NOT NULL"
+    },
+    'file_tracking': {
+        'deleted_files': "{row}.deleted"
+    }
+}
+
+# Tables whose distinct file paths are counted as '<table>.total_files'
+FILE_COUNTED_TABLES = ('code_records', 'ast_code_records')
+
+# Bumped whenever code_records rows are deleted or rewritten; appends leave
+# it alone, so snapshots built from the table can be extended instead
+GENERATION_STAT = 'code_records.generation'
+
+# Full-text indexes of code_records, rowid = record id: trigrams of the
+# function names (substring matches) and the identifiers used in the code
+NAME_SEARCH_TABLE = 'name_search'
+TOKEN_SEARCH_TABLE = 'token_search'
+
+# Feature hash of simhashes stored before the algorithm was recorded
+LEGACY_SIMHASH_ALGORITHM = 'md5'
+
+# Tables with a simhash column
+SIMHASH_TABLES = ('code_records', 'ast_code_records')
+
 
 class SchemaManager:
     """
     Manages database schema creation and migration.
     """
     
-    SCHEMA_VERSION = "1.0"
+    # Bumped with every migration so needs_migration() reports older files:
+    # 1.1 INTEGER simhash with indexed band columns
+    # 1.2 compressed, deduplicated code_blobs
+    # 1.3 trigger-maintained stats tables
+    # 1.4 FTS5 code search tables
+    # 1.5 file_tracking.stat_signature
+    SCHEMA_VERSION = "1.5"
+    # Temporary name of a code_records table being rebuilt
+    REBUILT_TABLE = "code_records_rebuilt"
+    SIMHASH_ALGORITHM_KEY = "simhash_algorithm"
+    TOKEN_VOCABULARY_VERSION_KEY = "token_vocabulary_version"
     
     def __init__(self, connection_manager):
         """
@@ -26,24 +77,50 @@ class SchemaManager:
         """
         self.connection_manager = connection_manager
     
-    def initialize_schema(self):
-        """Create all database tables and indexes."""
+    def initialize_schema(self, vacuum: bool = False):
+        """
+        Create all database tables and indexes.
+        
+        Args:
+            vacuum: Vacuum the file after a migration freed pages. VACUUM
+                rewrites the whole file and blocks every other connection,
+                so it is left to callers that own the database.
+        """
         try:
-            self._create_tables()
+            self.create_tables()
+            self._migrate_columns()
+            self._migrate_file_stat_signatures()
+            self._migrate_simhash_columns()
+            self._migrate_code_blobs(vacuum=vacuum)
             self._create_indexes()
+            self._create_statistics()
+            self._create_code_search()
             self._initialize_metadata()
+            self._record_legacy_simhash_algorithm()
             logger.info("Database schema initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize schema: {e}")
             raise
     
-    def _create_tables(self):
-        """Create all database tables."""
+    def create_tables(self):
+        """
+        Create the database tables that do not exist yet.
+        
+        Existing tables are neither migrated nor indexed; for components
+        that only need their own tables, where initialize_schema() would
+        rebuild tables other connections are using.
+        """
         tables = [
+            self._get_code_blobs_table_sql(),
             self._get_code_records_table_sql(),
+            self._get_ast_code_records_table_sql(),
             self._get_classification_rules_table_sql(),
             self._get_file_tracking_table_sql(),
-            self._get_database_info_table_sql()
+            self._get_database_info_table_sql(),
+            self._get_parse_cache_table_sql(),
+            self._get_token_vocabulary_table_sql(),
+            self._get_stats_table_sql(),
+            self._get_stats_files_table_sql()
         ]
         
         for table_sql in tables:
@@ -55,13 +132,51 @@ class SchemaManager:
             CREATE TABLE IF NOT EXISTS code_records (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 code_hash TEXT UNIQUE NOT NULL,
-                code_content TEXT NOT NULL,
+                code_content TEXT,
                 normalized_code TEXT,
+                code_blob TEXT REFERENCES code_blobs(content_hash),
+                normalized_blob TEXT REFERENCES code_blobs(content_hash),
                 function_name TEXT,
                 file_path TEXT,
                 timestamp TEXT NOT NULL,
                 metadata TEXT,
-                simhash TEXT
+                simhash INTEGER,
+                simhash_band0 INTEGER,
+                simhash_band1 INTEGER,
+                simhash_band2 INTEGER,
+                simhash_band3 INTEGER
+            )
+        """
+    
+    def _get_code_blobs_table_sql(self) -> str:
+        """Get SQL for creating the content-addressed code blob table."""
+        return """
+            CREATE TABLE IF NOT EXISTS code_blobs (
+                content_hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                identifiers TEXT
+            )
+        """
+    
+    def _get_ast_code_records_table_sql(self) -> str:
+        """Get SQL for creating the AST code records table of ASTDatabaseManager."""
+        return """
+            CREATE TABLE IF NOT EXISTS ast_code_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code_hash TEXT UNIQUE NOT NULL,
+                code_content TEXT NOT NULL,
+                function_name TEXT,
+                file_path TEXT,
+                timestamp TEXT NOT NULL,
+                simhash TEXT,
+                unit_type TEXT,
+                start_line INTEGER,
+                end_line INTEGER,
+                complexity_score INTEGER,
+                ast_structure TEXT,
+                dependencies TEXT,
+                metadata TEXT
             )
         """
     
@@ -95,17 +210,220 @@ class SchemaManager:
                 file_path TEXT UNIQUE NOT NULL,
                 last_modified TEXT NOT NULL,
                 file_hash TEXT NOT NULL,
-                scan_timestamp TEXT NOT NULL
+                scan_timestamp TEXT NOT NULL,
+                unit_count INTEGER NOT NULL DEFAULT 0,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                stat_signature TEXT
+            )
+        """
+    
+    def _get_parse_cache_table_sql(self) -> str:
+        """Get SQL for creating the content-addressed parse cache table."""
+        return """
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                content_hash TEXT NOT NULL,
+                analyzer_version TEXT NOT NULL,
+                units TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (content_hash, analyzer_version)
+            )
+        """
+    
+    def _get_token_vocabulary_table_sql(self) -> str:
+        """Get SQL for creating the structure token vocabulary table."""
+        return """
+            CREATE TABLE IF NOT EXISTS token_vocabulary (
+                id INTEGER PRIMARY KEY,
+                token TEXT UNIQUE NOT NULL
             )
         """
     
+    def _get_stats_table_sql(self) -> str:
+        """Get SQL for creating the trigger-maintained statistics table."""
+        return """
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """
+    
+    def _get_stats_files_table_sql(self) -> str:
+        """Get SQL for creating the per-file record counts behind the total_files statistics."""
+        return """
+            CREATE TABLE IF NOT EXISTS stats_files (
+                table_name TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                record_count INTEGER NOT NULL,
+                PRIMARY KEY (table_name, file_path)
+            ) WITHOUT ROWID
+        """
+    
+    def _migrate_columns(self):
+        """Add columns introduced after a table was first created."""
+        added_columns = [
+            ("file_tracking", "unit_count", "INTEGER NOT NULL DEFAULT 0"),
+            ("file_tracking", "deleted", "INTEGER NOT NULL DEFAULT 0"),
+            ("file_tracking", "stat_signature", "TEXT"),
+            ("code_blobs", "identifiers", "TEXT")
+        ]
+        
+        for table_name, column_name, definition in added_columns:
+            cursor = self.connection_manager.execute(f"PRAGMA table_info({table_name})")
+            if column_name not in {row['name'] for row in cursor.fetchall()}:
+                self.connection_manager.execute(
+                    f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}"
+                )
+                logger.info(f"Added column {table_name}.{column_name}")
+    
+    def _migrate_file_stat_signatures(self):
+        """
+        Move stat signatures out of file_tracking.last_modified.
+        
+        FileTrackingRepository used to keep its "<mtime_ns>:<size>"
+        signature in last_modified, which otherwise holds timestamps. Such
+        rows get the signature in stat_signature and their scan time back
+        in last_modified.
+        """
+        with self.connection_manager.transaction():
+            cursor = self.connection_manager.execute("""
+                UPDATE file_tracking
+                SET stat_signature = last_modified, last_modified = scan_timestamp
+                WHERE stat_signature IS NULL AND last_modified GLOB '[0-9]*:[0-9]*'
+                    AND last_modified NOT GLOB '*[^0-9:]*'
+            """)
+        if cursor.rowcount > 0:
+            logger.info(f"Moved {cursor.rowcount} stat signatures to file_tracking.stat_signature")
+    
+    def _migrate_simhash_columns(self):
+        """
+        Convert code_records.simhash from TEXT to INTEGER with band columns.
+        
+        SQLite cannot change a column type in place, so the table is
+        rebuilt: rows are copied into a table with the current definition
+        and their simhashes are rewritten as signed 64-bit integers plus
+        the four indexed 16-bit bands.
+        """
+        from ..core.simhash.bands import BAND_COLUMNS, split_bands, to_signed64
+        
+        cursor = self.connection_manager.execute("PRAGMA table_info(code_records)")
+        columns = [row['name'] for row in cursor.fetchall()]
+        if BAND_COLUMNS[0] in columns:
+            return
+        
+        with self.connection_manager.transaction():
+            self._rebuild_code_records(columns, skipped=('simhash',))
+            
+            rows = []
+            cursor = self.connection_manager.execute(
+                f"SELECT id, simhash FROM {self.REBUILT_TABLE} WHERE simhash IS NOT NULL"
+            )
+            for row in cursor.fetchall():
+                try:
+                    simhash = int(row['simhash'])
+                except ValueError:
+                    logger.warning(f"Dropping unparseable simhash of code record {row['id']}")
+                    continue
+                rows.append((to_signed64(simhash), *split_bands(simhash), row['id']))
+            
+            assignments = ", ".join(f"{column} = ?" for column in ('simhash',) + BAND_COLUMNS)
+            self.connection_manager.executemany(
+                f"UPDATE code_records SET {assignments} WHERE id = ?", rows
+            )
+            self.connection_manager.execute(f"DROP TABLE {self.REBUILT_TABLE}")
+        logger.info(f"Migrated {len(rows)} code_records simhashes to INTEGER band columns")
+    
+    def _rebuild_code_records(self, columns: List[str], skipped: tuple = ()):
+        """
+        Recreate code_records with its current definition inside a transaction.
+        
+        SQLite cannot change column types or constraints in place. The old
+        table is renamed to REBUILT_TABLE and its rows are copied, except
+        for the skipped columns, which the caller fills from REBUILT_TABLE
+        before dropping it.
+        
+        Args:
+            columns: Columns of the existing table
+            skipped: Columns not copied as they are
+        """
+        copied = ", ".join(column for column in columns if column not in skipped)
+        # Explicit BEGIN so the DDL statements roll back with the copy
+        self.connection_manager.execute("BEGIN")
+        self.connection_manager.execute(f"ALTER TABLE code_records RENAME TO {self.REBUILT_TABLE}")
+        self.connection_manager.execute(self._get_code_records_table_sql())
+        self.connection_manager.execute(
+            f"INSERT INTO code_records ({copied}) SELECT {copied} FROM {self.REBUILT_TABLE}"
+        )
+    
+    def _migrate_code_blobs(self, batch_size: int = 1000, vacuum: bool = False):
+        """
+        Move code_records texts into compressed, deduplicated code_blobs.
+        
+        Tables from before code_blobs declare code_content NOT NULL and are
+        rebuilt first. Rows still holding plain text are then converted in
+        batches; the freed pages are reused by later writes, or returned to
+        the file system if vacuum is set.
+        
+        Args:
+            batch_size: Rows converted per statement batch
+            vacuum: Vacuum the file once rows were converted
+        """
+        from .code_blob_repository import CodeBlobRepository
+        
+        cursor = self.connection_manager.execute("PRAGMA table_info(code_records)")
+        columns = [row['name'] for row in cursor.fetchall()]
+        if 'code_blob' not in columns:
+            with self.connection_manager.transaction():
+                self._rebuild_code_records(columns)
+                self.connection_manager.execute(f"DROP TABLE {self.REBUILT_TABLE}")
+        
+        blobs = CodeBlobRepository(self.connection_manager)
+        converted = 0
+        last_id = 0
+        while True:
+            rows = self.connection_manager.execute("""
+                SELECT id, code_content, normalized_code FROM code_records
+                WHERE id > ? AND (code_content IS NOT NULL OR normalized_code IS NOT NULL)
+                ORDER BY id LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            
+            with self.connection_manager.transaction():
+                texts = [text for row in rows for text in (row['code_content'], row['normalized_code'])
+                         if text is not None]
+                hashes = iter(blobs.put_many(texts))
+                updates = []
+                for row in rows:
+                    code_blob = next(hashes) if row['code_content'] is not None else None
+                    normalized_blob = next(hashes) if row['normalized_code'] is not None else None
+                    updates.append((code_blob, normalized_blob, row['id']))
+                self.connection_manager.executemany("""
+                    UPDATE code_records
+                    SET code_content = NULL, normalized_code = NULL, code_blob = ?, normalized_blob = ?
+                    WHERE id = ?
+                """, updates)
+            converted += len(rows)
+            last_id = rows[-1]['id']
+        
+        if converted:
+            logger.info(f"Moved the texts of {converted} code records into code_blobs")
+            if vacuum:
+                self.connection_manager.execute("VACUUM")
+            else:
+                logger.info("Run VACUUM on the database to return the freed pages")
+    
     def _create_indexes(self):
         """Create database indexes for performance."""
         indexes = [
             ("idx_code_hash", "code_records", "code_hash"),
             ("idx_function_name", "code_records", "function_name"),
             ("idx_file_path", "code_records", "file_path"),
-            ("idx_simhash", "code_records", "simhash"),
+            ("idx_ast_file_path", "ast_code_records", "file_path"),
+            ("idx_ast_keyset", "ast_code_records", "file_path, start_line, id"),
+            ("idx_simhash_band0", "code_records", "simhash_band0"),
+            ("idx_simhash_band1", "code_records", "simhash_band1"),
+            ("idx_simhash_band2", "code_records", "simhash_band2"),
+            ("idx_simhash_band3", "code_records", "simhash_band3"),
             ("idx_file_tracking_path", "file_tracking", "file_path"),
             ("idx_file_tracking_hash", "file_tracking", "file_hash"),
             ("idx_classification_rules_type", "classification_rules", "rule_type")
@@ -115,6 +433,300 @@ class SchemaManager:
             sql = f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}({column_name})"
             self.connection_manager.execute(sql)
     
+    def _get_statistics_triggers(self) -> Dict[str, str]:
+        """Get SQL of the triggers keeping the stats table current, by trigger name."""
+        triggers = {
+            'stats_files_insert': """
+                CREATE TRIGGER IF NOT EXISTS stats_files_insert AFTER INSERT ON stats_files
+                BEGIN
+                    UPDATE stats SET value = value + 1 WHERE name = NEW.table_name || '.total_files';
+                END
+            """,
+            'stats_files_emptied': """
+                CREATE TRIGGER IF NOT EXISTS stats_files_emptied AFTER UPDATE OF record_count ON stats_files
+                WHEN NEW.record_count <= 0
+                BEGIN
+                    DELETE FROM stats_files WHERE table_name = NEW.table_name AND file_path = NEW.file_path;
+                END
+            """,
+            'stats_files_delete': """
+                CREATE TRIGGER IF NOT EXISTS stats_files_delete AFTER DELETE ON stats_files
+                BEGIN
+                    UPDATE stats SET value = value - 1 WHERE name = OLD.table_name || '.total_files';
+                END
+            """,
+            'stats_code_records_generation_delete': f"""
+                CREATE TRIGGER IF NOT EXISTS stats_code_records_generation_delete AFTER DELETE ON code_records
+                BEGIN
+                    UPDATE stats SET value = value + 1 WHERE name = '{GENERATION_STAT}';
+                END
+            """,
+            'stats_code_records_generation_update': f"""
+                CREATE TRIGGER IF NOT EXISTS stats_code_records_generation_update
+                AFTER UPDATE OF id, simhash, file_path, metadata ON code_records
+                BEGIN
+                    UPDATE stats SET value = value + 1 WHERE name = '{GENERATION_STAT}';
+                END
+            """
+        }
+        
+        for table_name, counters in STATISTICS.items():
+            columns = sorted({column for expression in counters.values()
+                              for column in re.findall(r"\{row\}\.(\w+)", expression)}
+                             | ({'file_path'} if table_name in FILE_COUNTED_TABLES else set()))
+            triggers[f"stats_{table_name}_insert"] = f"""
+                CREATE TRIGGER IF NOT EXISTS stats_{table_name}_insert AFTER INSERT ON {table_name}
+                BEGIN
+                {self._statistics_trigger_body(table_name, 'NEW', '+')}
+                END
+            """
+            triggers[f"stats_{table_name}_delete"] = f"""
+                CREATE TRIGGER IF NOT EXISTS stats_{table_name}_delete AFTER DELETE ON {table_name}
+                BEGIN
+                {self._statistics_trigger_body(table_name, 'OLD', '-')}
+                END
+            """
+            triggers[f"stats_{table_name}_update"] = f"""
+                CREATE TRIGGER IF NOT EXISTS stats_{table_name}_update
+                AFTER UPDATE OF {', '.join(columns)} ON {table_name}
+                BEGIN
+                {self._statistics_trigger_body(table_name, 'OLD', '-')}
+                {self._statistics_trigger_body(table_name, 'NEW', '+')}
+                END
+            """
+        return triggers
+    
+    @staticmethod
+    def _statistics_trigger_body(table_name: str, row: str, sign: str) -> str:
+        """Statements adding (sign '+') or removing (sign '-') one row of a table from the stats."""
+        counters = STATISTICS[table_name]
+        # One UPDATE for all counters of the table keeps the per-row cost low
+        cases = " ".join(f"WHEN '{table_name}.{name}' THEN ({expression.format(row=row)})"
+                         for name, expression in counters.items())
+        names = ", ".join(f"'{table_name}.{name}'" for name in counters)
+        statements = [f"UPDATE stats SET value = value {sign} (CASE name {cases} END) WHERE name IN ({names});"]
+        if table_name in FILE_COUNTED_TABLES and sign == '+':
+            statements.append(
+                f"INSERT INTO stats_files (table_name, file_path, record_count) "
+                f"SELECT '{table_name}', {row}.file_path, 1 WHERE {row}.file_path IS NOT NULL "
+                f"ON CONFLICT (table_name, file_path) DO UPDATE SET record_count = record_count + 1;"
+            )
+        elif table_name in FILE_COUNTED_TABLES:
+            statements.append(
+                f"UPDATE stats_files SET record_count = record_count - 1 "
+                f"WHERE table_name = '{table_name}' AND file_path = {row}.file_path;"
+            )
+        return "\n".join(statements)
+    
+    def _create_statistics(self):
+        """
+        Install the statistics triggers and fill the stats table.
+        
+        The counters are computed from the tables only when a trigger is
+        missing: on the first run against an existing database, or after a
+        table rebuild dropped the triggers together with the old table.
+        """
+        triggers = self._get_statistics_triggers()
+        cursor = self.connection_manager.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row['name'] for row in cursor.fetchall()}
+        if existing.issuperset(triggers):
+            return
+        
+        with self.connection_manager.transaction():
+            self.connection_manager.execute("BEGIN")
+            for trigger_sql in triggers.values():
+                self.connection_manager.execute(trigger_sql)
+            self._fill_statistics()
+        logger.info("Installed statistics triggers")
+    
+    def rebuild_statistics(self):
+        """Recompute every counter of the stats table from the tables themselves."""
+        with self.connection_manager.transaction():
+            self.connection_manager.execute("BEGIN")
+            self._fill_statistics()
+    
+    def _fill_statistics(self):
+        """Replace the stats and stats_files rows with freshly counted ones."""
+        # The rows may have changed while no trigger was counting
+        generation = self.get_generation() + 1
+        self.connection_manager.execute("DELETE FROM stats_files")
+        self.connection_manager.execute("DELETE FROM stats")
+        self.connection_manager.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?)", (GENERATION_STAT, generation)
+        )
+        for table_name, counters in STATISTICS.items():
+            for name, expression in counters.items():
+                self.connection_manager.execute(
+                    f"INSERT INTO stats (name, value) "
+                    f"SELECT '{table_name}.{name}', COALESCE(SUM({expression.format(row=table_name)}), 0) "
+                    f"FROM {table_name}"
+                )
+        for table_name in FILE_COUNTED_TABLES:
+            # The stats_files insert trigger counts each file into total_files
+            self.connection_manager.execute(
+                "INSERT INTO stats (name, value) VALUES (?, 0)", (f"{table_name}.total_files",)
+            )
+            self.connection_manager.execute(f"""
+                INSERT INTO stats_files (table_name, file_path, record_count)
+                SELECT '{table_name}', file_path, COUNT(*) FROM {table_name}
+                WHERE file_path IS NOT NULL GROUP BY file_path
+            """)
+    
+    def get_generation(self) -> int:
+        """
+        Get the code_records generation counter.
+        
+        Returns:
+            Counter that changes whenever rows are deleted or rewritten
+            (0 before the statistics triggers are installed)
+        """
+        row = self.connection_manager.execute(
+            "SELECT value FROM stats WHERE name = ?", (GENERATION_STAT,)
+        ).fetchone()
+        return row['value'] if row else 0
+    
+    def _get_code_search_tables_sql(self) -> List[str]:
+        """Get SQL for creating the code search full-text indexes."""
+        return [
+            # Names are read from code_records itself (external content)
+            f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {NAME_SEARCH_TABLE}
+                USING fts5(function_name, content = 'code_records', content_rowid = 'id',
+                           tokenize = 'trigram', columnsize = 0)
+            """,
+            # Identifiers live compressed in code_blobs, so the index keeps
+            # its own copy; one token per identifier keeps it small. Neither
+            # index ranks results, so no column sizes are stored
+            f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {TOKEN_SEARCH_TABLE}
+                USING fts5(identifiers, tokenize = "unicode61 tokenchars '_'", columnsize = 0)
+            """
+        ]
+    
+    def _get_code_search_triggers(self) -> Dict[str, str]:
+        """Get SQL of the triggers keeping the code search indexes in step with code_records."""
+        add_row = f"""
+                    INSERT INTO {NAME_SEARCH_TABLE} (rowid, function_name) VALUES (NEW.id, NEW.function_name);
+                    INSERT INTO {TOKEN_SEARCH_TABLE} (rowid, identifiers)
+                    SELECT NEW.id, identifiers FROM code_blobs WHERE content_hash = NEW.code_blob;
+        """
+        remove_row = f"""
+                    INSERT INTO {NAME_SEARCH_TABLE} ({NAME_SEARCH_TABLE}, rowid, function_name)
+                    VALUES ('delete', OLD.id, OLD.function_name);
+                    DELETE FROM {TOKEN_SEARCH_TABLE} WHERE rowid = OLD.id;
+        """
+        return {
+            'code_search_insert': f"""
+                CREATE TRIGGER IF NOT EXISTS code_search_insert AFTER INSERT ON code_records
+                BEGIN
+                {add_row}
+                END
+            """,
+            'code_search_delete': f"""
+                CREATE TRIGGER IF NOT EXISTS code_search_delete AFTER DELETE ON code_records
+                BEGIN
+                {remove_row}
+                END
+            """,
+            'code_search_update': f"""
+                CREATE TRIGGER IF NOT EXISTS code_search_update
+                AFTER UPDATE OF id, function_name, code_blob ON code_records
+                BEGIN
+                {remove_row}
+                {add_row}
+                END
+            """
+        }
+    
+    def _code_search_supported(self) -> bool:
+        """Whether this SQLite build has FTS5 with the trigram tokenizer."""
+        try:
+            self.connection_manager.execute(
+                "CREATE VIRTUAL TABLE temp.code_search_probe USING fts5(probe, tokenize = 'trigram')"
+            )
+        except sqlite3.OperationalError:
+            return False
+        self.connection_manager.execute("DROP TABLE temp.code_search_probe")
+        return True
+    
+    def _create_code_search(self):
+        """
+        Create the code search indexes, their triggers and their rows.
+        
+        The index is optional: without FTS5 (or its trigram tokenizer,
+        SQLite 3.34+) it is skipped and has_code_search() is False. As with
+        the statistics, rows are only filled when a trigger is missing.
+        """
+        triggers = self._get_code_search_triggers()
+        cursor = self.connection_manager.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row['name'] for row in cursor.fetchall()}
+        if self.has_code_search() and existing.issuperset(triggers):
+            return
+        if not self.has_code_search() and not self._code_search_supported():
+            logger.info("SQLite lacks FTS5 with the trigram tokenizer; code search is disabled")
+            return
+        
+        self._fill_blob_identifiers()
+        with self.connection_manager.transaction():
+            self.connection_manager.execute("BEGIN")
+            for table_sql in self._get_code_search_tables_sql():
+                self.connection_manager.execute(table_sql)
+            for trigger_sql in triggers.values():
+                self.connection_manager.execute(trigger_sql)
+            self._fill_code_search()
+        logger.info("Created code search indexes")
+    
+    def has_code_search(self) -> bool:
+        """Whether the code search full-text indexes exist."""
+        cursor = self.connection_manager.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+            (NAME_SEARCH_TABLE, TOKEN_SEARCH_TABLE)
+        )
+        return cursor.fetchone()[0] == 2
+    
+    def rebuild_code_search(self):
+        """Re-index every code record for code search."""
+        self._fill_blob_identifiers()
+        with self.connection_manager.transaction():
+            self.connection_manager.execute("BEGIN")
+            self._fill_code_search()
+    
+    def _fill_code_search(self):
+        """Re-index the names and identifiers of every record."""
+        self.connection_manager.execute(
+            f"INSERT INTO {NAME_SEARCH_TABLE} ({NAME_SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+        self.connection_manager.execute(f"DELETE FROM {TOKEN_SEARCH_TABLE}")
+        self.connection_manager.execute(f"""
+            INSERT INTO {TOKEN_SEARCH_TABLE} (rowid, identifiers)
+            SELECT r.id, b.identifiers FROM code_records r JOIN code_blobs b ON b.content_hash = r.code_blob
+        """)
+    
+    def _fill_blob_identifiers(self, batch_size: int = 1000):
+        """
+        Extract the identifiers of blobs stored before they were indexed.
+        
+        Args:
+            batch_size: Blobs decompressed per transaction
+        """
+        from .code_blob_repository import decompress_text, identifier_text
+        
+        filled = 0
+        while True:
+            rows = self.connection_manager.execute(
+                "SELECT rowid, data FROM code_blobs WHERE identifiers IS NULL LIMIT ?", (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+            with self.connection_manager.transaction():
+                self.connection_manager.executemany(
+                    "UPDATE code_blobs SET identifiers = ? WHERE rowid = ?",
+                    [(identifier_text(decompress_text(row['data'])), row['rowid']) for row in rows]
+                )
+            filled += len(rows)
+        if filled:
+            logger.info(f"Extracted identifiers of {filled} code blobs")
+    
     def _initialize_metadata(self):
         """Initialize database metadata."""
         # Insert schema version
@@ -142,4 +754,90 @@ class SchemaManager:
     def needs_migration(self) -> bool:
         """Check if database needs schema migration."""
         current_version = self.get_schema_version()
-        return current_version != self.SCHEMA_VERSION
\ No newline at end of file
+        return current_version != self.SCHEMA_VERSION
+    
+    def _get_info_value(self, key: str) -> Optional[str]:
+        """Get a value from the database_info table."""
+        cursor = self.connection_manager.execute(
+            "SELECT value FROM database_info WHERE key = ?",
+            (key,)
+        )
+        result = cursor.fetchone()
+        return result['value'] if result else None
+    
+    def _ensure_info_value(self, key: str, value: str, description: str):
+        """Record a database_info value, or verify it matches the recorded one."""
+        recorded = self._get_info_value(key)
+        if recorded is None:
+            self.connection_manager.execute(
+                "INSERT INTO database_info (key, value) VALUES (?, ?)",
+                (key, value)
+            )
+            self.connection_manager.commit()
+        elif recorded != value:
+            raise ConfigurationError(
+                f"Database {description} is '{recorded}', refusing to mix with '{value}'"
+            )
+    
+    def get_simhash_algorithm(self) -> Optional[str]:
+        """Get the feature hash algorithm stored simhashes were built with."""
+        return self._get_info_value(self.SIMHASH_ALGORITHM_KEY)
+    
+    def ensure_simhash_algorithm(self, algorithm: Optional[str] = None) -> str:
+        """
+        Record the simhash feature hash algorithm, or verify it matches.
+        
+        Simhashes computed with different feature hash backends are not
+        comparable, so a database (and every index built from it) is bound
+        to the first algorithm recorded.
+        
+        Args:
+            algorithm: Name of the feature hash algorithm in use; None uses
+                the recorded algorithm, or the default for an unbound database
+        
+        Returns:
+            The algorithm the database is bound to
+        
+        Raises:
+            ConfigurationError: If the database was built with another algorithm
+        """
+        if algorithm is None:
+            # Imported here: the simhash package imports this module
+            from ..core.simhash.feature_hash import DEFAULT_HASH_ALGORITHM
+            algorithm = self.get_simhash_algorithm() or DEFAULT_HASH_ALGORITHM
+        self._ensure_info_value(self.SIMHASH_ALGORITHM_KEY, algorithm, "simhash algorithm")
+        return algorithm
+    
+    def _record_legacy_simhash_algorithm(self):
+        """
+        Record md5 for databases holding simhashes but no algorithm.
+        
+        Such simhashes were written before the algorithm was recorded, when
+        md5 was the only feature hash. Empty databases are left unbound
+        until the first simhash is written.
+        """
+        if self.get_simhash_algorithm() is not None:
+            return
+        for table in SIMHASH_TABLES:
+            row = self.connection_manager.execute(
+                f"SELECT 1 FROM {table} WHERE simhash IS NOT NULL LIMIT 1"
+            ).fetchone()
+            if row:
+                logger.info(f"Recording {LEGACY_SIMHASH_ALGORITHM} for the simhashes stored in {table}")
+                self.ensure_simhash_algorithm(LEGACY_SIMHASH_ALGORITHM)
+                return
+    
+    def ensure_token_vocabulary_version(self, version: str):
+        """
+        Record the token vocabulary format version, or verify it matches.
+        
+        Token ID arrays stored in the database are only meaningful with the
+        vocabulary they were interned in.
+        
+        Args:
+            version: Vocabulary format version in use
+        
+        Raises:
+            ConfigurationError: If the database vocabulary has another version
+        """
+        self._ensure_info_value(self.TOKEN_VOCABULARY_VERSION_KEY, version, "token vocabulary version")
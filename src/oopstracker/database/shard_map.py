@@ -0,0 +1,161 @@
+"""
+Shard maps.
+Assign code records to SQLite shard files by file or project.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path, PurePath
+from typing import Any, Dict, Iterable, Optional
+
+from ..exceptions import ConfigurationError
+
+# What records are routed by: their file, or the project root containing it
+ROUTING_KEYS = ('file', 'project')
+
+
+def _rendezvous_weight(shard: str, key: str) -> int:
+    """Weight of a shard for a routing key; unlike hash(), the same in every process."""
+    digest = hashlib.blake2b(f"{shard}\0{key}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class ShardMap:
+    """
+    Which shard database each code record belongs to.
+    
+    Records are routed by a key: their file path, or with key='project'
+    the deepest configured project root containing the file (files outside
+    every root are routed by their own path). Keys listed in ``pinned`` go
+    to their pinned shard; every other key goes to the shard with the
+    highest rendezvous hash of (shard name, key). Adding or removing a
+    shard therefore only moves the keys that land on or came from it, and
+    all records of one file always share a shard. Records without a file
+    path are routed by their code hash.
+    
+    Maps are stored as JSON::
+        
+        {"key": "project",
+         "shards": {"a": "shards/a.db", "b": "shards/b.db"},
+         "projects": ["/src/service", "/src/tools"],
+         "pinned": {"/src/tools": "b"}}
+    
+    Relative shard paths are relative to the map file.
+    """
+    
+    def __init__(self, shards: Dict[str, Any], key: str = 'file', projects: Iterable[str] = (),
+                 pinned: Optional[Dict[str, str]] = None):
+        """
+        Initialize shard map.
+        
+        Args:
+            shards: Database path of each shard, by shard name
+            key: Routing key, one of ROUTING_KEYS
+            projects: Project root directories for key='project'
+            pinned: Shard name of routing keys that must not be hashed
+        
+        Raises:
+            ConfigurationError: If the map has no shards, an unknown key or
+                a pin to a shard it does not have
+        """
+        if not shards:
+            raise ConfigurationError("A shard map needs at least one shard")
+        if key not in ROUTING_KEYS:
+            raise ConfigurationError(f"Unknown shard routing key {key!r}, expected one of {ROUTING_KEYS}")
+        pinned = dict(pinned or {})
+        unknown = sorted(set(pinned.values()) - set(shards))
+        if unknown:
+            raise ConfigurationError(f"Pinned keys refer to unknown shards: {unknown}")
+        
+        self.shards = {str(name): Path(path) for name, path in shards.items()}
+        self.key = key
+        # Deepest roots first, so nested projects win over their parents
+        self.projects = sorted({PurePath(root) for root in projects}, key=lambda root: -len(root.parts))
+        self.pinned = pinned
+    
+    @classmethod
+    def with_shard_count(cls, directory: str, count: int, **kwargs) -> 'ShardMap':
+        """
+        Map with shards named shard-0 .. shard-<count - 1> in one directory.
+        
+        Args:
+            directory: Directory of the shard databases
+            count: Number of shards
+            **kwargs: key, projects and pinned as for ShardMap()
+        """
+        return cls({f"shard-{i}": Path(directory) / f"shard-{i}.db" for i in range(count)}, **kwargs)
+    
+    @classmethod
+    def load(cls, path: str) -> 'ShardMap':
+        """
+        Read a shard map from a JSON file.
+        
+        Args:
+            path: Map file
+        
+        Raises:
+            ConfigurationError: If the file is not a valid shard map
+        """
+        path = Path(path)
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise ConfigurationError(f"Cannot read shard map {path}: {e}") from e
+        if not isinstance(data, dict) or not isinstance(data.get('shards'), dict):
+            raise ConfigurationError(f"Shard map {path} has no 'shards' object")
+        
+        shards = {name: path.parent / shard_path for name, shard_path in data['shards'].items()}
+        return cls(shards, data.get('key', 'file'), data.get('projects', ()), data.get('pinned'))
+    
+    def save(self, path: str):
+        """
+        Write the map as JSON; shard paths below the file's directory are stored relative to it.
+        
+        Args:
+            path: Map file
+        """
+        path = Path(path)
+        base = path.parent.resolve()
+        shards = {}
+        for name, shard_path in self.shards.items():
+            resolved = shard_path.resolve()
+            shards[name] = str(resolved.relative_to(base)) if resolved.is_relative_to(base) else str(resolved)
+        path.write_text(json.dumps(self.to_dict(shards), indent=2) + "\n")
+    
+    def to_dict(self, shards: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """JSON-ready form of the map."""
+        return {
+            'key': self.key,
+            'shards': shards or {name: str(shard_path) for name, shard_path in self.shards.items()},
+            'projects': [str(root) for root in self.projects],
+            'pinned': dict(self.pinned)
+        }
+    
+    def routing_key(self, record_data: Dict[str, Any]) -> str:
+        """
+        Key a record is routed by.
+        
+        Args:
+            record_data: Record dict with file_path and code_hash
+        """
+        file_path = record_data.get('file_path')
+        if not file_path:
+            return f"code_hash:{record_data.get('code_hash')}"
+        if self.key == 'project':
+            path = PurePath(os.fspath(file_path))
+            for root in self.projects:
+                if path.is_relative_to(root):
+                    return str(root)
+        return str(file_path)
+    
+    def shard_for_key(self, key: str) -> str:
+        """Name of the shard a routing key is stored in."""
+        pinned = self.pinned.get(key)
+        if pinned is not None:
+            return pinned
+        return max(self.shards, key=lambda shard: _rendezvous_weight(shard, key))
+    
+    def shard_for(self, record_data: Dict[str, Any]) -> str:
+        """Name of the shard a record is stored in."""
+        return self.shard_for_key(self.routing_key(record_data))
@@ -0,0 +1,304 @@
+"""
+Write-behind queue.
+Coalesces small writes from many callers into few transactions on a background thread.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from ..exceptions import DatabaseError, WriteQueueFullError
+
+logger = logging.getLogger(__name__)
+
+# (query, parameter rows) pairs executed in order
+Statements = Sequence[Tuple[str, Sequence[tuple]]]
+
+
+class _PendingWrite:
+    """Statements of one submit call and the callback run once they are written."""
+    
+    __slots__ = ('sequence', 'statements', 'row_count', 'on_done')
+    
+    def __init__(self, sequence: int, statements: Statements, on_done: Optional[Callable[[bool], None]]):
+        self.sequence = sequence
+        self.statements = [(query, list(rows)) for query, rows in statements]
+        self.row_count = sum(len(rows) for _, rows in self.statements)
+        self.on_done = on_done
+
+
+class WriteBehindQueue:
+    """
+    Single background writer batching pending writes into one transaction.
+    
+    Every commit of a small insert or update pays for a WAL sync. Callers
+    submit their statements instead, and the writer thread commits
+    everything that arrived within ``flush_interval`` seconds, or
+    ``max_batch_rows`` rows, in one transaction. Runs of the same statement
+    inside a batch become a single executemany.
+    
+    Submitting blocks while ``max_pending`` rows are waiting (backpressure).
+    ``flush()`` marks a durability point: it returns once everything
+    submitted before it is committed, and re-raises the error of a failed
+    batch. Until then readers see queued writes only through an overlay
+    kept by the repository; ``consistent_read()`` keeps a batch from being
+    committed between reading the database and reading the overlay.
+    
+    The connection manager is used from the writer thread, so it must be
+    thread-safe, e.g. a PooledConnectionManager.
+    """
+    
+    def __init__(self, connection_manager, max_batch_rows: int = 500, flush_interval: float = 0.05,
+                 max_pending: int = 10000, submit_timeout: Optional[float] = 30.0):
+        """
+        Initialize write-behind queue.
+        
+        Args:
+            connection_manager: Thread-safe connection manager to write through
+            max_batch_rows: Rows after which a batch is written without waiting
+            flush_interval: Seconds a write may wait for others to join its batch
+            max_pending: Rows that may wait before submit() blocks
+            submit_timeout: Seconds submit() waits for room before raising
+                WriteQueueFullError (None waits forever)
+        """
+        self.connection_manager = connection_manager
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.flush_interval = max(0.0, flush_interval)
+        self.max_pending = max(1, max_pending)
+        self.submit_timeout = submit_timeout
+        
+        self._condition = threading.Condition()
+        self._visibility_lock = threading.RLock()
+        self._pending: Deque[_PendingWrite] = deque()
+        self._pending_rows = 0
+        self._pending_since = 0.0
+        self._submitted = 0
+        self._completed = 0
+        self._flush_waiters = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            'submitted_rows': 0,
+            'committed_rows': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'backpressure_waits': 0,
+            'backpressure_wait_seconds': 0.0
+        }
+    
+    def submit(self, statements: Statements, on_done: Optional[Callable[[bool], None]] = None) -> int:
+        """
+        Queue statements to be written together in a later transaction.
+        
+        Args:
+            statements: (query, parameter rows) pairs, executed in order
+            on_done: Called from the writer thread with True once the
+                statements are committed, or False if their batch failed
+        
+        Returns:
+            Sequence number of the write
+        
+        Raises:
+            DatabaseError: If the queue is closed
+            WriteQueueFullError: If no room became free within submit_timeout
+        """
+        write = _PendingWrite(0, statements, on_done)
+        with self._condition:
+            if self._closed:
+                raise DatabaseError("Write-behind queue is closed")
+            if self._pending_rows and self._pending_rows + write.row_count > self.max_pending:
+                self._wait_for_room(write.row_count)
+            
+            self._submitted += 1
+            write.sequence = self._submitted
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(write)
+            self._pending_rows += write.row_count
+            self._stats['submitted_rows'] += write.row_count
+            self._ensure_writer()
+            self._condition.notify_all()
+        return write.sequence
+    
+    def _wait_for_room(self, row_count: int):
+        """Block until row_count more rows fit; the caller holds the condition."""
+        start = time.monotonic()
+        deadline = None if self.submit_timeout is None else start + self.submit_timeout
+        self._stats['backpressure_waits'] += 1
+        # Ask the writer not to wait for the batch to fill up
+        self._flush_waiters += 1
+        self._condition.notify_all()
+        try:
+            while self._pending_rows and self._pending_rows + row_count > self.max_pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise WriteQueueFullError(
+                        f"{self._pending_rows} rows still queued after {self.submit_timeout:.2f}s"
+                    )
+                self._condition.wait(remaining)
+                if self._closed:
+                    raise DatabaseError("Write-behind queue is closed")
+        finally:
+            self._flush_waiters -= 1
+            self._stats['backpressure_wait_seconds'] += time.monotonic() - start
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every write submitted so far is committed.
+        
+        Args:
+            timeout: Seconds to wait (None waits until done)
+        
+        Returns:
+            False if the timeout expired first
+        
+        Raises:
+            Exception: The error of a batch that failed since the last flush
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            target = self._submitted
+            self._flush_waiters += 1
+            self._condition.notify_all()
+            try:
+                while self._completed < target:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._flush_waiters -= 1
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+        return True
+    
+    @contextmanager
+    def consistent_read(self):
+        """
+        Context manager during which no batch is committed.
+        
+        Reading the database and then the overlay inside it sees every
+        queued write exactly once.
+        """
+        with self._visibility_lock:
+            yield
+    
+    @property
+    def pending_rows(self) -> int:
+        """Rows submitted but not written yet."""
+        with self._condition:
+            return self._pending_rows
+    
+    def _ensure_writer(self):
+        """Start the writer thread; the caller holds the condition."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="oopstracker-write-behind", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        """Writer loop: wait for a batch to fill up or time out, then write it."""
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                deadline = self._pending_since + self.flush_interval
+                while (self._pending_rows < self.max_batch_rows and not self._closed
+                       and not self._flush_waiters):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_batch()
+            self._write(batch)
+    
+    def _take_batch(self) -> List[_PendingWrite]:
+        """Dequeue writes up to max_batch_rows; the caller holds the condition."""
+        batch = []
+        rows = 0
+        while self._pending and (not batch or rows + self._pending[0].row_count <= self.max_batch_rows):
+            write = self._pending.popleft()
+            batch.append(write)
+            rows += write.row_count
+        self._pending_since = time.monotonic()
+        return batch
+    
+    def _write(self, batch: List[_PendingWrite]):
+        """Write a batch in one transaction and report it to the callbacks."""
+        statements: List[Tuple[str, List[tuple]]] = []
+        for write in batch:
+            for query, rows in write.statements:
+                if statements and statements[-1][0] == query:
+                    statements[-1][1].extend(rows)
+                else:
+                    statements.append((query, list(rows)))
+        row_count = sum(write.row_count for write in batch)
+        
+        error = None
+        with self._visibility_lock:
+            try:
+                with self.connection_manager.transaction():
+                    for query, rows in statements:
+                        self.connection_manager.executemany(query, rows)
+            except Exception as e:
+                error = e
+                logger.error(f"Write-behind batch of {row_count} rows failed: {e}")
+            for write in batch:
+                if write.on_done is not None:
+                    try:
+                        write.on_done(error is None)
+                    except Exception as e:
+                        logger.warning(f"Write-behind callback failed: {e}")
+        
+        with self._condition:
+            self._pending_rows -= row_count
+            self._completed = batch[-1].sequence
+            if error is None:
+                self._stats['batches'] += 1
+                self._stats['committed_rows'] += row_count
+            else:
+                self._stats['failed_batches'] += 1
+                self._error = error
+            self._condition.notify_all()
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get queue metrics.
+        
+        Returns:
+            Dictionary with row and batch counters, backpressure waits and
+            the rows currently queued
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['pending_rows'] = self._pending_rows
+            stats['average_batch_rows'] = (stats['committed_rows'] / stats['batches']
+                                           if stats['batches'] else 0.0)
+        return stats
+    
+    def close(self, timeout: Optional[float] = None):
+        """
+        Write everything still queued and stop the writer thread.
+        
+        Args:
+            timeout: Seconds to wait for the writer (None waits until done)
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        logger.debug("Write-behind queue closed")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -13,6 +13,16 @@ class DatabaseError(OOPSTrackerError):
     pass
 
 
+class PoolTimeoutError(DatabaseError):
+    """Exception raised when no pooled database connection became available in time."""
+    pass
+
+
+class WriteQueueFullError(DatabaseError):
+    """Exception raised when queued writes did not drain in time to accept more."""
+    pass
+
+
 class ValidationError(OOPSTrackerError):
     """Exception raised for validation errors."""
     pass
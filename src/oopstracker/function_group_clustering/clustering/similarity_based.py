@@ -2,12 +2,14 @@
 
 import re
 import logging
-from typing import List, Dict, Any, Tuple, Set
+from array import array
+from typing import List, Dict, Any, Tuple, Iterable
 from collections import defaultdict
 from difflib import SequenceMatcher
 import hashlib
 
 from .base import ClusterStrategy
+from ...core.token_vocabulary import get_token_vocabulary, jaccard_similarity
 from ...clustering_models import FunctionGroup
 
 
@@ -220,30 +222,24 @@ class SimilarityBasedClustering(ClusterStrategy):
         
         return '\n'.join(lines)
     
-    def _extract_tokens(self, code: str) -> Set[str]:
-        """Extract meaningful tokens from code."""
+    def _extract_tokens(self, code: str) -> array:
+        """Extract meaningful tokens from code as interned token IDs."""
         # Simple tokenization - can be enhanced with proper lexing
-        tokens = set()
+        vocabulary = get_token_vocabulary()
         
         # Extract identifiers (variable/function names)
         identifier_pattern = r'\b[a-zA-Z_][a-zA-Z0-9_]*\b'
-        tokens.update(re.findall(identifier_pattern, code))
+        tokens = vocabulary.intern_many(re.findall(identifier_pattern, code))
         
         # Extract string literals
         string_pattern = r'["\']([^"\']*)["\']'
-        tokens.update(re.findall(string_pattern, code))
+        tokens.extend(vocabulary.intern_many(re.findall(string_pattern, code)))
         
         return tokens
     
-    def _jaccard_similarity(self, set1: Set[str], set2: Set[str]) -> float:
-        """Calculate Jaccard similarity between two sets."""
-        if not set1 and not set2:
-            return 1.0
-        
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
-        
-        return intersection / union if union > 0 else 0.0
+    def _jaccard_similarity(self, ids1: Iterable[int], ids2: Iterable[int]) -> float:
+        """Calculate Jaccard similarity between the token sets of two ID streams."""
+        return jaccard_similarity(ids1, ids2)
     
     def _generate_cluster_label(self, functions: List[Dict[str, Any]], base_pattern: str) -> str:
         """Generate a descriptive label for the cluster."""
@@ -0,0 +1,256 @@
+"""
+MinHash + LSH banding duplicate detector for Jaccard-style token overlap.
+No LLM involved, so it scales to large scans.
+"""
+
+import logging
+import re
+from array import array
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .ast_analyzer import ASTAnalyzer
+from .code_record import CodeRecord
+from .core.token_vocabulary import get_token_vocabulary
+from .core.union_find import UnionFind
+from .similarity_result import SimilarityResult
+from .unified_detector import DuplicateDetector, DetectionConfiguration
+
+# Smallest prime above 2**32: (a * x + b) stays below 2**64 for 32-bit a, x, b
+MERSENNE_PRIME = (1 << 32) + 15
+
+# Constants of the murmur3 32-bit finalizer
+MIX_MULTIPLIERS = (0x85EBCA6B, 0xC2B2AE35)
+MASK32 = np.uint64(0xFFFFFFFF)
+
+# Bounds the temporary (num_perm x tokens) matrix during signature generation
+SIGNATURE_CHUNK_TOKENS = 1 << 15
+
+# Bounds the temporary (pairs x num_perm) matrices during candidate verification
+PAIR_CHUNK_ELEMENTS = 1 << 20
+
+
+def _mix32(ids: np.ndarray) -> np.ndarray:
+    """
+    Scramble 32-bit token IDs with a bijective mix.
+
+    Vocabulary IDs are dense and consecutive; fed straight into the linear
+    permutations, runs of IDs keep their order and bias the minima, so the
+    signature agreement underestimates the Jaccard similarity.
+    """
+    ids = ids & MASK32
+    ids ^= ids >> np.uint64(16)
+    ids = (ids * np.uint64(MIX_MULTIPLIERS[0])) & MASK32
+    ids ^= ids >> np.uint64(13)
+    ids = (ids * np.uint64(MIX_MULTIPLIERS[1])) & MASK32
+    ids ^= ids >> np.uint64(16)
+    return ids
+
+
+class MinHashLSHDetector(DuplicateDetector):
+    """
+    Detects duplicates by estimated Jaccard similarity of structure tokens.
+
+    Each record is reduced to the set of its structure token IDs and a
+    MinHash signature of ``num_perm`` universal hashes of those IDs. Signatures are split
+    into ``bands`` bands of equal rows; records sharing all rows of any band
+    become candidate pairs, which are verified on the full signature. With
+    the defaults (128 permutations, 16 bands of 8 rows) the LSH threshold
+    is about (1/16)^(1/8) ~= 0.71.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, seed: int = 1):
+        """
+        Initialize the detector.
+
+        Args:
+            num_perm: Number of hash permutations in each signature
+            bands: Number of LSH bands (must divide num_perm)
+            seed: Seed for the permutation coefficients
+
+        Raises:
+            ValueError: If bands does not divide num_perm
+        """
+        if num_perm <= 0 or bands <= 0 or num_perm % bands:
+            raise ValueError(f"bands ({bands}) must evenly divide num_perm ({num_perm})")
+
+        self.logger = logging.getLogger(__name__)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self.analyzer = ASTAnalyzer()
+        self.vocabulary = get_token_vocabulary()
+        self.signature_cache: Dict[str, np.ndarray] = {}
+
+    def detect_duplicates(self, records: List[CodeRecord], config: DetectionConfiguration) -> List[SimilarityResult]:
+        """Detect clusters of records whose estimated Jaccard similarity meets the threshold."""
+        candidates = [record for record in records if record.code_content]
+        if len(candidates) < 2:
+            return []
+
+        signatures = self._record_signatures(candidates)
+
+        # Identical signatures are linked up front, so each is banded once
+        unique, first_rows, inverse = np.unique(signatures, axis=0, return_index=True, return_inverse=True)
+        representatives = first_rows[inverse.reshape(-1)]
+        rows = np.flatnonzero(representatives != np.arange(len(candidates)))
+        clusters = UnionFind(len(candidates))
+        clusters.union_pairs(zip(representatives[rows].tolist(), rows.tolist()))
+
+        for left, right in self._candidate_pairs(unique):
+            similarity = np.mean(unique[left] == unique[right], axis=1)
+            keep = similarity >= config.threshold
+            clusters.union_pairs(zip(first_rows[left[keep]].tolist(), first_rows[right[keep]].tolist()))
+
+        results = []
+        for members in clusters.groups(min_size=2)[:config.max_results]:
+            member_signatures = signatures[members]
+            similarities = np.mean(member_signatures == member_signatures[0], axis=1)
+            results.append(SimilarityResult(
+                is_duplicate=True,
+                similarity_score=float(similarities.mean()),
+                matched_records=[candidates[index] for index in members],
+                analysis_method="minhash_lsh",
+                threshold=config.threshold
+            ))
+
+        self.logger.info(f"MinHash LSH found {len(results)} duplicate clusters in {len(candidates)} records")
+        return results
+
+    def find_similar(self, source_code: str, records: List[CodeRecord], config: DetectionConfiguration) -> SimilarityResult:
+        """Find records sharing an LSH band with the source and meeting the threshold."""
+        candidates = [record for record in records if record.code_content]
+        matched_records = []
+
+        if candidates:
+            source_signature = self.signatures([self._tokens(source_code)])[0]
+            signatures = self._record_signatures(candidates)
+
+            banded = (signatures == source_signature).reshape(len(candidates), self.bands, self.rows)
+            in_bucket = banded.all(axis=2).any(axis=1)
+            similarities = np.mean(signatures == source_signature, axis=1)
+
+            for index in np.flatnonzero(in_bucket & (similarities >= config.threshold)):
+                record = candidates[index]
+                record.similarity_score = float(similarities[index])
+                matched_records.append(record)
+
+        avg_similarity = (sum(r.similarity_score for r in matched_records) / len(matched_records)
+                          if matched_records else 0)
+        return SimilarityResult(
+            is_duplicate=len(matched_records) > 0,
+            similarity_score=avg_similarity,
+            matched_records=matched_records,
+            analysis_method="minhash_lsh",
+            threshold=config.threshold
+        )
+
+    def get_algorithm_name(self) -> str:
+        return "minhash_lsh"
+
+    def signatures(self, token_id_arrays: Sequence[Sequence[int]]) -> np.ndarray:
+        """
+        Compute MinHash signatures for many token ID streams at once.
+
+        The IDs of the shared TokenVocabulary are scrambled and then hashed;
+        repeated IDs do not change a minimum, so streams need not be
+        deduplicated.
+
+        Args:
+            token_id_arrays: One array('I') of token IDs per document
+
+        Returns:
+            uint64 array of shape (len(token_id_arrays), num_perm); empty
+            streams get an all-max signature that never matches a real one
+        """
+        result = np.full((len(token_id_arrays), self.num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+
+        arrays = [np.asarray(ids, dtype=np.uint64) for ids in token_id_arrays]
+        lengths = np.fromiter((len(ids) for ids in arrays), dtype=np.int64, count=len(arrays))
+        if not lengths.sum():
+            return result
+
+        token_hashes = _mix32(np.concatenate(arrays))
+        doc_ids = np.repeat(np.arange(len(arrays), dtype=np.int64), lengths)
+        prime = np.uint64(MERSENNE_PRIME)
+
+        # Tokens are grouped by document, so each chunk reduces over
+        # contiguous segments; a document split across chunks is merged
+        # with np.minimum.
+        for start in range(0, len(token_hashes), SIGNATURE_CHUNK_TOKENS):
+            stop = start + SIGNATURE_CHUNK_TOKENS
+            chunk_docs = doc_ids[start:stop]
+            permuted = (self._a[:, None] * token_hashes[None, start:stop] + self._b[:, None]) % prime
+            segment_starts = np.concatenate(([0], np.flatnonzero(np.diff(chunk_docs)) + 1))
+            minima = np.minimum.reduceat(permuted, segment_starts, axis=1).T
+            docs = chunk_docs[segment_starts]
+            result[docs] = np.minimum(result[docs], minima)
+
+        return result
+
+    def _record_signatures(self, records: List[CodeRecord]) -> np.ndarray:
+        """Signatures for records, cached by code hash or content."""
+        missing = [record for record in records if self._cache_key(record) not in self.signature_cache]
+        if missing:
+            computed = self.signatures([self._record_tokens(record) for record in missing])
+            for record, signature in zip(missing, computed):
+                self.signature_cache[self._cache_key(record)] = signature
+        return np.stack([self.signature_cache[self._cache_key(record)] for record in records])
+
+    def _candidate_pairs(self, signatures: np.ndarray):
+        """
+        Yield (left, right) index arrays of records sharing an LSH band.
+
+        Each bucket is joined as a star from its first member to the rest,
+        so a band yields fewer pairs than records instead of all pairs of
+        its largest bucket. A pair is produced only for the first band it
+        shares, so each candidate is verified once; chunks hold at most
+        PAIR_CHUNK_ELEMENTS signature values.
+        """
+        banded = signatures.reshape(len(signatures), self.bands, self.rows)
+        step = max(1, PAIR_CHUNK_ELEMENTS // self.num_perm)
+        for band in range(self.bands):
+            _, bucket_ids = np.unique(banded[:, band, :], axis=0, return_inverse=True)
+            bucket_ids = bucket_ids.reshape(-1)
+            order = np.argsort(bucket_ids, kind="stable")
+            sorted_ids = bucket_ids[order]
+            run_start = np.concatenate(([True], sorted_ids[1:] != sorted_ids[:-1]))
+            heads = order[run_start][np.cumsum(run_start) - 1]
+            left, right = heads[~run_start], order[~run_start]
+
+            for start in range(0, len(left), step):
+                chunk_left, chunk_right = left[start:start + step], right[start:start + step]
+                if band:
+                    earlier = (banded[chunk_left, :band, :] == banded[chunk_right, :band, :]).all(axis=2).any(axis=1)
+                    chunk_left, chunk_right = chunk_left[~earlier], chunk_right[~earlier]
+                if len(chunk_left):
+                    yield chunk_left, chunk_right
+
+    def _record_tokens(self, record: CodeRecord) -> array:
+        """Token IDs of a record, preferring a stored ast_structure."""
+        metadata = record.metadata if isinstance(record.metadata, dict) else {}
+        structure = metadata.get('ast_structure')
+        if structure:
+            return self.vocabulary.intern_many(structure.split("|"))
+        return self._tokens(record.code_content or "")
+
+    def _tokens(self, code: str) -> array:
+        """Structure token IDs of all units in the code, or identifiers if it does not parse."""
+        token_ids = array('I')
+        for unit in self.analyzer.parse_code(code):
+            if unit.token_ids:
+                token_ids.extend(unit.token_ids)
+        if not token_ids:
+            token_ids = self.vocabulary.intern_many(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", code))
+        return token_ids
+
+    @staticmethod
+    def _cache_key(record: CodeRecord) -> str:
+        # Content, not id(): ids of collected records are reused
+        return record.code_hash or record.code_content
@@ -0,0 +1,169 @@
+"""
+Content-addressed cache of extracted code unit features.
+Unchanged files skip AST parsing entirely on later scans.
+"""
+
+import hashlib
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from .core.simhash.feature_hash import DEFAULT_HASH_ALGORITHM
+from .core.token_vocabulary import TokenVocabulary
+from .database.schema_manager import SchemaManager
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of cached unit rows changes
+CACHE_FORMAT_VERSION = 2
+
+_PACKAGE_ROOT = Path(__file__).resolve().parent
+_ANALYZER_SOURCES = [_PACKAGE_ROOT / "ast_analyzer.py", *sorted((_PACKAGE_ROOT / "visitors").glob("*.py"))]
+
+
+def compute_analyzer_version() -> str:
+    """
+    Fingerprint of everything that determines extracted unit features.
+
+    Covers the analyzer and visitor sources, the Python minor version (the
+    ast module changes between releases), the simhash feature hash and the
+    cache row format. Any edit to a visitor yields a new version, so stale
+    entries are never returned.
+
+    Returns:
+        Short hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_FORMAT_VERSION}:{sys.version_info[0]}.{sys.version_info[1]}:"
+                  f"{DEFAULT_HASH_ALGORITHM}".encode())
+    for path in _ANALYZER_SOURCES:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+ANALYZER_VERSION = compute_analyzer_version()
+
+
+class ParseCache:
+    """
+    Stores compact CodeUnit rows keyed by file content hash and analyzer version.
+
+    Rows are the tuples produced by CodeUnit.to_compact(); unit sources are
+    not stored since they are sliced from the file that is read anyway to
+    compute its hash. Structure tokens are stored as IDs of a vocabulary
+    persisted in the same database, which is append-only so stored rows
+    stay valid as it grows.
+    """
+
+    def __init__(self, connection_manager, analyzer_version: str = ANALYZER_VERSION):
+        """
+        Initialize the cache and drop entries of other analyzer versions.
+
+        Args:
+            connection_manager: DatabaseConnectionManager instance
+            analyzer_version: Version the entries must match
+        """
+        self.connection_manager = connection_manager
+        self.analyzer_version = analyzer_version
+        schema = SchemaManager(connection_manager)
+        schema.create_tables()
+        # Cached units carry simhashes, so they use the database's algorithm
+        self.simhash_algorithm = schema.get_simhash_algorithm() or DEFAULT_HASH_ALGORITHM
+        self.vocabulary = TokenVocabulary.load(connection_manager)
+        self.purge_stale()
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        """Cache key of a file's raw bytes."""
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key: str) -> Optional[List[list]]:
+        """
+        Look up cached unit rows.
+
+        Args:
+            key: Content hash of the file
+
+        Returns:
+            List of unit rows with structure tokens as strings, or None on a miss
+        """
+        cursor = self.connection_manager.execute(
+            "SELECT units FROM parse_cache WHERE content_hash = ? AND analyzer_version = ?",
+            (key, self.analyzer_version)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        
+        rows = json.loads(row['units'])
+        if any(unit_row[4] is not None and max(unit_row[4], default=-1) >= len(self.vocabulary)
+               for unit_row in rows):
+            # Tokens added by another writer since this cache was opened
+            self.vocabulary.sync(self.connection_manager)
+        for unit_row in rows:
+            if unit_row[4] is not None:
+                unit_row[4] = self.vocabulary.tokens(unit_row[4])
+        return rows
+
+    def put(self, key: str, rows: List[tuple]):
+        """
+        Store unit rows for a file content hash.
+
+        New vocabulary tokens and the cache row are written in one
+        transaction, so a failed write leaves neither behind.
+
+        Args:
+            key: Content hash of the file
+            rows: CodeUnit.to_compact() tuples
+        """
+        # The write lock is taken before the sync, so no other writer can
+        # append tokens between reading the vocabulary and extending it
+        with self.connection_manager.transaction(immediate=True):
+            self.vocabulary.sync(self.connection_manager)
+            saved = len(self.vocabulary)
+            try:
+                stored_rows = []
+                for row in rows:
+                    row = list(row)
+                    if row[4] is not None:
+                        row[4] = self.vocabulary.intern_many(row[4]).tolist()
+                    stored_rows.append(row)
+                self.vocabulary.save(self.connection_manager, commit=False)
+                
+                self.connection_manager.execute(
+                    """
+                    INSERT OR REPLACE INTO parse_cache (content_hash, analyzer_version, units, created_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (key, self.analyzer_version, json.dumps(stored_rows, separators=(",", ":")),
+                     datetime.now().isoformat())
+                )
+            except Exception:
+                # The rollback drops the saved tokens as well
+                self.vocabulary.truncate(saved)
+                raise
+
+    def purge_stale(self) -> int:
+        """
+        Delete entries written by other analyzer versions.
+
+        Returns:
+            Number of deleted entries
+        """
+        cursor = self.connection_manager.execute(
+            "DELETE FROM parse_cache WHERE analyzer_version != ?",
+            (self.analyzer_version,)
+        )
+        self.connection_manager.commit()
+        if cursor.rowcount:
+            logger.info(f"Dropped {cursor.rowcount} parse cache entries from older analyzer versions")
+        return cursor.rowcount
+
+    def clear(self):
+        """Delete all cache entries."""
+        self.connection_manager.execute("DELETE FROM parse_cache")
+        self.connection_manager.commit()
@@ -2,16 +2,101 @@
 Refactored analysis service without try-catch complexity.
 """
 
+import re
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
+from .ast_analyzer import ASTAnalyzer, ParsedFile
 from .code_record import CodeRecord
+from .parse_cache import ParseCache
 from .pure_unified_detector import UnifiedDetectionService, DetectionConfiguration
 from .unified_repository import UnifiedRepository, OperationResult
 from .split_rule_repository import SplitRuleRepository
 
 
+# Characters that end a run of literal text in a regular expression
+_REGEX_SPECIAL = set(".^$*+?{[|()\\")
+
+# Escapes of a character class or anchor; other letter and digit escapes
+# (\x5f, \u00e9, \n, octal, back references) are not analyzed
+_CLASS_ESCAPES = set("dDwWsSbBAZ")
+
+
+def _required_literals(pattern: str) -> Optional[List[List[str]]]:
+    """
+    Literal texts a regex match must contain, per top-level alternative.
+    
+    Only plain patterns are analyzed: literal characters, escaped
+    punctuation, class and anchor escapes, anchors, character classes,
+    quantifiers and top-level ``|``. A
+    quantifier that allows zero repetitions drops the literal before it.
+    
+    Returns:
+        One list of required substrings per alternative, or None for
+        patterns with groups, character escapes or other syntax that is
+        not analyzed
+    """
+    branches = [[]]
+    current = []
+    
+    def end_run():
+        if current:
+            branches[-1].append("".join(current))
+            current.clear()
+    
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char in "()":
+            return None
+        if char == "\\":
+            if i + 1 >= len(pattern):
+                return None
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped in _CLASS_ESCAPES:
+                end_run()
+            elif escaped.isalnum():
+                return None
+            else:
+                current.append(escaped)
+            continue
+        if char == "[":
+            end = i + 1
+            if end < len(pattern) and pattern[end] == "^":
+                end += 1
+            if end < len(pattern) and pattern[end] == "]":
+                end += 1
+            while end < len(pattern) and pattern[end] != "]":
+                end += 2 if pattern[end] == "\\" else 1
+            if end >= len(pattern):
+                return None
+            end_run()
+            i = end + 1
+            continue
+        if char in "*?{":
+            if current:
+                current.pop()
+            end_run()
+            if char == "{":
+                close = pattern.find("}", i)
+                if close < 0:
+                    return None
+                i = close
+        elif char == "|":
+            end_run()
+            branches.append([])
+        elif char in _REGEX_SPECIAL:
+            end_run()
+        else:
+            current.append(char)
+        i += 1
+    end_run()
+    return branches
+
+
 @dataclass
 class AnalysisResult:
     """Result of code analysis operation."""
@@ -33,11 +118,22 @@ class RefactoredAnalysisService:
     Uses Result pattern for error handling.
     """
     
-    def __init__(self, repository: UnifiedRepository, detector: UnifiedDetectionService):
+    def __init__(self, repository: UnifiedRepository, detector: UnifiedDetectionService, jobs: int = 1,
+                 parse_cache: Optional[ParseCache] = None, rule_db_manager=None):
         self.repository = repository
         self.detector = detector
-        self.rule_repository = SplitRuleRepository()
+        # Split rules live in the records database unless the records are sharded
+        self.rule_repository = SplitRuleRepository(db_manager=rule_db_manager or repository.connection_manager)
         self.analysis_cache = {}
+        self.analyzer = ASTAnalyzer(parse_cache)
+        self.jobs = max(1, jobs)
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def close(self):
+        """Shut down the parsing process pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
     
     def analyze_files(self, file_paths: List[str], detection_algorithm: str = "pure_llm") -> AnalysisResult:
         """Analyze files without try-catch blocks."""
@@ -134,51 +230,50 @@ class RefactoredAnalysisService:
         new_records = []
         existing_hashes = {r.code_hash for r in existing_records if r.code_hash}
         
-        for file_path in file_paths:
-            file_records = self._extract_records_from_file(file_path, existing_hashes)
+        # Batches are small, so hand out one file per task to keep all workers busy
+        python_files = [path for path in file_paths if Path(path).suffix == '.py' and Path(path).exists()]
+        parsed_files = self.analyzer.parse_files(python_files, workers=self.jobs, chunksize=1,
+                                                 executor=self._get_executor())
+        for parsed in parsed_files:
+            file_records = self._extract_records_from_file(parsed, existing_hashes)
             new_records.extend(file_records)
         
         return new_records
     
-    def _extract_records_from_file(self, file_path: str, existing_hashes: set) -> List[CodeRecord]:
-        """Extract code records from a single file."""
-        path = Path(file_path)
-        
-        if not path.exists() or not path.suffix == '.py':
-            return []
-        
-        content = path.read_text(encoding='utf-8', errors='ignore')
-        if not content.strip():
-            return []
-        
-        # Simple function extraction (basic implementation)
-        lines = content.split('\n')
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Process pool shared by all batches when parsing with several jobs."""
+        if self.jobs > 1 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+        return self._executor
+    
+    def _extract_records_from_file(self, parsed: ParsedFile, existing_hashes: set) -> List[CodeRecord]:
+        """
+        Build code records from the function units of a file parsed by parse_files.
+        
+        The units are what the workers spent their time on, so the main
+        process only slices their sources; files that failed to read or
+        parse yield no records.
+        """
         records = []
         
-        for i, line in enumerate(lines):
-            if line.strip().startswith('def '):
-                function_name = line.split('def ')[1].split('(')[0].strip()
-                
-                # Get function body (simplified)
-                function_lines = [line]
-                for j in range(i + 1, len(lines)):
-                    if lines[j].strip() and not lines[j].startswith(' ') and not lines[j].startswith('\t'):
-                        break
-                    function_lines.append(lines[j])
-                
-                function_code = '\n'.join(function_lines)
-                code_hash = self._generate_hash(function_code)
-                
-                if code_hash not in existing_hashes:
-                    record = CodeRecord(
-                        code_hash=code_hash,
-                        code_content=function_code,
-                        normalized_code=self._normalize_code(function_code),
-                        function_name=function_name,
-                        file_path=str(path),
-                        metadata={'type': 'function', 'line_number': i + 1}
-                    )
-                    records.append(record)
+        for unit in parsed.units:
+            if unit.type != 'function':
+                continue
+            
+            # Same newlines as reading the file in text mode
+            function_code = unit.source_code.replace('\r\n', '\n').replace('\r', '\n')
+            code_hash = self._generate_hash(function_code)
+            
+            if code_hash not in existing_hashes:
+                record = CodeRecord(
+                    code_hash=code_hash,
+                    code_content=function_code,
+                    normalized_code=self._normalize_code(function_code),
+                    function_name=unit.name,
+                    file_path=str(parsed.file_path),
+                    metadata={'type': 'function', 'line_number': unit.start_line}
+                )
+                records.append(record)
         
         return records
     
@@ -208,28 +303,58 @@ class RefactoredAnalysisService:
         return classifications
     
     def _apply_existing_rules(self, records: List[CodeRecord]) -> List[CodeRecord]:
-        """Apply existing rules to classify records."""
+        """
+        Apply existing rules to classify records.
+        
+        Each record gets the first rule, in rule order, whose pattern
+        matches its function name. Where the pattern's literal text can be
+        looked up in the code search index, only the stored records it
+        finds (and records without a code hash) are checked with the regex,
+        so the records are expected to be stored already.
+        """
         rules = self.rule_repository.get_all_rules()
         if not rules:
             return records
         
-        classified_records = []
-        for record in records:
-            # Apply rules to classify the record
-            for rule in rules:
+        unmatched = {id(record): record for record in records}
+        for rule in rules:
+            candidates = self._rule_candidates(rule.pattern)
+            checked = [record for record in unmatched.values()
+                       if candidates is None or not record.code_hash or record.code_hash in candidates]
+            for record in checked:
                 if self._rule_matches_record(rule.pattern, record):
                     # Update record metadata with classification
                     if hasattr(record, 'metadata') and isinstance(record.metadata, dict):
                         record.metadata['rule_applied'] = rule.pattern
-                    break
-            classified_records.append(record)
+                    del unmatched[id(record)]
         
-        return classified_records
+        return records
+    
+    def _rule_candidates(self, pattern: str) -> Optional[set]:
+        """
+        Code hashes of the stored records whose names may match a rule pattern.
+        
+        Returns:
+            Set of code hashes, or None if every record must be checked
+        """
+        branches = _required_literals(pattern)
+        if branches is None:
+            return None
+        # Python and SQLite fold case alike only for ASCII text
+        branches = [[literal for literal in literals if literal.isascii()] for literals in branches]
+        if not all(branches):
+            return None
+        candidates = set()
+        for literals in branches:
+            result = self.repository.search_code_records(name_contains=literals, columns=('code_hash',))
+            if not result.success:
+                return None
+            candidates.update(record['code_hash'] for record in result.data)
+        return candidates
     
     def _rule_matches_record(self, pattern: str, record: CodeRecord) -> bool:
         """Check if a rule pattern matches a record."""
         # Simple pattern matching - can be enhanced
-        import re
         if hasattr(record, 'function_name') and record.function_name:
             return bool(re.search(pattern, record.function_name, re.IGNORECASE))
         return False
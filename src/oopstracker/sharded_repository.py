@@ -0,0 +1,362 @@
+"""
+Code record repository spread over several SQLite shard databases.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, zip_longest
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .database.code_blob_repository import CodeBlobRepository
+from .database.connection_pool import PooledConnectionManager
+from .database.schema_manager import SchemaManager
+from .database.shard_map import ShardMap
+from .exceptions import DatabaseError
+from .unified_repository import CODE_RECORD_COLUMNS, SEARCH_COLUMNS, OperationResult, UnifiedRepository
+
+logger = logging.getLogger(__name__)
+
+QUERIES = {
+    'delete_records': """
+        DELETE FROM code_records WHERE id IN (SELECT value FROM json_each(?))
+    """
+}
+
+
+class ShardedRepository:
+    """
+    Code records routed to one of several shard databases by a ShardMap.
+    
+    Each shard is a complete oopstracker database with its own
+    PooledConnectionManager and UnifiedRepository, so agents writing
+    records of different files or projects commit to different files and
+    never wait for each other's write lock. Writes go to the record's
+    shard; reads that span all records run on every shard in parallel and
+    their results are merged. Records read this way carry the name of
+    their shard under 'shard', since ids are only unique within a shard.
+    Code hashes are unique per shard, not across shards: the same code
+    in files of two shards is stored twice. get_all_code_records and
+    search_code_records return one record per code hash;
+    iter_code_records and get_statistics see every shard's copy.
+    """
+    
+    def __init__(self, shard_map: ShardMap, readers: int = 2, max_workers: Optional[int] = None,
+                 hash_algorithm: Optional[str] = None):
+        """
+        Open (and create if needed) every shard of a map.
+        
+        Args:
+            shard_map: Shards and routing
+            readers: Read-only connections per shard
+            max_workers: Threads running per-shard reads (default: one per shard)
+            hash_algorithm: Feature hash algorithm of the simhashes written
+                (see UnifiedRepository)
+        """
+        self.shard_map = shard_map
+        self.readers = readers
+        self.hash_algorithm = hash_algorithm
+        self.managers: Dict[str, PooledConnectionManager] = {}
+        self.repositories: Dict[str, UnifiedRepository] = {}
+        for name, path in shard_map.shards.items():
+            self._open_shard(name, path)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self.repositories),
+                                            thread_name_prefix="oopstracker-shard")
+        self._setup_queries()
+    
+    def _setup_queries(self):
+        """Pre-define all SQL queries."""
+        self.queries = dict(QUERIES)
+    
+    def _open_shard(self, name: str, path: Path):
+        """Open a shard database and bring its schema up to date."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        manager = PooledConnectionManager(str(path), readers=self.readers)
+        SchemaManager(manager).initialize_schema()
+        self.managers[name] = manager
+        self.repositories[name] = UnifiedRepository(manager, hash_algorithm=self.hash_algorithm)
+    
+    def _each_shard(self, function: Callable[[UnifiedRepository], Any]) -> Dict[str, Any]:
+        """
+        Run a function on every shard's repository in parallel.
+        
+        Returns:
+            Result of each shard by name, in shard map order
+        """
+        futures = {name: self._executor.submit(function, repository)
+                   for name, repository in self.repositories.items()}
+        return {name: future.result() for name, future in futures.items()}
+    
+    def _failure(self, results: Dict[str, OperationResult]) -> Optional[OperationResult]:
+        """First failed shard result, with the shard named in its message."""
+        for name, result in results.items():
+            if not result.success:
+                return OperationResult(False, error_message=f"Shard {name}: {result.error_message}")
+        return None
+    
+    @staticmethod
+    def _unique_by_hash(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Records without those repeating the code hash of an earlier one."""
+        seen = set()
+        unique = []
+        for record in records:
+            code_hash = record.get('code_hash')
+            if code_hash is not None:
+                if code_hash in seen:
+                    continue
+                seen.add(code_hash)
+            unique.append(record)
+        return unique
+    
+    @staticmethod
+    def _tagged(name: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Records with the name of their shard added."""
+        for record in records:
+            record['shard'] = name
+        return records
+    
+    def shard_for(self, record_data: Dict[str, Any]) -> str:
+        """Name of the shard a record is stored in."""
+        return self.shard_map.shard_for(record_data)
+    
+    def create_code_record(self, record_data: Dict[str, Any]) -> OperationResult:
+        """Create a code record in its shard."""
+        return self.repositories[self.shard_for(record_data)].create_code_record(record_data)
+    
+    def bulk_insert_records(self, records_data: List[Dict[str, Any]]) -> OperationResult:
+        """Insert records, one transaction per shard, writing the shards in parallel."""
+        by_shard: Dict[str, List[Dict[str, Any]]] = {}
+        for record_data in records_data:
+            by_shard.setdefault(self.shard_for(record_data), []).append(record_data)
+        futures = {name: self._executor.submit(self.repositories[name].bulk_insert_records, records)
+                   for name, records in by_shard.items()}
+        results = {name: future.result() for name, future in futures.items()}
+        
+        failure = self._failure(results)
+        if failure:
+            return failure
+        return OperationResult(True, affected_rows=sum(result.affected_rows for result in results.values()))
+    
+    def get_code_record(self, code_hash: str) -> OperationResult:
+        """Get a code record by hash from the first shard, in map order, that has it."""
+        results = self._each_shard(lambda repository: repository.get_code_record(code_hash))
+        for name, result in results.items():
+            if result.success:
+                return OperationResult(True, data=self._tagged(name, [result.data])[0])
+        return OperationResult(False, error_message="Record not found")
+    
+    def get_all_code_records(self) -> OperationResult:
+        """Get the code records of all shards, newest first like UnifiedRepository.
+        
+        A code hash stored in several shards is returned once, as its
+        newest record.
+        """
+        results = self._each_shard(lambda repository: repository.get_all_code_records())
+        failure = self._failure(results)
+        if failure:
+            return failure
+        
+        records = [record for name, result in results.items() for record in self._tagged(name, result.data)]
+        records.sort(key=lambda record: str(record.get('timestamp') or ''), reverse=True)
+        records = self._unique_by_hash(records)
+        return OperationResult(True, data=records, affected_rows=len(records))
+    
+    def iter_code_records(self, columns: Optional[Sequence[str]] = None,
+                          page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the code records of every shard, shard by shard in id order.
+        
+        The next page of every shard is read in the background while the
+        current one is consumed, so all shards are read in parallel.
+        
+        Args:
+            columns: Columns to read (default: all of CODE_RECORD_COLUMNS)
+            page_size: Records read ahead per shard
+        
+        Yields:
+            One dict per record with the projected columns and 'shard'
+        """
+        streams = {name: repository.iter_code_records(columns, page_size=page_size)
+                   for name, repository in self.repositories.items()}
+        
+        def next_page(name: str) -> List[Dict[str, Any]]:
+            return self._tagged(name, list(islice(streams[name], page_size)))
+        
+        pages = {name: self._executor.submit(next_page, name) for name in streams}
+        for name in streams:
+            while True:
+                page = pages[name].result()
+                if len(page) == page_size:
+                    pages[name] = self._executor.submit(next_page, name)
+                yield from page
+                if len(page) < page_size:
+                    break
+    
+    def search_code_records(self, name_prefix: Optional[str] = None, name_contains: Sequence[str] = (),
+                            tokens: Sequence[str] = (), token_prefix: Optional[str] = None,
+                            columns: Sequence[str] = SEARCH_COLUMNS,
+                            limit: Optional[int] = None) -> OperationResult:
+        """
+        Search the code search indexes of every shard.
+        
+        Takes the arguments of UnifiedRepository.search_code_records. The
+        shards' matches are interleaved, the first of every shard before
+        the second of any, so a limit takes an even share from each shard
+        instead of filling up from the first one. A code hash matched in
+        several shards is returned once.
+        
+        Returns:
+            OperationResult with the merged records, each shard's in id
+            order
+        """
+        fetch = limit
+        while True:
+            results = self._each_shard(lambda repository: repository.search_code_records(
+                name_prefix, name_contains, tokens, token_prefix, columns, fetch
+            ))
+            failure = self._failure(results)
+            if failure:
+                return failure
+            
+            per_shard = [self._tagged(name, result.data) for name, result in results.items()]
+            records = self._unique_by_hash([record for rank in zip_longest(*per_shard)
+                                            for record in rank if record is not None])
+            # Dropped duplicates leave room for matches past the shards' limit
+            if limit is None or len(records) >= limit or all(len(page) < fetch for page in per_shard):
+                break
+            fetch += limit - len(records)
+        
+        if limit is not None:
+            records = records[:limit]
+        return OperationResult(True, data=records, affected_rows=len(records))
+    
+    def find_simhash_candidates(self, simhash: int, max_distance: int) -> OperationResult:
+        """
+        Find records within a Hamming radius in every shard's band indexes.
+        
+        Args:
+            simhash: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+        
+        Returns:
+            OperationResult with (shard, record_id, distance) triples sorted
+            by distance
+        """
+        results = self._each_shard(lambda repository: repository.find_simhash_candidates(simhash, max_distance))
+        failure = self._failure(results)
+        if failure:
+            return failure
+        
+        order = {name: position for position, name in enumerate(results)}
+        matches = sorted(
+            ((name, record_id, distance) for name, result in results.items() for record_id, distance in result.data),
+            key=lambda match: (match[2], order[match[0]], match[1])
+        )
+        return OperationResult(True, data=matches, affected_rows=len(matches))
+    
+    def get_statistics(self) -> OperationResult:
+        """
+        Get statistics summed over the shards.
+        
+        Files never span shards, so file counts add up like record counts.
+        
+        Returns:
+            OperationResult with the totals and each shard's own statistics
+            under 'shards'
+        """
+        results = self._each_shard(lambda repository: repository.get_statistics())
+        failure = self._failure(results)
+        if failure:
+            return failure
+        
+        stats: Dict[str, Any] = {}
+        for result in results.values():
+            for stat_name, value in result.data.items():
+                stats[stat_name] = stats.get(stat_name, 0) + (value or 0)
+        stats['shards'] = {name: result.data for name, result in results.items()}
+        return OperationResult(True, data=stats)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every shard's queued writes are committed."""
+        return all(repository.flush(timeout) for repository in self.repositories.values())
+    
+    def rebalance(self, target: ShardMap, batch_size: int = 500) -> OperationResult:
+        """
+        Move records to the shards a new map assigns them, then switch to it.
+        
+        Shards new in the target map are created; shards it drops are
+        emptied and closed, their files left in place. Each batch is first
+        committed to its new shard and then deleted from the old one, so an
+        interrupted rebalance loses nothing and running it again finishes
+        the move. A moved record whose code hash the new shard already
+        holds is merged into it, as inserting it there would have been.
+        
+        Args:
+            target: Shard map to move to
+            batch_size: Records moved per transaction
+        
+        Returns:
+            OperationResult with the number of records moved from each
+            shard to each other shard, as {source: {target: count}}
+        """
+        for name, path in target.shards.items():
+            if name not in self.repositories:
+                self._open_shard(name, path)
+        
+        moved: Dict[str, Dict[str, int]] = {}
+        for source, repository in list(self.repositories.items()):
+            batch = []
+            for record in repository.iter_code_records(CODE_RECORD_COLUMNS, page_size=batch_size):
+                destination = target.shard_for(record)
+                if destination == source:
+                    continue
+                batch.append((destination, record))
+                if len(batch) >= batch_size:
+                    self._move_records(source, batch, moved)
+                    batch = []
+            if batch:
+                self._move_records(source, batch, moved)
+            if moved.get(source):
+                CodeBlobRepository(self.managers[source]).delete_unreferenced()
+        
+        for name in list(self.repositories):
+            if name not in target.shards:
+                self.managers.pop(name).close()
+                del self.repositories[name]
+        self.shard_map = target
+        
+        total = sum(count for counts in moved.values() for count in counts.values())
+        logger.info(f"Rebalanced {total} code records across {len(target.shards)} shards")
+        return OperationResult(True, data=moved, affected_rows=total)
+    
+    def _move_records(self, source: str, batch: List[tuple], moved: Dict[str, Dict[str, int]]):
+        """Copy (destination, record) pairs to their shards, then delete them from the source."""
+        by_destination: Dict[str, List[Dict[str, Any]]] = {}
+        for destination, record in batch:
+            by_destination.setdefault(destination, []).append(record)
+        # Moved simhashes were produced with the source shard's algorithm
+        algorithm = SchemaManager(self.managers[source]).get_simhash_algorithm()
+        for destination, records in by_destination.items():
+            writer = UnifiedRepository(self.managers[destination], hash_algorithm=algorithm)
+            result = writer.bulk_insert_records(records)
+            if not result.success:
+                raise DatabaseError(f"Moving records to shard {destination} failed: {result.error_message}")
+            counts = moved.setdefault(source, {})
+            counts[destination] = counts.get(destination, 0) + len(records)
+        
+        manager = self.managers[source]
+        with manager.transaction():
+            manager.execute(self.queries['delete_records'], (json.dumps([record['id'] for _, record in batch]),))
+    
+    def close(self):
+        """Stop the reader threads and close every shard."""
+        self._executor.shutdown(wait=True)
+        for manager in self.managers.values():
+            manager.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -5,11 +5,13 @@ Repository for managing split rules used by LLM-based group splitting.
 import sqlite3
 import json
 import logging
+import threading
+from contextlib import nullcontext
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from dataclasses import dataclass, asdict
 
-from .database.connection_manager import DatabaseConnectionManager
+from .database.connection_pool import PooledConnectionManager
 from .database.decorators import with_retry
 
 
@@ -25,11 +27,27 @@ class SplitRule:
 
 
 class SplitRuleRepository:
-    """Repository for managing split rules in the database."""
+    """
+    Repository for managing split rules in the database.
     
-    def __init__(self, db_path: str = "oopstracker.db"):
+    With a write queue, rule statistics updates are batched by its
+    background writer; rules read back include the queued counts.
+    """
+    
+    def __init__(self, db_path: str = "oopstracker.db", db_manager=None, write_queue=None):
+        """
+        Args:
+            db_path: Database file used when no manager is given
+            db_manager: Connection manager to share with other repositories
+            write_queue: Optional WriteBehindQueue on db_manager that batches
+                update_rule_stats
+        """
         self.logger = logging.getLogger(__name__)
-        self.db_manager = DatabaseConnectionManager(db_path)
+        self.db_manager = db_manager or PooledConnectionManager(db_path)
+        self.write_queue = write_queue
+        # pattern -> [queued successes, queued failures]
+        self._pending_stats: Dict[str, List[int]] = {}
+        self._pending_lock = threading.Lock()
         self._ensure_table_exists()
     
     def _ensure_table_exists(self):
@@ -67,15 +85,17 @@ class SplitRuleRepository:
     
     def get_all_rules(self) -> List[SplitRule]:
         """Get all split rules from the database."""
-        conn = self.db_manager.connection
-        cursor = conn.execute("""
-            SELECT id, pattern, reasoning, created_at, success_count, failure_count
-            FROM split_rules
-            ORDER BY success_count DESC, created_at DESC
-        """)
+        with self._consistent_read():
+            cursor = self.db_manager.execute("""
+                SELECT id, pattern, reasoning, created_at, success_count, failure_count
+                FROM split_rules
+                ORDER BY success_count DESC, created_at DESC
+            """)
+            rows = cursor.fetchall()
+            pending = self._pending_stats_snapshot()
         
         rules = []
-        for row in cursor.fetchall():
+        for row in rows:
             rule = SplitRule(
                 id=row[0],
                 pattern=row[1],
@@ -84,7 +104,9 @@ class SplitRuleRepository:
                 success_count=row[4],
                 failure_count=row[5]
             )
-            rules.append(rule)
+            rules.append(self._with_pending(rule, pending))
+        if pending:
+            rules.sort(key=lambda rule: (rule.success_count, rule.created_at), reverse=True)
         
         self.logger.info(f"Retrieved {len(rules)} split rules from database")
         return rules
@@ -92,6 +114,10 @@ class SplitRuleRepository:
     @with_retry(max_attempts=3)
     def update_rule_stats(self, pattern: str, success: bool):
         """Update success/failure statistics for a rule."""
+        if self.write_queue is not None:
+            self._queue_rule_stats(pattern, success)
+            return
+        
         with self.db_manager.transaction():
             if success:
                 self.db_manager.execute("""
@@ -108,46 +134,104 @@ class SplitRuleRepository:
             
             self.logger.debug(f"Updated stats for rule '{pattern}': success={success}")
     
+    def _queue_rule_stats(self, pattern: str, success: bool):
+        """Hand a statistics update to the write queue, counting it as pending until written."""
+        delta = (1, 0) if success else (0, 1)
+        with self._pending_lock:
+            pending = self._pending_stats.setdefault(pattern, [0, 0])
+            pending[0] += delta[0]
+            pending[1] += delta[1]
+        
+        def written(committed: bool):
+            with self._pending_lock:
+                pending = self._pending_stats[pattern]
+                pending[0] -= delta[0]
+                pending[1] -= delta[1]
+                if pending == [0, 0]:
+                    del self._pending_stats[pattern]
+        
+        try:
+            self.write_queue.submit([("""
+                UPDATE split_rules
+                SET success_count = success_count + ?, failure_count = failure_count + ?
+                WHERE pattern = ?
+            """, [delta + (pattern,)])], written)
+        except Exception:
+            written(False)
+            raise
+    
+    def _consistent_read(self):
+        """Context manager keeping queued writes from landing mid-read."""
+        return self.write_queue.consistent_read() if self.write_queue is not None else nullcontext()
+    
+    def _pending_stats_snapshot(self) -> Dict[str, List[int]]:
+        """Copy of the queued statistics per pattern."""
+        with self._pending_lock:
+            return {pattern: list(counts) for pattern, counts in self._pending_stats.items()}
+    
+    @staticmethod
+    def _with_pending(rule: SplitRule, pending: Dict[str, List[int]]) -> SplitRule:
+        """Add the queued statistics of a rule to the stored ones."""
+        if rule.pattern in pending:
+            rule.success_count += pending[rule.pattern][0]
+            rule.failure_count += pending[rule.pattern][1]
+        return rule
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued statistics update is committed.
+        
+        Args:
+            timeout: Seconds to wait (None waits until done)
+        
+        Returns:
+            False if the timeout expired first
+        """
+        if self.write_queue is None:
+            return True
+        return self.write_queue.flush(timeout)
+    
     def get_rule_by_pattern(self, pattern: str) -> Optional[SplitRule]:
         """Get a rule by its pattern."""
-        conn = self.db_manager.connection
-        cursor = conn.execute("""
-            SELECT id, pattern, reasoning, created_at, success_count, failure_count
-            FROM split_rules
-            WHERE pattern = ?
-        """, (pattern,))
+        with self._consistent_read():
+            cursor = self.db_manager.execute("""
+                SELECT id, pattern, reasoning, created_at, success_count, failure_count
+                FROM split_rules
+                WHERE pattern = ?
+            """, (pattern,))
+            row = cursor.fetchone()
+            pending = self._pending_stats_snapshot()
         
-        row = cursor.fetchone()
         if row:
-            return SplitRule(
+            return self._with_pending(SplitRule(
                 id=row[0],
                 pattern=row[1],
                 reasoning=row[2],
                 created_at=datetime.fromisoformat(row[3]),
                 success_count=row[4],
                 failure_count=row[5]
-            )
+            ), pending)
         return None
     
     def delete_ineffective_rules(self, min_success_rate: float = 0.2):
         """Delete rules with low success rates."""
-        conn = self.db_manager.connection
-        cursor = conn.execute("""
-            DELETE FROM split_rules
-            WHERE (success_count + failure_count) > 5
-            AND (CAST(success_count AS FLOAT) / (success_count + failure_count)) < ?
-        """, (min_success_rate,))
+        self.flush()
+        with self.db_manager.transaction():
+            cursor = self.db_manager.execute("""
+                DELETE FROM split_rules
+                WHERE (success_count + failure_count) > 5
+                AND (CAST(success_count AS FLOAT) / (success_count + failure_count)) < ?
+            """, (min_success_rate,))
         
         deleted = cursor.rowcount
-        conn.commit()
         
         if deleted > 0:
             self.logger.info(f"Deleted {deleted} ineffective split rules")
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get statistics about split rules."""
-        conn = self.db_manager.connection
-        cursor = conn.execute("""
+        self.flush()
+        cursor = self.db_manager.execute("""
             SELECT 
                 COUNT(*) as total_rules,
                 SUM(success_count) as total_successes,
@@ -2,11 +2,25 @@
 Unified detector interface eliminating multiple detector implementations.
 """
 
+import logging
+import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Executor
+from collections import Counter
+from typing import FrozenSet, Iterator, List, Dict, Any, Optional, Sequence, Tuple
 from dataclasses import dataclass
+
+import numpy as np
+
 from .code_record import CodeRecord
 from .similarity_result import SimilarityResult
+from .core.simhash.calculator import SimHashCalculator
+from .core.simhash.hamming import hamming_distances, popcount64, to_hash_array
+from .core.simhash.self_join import PairChunk, iter_near_duplicate_pairs, link_identical_rows
+from .core.simhash.sidecar import SimHashSidecar
+from .core.union_find import UnionFind
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -19,6 +33,7 @@ class DetectionConfiguration:
     max_results: int = 100
     max_records_per_batch: int = 200
     memory_cleanup_interval: int = 50
+    max_hamming_distance: Optional[int] = None  # optional cap on the hash self-join radius
 
 
 class DuplicateDetector(ABC):
@@ -187,33 +202,105 @@ class LayeredDetectionStrategy:
 
 
 class SimHashDetector(DuplicateDetector):
-    """Refactored SimHash detector using layered strategy."""
+    """
+    Refactored SimHash detector using layered strategy.
     
-    def __init__(self):
+    Each record is reduced to the set of its lexical tokens (identifiers,
+    keywords, literals, operators) and a 64-bit SimHash of that set. Pairs
+    within the Hamming radius of the threshold are only candidates: at 64
+    bits even unrelated code often lands that close, so each candidate is
+    verified on the Jaccard similarity of the token sets before it joins a
+    cluster.
+    """
+    
+    HASH_BITS = 64
+    
+    # Record count from which the self-join fans out over the executor
+    SIDECAR_MIN_RECORDS = 20000
+    
+    # Bounds the temporary (pairs x bitset words) matrix of the verification
+    VERIFY_CHUNK_ELEMENTS = 1 << 20
+    
+    TOKEN_PATTERN = re.compile(r"[A-Za-z_]\w*|\d+(?:\.\d+)?|\S")
+    
+    def __init__(self, executor: Optional[Executor] = None):
+        """
+        Args:
+            executor: Optional process pool; large self-joins share the
+                hashes with its workers through a SimHashSidecar and run
+                one pigeonhole block per task
+        """
         self.strategy = LayeredDetectionStrategy()
+        self.calculator = SimHashCalculator(hash_size=self.HASH_BITS)
+        self.hash_cache = {}
+        self.token_cache = {}
+        self.executor = executor
     
     def detect_duplicates(self, records: List[CodeRecord], config: DetectionConfiguration) -> List[SimilarityResult]:
-        """Detect duplicates with resource management."""
-        # Immediate resource limitation to prevent Killed error
-        limited_records = records[:config.max_records_per_batch]
+        """Detect near-duplicate clusters with a sorted-block self-join."""
+        candidates = [record for record in records if record.code_content]
+        if len(candidates) < 2:
+            return []
+        
+        # The similarity threshold sets the radius; an explicit
+        # max_hamming_distance can lower it to keep the pigeonhole blocks
+        # wide enough for the join to stay near-linear on large corpora.
+        max_distance = max(0, int((1.0 - config.threshold) * self.HASH_BITS))
+        if config.max_hamming_distance is not None and config.max_hamming_distance < max_distance:
+            logger.info(f"Capping SimHash self-join radius at {config.max_hamming_distance} bits; "
+                        f"threshold {config.threshold} allows {max_distance}")
+            max_distance = max(0, config.max_hamming_distance)
+        
+        record_hashes = self._record_hashes(candidates)
+        token_bits, token_counts = self._token_bitsets([self._get_cached_tokens(record) for record in candidates])
+        
+        # Identical token sets give identical hashes, so rows sharing a hash
+        # are linked without verification and only distinct hashes are joined.
+        clusters = UnionFind(len(candidates))
+        link_identical_rows(clusters, record_hashes)
+        for left, right, _ in self._candidate_pairs(record_hashes, max_distance):
+            step = max(1, self.VERIFY_CHUNK_ELEMENTS // token_bits.shape[1])
+            for start in range(0, len(left), step):
+                chunk_left, chunk_right = left[start:start + step], right[start:start + step]
+                shared = popcount64(token_bits[chunk_left] & token_bits[chunk_right]).sum(axis=1, dtype=np.int64)
+                union = token_counts[chunk_left] + token_counts[chunk_right] - shared
+                keep = shared >= config.threshold * union
+                clusters.union_pairs(zip(chunk_left[keep].tolist(), chunk_right[keep].tolist()))
         
-        # Use exact match detector for better performance
-        exact_detector = ExactMatchDetector()
-        return exact_detector.detect_duplicates(limited_records, config)
+        results = []
+        for members in clusters.groups(min_size=2)[:config.max_results]:
+            member_hashes = record_hashes[members]
+            similarities = self._hash_similarities(int(member_hashes[0]), member_hashes)
+            result = SimilarityResult(
+                is_duplicate=True,
+                similarity_score=float(similarities.mean()),
+                matched_records=[candidates[index] for index in members],
+                analysis_method="simhash_self_join",
+                threshold=config.threshold
+            )
+            result.add_metadata('max_hamming_distance', max_distance)
+            results.append(result)
+        
+        return results
     
     def find_similar(self, source_code: str, records: List[CodeRecord], config: DetectionConfiguration) -> SimilarityResult:
         """Find similar code using SimHash."""
+        source_tokens = self._tokens(source_code)
         source_hash = self._calculate_simhash(source_code)
-        matched_records = []
+        candidates = [record for record in records if record.code_content]
         
-        for record in records:
-            if record.code_content:
-                record_hash = self._get_cached_hash(record)
-                similarity = self._hash_similarity(source_hash, record_hash)
-                
-                if similarity >= config.threshold:
-                    record.similarity_score = similarity
-                    matched_records.append(record)
+        # Score every candidate in one vectorized pass, then verify the
+        # survivors on their token sets
+        record_hashes = self._record_hashes(candidates)
+        similarities = self._hash_similarities(source_hash, record_hashes)
+        
+        matched_records = []
+        for index in np.flatnonzero(similarities >= config.threshold):
+            record = candidates[index]
+            if self._token_similarity(source_tokens, self._get_cached_tokens(record)) < config.threshold:
+                continue
+            record.similarity_score = float(similarities[index])
+            matched_records.append(record)
         
         is_duplicate = len(matched_records) > 0
         avg_similarity = sum(r.similarity_score for r in matched_records) / len(matched_records) if matched_records else 0
@@ -245,20 +332,92 @@ class SimHashDetector(DuplicateDetector):
         hash2 = self._get_cached_hash(record2)
         return self._hash_similarity(hash1, hash2)
     
+    def _candidate_pairs(self, record_hashes: np.ndarray, max_distance: int) -> Iterator[PairChunk]:
+        """Pairs of first rows of distinct hashes within max_distance bits."""
+        if self.executor is not None and len(record_hashes) >= self.SIDECAR_MIN_RECORDS:
+            with SimHashSidecar.create(record_hashes) as sidecar:
+                yield from sidecar.near_duplicate_pairs(max_distance, hash_size=self.HASH_BITS,
+                                                        executor=self.executor, distinct=True)
+            return
+        unique, first_rows = np.unique(record_hashes, return_index=True)
+        for left, right, distances in iter_near_duplicate_pairs(unique, max_distance, hash_size=self.HASH_BITS):
+            yield first_rows[left], first_rows[right], distances
+    
+    def _record_hashes(self, records: List[CodeRecord]) -> np.ndarray:
+        """SimHashes of records, computing the missing ones in one batch."""
+        missing = {}
+        for record in records:
+            key = self._cache_key(record)
+            if key not in self.hash_cache and key not in missing:
+                missing[key] = sorted(self._get_cached_tokens(record))
+        if missing:
+            computed = self.calculator.calculate_batch(list(missing.values()))
+            self.hash_cache.update(zip(missing, computed.tolist()))
+        return to_hash_array(self.hash_cache[self._cache_key(record)] for record in records)
+    
     def _get_cached_hash(self, record: CodeRecord) -> int:
         """Get cached SimHash for record."""
-        if record.simhash is not None:
-            return record.simhash
-        
-        cache_key = record.code_hash or id(record)
+        cache_key = self._cache_key(record)
         if cache_key not in self.hash_cache:
-            self.hash_cache[cache_key] = self._calculate_simhash(record.code_content)
+            self.hash_cache[cache_key] = self.calculator.calculate(sorted(self._get_cached_tokens(record)))
         
         return self.hash_cache[cache_key]
     
+    def _get_cached_tokens(self, record: CodeRecord) -> FrozenSet[str]:
+        """Get cached token set for record."""
+        cache_key = self._cache_key(record)
+        if cache_key not in self.token_cache:
+            self.token_cache[cache_key] = self._tokens(record.code_content)
+        
+        return self.token_cache[cache_key]
+    
     def _calculate_simhash(self, code: str) -> int:
         """Calculate SimHash for code content."""
-        return hash(code.lower().replace(' ', '').replace('\n', '').replace('\t', '')) % (2**32)
+        return self.calculator.calculate(sorted(self._tokens(code)))
+    
+    def _tokens(self, code: str) -> FrozenSet[str]:
+        """Set of lexical tokens of the code."""
+        return frozenset(self.TOKEN_PATTERN.findall(code or ""))
+    
+    @staticmethod
+    def _token_bitsets(token_sets: Sequence[FrozenSet[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pack token sets into bitsets for vectorized Jaccard verification.
+        
+        Only tokens held by at least two sets can be shared, so the bitsets
+        cover just those; the sizes count every token.
+        
+        Returns:
+            (uint64 array of shape (len(token_sets), words), int64 set sizes)
+        """
+        occurrences = Counter(token for tokens in token_sets for token in tokens)
+        columns = {token: column for column, token in
+                   enumerate(token for token, count in occurrences.items() if count > 1)}
+        rows, cols = [], []
+        for row, tokens in enumerate(token_sets):
+            for token in tokens:
+                column = columns.get(token)
+                if column is not None:
+                    rows.append(row)
+                    cols.append(column)
+        
+        bits = np.zeros((len(token_sets), max(1, (len(columns) + 63) // 64)), dtype=np.uint64)
+        cols = np.asarray(cols, dtype=np.uint64)
+        np.bitwise_or.at(bits, (np.asarray(rows, dtype=np.int64), (cols >> np.uint64(6)).astype(np.int64)),
+                         np.uint64(1) << (cols & np.uint64(63)))
+        counts = np.fromiter((len(tokens) for tokens in token_sets), dtype=np.int64, count=len(token_sets))
+        return bits, counts
+    
+    @staticmethod
+    def _token_similarity(tokens1: FrozenSet[str], tokens2: FrozenSet[str]) -> float:
+        """Jaccard similarity of two token sets."""
+        union = len(tokens1 | tokens2)
+        return len(tokens1 & tokens2) / union if union else 1.0
+    
+    @staticmethod
+    def _cache_key(record: CodeRecord) -> str:
+        # Content, not id(): ids of collected records are reused
+        return record.code_hash or record.code_content
     
     def _hash_similarity(self, hash1: int, hash2: int) -> float:
         """Calculate similarity between two hashes."""
@@ -266,8 +425,13 @@ class SimHashDetector(DuplicateDetector):
             return 1.0
         
         xor_result = hash1 ^ hash2
-        bit_diff = bin(xor_result).count('1')
-        return max(0, 1.0 - (bit_diff / 32.0))
+        bit_diff = xor_result.bit_count()
+        return max(0, 1.0 - (bit_diff / float(self.HASH_BITS)))
+    
+    def _hash_similarities(self, source_hash: int, record_hashes: np.ndarray) -> np.ndarray:
+        """Calculate similarity between one hash and an array of hashes."""
+        distances = hamming_distances(source_hash, record_hashes)
+        return np.maximum(0.0, 1.0 - distances / float(self.HASH_BITS))
 
 
 class ExactMatchDetector(DuplicateDetector):
@@ -322,9 +486,11 @@ class UnifiedDetectionService:
     def __init__(self):
         # Import pure LLM detector - no pattern matching
         from .pure_llm_detector import PureLLMDetector
+        from .minhash_detector import MinHashLSHDetector
         
         self.detectors = {
-            "pure_llm": PureLLMDetector()
+            "pure_llm": PureLLMDetector(),
+            "minhash_lsh": MinHashLSHDetector()
         }
         self.default_config = DetectionConfiguration(algorithm="pure_llm")
     
@@ -4,10 +4,18 @@ Unified repository for all data operations without try-catch complexity.
 
 import json
 import logging
+import threading
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List, Dict, Optional, Any, Tuple, Union
+from typing import List, Dict, Optional, Any, Tuple, Union, Iterator, Sequence
 from dataclasses import dataclass
 
+from .core.simhash.bands import BAND_COLUMNS, band_neighbors, band_radius, split_bands, to_signed64
+from .core.simhash.hamming import HASH_MASK, hamming_distances, to_hash_array
+from .database.code_blob_repository import blob_row, decompress_text
+from .database.schema_manager import SchemaManager
+from .exceptions import ConfigurationError
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,76 +28,257 @@ class OperationResult:
     affected_rows: int = 0
 
 
+# Columns of a code record as returned by the repositories
+CODE_RECORD_COLUMNS = ('id', 'code_hash', 'code_content', 'normalized_code', 'function_name', 'file_path',
+                       'timestamp', 'metadata', 'simhash')
+
+# Texts live in code_blobs and are only joined in when projected; rows
+# written before code_blobs existed still hold plain text
+_TEXT_COLUMNS = {
+    'code_content': ("COALESCE(code_blob.data, r.code_content) AS code_content",
+                     "LEFT JOIN code_blobs code_blob ON code_blob.content_hash = r.code_blob"),
+    'normalized_code': ("COALESCE(normalized_blob.data, r.normalized_code) AS normalized_code",
+                        "LEFT JOIN code_blobs normalized_blob ON normalized_blob.content_hash = r.normalized_blob")
+}
+
+
+def _select_records(columns: Sequence[str], *extra: str) -> str:
+    """SELECT ... FROM code_records r with the blob joins the columns need."""
+    expressions = [_TEXT_COLUMNS[column][0] if column in _TEXT_COLUMNS else f"r.{column}" for column in columns]
+    joins = [_TEXT_COLUMNS[column][1] for column in columns if column in _TEXT_COLUMNS]
+    return f"SELECT {', '.join(expressions + list(extra))} FROM code_records r {' '.join(joins)}"
+
+
+QUERIES = {
+    'insert_code_blob': """
+        INSERT OR IGNORE INTO code_blobs (content_hash, data, size, identifiers) VALUES (?, ?, ?, ?)
+    """,
+    'insert_code_record': """
+        INSERT OR IGNORE INTO code_records 
+        (code_hash, code_blob, normalized_blob, function_name, file_path, timestamp, metadata, simhash,
+         simhash_band0, simhash_band1, simhash_band2, simhash_band3)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'select_code_record': _select_records(CODE_RECORD_COLUMNS) + " WHERE r.code_hash = ?",
+    'select_all_records': _select_records(CODE_RECORD_COLUMNS) + " ORDER BY r.timestamp DESC",
+    'insert_classification_rule': """
+        INSERT OR REPLACE INTO classification_rules 
+        (pattern, category, confidence, rule_type, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'select_classification_rules': """
+        SELECT * FROM classification_rules WHERE rule_type = ?
+    """,
+    'insert_file_tracking': """
+        INSERT OR REPLACE INTO file_tracking 
+        (file_path, last_modified, file_hash, scan_timestamp)
+        VALUES (?, ?, ?, ?)
+    """,
+    'select_changed_files': """
+        SELECT file_path FROM file_tracking 
+        WHERE last_modified > scan_timestamp OR file_hash != ?
+    """,
+    'select_code_search_tables': """
+        SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('name_search', 'token_search')
+    """,
+    # Each band term is answered by its own index (MULTI-INDEX OR)
+    'select_simhash_candidates': "SELECT id, simhash FROM code_records WHERE " + " OR ".join(
+        f"{column} IN (SELECT value FROM json_each(?))" for column in BAND_COLUMNS
+    )
+}
+
+# Counters kept current by the triggers of SchemaManager
+STATISTICS_QUERIES = {
+    'total_records': "SELECT value FROM stats WHERE name = 'code_records.total_records'",
+    'total_files': "SELECT value FROM stats WHERE name = 'code_records.total_files'",
+    'total_functions': "SELECT value FROM stats WHERE name = 'code_records.total_functions'"
+}
+
+
+def _code_record_rows(records_data: List[Dict[str, Any]]) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Parameters of insert_code_blob and insert_code_record for record dicts.
+    
+    Returns:
+        Distinct blob rows and one record row per record dict
+    """
+    blob_rows = {}
+    
+    def blob(text: Optional[str]) -> Optional[str]:
+        if text is None:
+            return None
+        row = blob_row(text)
+        blob_rows.setdefault(row[0], row)
+        return row[0]
+    
+    record_rows = []
+    for record_data in records_data:
+        metadata = record_data.get('metadata', {})
+        metadata_str = json.dumps(metadata) if isinstance(metadata, dict) else metadata or '{}'
+        simhash = record_data.get('simhash')
+        if simhash is None:
+            simhash_columns = (None,) * (1 + len(BAND_COLUMNS))
+        else:
+            simhash_columns = (to_signed64(simhash),) + split_bands(simhash)
+        record_rows.append((
+            record_data.get('code_hash'),
+            blob(record_data.get('code_content')),
+            blob(record_data.get('normalized_code')),
+            record_data.get('function_name'),
+            record_data.get('file_path'),
+            record_data.get('timestamp', datetime.now()),
+            metadata_str
+        ) + simhash_columns)
+    return list(blob_rows.values()), record_rows
+
+
+def _record_dict(row) -> Dict[str, Any]:
+    """Code record row as a dict with decompressed texts and an unsigned simhash."""
+    record = dict(row)
+    for column in _TEXT_COLUMNS:
+        if column in record:
+            record[column] = decompress_text(record[column])
+    if record.get('simhash') is not None:
+        record['simhash'] = int(record['simhash']) & HASH_MASK
+    return record
+
+
+def _pending_record_dict(record_data: Dict[str, Any], row: tuple) -> Dict[str, Any]:
+    """Record dict, as read back from the database, of a record still in the write queue."""
+    timestamp = row[5]
+    return {
+        'id': None,
+        'code_hash': row[0],
+        'code_content': record_data.get('code_content'),
+        'normalized_code': record_data.get('normalized_code'),
+        'function_name': row[3],
+        'file_path': row[4],
+        'timestamp': str(timestamp) if isinstance(timestamp, datetime) else timestamp,
+        'metadata': row[6],
+        'simhash': row[7] & HASH_MASK if row[7] is not None else None
+    }
+
+
+# Default projection of search_code_records
+SEARCH_COLUMNS = ('id', 'code_hash', 'function_name', 'file_path')
+
+# Shortest name text the trigram index can look up; shorter ones are scanned
+TRIGRAM_LENGTH = 3
+
+
+def _like_escape(text: str) -> str:
+    """Escape LIKE wildcards for ESCAPE '\\'."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts_string(text: str) -> str:
+    """Quote text as an FTS5 string."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _code_search_conditions(name_prefix: Optional[str], name_contains: Sequence[str],
+                            tokens: Sequence[str], token_prefix: Optional[str]) -> Tuple[str, list]:
+    """
+    WHERE clause of search_code_records and its parameters.
+    
+    Name texts of at least TRIGRAM_LENGTH characters are looked up in
+    name_search; shorter ones and the anchored prefix are then checked
+    with LIKE on the remaining rows. Identifiers are looked up in
+    token_search as whole tokens or a token prefix.
+    """
+    name_texts = [text for text in name_contains if text]
+    if name_prefix:
+        name_texts.append(name_prefix)
+    name_terms = [_fts_string(text) for text in name_texts if len(text) >= TRIGRAM_LENGTH]
+    token_terms = [_fts_string(token) for token in tokens if token]
+    if token_prefix:
+        token_terms.append(_fts_string(token_prefix) + " *")
+    
+    conditions = []
+    params = []
+    if name_terms:
+        conditions.append("r.id IN (SELECT rowid FROM name_search WHERE name_search MATCH ?)")
+        params.append(" AND ".join(name_terms))
+    if token_terms:
+        conditions.append("r.id IN (SELECT rowid FROM token_search WHERE token_search MATCH ?)")
+        params.append(" AND ".join(token_terms))
+    if name_prefix:
+        conditions.append("r.function_name LIKE ? ESCAPE '\\'")
+        params.append(_like_escape(name_prefix) + "%")
+    for text in name_texts:
+        if len(text) < TRIGRAM_LENGTH and text is not name_prefix:
+            conditions.append("r.function_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like_escape(text)}%")
+    if not conditions:
+        raise ValueError("No code search terms given")
+    return " AND ".join(conditions), params
+
+
+def _simhash_candidate_params(simhash: int, max_distance: int) -> tuple:
+    """JSON band value lists of select_simhash_candidates for a query."""
+    radius = band_radius(max_distance)
+    return tuple(json.dumps(band_neighbors(band, radius)) for band in split_bands(simhash))
+
+
 class UnifiedRepository:
     """
     Centralized repository for all data operations.
     Eliminates try-catch complexity by using Result pattern.
+    
+    With a write queue, code record inserts are handed to its background
+    writer instead of committing one by one. Lookups by hash and
+    get_all_code_records still see queued records through an in-memory
+    overlay; scans and aggregates flush the queue first.
     """
     
-    def __init__(self, connection_manager):
+    def __init__(self, connection_manager, bk_tree=None, write_queue=None,
+                 hash_algorithm: Optional[str] = None):
+        """
+        Args:
+            connection_manager: DatabaseConnectionManager for the code_records DB
+            bk_tree: Optional BKTree kept in sync with inserted simhashes
+            write_queue: Optional WriteBehindQueue on the same connection
+                manager that batches code record inserts
+            hash_algorithm: Feature hash algorithm of the calculator that
+                produced the simhashes written; recorded in (or checked
+                against) the database on the first simhash write, and
+                required once records carry simhashes
+        """
         self.connection_manager = connection_manager
+        self.bk_tree = bk_tree
+        self.write_queue = write_queue
+        self.hash_algorithm = hash_algorithm
+        self._hash_algorithm_checked = False
+        self._pending_records: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
         self._setup_queries()
     
     def _setup_queries(self):
         """Pre-define all SQL queries."""
-        self.queries = {
-            'insert_code_record': """
-                INSERT OR IGNORE INTO code_records 
-                (code_hash, code_content, normalized_code, function_name, file_path, timestamp, metadata, simhash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            'select_code_record': """
-                SELECT * FROM code_records WHERE code_hash = ?
-            """,
-            'select_all_records': """
-                SELECT * FROM code_records ORDER BY timestamp DESC
-            """,
-            'insert_classification_rule': """
-                INSERT OR REPLACE INTO classification_rules 
-                (pattern, category, confidence, rule_type, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-            'select_classification_rules': """
-                SELECT * FROM classification_rules WHERE rule_type = ?
-            """,
-            'insert_file_tracking': """
-                INSERT OR REPLACE INTO file_tracking 
-                (file_path, last_modified, file_hash, scan_timestamp)
-                VALUES (?, ?, ?, ?)
-            """,
-            'select_changed_files': """
-                SELECT file_path FROM file_tracking 
-                WHERE last_modified > scan_timestamp OR file_hash != ?
-            """
-        }
+        self.queries = dict(QUERIES)
     
     def create_code_record(self, record_data: Dict[str, Any]) -> OperationResult:
         """Create a code record."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
         
-        metadata = record_data.get('metadata', {})
-        metadata_str = json.dumps(metadata) if isinstance(metadata, dict) else metadata or '{}'
-        
-        result = cursor.execute(
-            self.queries['insert_code_record'],
-            (
-                record_data.get('code_hash'),
-                record_data.get('code_content'),
-                record_data.get('normalized_code'),
-                record_data.get('function_name'),
-                record_data.get('file_path'),
-                record_data.get('timestamp', datetime.now()),
-                metadata_str,
-                record_data.get('simhash')
+        self._check_hash_algorithm([record_data])
+        if self.write_queue is not None:
+            queued = self._queue_code_records([record_data])
+            return OperationResult(
+                success=queued > 0,
+                affected_rows=queued,
+                error_message="" if queued else "Record already queued"
             )
-        )
+        
+        blob_rows, record_rows = _code_record_rows([record_data])
+        with self.connection_manager.transaction():
+            self.connection_manager.executemany(self.queries['insert_code_blob'], blob_rows)
+            result = self.connection_manager.execute(self.queries['insert_code_record'], record_rows[0])
         
         success = result.rowcount > 0
         if success:
-            self.connection_manager.commit()
+            self._sync_bk_tree()
         return OperationResult(
             success=success,
             affected_rows=result.rowcount,
@@ -98,151 +287,351 @@ class UnifiedRepository:
     
     def get_code_record(self, code_hash: str) -> OperationResult:
         """Get a code record by hash."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
         
-        result = cursor.execute(self.queries['select_code_record'], (code_hash,))
-        record = result.fetchone()
+        with self._consistent_read():
+            result = self.connection_manager.execute(self.queries['select_code_record'], (code_hash,))
+            record = result.fetchone()
+            pending = self._pending_records.get(code_hash) if record is None else None
         
         if record:
-            return OperationResult(True, data=dict(record))
+            return OperationResult(True, data=_record_dict(record))
+        elif pending:
+            return OperationResult(True, data=dict(pending))
         else:
             return OperationResult(False, error_message="Record not found")
     
     def get_all_code_records(self) -> OperationResult:
         """Get all code records."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
         
-        result = cursor.execute(self.queries['select_all_records'])
-        records = [dict(row) for row in result.fetchall()]
+        with self._consistent_read():
+            result = self.connection_manager.execute(self.queries['select_all_records'])
+            records = [_record_dict(row) for row in result.fetchall()]
+            with self._pending_lock:
+                pending = list(self._pending_records.values())
         
+        if pending:
+            stored = {record['code_hash'] for record in records}
+            # Queued records are the newest ones
+            records = [dict(record) for record in reversed(pending) if record['code_hash'] not in stored] + records
         return OperationResult(True, data=records, affected_rows=len(records))
     
+    def iter_code_records(self, columns: Optional[Sequence[str]] = None, page_size: int = 1000,
+                          arraysize: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Stream code records in id order with keyset pagination.
+        
+        Each page continues after the last id instead of an OFFSET, and only
+        the projected columns are read, so e.g. ('code_hash', 'simhash')
+        never pulls source text.
+        
+        Args:
+            columns: Columns to read (default: all of CODE_RECORD_COLUMNS)
+            page_size: Rows fetched per keyset page
+            arraysize: Rows fetched from SQLite per fetchmany call
+        
+        Yields:
+            One dict per record with the projected columns
+        
+        Raises:
+            ValueError: If an unknown column is requested
+        """
+        columns = list(CODE_RECORD_COLUMNS if columns is None else columns)
+        unknown = set(columns) - set(CODE_RECORD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown code_records columns: {sorted(unknown)}")
+        self.flush()
+        query = _select_records(columns, "r.id AS _key_id") + " WHERE r.id > ? ORDER BY r.id LIMIT ?"
+        
+        last_id = 0
+        while True:
+            cursor = self.connection_manager.execute(query, (last_id, page_size))
+            count = 0
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                if not rows:
+                    break
+                count += len(rows)
+                last_id = rows[-1]['_key_id']
+                for row in rows:
+                    record = _record_dict(row)
+                    del record['_key_id']
+                    yield record
+            if count < page_size:
+                return
+    
     def create_classification_rule(self, rule_data: Dict[str, Any]) -> OperationResult:
         """Create a classification rule."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
-        
-        result = cursor.execute(
-            self.queries['insert_classification_rule'],
-            (
-                rule_data.get('pattern'),
-                rule_data.get('category'),
-                rule_data.get('confidence', 0.5),
-                rule_data.get('rule_type', 'pattern'),
-                datetime.now()
+        
+        with self.connection_manager.transaction():
+            result = self.connection_manager.execute(
+                self.queries['insert_classification_rule'],
+                (
+                    rule_data.get('pattern'),
+                    rule_data.get('category'),
+                    rule_data.get('confidence', 0.5),
+                    rule_data.get('rule_type', 'pattern'),
+                    datetime.now()
+                )
             )
-        )
         
         return OperationResult(True, affected_rows=result.rowcount)
     
     def get_classification_rules(self, rule_type: str = 'pattern') -> OperationResult:
         """Get classification rules by type."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
         
-        result = cursor.execute(self.queries['select_classification_rules'], (rule_type,))
+        result = self.connection_manager.execute(self.queries['select_classification_rules'], (rule_type,))
         rules = [dict(row) for row in result.fetchall()]
         
         return OperationResult(True, data=rules, affected_rows=len(rules))
     
     def track_file(self, file_data: Dict[str, Any]) -> OperationResult:
         """Track file changes."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
-        
-        result = cursor.execute(
-            self.queries['insert_file_tracking'],
-            (
-                file_data.get('file_path'),
-                file_data.get('last_modified'),
-                file_data.get('file_hash'),
-                datetime.now()
+        
+        with self.connection_manager.transaction():
+            result = self.connection_manager.execute(
+                self.queries['insert_file_tracking'],
+                (
+                    file_data.get('file_path'),
+                    file_data.get('last_modified'),
+                    file_data.get('file_hash'),
+                    datetime.now()
+                )
             )
-        )
         
         return OperationResult(True, affected_rows=result.rowcount)
     
     def get_changed_files(self, reference_hash: str) -> OperationResult:
         """Get files that have changed."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
         
-        result = cursor.execute(self.queries['select_changed_files'], (reference_hash,))
+        result = self.connection_manager.execute(self.queries['select_changed_files'], (reference_hash,))
         files = [row[0] for row in result.fetchall()]
         
         return OperationResult(True, data=files, affected_rows=len(files))
     
     def bulk_insert_records(self, records_data: List[Dict[str, Any]]) -> OperationResult:
         """Bulk insert multiple records efficiently."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
-        
-        insert_data = [
-            (
-                record.get('code_hash'),
-                record.get('code_content'),
-                record.get('normalized_code'),
-                record.get('function_name'),
-                record.get('file_path'),
-                record.get('timestamp', datetime.now()),
-                json.dumps(record.get('metadata', {})) if isinstance(record.get('metadata'), dict) else record.get('metadata', '{}'),
-                record.get('simhash')
-            )
-            for record in records_data
-        ]
         
-        cursor.executemany(self.queries['insert_code_record'], insert_data)
-        self.connection_manager.commit()
+        self._check_hash_algorithm(records_data)
+        if self.write_queue is not None:
+            self._queue_code_records(records_data)
+            return OperationResult(True, affected_rows=len(records_data))
+        
+        blob_rows, insert_data = _code_record_rows(records_data)
+        
+        with self.connection_manager.transaction():
+            self.connection_manager.executemany(self.queries['insert_code_blob'], blob_rows)
+            self.connection_manager.executemany(self.queries['insert_code_record'], insert_data)
+        self._sync_bk_tree()
         
         return OperationResult(True, affected_rows=len(insert_data))
     
+    def search_code_records(self, name_prefix: Optional[str] = None, name_contains: Sequence[str] = (),
+                            tokens: Sequence[str] = (), token_prefix: Optional[str] = None,
+                            columns: Sequence[str] = SEARCH_COLUMNS,
+                            limit: Optional[int] = None) -> OperationResult:
+        """
+        Find code records by name and identifier text in the code search indexes.
+        
+        All given conditions must hold. Matching ignores case, like the
+        re.IGNORECASE checks it replaces, and runs in SQLite at index speed
+        instead of a regex per row.
+        
+        Args:
+            name_prefix: Text the function name starts with
+            name_contains: Texts that all occur in the function name
+            tokens: Identifiers that all occur whole in the code
+            token_prefix: Text some identifier in the code starts with
+            columns: Columns to read (default: SEARCH_COLUMNS)
+            limit: Maximum number of records (default: all)
+        
+        Returns:
+            OperationResult with one dict per record in id order; fails
+            when the database has no code search indexes (no FTS5)
+        
+        Raises:
+            ValueError: If no condition or an unknown column is given
+        """
+        if not self.connection_manager.connection:
+            return OperationResult(False, error_message="Database connection unavailable")
+        
+        unknown = set(columns) - set(CODE_RECORD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown code_records columns: {sorted(unknown)}")
+        where, params = _code_search_conditions(name_prefix, name_contains, tokens, token_prefix)
+        if self.connection_manager.execute(self.queries['select_code_search_tables']).fetchone()[0] < 2:
+            return OperationResult(False, error_message="Code search index not available")
+        
+        self.flush()
+        query = _select_records(columns) + f" WHERE {where} ORDER BY r.id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        records = [_record_dict(row) for row in self.connection_manager.execute(query, tuple(params))]
+        return OperationResult(True, data=records, affected_rows=len(records))
+    
+    def find_similar_simhashes(self, simhash: int, max_distance: int) -> OperationResult:
+        """Find record ids whose simhash is within a Hamming radius using the BK-tree."""
+        if self.bk_tree is None:
+            return OperationResult(False, error_message="No BK-tree attached to repository")
+        
+        self.flush()
+        # Also rebuilds the tree if rows were deleted or rewritten meanwhile
+        self._sync_bk_tree()
+        matches = self.bk_tree.query(simhash, max_distance)
+        return OperationResult(True, data=matches, affected_rows=len(matches))
+    
+    def find_simhash_candidates(self, simhash: int, max_distance: int) -> OperationResult:
+        """
+        Find records whose simhash is within a Hamming radius using the band indexes.
+        
+        Only rows sharing a band value within max_distance // 4 bits of the
+        query (which every match must, by pigeonhole) are read from SQLite;
+        their exact distances are then checked in Python.
+        
+        Args:
+            simhash: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+        
+        Returns:
+            OperationResult with (record_id, distance) pairs sorted by distance
+        """
+        if not self.connection_manager.connection:
+            return OperationResult(False, error_message="Database connection unavailable")
+        
+        self.flush()
+        result = self.connection_manager.execute(
+            self.queries['select_simhash_candidates'], _simhash_candidate_params(simhash, max_distance)
+        )
+        rows = result.fetchall()
+        distances = hamming_distances(simhash, to_hash_array(row[1] for row in rows))
+        matches = sorted(
+            ((row[0], int(distance)) for row, distance in zip(rows, distances) if distance <= max_distance),
+            key=lambda match: (match[1], match[0])
+        )
+        return OperationResult(True, data=matches, affected_rows=len(matches))
+    
+    def _check_hash_algorithm(self, records_data: List[Dict[str, Any]]):
+        """
+        Record or verify the simhash algorithm before the first simhash write.
+        
+        Raises:
+            ConfigurationError: If simhashes are written without an algorithm,
+                or the database holds simhashes of another one
+        """
+        if self._hash_algorithm_checked or all(record.get('simhash') is None for record in records_data):
+            return
+        if self.hash_algorithm is None:
+            raise ConfigurationError("Simhashes must be written with the algorithm that produced them")
+        SchemaManager(self.connection_manager).ensure_simhash_algorithm(self.hash_algorithm)
+        self._hash_algorithm_checked = True
+    
+    def _sync_bk_tree(self):
+        """Feed newly inserted rows into the attached BK-tree."""
+        if self.bk_tree is not None:
+            self.bk_tree.sync(self.connection_manager)
+    
+    def _queue_code_records(self, records_data: List[Dict[str, Any]]) -> int:
+        """
+        Hand records to the write queue and show them in the overlay until written.
+        
+        Returns:
+            Number of records that were neither queued already nor duplicated
+        """
+        blob_rows, record_rows = _code_record_rows(records_data)
+        queued = {}
+        with self._pending_lock:
+            for record_data, row in zip(records_data, record_rows):
+                if row[0] not in self._pending_records and row[0] not in queued:
+                    queued[row[0]] = _pending_record_dict(record_data, row)
+            self._pending_records.update(queued)
+        
+        def written(committed: bool):
+            with self._pending_lock:
+                for code_hash, record in queued.items():
+                    if self._pending_records.get(code_hash) is record:
+                        del self._pending_records[code_hash]
+        
+        try:
+            self.write_queue.submit([
+                (self.queries['insert_code_blob'], blob_rows),
+                (self.queries['insert_code_record'], record_rows)
+            ], written)
+        except Exception:
+            written(False)
+            raise
+        return len(queued)
+    
+    def _consistent_read(self):
+        """Context manager keeping queued writes from landing mid-read."""
+        return self.write_queue.consistent_read() if self.write_queue is not None else nullcontext()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued write is committed.
+        
+        Without a write queue every write is committed already.
+        
+        Args:
+            timeout: Seconds to wait (None waits until done)
+        
+        Returns:
+            False if the timeout expired first
+        """
+        if self.write_queue is None:
+            return True
+        flushed = self.write_queue.flush(timeout)
+        if flushed:
+            self._sync_bk_tree()
+        return flushed
+    
+    def close(self):
+        """
+        Flush queued writes and save the attached BK-tree if it changed.
+        
+        The connection manager stays open; it belongs to the caller.
+        """
+        self.flush()
+        if self.bk_tree is not None and self.bk_tree.is_dirty and self.bk_tree.snapshot_path is not None:
+            self.bk_tree.save()
+    
     def execute_custom_query(self, query: str, params: Tuple = ()) -> OperationResult:
         """Execute custom query with parameters."""
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
-        
-        result = cursor.execute(query, params)
         
+        self.flush()
         if query.strip().upper().startswith('SELECT'):
+            result = self.connection_manager.execute(query, params)
             data = [dict(row) for row in result.fetchall()]
             return OperationResult(True, data=data, affected_rows=len(data))
         else:
+            with self.connection_manager.transaction():
+                result = self.connection_manager.execute(query, params)
             return OperationResult(True, affected_rows=result.rowcount)
     
     def get_statistics(self) -> OperationResult:
         """Get database statistics."""
-        stats_queries = {
-            'total_records': 'SELECT COUNT(*) as count FROM code_records',
-            'total_files': 'SELECT COUNT(DISTINCT file_path) as count FROM code_records',
-            'total_functions': 'SELECT COUNT(*) as count FROM code_records WHERE function_name IS NOT NULL'
-        }
-        
-        connection = self.connection_manager.connection
-        if not connection:
+        if not self.connection_manager.connection:
             return OperationResult(False, error_message="Database connection unavailable")
-        cursor = connection.cursor()
         
+        self.flush()
         stats = {}
-        for stat_name, query in stats_queries.items():
-            result = cursor.execute(query)
+        for stat_name, query in STATISTICS_QUERIES.items():
+            result = self.connection_manager.execute(query)
             row = result.fetchone()
             stats[stat_name] = row[0] if row else 0
         
@@ -4,6 +4,7 @@ from .function_visitor import FunctionVisitor
 from .class_visitor import ClassVisitor
 from .control_flow_visitor import ControlFlowVisitor
 from .expression_visitor import ExpressionVisitor
+from .traversal import FusedTraversal, ScopeFeatures
 
 __all__ = [
     'BaseStructureVisitor',
@@ -11,4 +12,6 @@ __all__ = [
     'ClassVisitor',
     'ControlFlowVisitor',
     'ExpressionVisitor',
+    'FusedTraversal',
+    'ScopeFeatures',
 ]
\ No newline at end of file
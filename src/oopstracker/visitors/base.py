@@ -15,6 +15,14 @@ class BaseStructureVisitor(ast.NodeVisitor):
         self.dependencies: Set[str] = set()
         self.function_calls: List[str] = []
         self.imports: List[str] = []
+        # When False the visitor only handles nodes handed to it (e.g. by
+        # FusedTraversal) and generic_visit does not descend
+        self.descend: bool = True
+    
+    def generic_visit(self, node):
+        """Visit children unless another engine drives the traversal."""
+        if self.descend:
+            super().generic_visit(node)
     
     def get_structure_signature(self) -> str:
         """Get a structural signature of the code."""
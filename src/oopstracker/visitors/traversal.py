@@ -0,0 +1,139 @@
+"""Single-pass traversal engine dispatching each node to several visitors."""
+import ast
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Set, Tuple, Type
+
+from .base import BaseStructureVisitor
+
+
+@dataclass
+class ScopeFeatures:
+    """Features of one scope node's subtree collected during a traversal."""
+
+    token_ranges: List[Tuple[int, int]]  # [start, end) into each visitor's structure_tokens
+    complexity: int
+    dependencies: Set[str]
+
+
+class _ScopeExit:
+    """Stack marker closing a scope once all of its descendants are visited."""
+
+    __slots__ = ("node", "token_starts", "complexity_start", "parent_dependencies")
+
+    def __init__(self, node, token_starts, complexity_start, parent_dependencies):
+        self.node = node
+        self.token_starts = token_starts
+        self.complexity_start = complexity_start
+        self.parent_dependencies = parent_dependencies
+
+
+class FusedTraversal:
+    """
+    Walks an AST once and hands every node to all registered visitors.
+
+    Each visitor's ``visit_<NodeType>`` handler is called in pre-order, in
+    registration order, exactly as it would be during the visitor's own
+    recursive walk. The visitors are switched to handler mode so their
+    ``generic_visit`` does not descend; the engine does the descent with an
+    explicit stack instead. Because every handler in this package does its
+    work before calling ``generic_visit``, each visitor sees the nodes in
+    the same order and collects the same tokens as a standalone walk.
+    """
+
+    def __init__(self, visitors: List[BaseStructureVisitor]):
+        """
+        Initialize the traversal.
+
+        Args:
+            visitors: Visitors whose handlers run on each node, in order
+        """
+        self.visitors = list(visitors)
+        for visitor in self.visitors:
+            visitor.descend = False
+        self._dispatch: Dict[Type[ast.AST], List[Callable[[ast.AST], None]]] = {}
+
+    def visit(self, node: ast.AST, scope_types: Tuple[Type[ast.AST], ...] = ()) -> Dict[ast.AST, "ScopeFeatures"]:
+        """
+        Traverse node and its descendants once, dispatching to all visitors.
+
+        Nodes of scope_types (e.g. function and class definitions) also get
+        their own features recorded on the way. A visitor's tokens for a
+        subtree are contiguous in pre-order, so a scope only remembers its
+        token range per visitor. Dependencies are collected bottom-up: on
+        entering a scope every visitor gets a fresh set, which is merged
+        into the enclosing scope's set on exit.
+
+        Args:
+            node: Root node to traverse
+            scope_types: Node types whose subtree features are recorded
+
+        Returns:
+            Mapping from each scope node to its ScopeFeatures
+        """
+        visitors = self.visitors
+        dispatch = self._dispatch
+        scopes: Dict[ast.AST, ScopeFeatures] = {}
+        stack = [node]
+        while stack:
+            node = stack.pop()
+
+            # Scope exit marker, pushed below the scope's children
+            if type(node) is _ScopeExit:
+                scopes[node.node] = self._close_scope(node)
+                continue
+
+            node_type = type(node)
+            if scope_types and isinstance(node, scope_types):
+                stack.append(_ScopeExit(
+                    node,
+                    [len(visitor.structure_tokens) for visitor in visitors],
+                    sum(visitor.complexity for visitor in visitors),
+                    [visitor.dependencies for visitor in visitors]
+                ))
+                for visitor in visitors:
+                    visitor.dependencies = set()
+
+            handlers = dispatch.get(node_type)
+            if handlers is None:
+                handlers = dispatch[node_type] = self._handlers_for(node_type)
+            for handler in handlers:
+                handler(node)
+
+            # Push children in reverse so they are popped in field order
+            children = []
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, ast.AST):
+                    children.append(value)
+                elif isinstance(value, list):
+                    children.extend(item for item in value if isinstance(item, ast.AST))
+            children.reverse()
+            stack.extend(children)
+
+        return scopes
+
+    def _close_scope(self, marker: "_ScopeExit") -> "ScopeFeatures":
+        """Record a finished scope and fold its dependencies into the parent's."""
+        dependencies = set()
+        for visitor, parent_dependencies in zip(self.visitors, marker.parent_dependencies):
+            dependencies |= visitor.dependencies
+            parent_dependencies |= visitor.dependencies
+            visitor.dependencies = parent_dependencies
+        return ScopeFeatures(
+            token_ranges=[(start, len(visitor.structure_tokens))
+                          for visitor, start in zip(self.visitors, marker.token_starts)],
+            complexity=sum(visitor.complexity for visitor in self.visitors) - marker.complexity_start,
+            dependencies=dependencies
+        )
+
+    def _handlers_for(self, node_type: Type[ast.AST]) -> List[Callable[[ast.AST], None]]:
+        """Bound handlers of every visitor that defines one for node_type."""
+        method_name = f"visit_{node_type.__name__}"
+        # ast.NodeVisitor's own compatibility handlers (e.g. visit_Constant)
+        # only forward to generic_visit, so they are skipped
+        inherited = getattr(ast.NodeVisitor, method_name, None)
+        return [
+            getattr(visitor, method_name)
+            for visitor in self.visitors
+            if getattr(type(visitor), method_name, inherited) is not inherited
+        ]
@@ -4,6 +4,7 @@ import pytest
 from oopstracker.ast_analyzer import ASTAnalyzer
 from oopstracker.core.simhash import SimHashCalculator
 from oopstracker.core.analyzer.code_analyzer import CodeAnalyzer
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
 
 
 @pytest.fixture
@@ -21,4 +22,38 @@ def simhash_calculator():
 @pytest.fixture
 def code_analyzer(ast_analyzer, simhash_calculator):
     """Create a CodeAnalyzer instance with required dependencies."""
-    return CodeAnalyzer(ast_analyzer, simhash_calculator)
\ No newline at end of file
+    return CodeAnalyzer(ast_analyzer, simhash_calculator)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Create a DatabaseConnectionManager on a new database with the full schema."""
+    manager = DatabaseConnectionManager(str(tmp_path / "records.db"))
+    SchemaManager(manager).initialize_schema()
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def make_records():
+    """
+    Return a factory of code record dicts for bulk_insert_records.
+    
+    make_records(count, start=0, **fields) builds records start..start+count-1
+    with distinct hashes, names and simhashes; fields override the defaults,
+    a callable being called with the record's index.
+    """
+    def make(count, start=0, **fields):
+        records = []
+        for i in range(start, start + count):
+            record = {
+                'code_hash': f"h{i}",
+                'code_content': f"def handler_{i}(event_{i % 3}):\n    return event_{i % 3}\n",
+                'function_name': f"handler_{i}",
+                'file_path': f"module_{i % 7}.py",
+                'simhash': (i * 0x9E3779B97F4A7C15) & (2 ** 64 - 1)
+            }
+            record.update({name: value(i) if callable(value) else value for name, value in fields.items()})
+            records.append(record)
+        return records
+    return make
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""Test cases for ASTDatabaseManager and its repositories."""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+from oopstracker.ast_analyzer import ASTAnalyzer
+from oopstracker.ast_database import ASTDatabaseManager
+from oopstracker.database import DatabaseConnectionManager, FileTrackingRepository
+from oopstracker.exceptions import ConfigurationError
+from oopstracker.models import CodeRecord
+from oopstracker.parse_cache import ParseCache
+
+SOURCE = '''
+class Cart{index}:
+    def add_{index}(self, item):
+        self.items.append(item)
+
+
+def total_{index}(items):
+    return sum(len(item) for item in items)
+'''
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = ASTDatabaseManager(str(tmp_path / "ast.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def source_files(tmp_path):
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"module_{index}.py"
+        path.write_text(SOURCE.format(index=index))
+        paths.append(str(path))
+    return paths
+
+
+def _pairs(file_path):
+    units = sorted(ASTAnalyzer().parse_file(file_path), key=lambda unit: unit.start_line)
+    return [(CodeRecord(code_content=unit.source_code, function_name=unit.name, file_path=file_path), unit)
+            for unit in units]
+
+
+def _track(db, paths):
+    db.update_file_tracking_batch([(path, FileTrackingRepository.hash_file(path), 3) for path in paths])
+
+
+class TestCodeRecordRepository:
+    """Test bulk inserts and reads of records with their units."""
+
+    def test_insert_records_round_trip(self, db, source_files):
+        """Test inserted records and units are read back unchanged."""
+        pairs = _pairs(source_files[0])
+
+        assert db.insert_records(pairs) == len(pairs)
+        stored = db.get_by_file_path(source_files[0])
+
+        assert [record.function_name for record, _ in stored] == [record.function_name for record, _ in pairs]
+        for (record, unit), (expected_record, expected_unit) in zip(stored, pairs):
+            assert record.code_hash == expected_record.code_hash
+            assert (unit.name, unit.type, unit.start_line, unit.end_line, unit.source_code,
+                    unit.ast_structure, unit.complexity_score, sorted(unit.dependencies)) == \
+                   (expected_unit.name, expected_unit.type, expected_unit.start_line, expected_unit.end_line,
+                    expected_unit.source_code, expected_unit.ast_structure, expected_unit.complexity_score,
+                    sorted(expected_unit.dependencies))
+
+    def test_duplicates_are_ignored(self, db, source_files):
+        """Test re-inserting the same code hashes inserts nothing."""
+        pairs = _pairs(source_files[0])
+        db.insert_records(pairs)
+
+        assert db.insert_records(pairs) == 0
+        assert not db.insert_record(*pairs[0])
+        assert len(db.get_all_records()) == len(pairs)
+
+    def test_bulk_insert_uses_one_transaction(self, db, source_files):
+        """Test a bulk insert commits once."""
+        pairs = [pair for path in source_files for pair in _pairs(path)]
+        commits = []
+        db.connection.set_trace_callback(lambda statement: commits.append(statement) if statement == "COMMIT" else None)
+
+        db.insert_records(pairs)
+
+        assert commits == ["COMMIT"]
+
+    def test_delete_and_statistics(self, db, source_files):
+        """Test deleting by file and the record statistics."""
+        for path in source_files[:2]:
+            db.insert_records(_pairs(path))
+
+        stats = db.code_records.get_statistics()
+        assert (stats['total_records'], stats['total_files'], stats['total_classes']) == (6, 2, 2)
+        assert db.delete_by_file_path(source_files[0]) == 3
+        assert db.code_records.delete_by_file_paths(source_files) == 3
+        assert not db.has_data()
+
+    def test_simhashes_carry_their_algorithm(self, db, source_files, tmp_path):
+        """Test simhashes of another algorithm than the database's are refused."""
+        db.schema_manager.ensure_simhash_algorithm("md5")
+        with DatabaseConnectionManager(str(tmp_path / "cache.db")) as cache_db:
+            analyzer = ASTAnalyzer(parse_cache=ParseCache(cache_db))
+            units = analyzer.parse_file(source_files[0])
+        pairs = [(CodeRecord(code_content=unit.source_code, function_name=unit.name), unit) for unit in units]
+
+        assert analyzer.simhash_algorithm == "xxhash64"
+        with pytest.raises(ConfigurationError):
+            db.insert_records(pairs)
+        with pytest.raises(ConfigurationError):
+            db.insert_records(pairs, hash_algorithm=analyzer.simhash_algorithm)
+        assert not db.has_data()
+
+
+class TestFileTrackingRepository:
+    """Test batched change detection."""
+
+    def test_untracked_files_are_changed(self, db, source_files):
+        """Test files never tracked are reported."""
+        assert db.get_changed_files(source_files) == source_files
+
+    def test_tracked_files_are_unchanged(self, db, source_files):
+        """Test tracked files are skipped and looked up in one query."""
+        _track(db, source_files)
+        statements = []
+        db.connection.set_trace_callback(statements.append)
+
+        assert db.get_changed_files(source_files) == []
+        assert len([statement for statement in statements if statement.lstrip().startswith("SELECT")]) == 1
+
+    def test_modified_file_is_changed(self, db, source_files):
+        """Test a file with new content is reported."""
+        _track(db, source_files)
+        with open(source_files[2], "a") as f:
+            f.write("\n# edited\n")
+
+        assert db.get_changed_files(source_files) == [source_files[2]]
+
+    def test_touched_file_with_same_content_is_unchanged(self, db, source_files):
+        """Test a new modification time alone does not count as a change."""
+        _track(db, source_files)
+        stat = os.stat(source_files[1])
+        os.utime(source_files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+        assert db.get_changed_files(source_files) == []
+
+    def test_file_hash_and_removal(self, db, source_files):
+        """Test stored hashes, deleted-file detection and untracking."""
+        _track(db, source_files)
+
+        assert db.get_file_hash(source_files[0]) == FileTrackingRepository.hash_file(source_files[0])
+        assert db.check_and_mark_deleted_files(set(source_files[1:])) == [source_files[0]]
+        assert db.file_tracking.remove_file_tracking(source_files[0])
+        assert db.get_file_hash(source_files[0]) is None
+
+    def test_unit_count_column_is_migrated(self, tmp_path):
+        """Test an existing file_tracking table gains the unit_count column."""
+        path = str(tmp_path / "old.db")
+        connection = sqlite3.connect(path)
+        connection.execute("""
+            CREATE TABLE file_tracking (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT UNIQUE NOT NULL,
+                last_modified TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                scan_timestamp TEXT NOT NULL
+            )
+        """)
+        connection.close()
+
+        with ASTDatabaseManager(path) as db:
+            assert db.update_file_tracking(path, "hash", unit_count=4)
+            row = db.connection.execute("SELECT unit_count FROM file_tracking").fetchone()
+            assert row["unit_count"] == 4
+
+    def test_stat_signatures_move_out_of_last_modified(self, tmp_path, source_files):
+        """Test signatures stored in last_modified move to stat_signature and timestamps stay."""
+        path = str(tmp_path / "old.db")
+        connection = sqlite3.connect(path)
+        connection.execute("""
+            CREATE TABLE file_tracking (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT UNIQUE NOT NULL,
+                last_modified TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                scan_timestamp TEXT NOT NULL
+            )
+        """)
+        signature = FileTrackingRepository.stat_signature(source_files[0])
+        connection.executemany("INSERT INTO file_tracking (file_path, last_modified, file_hash, scan_timestamp) "
+                               "VALUES (?, ?, ?, '2024-01-02T00:00:00')", [
+            (source_files[0], signature, FileTrackingRepository.hash_file(source_files[0])),
+            (source_files[1], "2024-01-01T12:30:00", "stale")
+        ])
+        connection.commit()
+        connection.close()
+
+        with ASTDatabaseManager(path) as db:
+            rows = db.connection.execute(
+                "SELECT last_modified, stat_signature FROM file_tracking ORDER BY id"
+            ).fetchall()
+            assert [tuple(row) for row in rows] == [
+                ("2024-01-02T00:00:00", signature),
+                ("2024-01-01T12:30:00", None)
+            ]
+            assert db.get_changed_files(source_files[:2]) == [source_files[1]]
+
+            _track(db, source_files)
+            row = db.connection.execute(
+                "SELECT last_modified FROM file_tracking WHERE file_path = ?", (source_files[2],)
+            ).fetchone()
+            assert row["last_modified"] == datetime.fromtimestamp(os.stat(source_files[2]).st_mtime).isoformat()
@@ -0,0 +1,120 @@
+"""Test cases for AsyncUnifiedRepository."""
+
+import asyncio
+
+import pytest
+from oopstracker.async_unified_repository import AsyncUnifiedRepository
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.exceptions import ConfigurationError
+from oopstracker.unified_repository import UnifiedRepository
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # Left empty: the repository creates the schema when it connects
+    return str(tmp_path / "records.db")
+
+
+def _records(count, prefix="hash"):
+    return [
+        {'code_hash': f"{prefix}_{i}", 'code_content': f"def f_{i}(): pass", 'function_name': f"f_{i}",
+         'file_path': f"module_{i % 3}.py", 'metadata': {'index': i}, 'simhash': i}
+        for i in range(count)
+    ]
+
+
+class TestAsyncUnifiedRepository:
+    """Test the async repository against the synchronous one."""
+
+    def test_create_and_get_record(self, db_path):
+        """Test a created record is read back and duplicates are reported."""
+        async def scenario():
+            async with AsyncUnifiedRepository(db_path, hash_algorithm="xxhash64") as repository:
+                created = await repository.create_code_record(_records(1)[0])
+                duplicate = await repository.create_code_record(_records(1)[0])
+                fetched = await repository.get_code_record("hash_0")
+                missing = await repository.get_code_record("unknown")
+            return created, duplicate, fetched, missing
+
+        created, duplicate, fetched, missing = asyncio.run(scenario())
+
+        assert (created.success, duplicate.success, missing.success) == (True, False, False)
+        assert fetched.data['function_name'] == "f_0"
+        assert fetched.data['metadata'] == '{"index": 0}'
+
+    def test_bulk_insert_and_iterate(self, db_path):
+        """Test bulk inserted records are streamed and match the sync repository."""
+        async def scenario():
+            async with AsyncUnifiedRepository(db_path, hash_algorithm="xxhash64") as repository:
+                inserted = await repository.bulk_insert_records(_records(50))
+                streamed = [record async for record in repository.get_all_code_records()]
+                stats = await repository.get_statistics()
+            return inserted, streamed, stats
+
+        inserted, streamed, stats = asyncio.run(scenario())
+        with DatabaseConnectionManager(db_path) as manager:
+            expected = UnifiedRepository(manager).get_all_code_records().data
+            expected_stats = UnifiedRepository(manager).get_statistics().data
+
+        assert inserted.affected_rows == 50
+        assert streamed == expected
+        assert stats.data == expected_stats == {'total_records': 50, 'total_files': 3, 'total_functions': 50}
+
+    def test_writes_do_not_block_the_loop(self, db_path):
+        """Test other tasks keep running while a bulk insert is in flight."""
+        async def scenario():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            async with AsyncUnifiedRepository(db_path, hash_algorithm="xxhash64") as repository:
+                task = asyncio.create_task(ticker())
+                await repository.bulk_insert_records(_records(20_000, prefix="bulk"))
+                done.set()
+                await task
+            return ticks
+
+        assert asyncio.run(scenario()) > 1
+
+    def test_custom_query(self, db_path):
+        """Test custom reads return rows and writes are committed."""
+        async def scenario():
+            async with AsyncUnifiedRepository(db_path, hash_algorithm="xxhash64") as repository:
+                await repository.bulk_insert_records(_records(4))
+                deleted = await repository.execute_custom_query(
+                    "DELETE FROM code_records WHERE file_path = ?", ("module_0.py",)
+                )
+                remaining = await repository.execute_custom_query("SELECT code_hash FROM code_records")
+            return deleted, remaining
+
+        deleted, remaining = asyncio.run(scenario())
+
+        assert deleted.affected_rows == 2
+        assert sorted(row['code_hash'] for row in remaining.data) == ["hash_1", "hash_2"]
+
+    def test_simhash_writes_check_the_algorithm(self, db_path):
+        """Test simhash writes need an algorithm matching the database's."""
+        with DatabaseConnectionManager(db_path) as manager:
+            SchemaManager(manager).initialize_schema()
+            SchemaManager(manager).ensure_simhash_algorithm("md5")
+
+        async def scenario():
+            async with AsyncUnifiedRepository(db_path) as repository:
+                with pytest.raises(ConfigurationError):
+                    await repository.bulk_insert_records(_records(2))
+                plain = await repository.create_code_record({'code_hash': 'plain', 'code_content': "pass"})
+            async with AsyncUnifiedRepository(db_path, hash_algorithm="xxhash64") as repository:
+                with pytest.raises(ConfigurationError):
+                    await repository.create_code_record(_records(1)[0])
+            async with AsyncUnifiedRepository(db_path, hash_algorithm="md5") as repository:
+                return plain, await repository.bulk_insert_records(_records(2))
+
+        plain, inserted = asyncio.run(scenario())
+
+        assert plain.success
+        assert inserted.affected_rows == 2
@@ -0,0 +1,191 @@
+"""Test cases for the persistent BK-tree index."""
+
+import asyncio
+import random
+
+import pytest
+from oopstracker.cli import create_parser
+from oopstracker.commands.base import CommandContext
+from oopstracker.commands.check import CheckCommand
+from oopstracker.core.simhash import BKTree
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.exceptions import ConfigurationError
+from oopstracker.unified_repository import UnifiedRepository
+
+
+def _brute_force(hashes, query, radius):
+    matches = [(record_id, (value ^ query).bit_count()) for record_id, value in hashes.items()]
+    return sorted((m for m in matches if m[1] <= radius), key=lambda m: (m[1], m[0]))
+
+
+@pytest.fixture
+def hashes():
+    rng = random.Random(7)
+    base = rng.getrandbits(64)
+    values = {}
+    for record_id in range(1, 400):
+        value = base
+        for position in rng.sample(range(64), rng.randint(0, 24)):
+            value ^= 1 << position
+        values[record_id] = value
+    values[400] = values[5]  # duplicate hash shares a node
+    return values
+
+
+class TestBKTree:
+    """Test cases for BKTree class."""
+
+    def test_query_matches_linear_scan(self, hashes):
+        """Test that radius queries return exactly the brute-force result."""
+        tree = BKTree()
+        tree.build(hashes.items())
+        
+        assert len(tree) == len(hashes)
+        assert tree.node_count == len(set(hashes.values()))
+        for radius in (0, 4, 10):
+            assert tree.query(hashes[5], radius) == _brute_force(hashes, hashes[5], radius)
+
+    def test_nearest_matches_linear_scan(self, hashes):
+        """Test that k-nearest search returns the k closest records."""
+        tree = BKTree()
+        tree.build(hashes.items())
+        query = hashes[17] ^ 0b111
+        
+        expected = _brute_force(hashes, query, 64)[:10]
+        assert tree.nearest(query, 10) == expected
+
+    def test_snapshot_round_trip(self, hashes, tmp_path):
+        """Test that a saved snapshot answers queries like the original tree."""
+        tree = BKTree()
+        tree.build(hashes.items())
+        path = tree.save(tmp_path / "index.bktree")
+        
+        loaded = BKTree.load(path)
+        
+        assert not loaded.is_dirty
+        assert len(loaded) == len(tree)
+        assert loaded.max_record_id == 400
+        assert loaded.query(hashes[9], 8) == tree.query(hashes[9], 8)
+        assert loaded.nearest(hashes[9], 5) == tree.nearest(hashes[9], 5)
+
+    def test_load_rejects_foreign_file(self, tmp_path):
+        """Test that loading a non-snapshot file raises ValueError."""
+        path = tmp_path / "bogus.bktree"
+        path.write_bytes(b"not a snapshot at all, definitely not")
+        with pytest.raises(ValueError):
+            BKTree.load(path)
+
+    def test_repository_keeps_tree_in_sync(self, tmp_path):
+        """Test incremental insertion as records are bulk inserted."""
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        SchemaManager(db).initialize_schema()
+        tree = BKTree.open(db)
+        repository = UnifiedRepository(db, bk_tree=tree, hash_algorithm="xxhash64")
+        
+        repository.bulk_insert_records([
+            {'code_hash': 'a', 'code_content': 'x', 'simhash': 0b1010},
+            {'code_hash': 'b', 'code_content': 'y', 'simhash': 0b1011},
+            {'code_hash': 'c', 'code_content': 'z'},
+        ])
+        tree.save()
+        repository.create_code_record({'code_hash': 'd', 'code_content': 'w', 'simhash': 0b0011})
+        
+        result = repository.find_similar_simhashes(0b1010, 1)
+        assert result.success
+        assert result.data == [(1, 0), (2, 1)]
+        
+        reopened = BKTree.open(db)
+        assert len(reopened) == 3
+        assert reopened.query(0b0011, 0) == [(4, 0)]
+        db.close()
+
+    def test_open_refuses_mixed_hash_algorithms(self, tmp_path):
+        """Test that a DB built with one feature hash backend rejects another."""
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        SchemaManager(db).initialize_schema()
+        BKTree.open(db, hash_algorithm="md5").save()
+        
+        with pytest.raises(ConfigurationError):
+            BKTree.open(db, hash_algorithm="xxhash64")
+        assert BKTree.open(db, hash_algorithm="md5").hash_algorithm == "md5"
+        db.close()
+
+    def test_deleted_and_rewritten_rows_are_dropped(self, tmp_path):
+        """Test a moved generation rebuilds the tree instead of keeping stale matches."""
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        SchemaManager(db).initialize_schema()
+        repository = UnifiedRepository(db, bk_tree=BKTree.open(db), hash_algorithm="xxhash64")
+        repository.bulk_insert_records([
+            {'code_hash': 'a', 'code_content': 'x', 'simhash': 0b1010},
+            {'code_hash': 'b', 'code_content': 'y', 'simhash': 0b1011},
+        ])
+        repository.close()
+        assert BKTree.snapshot_path_for(db.db_path).exists()
+
+        with db.transaction():
+            db.execute("DELETE FROM code_records WHERE code_hash = 'a'")
+            db.execute("UPDATE code_records SET simhash = 7 WHERE code_hash = 'b'")
+
+        assert repository.find_similar_simhashes(0b1010, 1).data == []
+        reopened = BKTree.open(db)
+        assert reopened.query(7, 0) == [(2, 0)]
+        assert len(reopened) == 1
+        db.close()
+
+    def test_simhash_writes_record_the_algorithm(self, tmp_path):
+        """Test the first simhash write binds the database to the writer's algorithm."""
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        SchemaManager(db).initialize_schema()
+        UnifiedRepository(db).bulk_insert_records([{'code_hash': 'a', 'code_content': 'x'}])
+        assert SchemaManager(db).get_simhash_algorithm() is None
+
+        with pytest.raises(ConfigurationError):
+            UnifiedRepository(db).bulk_insert_records([{'code_hash': 'b', 'code_content': 'y', 'simhash': 3}])
+        assert SchemaManager(db).get_simhash_algorithm() is None
+
+        UnifiedRepository(db, hash_algorithm="xxhash64").bulk_insert_records(
+            [{'code_hash': 'b', 'code_content': 'y', 'simhash': 3}]
+        )
+
+        assert SchemaManager(db).get_simhash_algorithm() == "xxhash64"
+        with pytest.raises(ConfigurationError):
+            UnifiedRepository(db, hash_algorithm="md5").create_code_record(
+                {'code_hash': 'c', 'code_content': 'z', 'simhash': 5}
+            )
+        db.close()
+
+    def test_legacy_simhashes_are_marked_md5(self, tmp_path):
+        """Test a database with simhashes but no recorded algorithm is treated as md5."""
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        SchemaManager(db).initialize_schema()
+        with db.transaction():
+            db.execute("INSERT INTO code_records (code_hash, timestamp, simhash) VALUES ('a', '2024-01-01', 7)")
+
+        SchemaManager(db).initialize_schema()
+
+        assert SchemaManager(db).get_simhash_algorithm() == "md5"
+        assert BKTree.open(db).hash_algorithm == "md5"
+        with pytest.raises(ConfigurationError):
+            BKTree.open(db, hash_algorithm="xxhash64")
+        db.close()
+
+    def test_check_opens_md5_database(self, tmp_path, monkeypatch):
+        """Test check runs against a database holding md5 simhashes."""
+        (tmp_path / "module.py").write_text("def add(a, b):\n    return a + b\n")
+        monkeypatch.chdir(tmp_path)
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        SchemaManager(db).initialize_schema()
+        with db.transaction():
+            db.execute("INSERT INTO code_records (code_hash, timestamp, simhash) VALUES ('a', '2024-01-01', 7)")
+        SchemaManager(db).initialize_schema()
+        db.close()
+
+        parser, _ = create_parser()
+        args = parser.parse_args(["check", str(tmp_path / "module.py")])
+        command = CheckCommand(CommandContext(detector=None, semantic_detector=None, args=args))
+
+        assert asyncio.run(command.execute()) == 0
+        assert not BKTree.snapshot_path_for(tmp_path / "oopstracker.db").exists()
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        assert SchemaManager(db).get_simhash_algorithm() == "md5"
+        db.close()
@@ -0,0 +1,121 @@
+"""Test cases for compressed, content-addressed code blob storage."""
+
+import os
+import sqlite3
+
+from oopstracker.database import CodeBlobRepository, DatabaseConnectionManager, SchemaManager
+from oopstracker.unified_repository import UnifiedRepository
+
+BODY = "def helper(items):\n" + "".join(f"    items.append({i})\n" for i in range(40))
+
+
+def _create_text_database(path):
+    connection = sqlite3.connect(path)
+    connection.execute("""
+        CREATE TABLE code_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code_hash TEXT UNIQUE NOT NULL,
+            code_content TEXT NOT NULL,
+            normalized_code TEXT,
+            function_name TEXT,
+            file_path TEXT,
+            timestamp TEXT NOT NULL,
+            metadata TEXT,
+            simhash TEXT
+        )
+    """)
+    connection.executemany(
+        "INSERT INTO code_records (code_hash, code_content, normalized_code, timestamp, simhash) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(f"h{i}", BODY, BODY if i % 2 else None, "2024-01-01", str(i)) for i in range(2000)]
+    )
+    connection.commit()
+    connection.close()
+
+
+class TestCodeBlobs:
+    """Test records sharing compressed blobs."""
+
+    def test_identical_bodies_share_one_blob(self, manager, make_records):
+        """Test duplicated texts are stored once, compressed, and read back intact."""
+        repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+        repository.bulk_insert_records(make_records(10, code_content=BODY, normalized_code=BODY.replace(" ", "")))
+        repository.create_code_record({'code_hash': 'other', 'code_content': BODY})
+
+        stats = CodeBlobRepository(manager).get_statistics()
+        raw = manager.execute("SELECT code_content, code_blob FROM code_records WHERE code_hash = 'h3'").fetchone()
+
+        assert stats['blob_count'] == 2
+        assert stats['stored_bytes'] < stats['raw_bytes']
+        assert raw['code_content'] is None and raw['code_blob'] is not None
+        assert repository.get_code_record('h3').data['code_content'] == BODY
+        assert repository.get_code_record('other').data['normalized_code'] is None
+        assert all(record['normalized_code'] == BODY.replace(" ", "")
+                   for record in repository.get_all_code_records().data if record['code_hash'] != 'other')
+
+    def test_projection_skips_blobs(self, manager, make_records):
+        """Test iterating without texts never reads code_blobs."""
+        repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+        repository.bulk_insert_records(make_records(3, code_content=BODY))
+        statements = []
+        manager.connection.set_trace_callback(statements.append)
+
+        records = list(repository.iter_code_records(columns=('code_hash', 'simhash')))
+
+        assert [record['code_hash'] for record in records] == ["h0", "h1", "h2"]
+        assert not any("code_blobs" in statement for statement in statements)
+        assert [record['code_content'] for record in repository.iter_code_records()] == [BODY] * 3
+
+    def test_blob_repository(self, manager):
+        """Test storing, reading and collecting unreferenced blobs."""
+        blobs = CodeBlobRepository(manager)
+        with manager.transaction():
+            hashes = blobs.put_many(["a = 1", "b = 2", "a = 1"])
+
+        assert hashes[0] == hashes[2]
+        assert blobs.get(hashes[1]) == "b = 2"
+        assert blobs.get_many(hashes) == {hashes[0]: "a = 1", hashes[1]: "b = 2"}
+        assert blobs.get("missing") is None
+
+        UnifiedRepository(manager, hash_algorithm="xxhash64").create_code_record({'code_hash': 'kept', 'code_content': "a = 1"})
+        assert blobs.delete_unreferenced() == 1
+        assert blobs.get_many(hashes) == {hashes[0]: "a = 1"}
+
+
+class TestCodeBlobMigration:
+    """Test migration of plain-text code_records."""
+
+    def test_text_rows_are_moved_into_blobs(self, tmp_path):
+        """Test an old database keeps its records and shrinks when vacuumed."""
+        path = str(tmp_path / "old.db")
+        _create_text_database(path)
+        size_before = os.path.getsize(path)
+
+        with DatabaseConnectionManager(path) as manager:
+            SchemaManager(manager).initialize_schema(vacuum=True)
+            # A second run finds nothing left to migrate
+            SchemaManager(manager).initialize_schema()
+            repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+            records = repository.get_all_code_records().data
+            plain = manager.execute(
+                "SELECT COUNT(*) FROM code_records WHERE code_content IS NOT NULL OR normalized_code IS NOT NULL"
+            ).fetchone()[0]
+            stats = CodeBlobRepository(manager).get_statistics()
+            manager.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        assert len(records) == 2000 and plain == 0
+        assert all(record['code_content'] == BODY for record in records)
+        assert sum(record['normalized_code'] == BODY for record in records) == 1000
+        assert stats['blob_count'] == 1
+        assert os.path.getsize(path) < size_before / 5
+
+    def test_migration_does_not_vacuum_by_default(self, tmp_path):
+        """Test the freed pages stay in the file unless a vacuum is requested."""
+        path = str(tmp_path / "old.db")
+        _create_text_database(path)
+
+        with DatabaseConnectionManager(path) as manager:
+            SchemaManager(manager).initialize_schema()
+            free_pages = manager.execute("PRAGMA freelist_count").fetchone()[0]
+
+        assert free_pages > 0
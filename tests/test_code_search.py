@@ -0,0 +1,133 @@
+"""Test cases for the FTS5 code search indexes and rule matching on top of them."""
+
+import re
+from datetime import datetime
+
+import pytest
+from oopstracker.code_record import CodeRecord
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.refactored_analysis_service import RefactoredAnalysisService, _required_literals
+from oopstracker.split_rule_repository import SplitRule
+from oopstracker.unified_repository import UnifiedRepository
+
+FUNCTIONS = {
+    'get_user': "def get_user(user_id):\n    return db.fetch(user_id)\n",
+    'getter': "def getter(item):\n    return item.user_identity\n",
+    'fetch_orders': "def fetch_orders(user):\n    return [order for order in user.orders]\n",
+    'ab': "def ab(x):\n    pass\n",
+    'validate_email': "def validate_email(value):\n    return '@' in value\n",
+    'on_click_handler': "def on_click_handler(event):\n    event.stop()\n"
+}
+
+
+@pytest.fixture
+def repository(manager):
+    repository = UnifiedRepository(manager)
+    repository.bulk_insert_records([
+        {'code_hash': name, 'code_content': code, 'function_name': name} for name, code in FUNCTIONS.items()
+    ])
+    return repository
+
+
+def _names(result):
+    assert result.success
+    return [record['function_name'] for record in result.data]
+
+
+class TestCodeSearch:
+    """Test name and identifier searches and keeping the indexes in sync."""
+
+    def test_name_searches(self, repository):
+        """Test prefix and substring searches ignore case, short texts included."""
+        assert _names(repository.search_code_records(name_prefix="get_")) == ['get_user']
+        assert _names(repository.search_code_records(name_prefix="Ge")) == ['get_user', 'getter']
+        assert _names(repository.search_code_records(name_contains=["USER"])) == ['get_user']
+        assert _names(repository.search_code_records(name_contains=["b"])) == ['ab']
+        assert _names(repository.search_code_records(name_contains=["_", "handler"])) == ['on_click_handler']
+
+    def test_identifier_searches(self, repository):
+        """Test whole identifiers, identifier prefixes and combined conditions."""
+        assert _names(repository.search_code_records(tokens=["user_id"])) == ['get_user']
+        assert _names(repository.search_code_records(token_prefix="user")) == ['get_user', 'getter',
+                                                                                'fetch_orders']
+        assert _names(repository.search_code_records(tokens=["user"], name_prefix="fetch")) == ['fetch_orders']
+        # Keywords are not indexed as identifiers
+        assert _names(repository.search_code_records(tokens=["return"])) == []
+        with pytest.raises(ValueError):
+            repository.search_code_records()
+
+    def test_indexes_follow_updates_and_deletes(self, repository, manager):
+        """Test renamed, rewritten and deleted records are re-indexed."""
+        with manager.transaction():
+            manager.execute("UPDATE code_records SET function_name = 'load_user' WHERE code_hash = 'get_user'")
+            manager.execute("DELETE FROM code_records WHERE code_hash = 'getter'")
+        repository.create_code_record({'code_hash': 'late', 'code_content': "def late():\n    return user_id\n",
+                                       'function_name': 'late'})
+
+        assert _names(repository.search_code_records(name_prefix="get")) == []
+        assert _names(repository.search_code_records(name_contains=["load"])) == ['load_user']
+        assert _names(repository.search_code_records(tokens=["user_id"])) == ['load_user', 'late']
+        assert _names(repository.search_code_records(token_prefix="user_ident")) == []
+        for table in ("name_search", "token_search"):
+            manager.execute(f"INSERT INTO {table} ({table}) VALUES ('integrity-check')")
+
+    def test_existing_database_is_indexed_on_open(self, tmp_path):
+        """Test a database from before code search gets its blobs and records indexed."""
+        path = str(tmp_path / "old.db")
+        with DatabaseConnectionManager(path) as manager:
+            SchemaManager(manager).initialize_schema()
+            UnifiedRepository(manager).bulk_insert_records([
+                {'code_hash': name, 'code_content': code, 'function_name': name} for name, code in FUNCTIONS.items()
+            ])
+            with manager.transaction():
+                for name in ("code_search_insert", "code_search_delete", "code_search_update"):
+                    manager.execute(f"DROP TRIGGER {name}")
+                manager.execute("DROP TABLE name_search")
+                manager.execute("DROP TABLE token_search")
+                manager.execute("UPDATE code_blobs SET identifiers = NULL")
+
+        with DatabaseConnectionManager(path) as manager:
+            schema_manager = SchemaManager(manager)
+            schema_manager.initialize_schema()
+            repository = UnifiedRepository(manager)
+
+            assert schema_manager.has_code_search()
+            assert _names(repository.search_code_records(tokens=["event"])) == ['on_click_handler']
+            assert _names(repository.search_code_records(name_contains=["email"])) == ['validate_email']
+
+
+class TestRuleMatching:
+    """Test split rules are matched through the code search index."""
+
+    @pytest.mark.parametrize("pattern, expected", [
+        ("^get_|^fetch_", [['get_'], ['fetch_']]),
+        (r"\bvalidate\w+", [['validate']]),
+        ("ab*c", [['a', 'c']]),
+        ("[a-z]+_handler$", [['_handler']]),
+        (r"foo\.bar", [['foo.bar']]),
+        ("(get|set)_", None),
+        (r"get\x5fuser", None),
+        (r"caf\u00e9|\101", None),
+        (r"line\nbreak", None)
+    ])
+    def test_required_literals(self, pattern, expected):
+        """Test the literal texts every match of a pattern must contain."""
+        assert _required_literals(pattern) == expected
+
+    def test_rules_match_like_regex_scan(self, repository):
+        """Test pushed-down rule matching classifies records like checking every rule on every record."""
+        service = RefactoredAnalysisService(repository, detector=None)
+        patterns = ["^get_|^fetch_", "USER", "_handler$", "a", "(set|validate)_"]
+        for pattern in patterns:
+            service.rule_repository.save_rule(SplitRule(pattern=pattern, reasoning="test", created_at=datetime.now()))
+        records = [CodeRecord(code_hash=name, code_content=code, function_name=name, metadata={})
+                   for name, code in FUNCTIONS.items()]
+        records.append(CodeRecord(code_content="def get_unsaved(): pass", function_name="get_unsaved", metadata={}))
+
+        service._apply_existing_rules(records)
+
+        rules = [rule.pattern for rule in service.rule_repository.get_all_rules()]
+        for record in records:
+            expected = next((pattern for pattern in rules
+                             if re.search(pattern, record.function_name, re.IGNORECASE)), None)
+            assert record.metadata.get('rule_applied') == expected
@@ -0,0 +1,74 @@
+"""Test cases for the compact, lazily materialized CodeUnit."""
+
+import hashlib
+from pathlib import Path
+
+from oopstracker.ast_analyzer import ASTAnalyzer, CodeUnit, SourceBuffer, extract_line_range
+
+SOURCE_ROOT = Path(__file__).resolve().parent.parent / "src" / "oopstracker"
+
+NESTED = '''
+class Outer:
+    """Docstring."""
+
+    def method(self, value):
+        def inner():
+            return value
+        return inner()
+'''
+
+
+class TestCodeUnit:
+    """Test slot storage, lazy source and lazy hash."""
+
+    def test_units_share_one_buffer(self):
+        """Test nested units keep offsets into the same buffer instead of copies."""
+        units = ASTAnalyzer().parse_code(NESTED)
+        assert len({id(unit._buffer) for unit in units}) == 1
+        assert all(unit._source is None for unit in units)
+        assert not hasattr(units[0], "__dict__")
+
+    def test_source_matches_line_extraction_on_package(self):
+        """Test buffer slicing reproduces the dedented line-range source."""
+        analyzer = ASTAnalyzer()
+        for path in sorted(SOURCE_ROOT.rglob("*.py")):
+            source = path.read_text(encoding="utf-8")
+            lines = source.splitlines()
+            for unit in analyzer.parse_code(source, str(path)):
+                assert unit.source_code == extract_line_range(lines, unit.start_line, unit.end_line), \
+                    f"{path}:{unit.start_line}"
+
+    def test_hash_is_lazy(self):
+        """Test the MD5 is computed on first access only."""
+        unit = ASTAnalyzer().parse_code(NESTED)[0]
+        assert unit._hash is None
+        expected = hashlib.md5(f"{unit.name}:{unit.source_code}".encode()).hexdigest()
+        assert unit.hash == expected
+        assert unit._hash == expected
+
+    def test_direct_construction(self):
+        """Test units can still be built from a source string and compared."""
+        first = CodeUnit(name="f", type="function", source_code="def f():\n    pass",
+                         start_line=1, end_line=2)
+        second = CodeUnit("f", "function", "def f():\n    pass", 1, 2)
+        assert first == second
+        assert first.dependencies == []
+        assert first.hash == hashlib.md5(b"f:def f():\n    pass").hexdigest()
+
+        first.source_code = "def f():\n    return 1"
+        assert first.hash != second.hash
+        assert first != second
+
+    def test_crlf_and_unicode_sources(self):
+        """Test byte offsets follow the tokenizer's line breaks on non-ASCII files."""
+        source = "# café\r\ndef f():\r\n    return 'é'\r\n\r\ndef g():\r\n    pass\r\n"
+        units = {unit.name: unit for unit in ASTAnalyzer().parse_code(source)}
+        assert units["f"].source_code == "def f():\n    return 'é'"
+        assert units["g"].source_code == "def g():\n    pass"
+
+    def test_out_of_range_span(self):
+        """Test spans outside the buffer materialize as empty source."""
+        buffer = SourceBuffer.from_text("x = 1\n")
+        assert buffer.span(0, 1) == (0, 0)
+        assert buffer.span(1, 5) == (0, 0)
+        assert buffer.text(*buffer.span(1, 1)) == "x = 1"
@@ -0,0 +1,178 @@
+"""Test cases for PooledConnectionManager."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from oopstracker.database import PooledConnectionManager
+from oopstracker.exceptions import PoolTimeoutError
+from oopstracker.split_rule_repository import SplitRuleRepository
+from oopstracker.unified_repository import UnifiedRepository
+
+
+@pytest.fixture
+def pool(tmp_path):
+    manager = PooledConnectionManager(str(tmp_path / "pool.db"), readers=2, checkout_timeout=0.2)
+    with manager.transaction():
+        manager.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        manager.executemany("INSERT INTO items (name) VALUES (?)", [(f"item_{i}",) for i in range(10)])
+    yield manager
+    manager.close()
+
+
+def _count(manager):
+    return manager.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+class TestPooledReads:
+    """Test reads served by the read-only connections."""
+
+    def test_concurrent_reads(self, pool):
+        """Test many threads read through at most the configured readers."""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            counts = list(executor.map(lambda _: _count(pool), range(40)))
+
+        stats = pool.get_pool_statistics()
+        assert counts == [10] * 40
+        assert stats['reader_checkouts'] == 40
+        assert 1 <= stats['readers_open'] <= 2
+        assert stats['readers_in_use'] == 0
+
+    def test_small_result_returns_reader(self, pool):
+        """Test rows stay readable after the reader went back to the pool."""
+        cursor = pool.execute("SELECT id, name FROM items ORDER BY id")
+
+        assert not cursor.attached
+        assert pool.get_pool_statistics()['readers_in_use'] == 0
+        assert cursor.fetchone()['name'] == "item_0"
+        assert len(cursor.fetchmany(3)) == 3
+        assert [row['id'] for row in cursor] == list(range(5, 11))
+        assert [column[0] for column in cursor.description] == ["id", "name"]
+
+    def test_large_result_streams(self, pool, monkeypatch):
+        """Test a result past the prefetch keeps its reader until it is consumed."""
+        monkeypatch.setattr("oopstracker.database.connection_pool.PREFETCH_ROWS", 2)
+        cursor = pool.execute("SELECT id FROM items ORDER BY id")
+
+        assert cursor.attached
+        assert [row['id'] for row in cursor.fetchmany(4)] == [1, 2, 3, 4]
+        assert pool.get_pool_statistics()['readers_in_use'] == 1
+        assert [row['id'] for row in cursor.fetchmany(6)] == list(range(5, 11))
+        assert cursor.fetchmany(6) == []
+        assert pool.get_pool_statistics()['readers_in_use'] == 0
+
+        cursor = pool.execute("SELECT id FROM items ORDER BY id")
+        cursor.close()
+        assert pool.get_pool_statistics()['readers_in_use'] == 0
+
+    def test_readers_are_read_only(self, pool):
+        """Test a checked out reader refuses writes."""
+        with pool.reader() as conn:
+            with pytest.raises(Exception):
+                conn.execute("DELETE FROM items")
+
+    def test_cte_write_falls_back_to_writer(self, pool):
+        """Test a WITH statement that writes runs on the writer."""
+        pool.execute("WITH v(name) AS (SELECT 'from_cte') INSERT INTO items (name) SELECT name FROM v")
+        pool.commit()
+
+        assert pool.execute("WITH v AS (SELECT name FROM items) SELECT COUNT(*) FROM v").fetchone()[0] == 11
+        assert pool.get_pool_statistics()['readers_in_use'] == 0
+
+    def test_reader_checkout_timeout(self, pool):
+        """Test waiting for an exhausted pool raises PoolTimeoutError."""
+        with pool.reader(), pool.reader():
+            assert pool.get_pool_statistics()['reader_utilization'] == 1.0
+            with pytest.raises(PoolTimeoutError):
+                with pool.reader():
+                    pass
+
+        stats = pool.get_pool_statistics()
+        assert (stats['reader_timeouts'], stats['peak_readers_in_use']) == (1, 2)
+
+    def test_in_memory_database_reads_through_writer(self):
+        """Test in-memory databases work without readers."""
+        with PooledConnectionManager(":memory:") as manager:
+            manager.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+            manager.execute("INSERT INTO items DEFAULT VALUES")
+            manager.commit()
+
+            assert manager.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+            assert manager.get_pool_statistics()['readers_open'] == 0
+
+
+class TestPooledWrites:
+    """Test ownership of the writer connection."""
+
+    def test_read_your_writes(self, pool):
+        """Test the writing thread sees its uncommitted rows and others do not."""
+        pool.execute("INSERT INTO items (name) VALUES ('pending')")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other_thread_count = executor.submit(_count, pool).result()
+
+        assert _count(pool) == 11
+        assert other_thread_count == 10
+        pool.commit()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(_count, pool).result() == 11
+
+    def test_writer_timeout(self, pool):
+        """Test a second writer times out while a transaction is open."""
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold_writer():
+            with pool.transaction():
+                pool.execute("INSERT INTO items (name) VALUES ('held')")
+                entered.set()
+                release.wait(5)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(hold_writer)
+            entered.wait(5)
+            with pytest.raises(PoolTimeoutError):
+                pool.execute("INSERT INTO items (name) VALUES ('blocked')")
+            release.set()
+            future.result()
+
+        assert pool.get_pool_statistics()['writer_timeouts'] == 1
+        assert _count(pool) == 11
+
+    def test_concurrent_transactions_do_not_interleave(self, pool):
+        """Test transactions of different threads are serialized."""
+        pool.checkout_timeout = 5.0
+
+        def write(index):
+            with pool.transaction():
+                pool.execute("INSERT INTO items (name) VALUES (?)", (f"thread_{index}",))
+                pool.execute("UPDATE items SET name = name || '!' WHERE name = ?", (f"thread_{index}",))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write, range(20)))
+
+        assert _count(pool) == 30
+        assert pool.execute("SELECT COUNT(*) FROM items WHERE name LIKE 'thread_%!'").fetchone()[0] == 20
+        assert not pool.get_pool_statistics()['writer_busy']
+
+    def test_rollback_releases_writer(self, pool):
+        """Test a failed transaction gives the writer back."""
+        with pytest.raises(RuntimeError):
+            with pool.transaction():
+                pool.execute("INSERT INTO items (name) VALUES ('discarded')")
+                raise RuntimeError("abort")
+
+        assert not pool.get_pool_statistics()['writer_busy']
+        assert _count(pool) == 10
+
+
+class TestSharedManager:
+    """Test repositories sharing one pooled manager."""
+
+    def test_split_rules_share_the_manager(self, pool):
+        """Test SplitRuleRepository reuses a given manager."""
+        repository = SplitRuleRepository(db_manager=pool)
+        unified = UnifiedRepository(pool)
+
+        assert repository.db_manager is unified.connection_manager
+        assert repository.get_statistics()['total_rules'] == 0
+        assert unified.execute_custom_query("SELECT COUNT(*) AS count FROM items").data == [{'count': 10}]
@@ -0,0 +1,135 @@
+"""Test cases for the single-pass visitor traversal."""
+
+import ast
+from pathlib import Path
+
+import pytest
+from oopstracker.ast_analyzer import ASTAnalyzer, CompositeVisitor
+from oopstracker.visitors import (
+    ClassVisitor,
+    ControlFlowVisitor,
+    ExpressionVisitor,
+    FunctionVisitor,
+    FusedTraversal,
+)
+
+SOURCE_ROOT = Path(__file__).resolve().parent.parent / "src" / "oopstracker"
+
+
+def _standalone_features(node):
+    """Features as produced by running each visitor's own recursive walk."""
+    visitors = [FunctionVisitor(), ClassVisitor(), ControlFlowVisitor(), ExpressionVisitor()]
+    for visitor in visitors:
+        visitor.visit(node)
+    tokens = [token for visitor in visitors for token in visitor.structure_tokens]
+    complexity = sum(visitor.complexity for visitor in visitors)
+    dependencies = set().union(*(visitor.dependencies for visitor in visitors))
+    return "|".join(tokens), complexity, dependencies
+
+
+def _definitions():
+    for path in sorted(SOURCE_ROOT.rglob("*.py")):
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                yield path, node
+
+
+class TestFusedTraversal:
+    """Test the fused traversal matches the per-visitor walks."""
+
+    def test_matches_standalone_visitors_on_package_source(self):
+        """Test every definition in the package yields identical features."""
+        composite = CompositeVisitor()
+        checked = 0
+        for path, node in _definitions():
+            composite.clear()
+            composite.visit(node)
+            signature, complexity, dependencies = _standalone_features(node)
+            assert composite.get_structure_signature() == signature, f"{path}:{node.lineno}"
+            assert composite.get_complexity_score() == complexity, f"{path}:{node.lineno}"
+            assert set(composite.get_dependencies()) == dependencies, f"{path}:{node.lineno}"
+            checked += 1
+        assert checked > 100
+
+    def test_async_function_and_match(self):
+        """Test handlers that delegate or count cases still agree."""
+        code = '''
+async def handle(event, *, retries: int = 3) -> dict:
+    match event:
+        case {"type": "a"}:
+            return {"a": [x async for x in source() if x]}
+        case _:
+            raise ValueError("bad") from None
+'''
+        node = ast.parse(code).body[0]
+        composite = CompositeVisitor()
+        composite.visit(node)
+        signature, complexity, _ = _standalone_features(node)
+        assert composite.get_structure_signature() == signature
+        assert composite.get_complexity_score() == complexity
+        assert signature.startswith("ASYNC_FUNC|FUNC:1")
+
+    def test_visitors_in_handler_mode_do_not_descend(self):
+        """Test registered visitors only see nodes handed to them."""
+        visitor = ControlFlowVisitor()
+        FusedTraversal([visitor])
+        visitor.visit(ast.parse("if a:\n    if b:\n        pass").body[0])
+        assert visitor.structure_tokens == ["IF"]
+
+    @pytest.mark.parametrize("code", ["", "x = 1", "def f(:\n    pass"])
+    def test_analyzer_edge_cases(self, code):
+        """Test the analyzer still handles empty, unit-less and invalid code."""
+        assert ASTAnalyzer().parse_code(code) == []
+
+
+def _per_unit_features(source):
+    """Features as produced by visiting each definition separately."""
+    composite = CompositeVisitor()
+    expected = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            composite.clear()
+            composite.visit(node)
+            expected.append((node.name, composite.get_structure_signature(),
+                             composite.get_complexity_score(), set(composite.get_dependencies())))
+    return expected
+
+
+class TestSingleParseUnits:
+    """Test parse_code features recorded in one whole-file traversal."""
+
+    def test_matches_per_unit_visits_on_package_source(self):
+        """Test every unit in the package matches a separate visit of its node."""
+        analyzer = ASTAnalyzer()
+        for path in sorted(SOURCE_ROOT.rglob("*.py")):
+            source = path.read_text(encoding="utf-8")
+            actual = [(unit.name, unit.ast_structure, unit.complexity_score, set(unit.dependencies))
+                      for unit in analyzer.parse_code(source, str(path))]
+            assert actual == _per_unit_features(source), str(path)
+
+    def test_nested_definitions_compose_dependencies(self):
+        """Test outer scopes include the dependencies of nested ones, not vice versa."""
+        code = '''
+class Outer(base.Model):
+    def method(self):
+        def helper():
+            return os.getcwd()
+        return json.dumps(helper())
+'''
+        units = {unit.name: unit for unit in ASTAnalyzer().parse_code(code)}
+        assert set(units["helper"].dependencies) == {"os"}
+        assert set(units["method"].dependencies) == {"os", "json"}
+        assert set(units["Outer"].dependencies) == {"base", "os", "json"}
+        assert units["Outer"].source_code.startswith("class Outer")
+        assert units["helper"].source_code.startswith("def helper")
+
+    def test_scope_features_are_independent_of_previous_parse(self):
+        """Test repeated parses with one analyzer give the same units."""
+        analyzer = ASTAnalyzer()
+        code = "def f(a):\n    return len(a)\n"
+        first = analyzer.parse_code(code)
+        analyzer.parse_code("class A:\n    x = 1\n")
+        second = analyzer.parse_code(code)
+        assert first[0].ast_structure == second[0].ast_structure
+        assert first[0].complexity_score == second[0].complexity_score
@@ -0,0 +1,88 @@
+"""Test cases for vectorized Hamming distance kernels."""
+
+import random
+
+import numpy as np
+import pytest
+from oopstracker.code_record import CodeRecord
+from oopstracker.core.simhash import (
+    SimHashCalculator,
+    hamming_distance_matrix,
+    hamming_distances,
+    popcount64,
+    to_hash_array,
+    within_distance
+)
+from oopstracker.unified_detector import DetectionConfiguration, SimHashDetector
+
+
+@pytest.fixture
+def stored_hashes():
+    rng = random.Random(3)
+    return [rng.getrandbits(64) for _ in range(500)] + [0, (1 << 64) - 1]
+
+
+class TestHammingKernels:
+    """Test cases for the NumPy popcount kernels."""
+
+    def test_one_vs_many_matches_scalar(self, stored_hashes):
+        """Test one-vs-many distances against the scalar calculator."""
+        calculator = SimHashCalculator()
+        query = stored_hashes[10]
+        
+        distances = hamming_distances(query, to_hash_array(stored_hashes))
+        
+        assert distances.tolist() == [calculator.hamming_distance(query, h) for h in stored_hashes]
+        assert calculator.hamming_distances(query, stored_hashes).tolist() == distances.tolist()
+
+    def test_byte_table_fallback(self, stored_hashes, monkeypatch):
+        """Test the lookup-table path used on NumPy < 2.0."""
+        hashes = to_hash_array(stored_hashes)
+        expected = [h.bit_count() for h in stored_hashes]
+        monkeypatch.delattr(np, "bitwise_count", raising=False)
+        
+        assert popcount64(hashes).tolist() == expected
+
+    def test_many_vs_many_matrix(self, stored_hashes, monkeypatch):
+        """Test that the chunked distance matrix matches pairwise distances."""
+        monkeypatch.setattr("oopstracker.core.simhash.hamming.MATRIX_CHUNK_ELEMENTS", 1000)
+        queries = stored_hashes[:7]
+        
+        matrix = hamming_distance_matrix(queries, to_hash_array(stored_hashes))
+        
+        assert matrix.shape == (7, len(stored_hashes))
+        for row, query in zip(matrix, queries):
+            assert row.tolist() == [(query ^ h).bit_count() for h in stored_hashes]
+
+    def test_signed_hashes_share_bits(self):
+        """Test that signed 64-bit values map to the same unsigned bits."""
+        unsigned = (1 << 63) + 5
+        assert to_hash_array([unsigned - (1 << 64)]).tolist() == [unsigned]
+
+    def test_within_distance(self):
+        """Test radius filtering returns matching positions."""
+        hashes = to_hash_array([0b0000, 0b0001, 0b0111, 0b1111])
+        assert within_distance(0, hashes, 1).tolist() == [0, 1]
+
+
+class TestSimHashDetectorVectorized:
+    """Test cases for SimHashDetector.find_similar using the kernels."""
+
+    def test_find_similar_scores_match_pairwise(self):
+        """Test vectorized scoring against the pairwise similarity helper."""
+        detector = SimHashDetector()
+        records = [
+            CodeRecord(code_hash="a", code_content="def f():\n    return 1"),
+            CodeRecord(code_hash="b", code_content="def g():\n    return 2"),
+            CodeRecord(code_hash="c", code_content=None),
+        ]
+        source = "def f():\n    return 1"
+        
+        result = detector.find_similar(source, records, DetectionConfiguration(threshold=0.0))
+        
+        source_hash = detector._calculate_simhash(source)
+        assert [r.code_hash for r in result.matched_records] == ["a", "b"]
+        assert result.matched_records[0].similarity_score == 1.0
+        assert result.matched_records[1].similarity_score == pytest.approx(
+            detector._hash_similarity(source_hash, detector._calculate_simhash("def g():\n    return 2"))
+        )
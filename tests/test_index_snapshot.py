@@ -0,0 +1,86 @@
+"""Test cases for the memory-mapped columnar index snapshot."""
+
+import asyncio
+
+import numpy as np
+from oopstracker.cli import main
+from oopstracker.core.simhash import IndexSnapshot
+from oopstracker.unified_repository import UnifiedRepository
+
+
+# make_records fields giving the locations snapshots report
+LOCATED = {'file_path': lambda i: f"module_{i % 4}.py", 'metadata': lambda i: {'line_number': i + 1}}
+
+
+def _brute_force(manager, simhash, max_distance):
+    rows = manager.execute("SELECT id, simhash FROM code_records").fetchall()
+    matches = [(row[0], ((row[1] & (2 ** 64 - 1)) ^ simhash).bit_count()) for row in rows]
+    return sorted((match for match in matches if match[1] <= max_distance), key=lambda m: (m[1], m[0]))
+
+
+class TestIndexSnapshot:
+    """Test saving, memory-mapped loading and catching up with the database."""
+
+    def test_round_trip_is_memory_mapped(self, manager, make_records):
+        """Test a saved snapshot loads as memory maps with the same columns."""
+        UnifiedRepository(manager, hash_algorithm="xxhash64").bulk_insert_records(make_records(50, **LOCATED))
+        built = IndexSnapshot.open(manager)
+
+        loaded = IndexSnapshot.load(built.snapshot_path)
+
+        assert isinstance(loaded.simhashes, np.memmap)
+        assert loaded.ids.tolist() == list(range(1, 51))
+        assert loaded.location(5) == ("module_1.py", 6)
+        assert (loaded.generation, loaded.max_record_id) == (built.generation, 50)
+        query = make_records(1, 7)[0]['simhash']
+        assert loaded.query(query, 30) == _brute_force(manager, query, 30)
+
+    def test_appends_extend_the_snapshot(self, manager, make_records):
+        """Test rows added after the snapshot are appended without a rebuild."""
+        repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+        repository.bulk_insert_records(make_records(20, **LOCATED))
+        first = IndexSnapshot.open(manager)
+        repository.bulk_insert_records(make_records(5, 20, **LOCATED))
+
+        extended = IndexSnapshot.open(manager)
+
+        assert extended.generation == first.generation
+        assert len(extended) == 25
+        assert not IndexSnapshot.open(manager).is_dirty
+        assert IndexSnapshot.load(extended.snapshot_path).ids.tolist() == list(range(1, 26))
+
+    def test_deletes_invalidate_the_snapshot(self, manager, make_records):
+        """Test deleting or rewriting rows moves the generation and rebuilds the snapshot."""
+        repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+        repository.bulk_insert_records(make_records(20, **LOCATED))
+        first = IndexSnapshot.open(manager)
+        repository.execute_custom_query("DELETE FROM code_records WHERE id <= 5")
+        rebuilt = IndexSnapshot.open(manager)
+        repository.execute_custom_query("UPDATE code_records SET simhash = 0 WHERE id = 10")
+        rewritten = IndexSnapshot.open(manager)
+
+        assert first.generation < rebuilt.generation < rewritten.generation
+        assert rebuilt.ids.tolist() == list(range(6, 21))
+        assert rewritten.query(0, 0) == [(10, 0)]
+
+    def test_unreadable_snapshot_is_rebuilt(self, manager, make_records):
+        """Test a corrupt snapshot file is ignored and replaced."""
+        UnifiedRepository(manager, hash_algorithm="xxhash64").bulk_insert_records(make_records(10, **LOCATED))
+        IndexSnapshot.snapshot_path_for(manager.db_path).write_bytes(b"not a snapshot")
+
+        assert len(IndexSnapshot.open(manager)) == 10
+        assert len(IndexSnapshot.load(IndexSnapshot.snapshot_path_for(manager.db_path))) == 10
+
+    def test_cli_index_command(self, manager, make_records, capsys, monkeypatch):
+        """Test the index command exports and queries without an LLM configured."""
+        UnifiedRepository(manager, hash_algorithm="xxhash64").bulk_insert_records(make_records(10, **LOCATED))
+        monkeypatch.delenv("OOPSTRACKER_LLM_MODEL", raising=False)
+        query = make_records(1, 3)[0]['simhash']
+
+        assert asyncio.run(main(["index", "export", "--db", str(manager.db_path)])) == 0
+        assert asyncio.run(main(["index", "load", "--db", str(manager.db_path),
+                                 "--query", hex(query), "--distance", "0"])) == 0
+
+        output = capsys.readouterr().out
+        assert "10 records, 4 files" in output
+        assert "#4 d=0 module_3.py:4" in output
@@ -0,0 +1,173 @@
+"""Test cases for the MinHash LSH duplicate detector."""
+
+import numpy as np
+import pytest
+from oopstracker.code_record import CodeRecord
+from oopstracker.core.token_vocabulary import get_token_vocabulary
+from oopstracker.minhash_detector import MinHashLSHDetector
+from oopstracker.unified_detector import DetectionConfiguration, UnifiedDetectionService
+
+
+def _jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+
+def _ids(tokens):
+    return get_token_vocabulary().intern_many(sorted(tokens))
+
+
+def _record(code, name):
+    return CodeRecord(code_content=code, function_name=name, file_path=f"{name}.py")
+
+
+ADD_ITEMS = '''
+def add_items(items, extra):
+    total = 0
+    for item in items:
+        if item > 0:
+            total += item
+    return total + len(extra)
+'''
+
+SUM_POSITIVE = '''
+def sum_positive(items, extra):
+    total = 0
+    for item in items:
+        if item >= 0:
+            total += item
+    return total + len(extra)
+'''
+
+OPEN_FILE = '''
+class Reader:
+    def read(self, path):
+        with open(path) as handle:
+            try:
+                return handle.read()
+            except OSError:
+                raise
+'''
+
+
+class TestMinHashLSHDetector:
+    """Test MinHash signatures, LSH candidates and detector registration."""
+
+    def test_rejects_uneven_bands(self):
+        """Test bands must divide the number of permutations."""
+        with pytest.raises(ValueError):
+            MinHashLSHDetector(num_perm=100, bands=16)
+
+    def test_signature_estimates_jaccard(self):
+        """Test signature agreement approximates the token Jaccard similarity."""
+        detector = MinHashLSHDetector(num_perm=256, bands=32)
+        first = {f"token{i}" for i in range(100)}
+        second = {f"token{i}" for i in range(50, 150)}
+        signatures = detector.signatures([_ids(first), _ids(second)])
+
+        estimate = np.mean(signatures[0] == signatures[1])
+        assert signatures.shape == (2, 256)
+        assert abs(estimate - _jaccard(first, second)) < 0.1
+
+    def test_signatures_match_per_document(self):
+        """Test batched signatures equal signatures computed one at a time."""
+        detector = MinHashLSHDetector()
+        token_sets = [{f"t{i}" for i in range(start, start + 30)} for start in range(0, 90, 10)]
+        batched = detector.signatures([_ids(tokens) for tokens in token_sets])
+        for tokens, signature in zip(token_sets, batched):
+            np.testing.assert_array_equal(detector.signatures([_ids(tokens)])[0], signature)
+
+    def test_repeated_ids_do_not_change_signature(self):
+        """Test a token stream and its deduplicated set share a signature."""
+        detector = MinHashLSHDetector()
+        stream = get_token_vocabulary().intern_many(["IF", "RETURN", "IF", "CALL:len", "RETURN"])
+        signatures = detector.signatures([stream, _ids({"IF", "RETURN", "CALL:len"})])
+        np.testing.assert_array_equal(signatures[0], signatures[1])
+
+    def test_candidate_pairs_reported_once(self):
+        """Test a pair sharing several bands is produced only once."""
+        detector = MinHashLSHDetector(num_perm=32, bands=8)
+        tokens = {f"t{i}" for i in range(40)}
+        signatures = detector.signatures([_ids(tokens), _ids(tokens), _ids({"other"})])
+
+        pairs = []
+        for left, right in detector._candidate_pairs(signatures):
+            pairs.extend(zip(left.tolist(), right.tolist()))
+        assert sorted(pairs) == [(0, 1)]
+
+    def test_bucket_joined_as_star(self):
+        """Test a shared band yields one pair per extra bucket member, not all pairs."""
+        detector = MinHashLSHDetector(num_perm=32, bands=8)
+        rng = np.random.default_rng(4)
+        signatures = rng.integers(0, 1 << 32, size=(300, 32), dtype=np.uint64)
+        signatures[:, :4] = 7
+
+        pairs = []
+        for left, right in detector._candidate_pairs(signatures):
+            pairs.extend(zip(left.tolist(), right.tolist()))
+        assert sorted(pairs) == [(0, index) for index in range(1, 300)]
+
+    def test_identical_signatures_cluster_without_pairs(self):
+        """Test copies of one record are linked before banding."""
+        detector = MinHashLSHDetector()
+        records = [_record(ADD_ITEMS, f"copy{i}") for i in range(50)] + [_record(OPEN_FILE, "reader")]
+        banded = []
+        original = detector._candidate_pairs
+        detector._candidate_pairs = lambda signatures: banded.append(len(signatures)) or original(signatures)
+
+        results = detector.detect_duplicates(records, DetectionConfiguration(threshold=0.7))
+
+        assert banded == [2]
+        assert len(results) == 1
+        assert len(results[0].matched_records) == 50
+
+    def test_cache_keyed_by_content(self):
+        """Test records without a code hash do not share signatures through id()."""
+        detector = MinHashLSHDetector()
+        first = detector._record_signatures([_record(ADD_ITEMS, "add_items")])[0]
+        second = detector._record_signatures([_record(OPEN_FILE, "reader")])[0]
+
+        assert not np.array_equal(first, second)
+        assert set(detector.signature_cache) == {ADD_ITEMS, OPEN_FILE}
+
+    def test_detect_duplicates_clusters_structural_copies(self):
+        """Test renamed copies cluster together and unrelated code does not."""
+        detector = MinHashLSHDetector()
+        records = [_record(ADD_ITEMS, "add_items"), _record(OPEN_FILE, "reader"),
+                   _record(SUM_POSITIVE, "sum_positive")]
+        config = DetectionConfiguration(algorithm="minhash_lsh", threshold=0.7)
+
+        results = detector.detect_duplicates(records, config)
+
+        assert len(results) == 1
+        names = {record.function_name for record in results[0].matched_records}
+        assert names == {"add_items", "sum_positive"}
+        assert results[0].analysis_method == "minhash_lsh"
+
+    def test_find_similar(self):
+        """Test find_similar returns only records in a shared band above the threshold."""
+        detector = MinHashLSHDetector()
+        records = [_record(ADD_ITEMS, "add_items"), _record(OPEN_FILE, "reader")]
+        config = DetectionConfiguration(algorithm="minhash_lsh", threshold=0.7)
+
+        result = detector.find_similar(SUM_POSITIVE, records, config)
+
+        assert result.is_duplicate
+        assert [record.function_name for record in result.matched_records] == ["add_items"]
+
+    def test_prefers_stored_ast_structure(self):
+        """Test tokens come from metadata ast_structure when present."""
+        detector = MinHashLSHDetector()
+        record = _record("x = 1", "snippet")
+        record.metadata = {"ast_structure": "FUNC:0|CALL:len|RETURN"}
+        token_ids = detector._record_tokens(record)
+        assert get_token_vocabulary().tokens(token_ids) == ["FUNC:0", "CALL:len", "RETURN"]
+
+    def test_registered_in_unified_service(self):
+        """Test the detector is selectable by name."""
+        service = UnifiedDetectionService()
+        assert "minhash_lsh" in service.get_available_algorithms()
+
+        records = [_record(ADD_ITEMS, "add_items"), _record(SUM_POSITIVE, "sum_positive")]
+        config = DetectionConfiguration(algorithm="minhash_lsh", threshold=0.7)
+        results = service.detect_duplicates(records, algorithm="minhash_lsh", config=config)
+        assert len(results) == 1
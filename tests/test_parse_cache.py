@@ -0,0 +1,126 @@
+"""Test cases for the content-addressed parse cache."""
+
+from unittest.mock import patch
+
+import pytest
+from oopstracker.ast_analyzer import ASTAnalyzer
+from oopstracker.core.simhash import SimHashCalculator
+from oopstracker.database import DatabaseConnectionManager
+from oopstracker.database.schema_manager import SchemaManager
+from oopstracker.parse_cache import ANALYZER_VERSION, ParseCache, compute_analyzer_version
+
+SOURCE = '''
+class Cart:
+    def add(self, item):
+        self.items.append(item)
+
+
+def total(items):
+    return sum(len(item) for item in items)
+'''
+
+
+@pytest.fixture
+def connection_manager(tmp_path):
+    manager = DatabaseConnectionManager(str(tmp_path / "cache.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "cart.py"
+    path.write_text(SOURCE)
+    return str(path)
+
+
+def _unit_key(unit):
+    return (unit.name, unit.type, unit.start_line, unit.end_line, unit.source_code,
+            unit.ast_structure, unit.complexity_score, sorted(unit.dependencies), unit.hash)
+
+
+class TestParseCache:
+    """Test cached parsing skips ast.parse and invalidates correctly."""
+
+    def test_second_parse_skips_ast_parse(self, connection_manager, source_file):
+        """Test an unchanged file is served from the cache."""
+        analyzer = ASTAnalyzer(ParseCache(connection_manager))
+        first = analyzer.parse_file(source_file)
+
+        with patch("oopstracker.ast_analyzer.ast.parse", side_effect=AssertionError("parsed again")):
+            second = ASTAnalyzer(ParseCache(connection_manager)).parse_file(source_file)
+
+        assert [_unit_key(unit) for unit in second] == [_unit_key(unit) for unit in first]
+        assert [_unit_key(unit) for unit in first] == [_unit_key(unit) for unit in ASTAnalyzer().parse_file(source_file)]
+
+    def test_cached_units_carry_simhash(self, connection_manager, source_file):
+        """Test stored units include the simhash of their structure tokens."""
+        ASTAnalyzer(ParseCache(connection_manager)).parse_file(source_file)
+        units = ASTAnalyzer(ParseCache(connection_manager)).parse_file(source_file)
+
+        calculator = SimHashCalculator()
+        for unit in units:
+            assert unit.simhash == calculator.calculate(unit.ast_structure.split("|"))
+
+    def test_simhashes_use_database_algorithm(self, connection_manager, source_file):
+        """Test cached simhashes are built with the algorithm the database is bound to."""
+        SchemaManager(connection_manager).initialize_schema()
+        SchemaManager(connection_manager).ensure_simhash_algorithm("md5")
+        units = ASTAnalyzer(ParseCache(connection_manager)).parse_file(source_file)
+
+        calculator = SimHashCalculator(hash_algorithm="md5")
+        for unit in units:
+            assert unit.simhash == calculator.calculate(unit.ast_structure.split("|"))
+
+    def test_failed_store_keeps_parsing(self, connection_manager, source_file, caplog):
+        """Test a failing cache write is logged and rolls back the new tokens."""
+        cache = ParseCache(connection_manager)
+        connection_manager.execute(
+            "CREATE TRIGGER reject_cache BEFORE INSERT ON parse_cache BEGIN SELECT RAISE(ABORT, 'locked'); END"
+        )
+
+        units = ASTAnalyzer(cache).parse_file(source_file)
+
+        assert sorted(unit.name for unit in units) == ["Cart", "add", "total"]
+        assert "Could not store parsed units" in caplog.text
+        assert len(cache.vocabulary) == 0
+        assert connection_manager.execute("SELECT COUNT(*) AS n FROM token_vocabulary").fetchone()["n"] == 0
+
+    def test_changed_content_is_reparsed(self, connection_manager, source_file, tmp_path):
+        """Test a modified file misses the cache."""
+        analyzer = ASTAnalyzer(ParseCache(connection_manager))
+        analyzer.parse_file(source_file)
+        (tmp_path / "cart.py").write_text(SOURCE + "\n\ndef extra():\n    pass\n")
+
+        assert "extra" in [unit.name for unit in analyzer.parse_file(source_file)]
+
+    def test_other_analyzer_version_is_purged(self, connection_manager, source_file):
+        """Test entries from another analyzer version are dropped on open."""
+        ASTAnalyzer(ParseCache(connection_manager, analyzer_version="old")).parse_file(source_file)
+
+        cache = ParseCache(connection_manager)
+        count = connection_manager.execute("SELECT COUNT(*) AS n FROM parse_cache").fetchone()["n"]
+        assert count == 0
+        with open(source_file, "rb") as f:
+            assert cache.get(ParseCache.key_for(f.read())) is None
+
+    def test_version_tracks_visitor_sources(self):
+        """Test the analyzer version is derived from the visitor sources."""
+        assert compute_analyzer_version() == ANALYZER_VERSION
+        with patch("oopstracker.parse_cache.CACHE_FORMAT_VERSION", 999):
+            assert compute_analyzer_version() != ANALYZER_VERSION
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_parse_files_uses_cache(self, connection_manager, source_file, tmp_path, workers):
+        """Test parse_files fills and then reads the cache."""
+        other = tmp_path / "other.py"
+        other.write_text("def other(x):\n    return x\n")
+        paths = [source_file, str(other)]
+        analyzer = ASTAnalyzer(ParseCache(connection_manager))
+        first = {parsed.file_path: parsed for parsed in analyzer.parse_files(paths, workers=workers, chunksize=1)}
+
+        with patch("oopstracker.ast_analyzer._parse_files_worker", side_effect=AssertionError("parsed again")):
+            second = {parsed.file_path: parsed for parsed in analyzer.parse_files(paths, workers=workers)}
+
+        for path in paths:
+            assert [_unit_key(unit) for unit in second[path].units] == [_unit_key(unit) for unit in first[path].units]
@@ -0,0 +1,113 @@
+"""Test cases for parallel parsing with ASTAnalyzer.parse_files."""
+
+import pickle
+
+import pytest
+from oopstracker.ast_analyzer import ASTAnalyzer, CodeUnit, SourceBuffer
+from oopstracker.commands.check import CheckCommand
+from oopstracker.cli import create_parser
+from oopstracker.database import DatabaseConnectionManager
+from oopstracker.refactored_analysis_service import RefactoredAnalysisService
+from oopstracker.unified_repository import UnifiedRepository
+
+GOOD_SOURCE = '''
+class Store:
+    def add(self, item):
+        self.items.append(item)
+
+    def total(self):
+        return sum(len(item) for item in self.items)
+
+
+def helper(value):
+    if value:
+        return value * 2
+    return 0
+'''
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"module_{index}.py"
+        path.write_text(GOOD_SOURCE.replace("helper", f"helper_{index}"))
+        paths.append(str(path))
+    broken = tmp_path / "broken.py"
+    broken.write_text("def broken(:\n    pass\n")
+    missing = tmp_path / "missing.py"
+    return paths, str(broken), str(missing)
+
+
+def _unit_key(unit):
+    return (unit.file_path, unit.name, unit.type, unit.start_line, unit.end_line, unit.source_code,
+            unit.ast_structure, unit.complexity_score, sorted(unit.dependencies), unit.hash)
+
+
+class TestParseFiles:
+    """Test parse_files results, error handling and compact units."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_matches_parse_file(self, source_tree, workers):
+        """Test parallel and serial results equal per-file parsing."""
+        paths, _, _ = source_tree
+        analyzer = ASTAnalyzer()
+
+        results = list(analyzer.parse_files(paths, workers=workers, chunksize=2))
+
+        assert sorted(result.file_path for result in results) == sorted(paths)
+        for result in results:
+            assert result.error is None
+            expected = [_unit_key(unit) for unit in analyzer.parse_file(result.file_path)]
+            assert [_unit_key(unit) for unit in result.units] == expected
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_per_file_errors_are_reported(self, source_tree, workers):
+        """Test syntax and read errors are reported without losing other files."""
+        paths, broken, missing = source_tree
+
+        results = {result.file_path: result
+                   for result in ASTAnalyzer().parse_files([broken, *paths, missing], workers=workers, chunksize=3)}
+
+        assert "SyntaxError" in results[broken].error
+        assert "FileNotFoundError" in results[missing].error
+        assert results[broken].units == []
+        assert all(results[path].error is None and len(results[path].units) == 4 for path in paths)
+
+    def test_compact_round_trip(self):
+        """Test compact tuples rebuild identical units and pickle smaller."""
+        units = ASTAnalyzer().parse_code(GOOD_SOURCE, "module.py")
+        buffer = SourceBuffer.from_text(GOOD_SOURCE)
+
+        rebuilt = [CodeUnit.from_compact(unit.to_compact(), buffer, "module.py") for unit in units]
+
+        assert [_unit_key(unit) for unit in rebuilt] == [_unit_key(unit) for unit in units]
+        compact_size = len(pickle.dumps((GOOD_SOURCE, [unit.to_compact() for unit in units])))
+        assert compact_size < len(pickle.dumps(units))
+
+    def test_check_command_jobs_option(self):
+        """Test the check command accepts --jobs."""
+        parser, commands = create_parser()
+        args = parser.parse_args(["check", "src", "--jobs", "4"])
+        assert commands["check"] is CheckCommand
+        assert args.jobs == 4
+        assert parser.parse_args(["check"]).jobs == 1
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_service_builds_records_from_units(self, source_tree, tmp_path, jobs):
+        """Test the analysis service builds its records from the parsed function units."""
+        paths, broken, missing = source_tree
+        with DatabaseConnectionManager(str(tmp_path / "records.db")) as db:
+            service = RefactoredAnalysisService(UnifiedRepository(db), detector=None, jobs=jobs)
+            try:
+                records = service._process_files([paths[0], broken, missing], [])
+            finally:
+                service.close()
+
+        by_name = {record.function_name: record for record in records}
+        assert sorted(by_name) == ["add", "helper_0", "total"]
+        assert by_name["helper_0"].metadata == {'type': 'function', 'line_number': 10}
+        assert by_name["helper_0"].code_content == (
+            "def helper_0(value):\n    if value:\n        return value * 2\n    return 0")
+        assert by_name["total"].code_content.strip().endswith("for item in self.items)")
+        assert by_name["add"].file_path == paths[0]
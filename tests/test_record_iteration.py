@@ -0,0 +1,95 @@
+"""Test cases for keyset-paginated record iteration."""
+
+import pytest
+from oopstracker.ast_database import ASTDatabaseManager
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.unified_repository import UnifiedRepository
+
+ROW_COUNT = 23
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = ASTDatabaseManager(str(tmp_path / "ast.db"))
+    rows = [(f"hash_{i}", f"def f_{i}(): pass", f"f_{i}", f"module_{i % 4}.py" if i % 7 else None,
+             "2024-01-01T00:00:00", str(i), i % 5 if i % 6 else None) for i in range(ROW_COUNT)]
+    with manager.connection_manager.transaction():
+        manager.connection_manager.executemany(
+            "INSERT INTO ast_code_records (code_hash, code_content, function_name, file_path, timestamp, "
+            "simhash, start_line) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+    yield manager
+    manager.close()
+
+
+def _expected_ids(db):
+    return [row[0] for row in db.connection.execute(
+        "SELECT id FROM ast_code_records ORDER BY file_path, start_line, id"
+    )]
+
+
+class TestASTRecordIteration:
+    """Test iteration over ast_code_records."""
+
+    @pytest.mark.parametrize("page_size, arraysize", [(1, 1), (3, 2), (5, 10), (1000, 100)])
+    def test_pages_cover_every_row_in_order(self, db, page_size, arraysize):
+        """Test every row is yielded once, in file and line order, including NULL keys."""
+        records = list(db.iter_records(page_size=page_size, arraysize=arraysize))
+
+        assert [record.id for record in records] == _expected_ids(db)
+        assert [record.id for record in db.load_all_records()] == _expected_ids(db)
+
+    def test_projection_skips_source(self, db):
+        """Test projected iteration never selects code_content."""
+        statements = []
+        db.connection.set_trace_callback(statements.append)
+
+        records = list(db.iter_records(columns=("id", "simhash"), page_size=10))
+
+        assert all(record.code_content is None for record in records)
+        assert sorted(record.simhash for record in records) == list(range(ROW_COUNT))
+        assert len(statements) == 3
+        assert not any("code_content" in statement for statement in statements)
+
+    def test_unknown_column_is_rejected(self, db):
+        """Test requesting a column the table does not have raises ValueError."""
+        with pytest.raises(ValueError):
+            list(db.iter_records(columns=("id", "source")))
+
+    def test_record_batches(self, db):
+        """Test batches have the requested size and cover every row."""
+        batches = list(db.iter_record_batches(batch_size=10, columns=("id",)))
+
+        assert [len(batch) for batch in batches] == [10, 10, 3]
+        assert [record.id for batch in batches for record in batch] == _expected_ids(db)
+
+    def test_keyset_page_uses_index_seek(self, db):
+        """Test pages after the first seek into idx_ast_keyset."""
+        plan = db.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM ast_code_records "
+            "WHERE (file_path, start_line, id) > (?, ?, ?) ORDER BY file_path, start_line, id LIMIT 10",
+            ("module_1.py", 1, 1)
+        ).fetchall()
+
+        assert "SEARCH ast_code_records USING COVERING INDEX idx_ast_keyset" in plan[0][3]
+
+
+class TestUnifiedRecordIteration:
+    """Test iteration over code_records."""
+
+    def test_iter_code_records(self, tmp_path):
+        """Test pages, projection and unsigned simhashes."""
+        with DatabaseConnectionManager(str(tmp_path / "records.db")) as manager:
+            SchemaManager(manager).initialize_schema()
+            repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+            repository.bulk_insert_records([
+                {'code_hash': f"h{i}", 'code_content': "pass", 'simhash': (1 << 64) - i - 1} for i in range(11)
+            ])
+
+            full = list(repository.iter_code_records(page_size=4, arraysize=3))
+            projected = list(repository.iter_code_records(columns=('code_hash', 'simhash'), page_size=4))
+
+        assert [record['id'] for record in full] == list(range(1, 12))
+        assert projected == [{'code_hash': f"h{i}", 'simhash': (1 << 64) - i - 1} for i in range(11)]
+        with pytest.raises(ValueError):
+            list(repository.iter_code_records(columns=('simhash_band0',)))
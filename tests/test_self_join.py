@@ -0,0 +1,182 @@
+"""Test cases for the near-duplicate self-join and union-find clustering."""
+
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from oopstracker.code_record import CodeRecord
+from oopstracker.core import UnionFind
+from oopstracker.core.simhash import iter_near_duplicate_pairs, near_duplicate_clusters, self_join
+from oopstracker.unified_detector import DetectionConfiguration, SimHashDetector
+
+
+def _brute_force_pairs(hashes, radius):
+    return {
+        (i, j, (hashes[i] ^ hashes[j]).bit_count())
+        for i in range(len(hashes)) for j in range(i + 1, len(hashes))
+        if (hashes[i] ^ hashes[j]).bit_count() <= radius
+    }
+
+
+def _joined_pairs(hashes, radius, **kwargs):
+    pairs = []
+    for left, right, distances in iter_near_duplicate_pairs(hashes, radius, **kwargs):
+        pairs.extend(zip(left.tolist(), right.tolist(), distances.tolist()))
+    return pairs
+
+
+@pytest.fixture
+def planted_hashes():
+    rng = random.Random(11)
+    hashes = []
+    for _ in range(40):
+        base = rng.getrandbits(64)
+        hashes.append(base)
+        for _ in range(rng.randint(0, 4)):
+            value = base
+            for position in rng.sample(range(64), rng.randint(0, 5)):
+                value ^= 1 << position
+            hashes.append(value)
+    rng.shuffle(hashes)
+    return hashes
+
+
+class TestSelfJoin:
+    """Test cases for iter_near_duplicate_pairs and near_duplicate_clusters."""
+
+    @pytest.mark.parametrize("radius", [0, 2, 4])
+    def test_pairs_match_brute_force(self, planted_hashes, radius):
+        """Test that every pair is found exactly once."""
+        pairs = _joined_pairs(planted_hashes, radius)
+        
+        assert len(pairs) == len(set(pairs))
+        assert set(pairs) == _brute_force_pairs(planted_hashes, radius)
+
+    def test_long_runs_use_chunked_matrix(self, monkeypatch):
+        """Test the path for long runs of equal block keys."""
+        monkeypatch.setattr("oopstracker.core.simhash.self_join.SMALL_RUN_LENGTH", 2)
+        monkeypatch.setattr("oopstracker.core.simhash.self_join.JOIN_CHUNK_ELEMENTS", 16)
+        rng = random.Random(5)
+        hashes = [rng.getrandbits(12) for _ in range(120)]
+        
+        pairs = _joined_pairs(hashes, 2, hash_size=12)
+        
+        assert len(pairs) == len(set(pairs))
+        assert set(pairs) == _brute_force_pairs(hashes, 2)
+
+    def test_block_count_must_exceed_radius(self):
+        """Test that an inexact block layout is rejected."""
+        with pytest.raises(ValueError):
+            list(iter_near_duplicate_pairs([1, 2, 3], 4, block_count=3))
+
+    def test_clusters_merge_transitively(self):
+        """Test that chained pairs end up in one cluster."""
+        far = (1 << 40) | (1 << 41) | (1 << 42)
+        hashes = [0b0000, 0b0001, 0b0011, far, 0b0111, far | (1 << 43)]
+        
+        assert near_duplicate_clusters(hashes, 1) == [[0, 1, 2, 4], [3, 5]]
+
+    def test_identical_hashes_are_joined_once(self, monkeypatch):
+        """Test that runs of identical hashes do not produce quadratic pairs."""
+        joined = []
+        original = self_join.iter_near_duplicate_pairs
+
+        def counting_pairs(hashes, *args, **kwargs):
+            joined.append(len(hashes))
+            return original(hashes, *args, **kwargs)
+
+        monkeypatch.setattr(self_join, "iter_near_duplicate_pairs", counting_pairs)
+        hashes = [5] * 300 + [7] * 3 + [1 << 40, 5]
+        
+        clusters = near_duplicate_clusters(hashes, 1)
+        
+        assert joined == [3]
+        assert clusters == [list(range(303)) + [304]]
+        assert near_duplicate_clusters(hashes, -1) == []
+
+
+class TestUnionFind:
+    """Test cases for UnionFind class."""
+
+    def test_union_and_groups(self):
+        """Test merging and group listing."""
+        sets = UnionFind(6)
+        assert sets.union_pairs([(0, 3), (3, 5), (1, 2)]) == 3
+        assert not sets.union(0, 5)
+        assert sets.groups() == [[0, 3, 5], [1, 2]]
+        assert sets.groups(min_size=1)[-1] == [4]
+
+
+class TestSimHashDetectorSelfJoin:
+    """Test cases for SimHashDetector.detect_duplicates."""
+
+    def test_detects_beyond_batch_limit(self):
+        """Test that duplicates past max_records_per_batch are still found."""
+        records = [
+            CodeRecord(code_hash=f"h{i}", code_content=f"def f{i}():\n    return {i}")
+            for i in range(300)
+        ]
+        records.append(CodeRecord(code_hash="dup", code_content="def f299():\n    return 299"))
+        detector = SimHashDetector()
+        
+        results = detector.detect_duplicates(records, DetectionConfiguration(max_hamming_distance=0))
+        
+        groups = [[r.code_hash for r in result.matched_records] for result in results]
+        assert ["h299", "dup"] in groups
+        assert all(result.similarity_score == 1.0 for result in results)
+
+    def test_radius_follows_threshold(self):
+        """Test that the threshold alone sets the radius and the cap is opt-in."""
+        records = [
+            CodeRecord(code_hash="a", code_content="def total(items):\n    return sum(item.price for item in items)"),
+            CodeRecord(code_hash="b", code_content="def total(items):\n    return sum(item.cost for item in items)"),
+            CodeRecord(code_hash="c", code_content="class Parser:\n    def feed(self, data):\n        self.buffer += data")
+        ]
+        detector = SimHashDetector()
+        distance = (detector._get_cached_hash(records[0]) ^ detector._get_cached_hash(records[1])).bit_count()
+        
+        results = detector.detect_duplicates(records, DetectionConfiguration(threshold=0.7))
+        capped = detector.detect_duplicates(
+            records, DetectionConfiguration(threshold=0.7, max_hamming_distance=distance - 1))
+        
+        assert [[r.code_hash for r in result.matched_records] for result in results] == [["a", "b"]]
+        assert results[0].metadata['max_hamming_distance'] == 19
+        assert capped == []
+
+    def test_unrelated_code_is_not_clustered(self):
+        """Test that hash-radius candidates of unrelated code are rejected."""
+        rng = random.Random(7)
+        names = ["alpha", "beta", "gamma", "delta", "omega", "sigma", "theta", "kappa"]
+        records = []
+        for i in range(2000):
+            first, second = rng.sample(names, 2)
+            records.append(CodeRecord(
+                code_hash=f"h{i}",
+                code_content=f"def func_{i}(x_{i}, {first}_{i}):\n    return x_{i} * {i} + {second}_{i}.get_{i}()"
+            ))
+        
+        results = SimHashDetector().detect_duplicates(records, DetectionConfiguration(threshold=0.7))
+        
+        assert results == []
+
+    def test_executor_joins_through_sidecar(self, monkeypatch):
+        """Test that a detector with a pool clusters like the in-process join."""
+        monkeypatch.setattr(SimHashDetector, "SIDECAR_MIN_RECORDS", 2)
+        rng = random.Random(3)
+        words = ["load", "save", "parse", "render", "merge", "split", "count", "check"]
+        records = []
+        for i in range(200):
+            picked = rng.sample(words, 5) if i % 3 else words[i % 4:i % 4 + 5]
+            records.append(CodeRecord(
+                code_hash=f"h{i}",
+                code_content=f"def run(data):\n    return {'('.join(picked)}(data{')' * 4}"
+            ))
+        config = DetectionConfiguration(threshold=0.8)
+        
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            pooled = SimHashDetector(executor=executor).detect_duplicates(records, config)
+        serial = SimHashDetector().detect_duplicates(records, config)
+        
+        assert pooled
+        assert ([[r.code_hash for r in result.matched_records] for result in pooled]
+                == [[r.code_hash for r in result.matched_records] for result in serial])
@@ -0,0 +1,213 @@
+"""Test cases for shard maps, federated reads over shards and rebalancing."""
+
+import asyncio
+from collections import Counter
+
+import pytest
+from oopstracker.cli import create_parser, main
+from oopstracker.commands.base import CommandContext
+from oopstracker.commands.check import CheckCommand
+from oopstracker.database import DatabaseConnectionManager, ShardMap
+from oopstracker.exceptions import ConfigurationError
+from oopstracker.sharded_repository import ShardedRepository
+from oopstracker.unified_repository import UnifiedRepository
+
+
+# make_records fields spreading records over the files of two projects
+PROJECT_FILES = {
+    'file_path': lambda i: f"/repos/{'alpha' if i % 2 else 'beta'}/module_{i % 7}.py",
+    'timestamp': lambda i: f"2024-01-{i % 28 + 1:02d}T00:00:{i % 60:02d}"
+}
+
+
+@pytest.fixture
+def single(manager, make_records):
+    repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+    repository.bulk_insert_records(make_records(60, **PROJECT_FILES))
+    return repository
+
+
+@pytest.fixture
+def sharded(tmp_path, make_records):
+    with ShardedRepository(ShardMap.with_shard_count(tmp_path / "shards", 3), hash_algorithm="xxhash64") as repository:
+        repository.bulk_insert_records(make_records(60, **PROJECT_FILES))
+        yield repository
+
+
+def _shard_counts(repository):
+    return {name: stats['total_records'] for name, stats in repository.get_statistics().data['shards'].items()}
+
+
+class TestShardMap:
+    """Test routing records to shards and storing maps."""
+
+    def test_routing_is_stable_and_by_file(self, tmp_path, make_records):
+        """Test records of one file share a shard and the choice survives a reload."""
+        shard_map = ShardMap.with_shard_count(tmp_path, 4)
+        shard_map.save(tmp_path / "map.json")
+        reloaded = ShardMap.load(tmp_path / "map.json")
+
+        for record in make_records(40, **PROJECT_FILES):
+            assert shard_map.shard_for(record) == reloaded.shard_for(record)
+            assert shard_map.shard_for(record) == shard_map.shard_for({'file_path': record['file_path']})
+        assert reloaded.shards == shard_map.shards
+        assert '"shard-0": "shard-0.db"' in (tmp_path / "map.json").read_text()
+
+    def test_adding_a_shard_only_moves_keys_to_it(self, tmp_path):
+        """Test rendezvous routing keeps every key that does not move to the new shard."""
+        keys = [f"/repos/file_{i}.py" for i in range(400)]
+        before = ShardMap.with_shard_count(tmp_path, 4)
+        after = ShardMap.with_shard_count(tmp_path, 5)
+
+        moved = [key for key in keys if before.shard_for_key(key) != after.shard_for_key(key)]
+        assert all(after.shard_for_key(key) == "shard-4" for key in moved)
+        assert 40 < len(moved) < 120
+
+    def test_project_routing_and_pins(self, tmp_path):
+        """Test the deepest project root is the key and pinned keys skip hashing."""
+        shard_map = ShardMap({'a': tmp_path / "a.db", 'b': tmp_path / "b.db"}, key='project',
+                             projects=["/repos/alpha", "/repos/alpha/vendor"], pinned={'/repos/alpha': 'b'})
+
+        assert shard_map.routing_key({'file_path': "/repos/alpha/x/y.py"}) == "/repos/alpha"
+        assert shard_map.routing_key({'file_path': "/repos/alpha/vendor/z.py"}) == "/repos/alpha/vendor"
+        assert shard_map.routing_key({'file_path': "/repos/beta/z.py"}) == "/repos/beta/z.py"
+        assert shard_map.routing_key({'code_hash': "abc"}) == "code_hash:abc"
+        assert shard_map.shard_for({'file_path': "/repos/alpha/x/y.py"}) == 'b'
+
+    @pytest.mark.parametrize("content", [
+        "not json",
+        '{"key": "file"}',
+        '{"key": "inode", "shards": {"a": "a.db"}}',
+        '{"shards": {"a": "a.db"}, "pinned": {"x": "b"}}',
+        '{"shards": {}}'
+    ])
+    def test_invalid_maps_are_rejected(self, tmp_path, content):
+        """Test unreadable or inconsistent maps raise ConfigurationError."""
+        path = tmp_path / "map.json"
+        path.write_text(content)
+        with pytest.raises(ConfigurationError):
+            ShardMap.load(path)
+
+
+class TestShardedRepository:
+    """Test writes are routed and federated reads match a single database."""
+
+    def test_records_are_spread_by_file(self, sharded):
+        """Test every shard gets records and each file lives in one shard."""
+        records = sharded.get_all_code_records().data
+        shards_by_file = {}
+        for record in records:
+            shards_by_file.setdefault(record['file_path'], set()).add(record['shard'])
+
+        assert all(count > 0 for count in _shard_counts(sharded).values())
+        assert all(len(shards) == 1 for shards in shards_by_file.values())
+
+    def test_federated_reads_match_single_database(self, sharded, single, make_records):
+        """Test statistics, all records, iteration, search and candidates merge to the single-file results."""
+        stats = sharded.get_statistics().data
+        expected = single.get_statistics().data
+        assert {name: stats[name] for name in expected} == expected
+
+        assert ([record['code_hash'] for record in sharded.get_all_code_records().data]
+                == [record['code_hash'] for record in single.get_all_code_records().data])
+        assert (sorted(record['code_hash'] for record in sharded.iter_code_records(('code_hash',), page_size=7))
+                == sorted(record['code_hash'] for record in single.iter_code_records(('code_hash',))))
+        assert (sorted(record['function_name'] for record in sharded.search_code_records(tokens=["event_1"]).data)
+                == sorted(record['function_name'] for record in single.search_code_records(tokens=["event_1"]).data))
+
+        query = make_records(1, 17)[0]['simhash']
+        matches = sharded.find_simhash_candidates(query, 24).data
+        shard_of = {record['code_hash']: record['shard'] for record in sharded.get_all_code_records().data}
+        assert [distance for _, _, distance in matches] == [distance for _, distance in
+                                                             single.find_simhash_candidates(query, 24).data]
+        assert matches[0][0] == shard_of['h17'] and matches[0][2] == 0
+
+    def test_search_limit_takes_from_every_shard(self, sharded):
+        """Test a limited search is shared out over the shards instead of filled from the first."""
+        records = sharded.search_code_records(name_prefix="handler", limit=6).data
+
+        assert Counter(record['shard'] for record in records) == {name: 2 for name in sharded.repositories}
+
+    def test_code_hash_in_two_shards_is_read_once(self, sharded, make_records):
+        """Test merged reads drop the copy of a code hash another shard also stores."""
+        original = make_records(1, 5, **PROJECT_FILES)[0]
+        copy = dict(original, timestamp="2025-01-01T00:00:00", file_path=next(
+            f"/repos/copy/module_{i}.py" for i in range(100)
+            if sharded.shard_for({'file_path': f"/repos/copy/module_{i}.py"}) != sharded.shard_for(original)
+        ))
+        sharded.bulk_insert_records([copy])
+
+        records = sharded.get_all_code_records().data
+        found = sharded.search_code_records(name_prefix="handler", limit=60).data
+        assert len(records) == len(found) == 60
+        assert records[0]['file_path'] == copy['file_path']
+        assert sum(stats['total_records'] for stats in sharded.get_statistics().data['shards'].values()) == 61
+
+    def test_get_code_record_names_its_shard(self, sharded):
+        """Test lookups by hash search every shard."""
+        record = sharded.get_code_record("h5").data
+
+        assert record['function_name'] == "handler_5"
+        assert record['shard'] == sharded.shard_for(record)
+        assert not sharded.get_code_record("missing").success
+
+
+class TestRebalance:
+    """Test moving records when the shard map changes."""
+
+    def test_growing_and_shrinking_keeps_every_record(self, sharded, tmp_path):
+        """Test records follow the new map and dropped shards are drained."""
+        before = {record['code_hash'] for record in sharded.get_all_code_records().data}
+        grown = ShardMap.with_shard_count(tmp_path / "shards", 5)
+
+        result = sharded.rebalance(grown)
+
+        assert result.success and result.affected_rows > 0
+        assert all(set(counts) <= {"shard-3", "shard-4"} for counts in result.data.values())
+        records = sharded.get_all_code_records().data
+        assert {record['code_hash'] for record in records} == before
+        assert all(record['shard'] == grown.shard_for(record) for record in records)
+        assert sharded.get_code_record("h9").data['code_content'].startswith("def handler_9(")
+
+        shrunk = ShardMap.with_shard_count(tmp_path / "shards", 2)
+        sharded.rebalance(shrunk)
+        assert set(_shard_counts(sharded)) == {"shard-0", "shard-1"}
+        assert sum(_shard_counts(sharded).values()) == 60
+        assert sharded.rebalance(shrunk).affected_rows == 0
+
+    def test_cli_init_rebalance_and_status(self, tmp_path, make_records, capsys, monkeypatch):
+        """Test the shards command without an LLM configured."""
+        monkeypatch.delenv("OOPSTRACKER_LLM_MODEL", raising=False)
+        map_path = tmp_path / "shards.json"
+        assert asyncio.run(main(["shards", "init", "--map", str(map_path), "--count", "2"])) == 0
+        with ShardedRepository(ShardMap.load(map_path), hash_algorithm="xxhash64") as repository:
+            repository.bulk_insert_records(make_records(20, **PROJECT_FILES))
+        ShardMap.with_shard_count(tmp_path / "shards", 3).save(tmp_path / "grown.json")
+
+        assert asyncio.run(main(["shards", "rebalance", "--map", str(map_path),
+                                 "--to", str(tmp_path / "grown.json")])) == 0
+        assert len(ShardMap.load(map_path).shards) == 3
+        assert asyncio.run(main(["shards", "status", "--map", str(map_path)])) == 0
+
+        output = capsys.readouterr().out
+        assert "20 records, 14 files in 3 shards" in output
+        assert "shard-2" in output
+
+    def test_check_writes_records_to_shards(self, tmp_path, monkeypatch):
+        """Test check --shard-map stores its records in the shards, not oopstracker.db."""
+        # One function: with two the default detector would call the LLM
+        (tmp_path / "alpha.py").write_text("def alpha(value):\n    return value + 1\n")
+        monkeypatch.chdir(tmp_path)
+        map_path = tmp_path / "shards.json"
+        ShardMap.with_shard_count(tmp_path / "shards", 2).save(map_path)
+
+        args = create_parser()[0].parse_args(["check", str(tmp_path), "--shard-map", str(map_path)])
+        assert asyncio.run(CheckCommand(CommandContext(detector=None, semantic_detector=None, args=args)).execute()) == 0
+
+        with ShardedRepository(ShardMap.load(map_path)) as repository:
+            records = repository.get_all_code_records().data
+        assert [(record['function_name'], record['shard']) for record in records] == [
+            ("alpha", repository.shard_for(records[0]))]
+        db = DatabaseConnectionManager(str(tmp_path / "oopstracker.db"))
+        assert db.execute("SELECT COUNT(*) FROM code_records").fetchone()[0] == 0
+        db.close()
@@ -0,0 +1,108 @@
+"""Test cases for the memory-mapped simhash sidecar shared with worker processes."""
+
+import gc
+import random
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+from oopstracker.core.simhash import (
+    SimHashSidecar,
+    attached_sidecar,
+    cleanup_stale_sidecars,
+    near_duplicate_clusters
+)
+
+
+@pytest.fixture
+def hashes():
+    rng = random.Random(5)
+    values = []
+    for _ in range(60):
+        base = rng.getrandbits(64)
+        values.append(base)
+        for _ in range(rng.randint(0, 3)):
+            values.append(base ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)))
+    return values
+
+
+@pytest.fixture
+def executor():
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+def _worker_view(handle):
+    sidecar = attached_sidecar(handle)
+    return isinstance(sidecar.simhashes, np.memmap), sidecar.simhashes.flags.writeable, int(sidecar.ids[-1])
+
+
+class TestSimHashSidecar:
+    """Test creating, attaching and releasing sidecars."""
+
+    def test_attach_maps_the_same_file(self, tmp_path, hashes):
+        """Test attached sidecars see the owner's arrays and only the owner deletes the file."""
+        owner = SimHashSidecar.create(hashes, ids=range(100, 100 + len(hashes)), directory=tmp_path)
+        attached = SimHashSidecar.attach(owner.handle)
+
+        assert isinstance(attached.simhashes, np.memmap)
+        assert attached.simhashes.tolist() == hashes
+        assert attached.ids.tolist() == list(range(100, 100 + len(hashes)))
+        attached.close()
+        assert owner.path.exists()
+        owner.close()
+        assert not owner.path.exists()
+        assert owner.closed
+
+    def test_garbage_collected_owner_removes_file(self, tmp_path, hashes):
+        """Test an owner that is never closed still deletes its file."""
+        path = SimHashSidecar.create(hashes, directory=tmp_path).path
+        gc.collect()
+
+        assert not path.exists()
+
+    def test_mismatched_handle_is_rejected(self, tmp_path, hashes):
+        """Test attaching with a wrong row count fails instead of misreading."""
+        with SimHashSidecar.create(hashes, directory=tmp_path) as owner:
+            with pytest.raises(ValueError):
+                SimHashSidecar.attach(owner.handle._replace(count=len(hashes) + 1))
+
+    def test_stale_files_of_dead_processes_are_removed(self, tmp_path):
+        """Test the sweep removes files of exited creators and keeps live ones."""
+        dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                              capture_output=True, text=True, check=True)
+        stale = tmp_path / f"oopstracker-simhash-{dead.stdout.strip()}-0.bin"
+        stale.write_bytes(b"\0" * 16)
+        with SimHashSidecar.create([1, 2], directory=tmp_path) as live:
+            assert cleanup_stale_sidecars(tmp_path) == []
+            assert not stale.exists()
+            assert live.path.exists()
+
+
+class TestSidecarWorkers:
+    """Test fanning queries and the self-join out to a process pool."""
+
+    def test_workers_map_read_only(self, tmp_path, hashes, executor):
+        """Test workers read the shared pages instead of receiving the hashes."""
+        with SimHashSidecar.create(hashes, ids=range(len(hashes)), directory=tmp_path) as sidecar:
+            assert executor.submit(_worker_view, sidecar.handle).result() == (True, False, len(hashes) - 1)
+
+    def test_query_many_matches_serial(self, tmp_path, hashes, executor):
+        """Test pooled queries return the same rows as running them in-process."""
+        with SimHashSidecar.create(hashes, directory=tmp_path) as sidecar:
+            pooled = sidecar.query_many(hashes[:30], 4, executor)
+            serial = sidecar.query_many(hashes[:30], 4)
+
+        assert len(pooled) == 30
+        for (rows, distances), (expected_rows, expected_distances) in zip(pooled, serial):
+            assert rows.tolist() == expected_rows.tolist()
+            assert distances.tolist() == expected_distances.tolist()
+        assert all(index in rows.tolist() for index, (rows, _) in enumerate(pooled))
+
+    def test_clusters_match_self_join(self, tmp_path, hashes, executor):
+        """Test block-per-worker clustering equals the in-process self-join."""
+        with SimHashSidecar.create(hashes, directory=tmp_path) as sidecar:
+            assert sidecar.near_duplicate_clusters(3, executor=executor) == near_duplicate_clusters(hashes, 3)
+            assert sidecar.near_duplicate_clusters(3) == near_duplicate_clusters(hashes, 3)
@@ -0,0 +1,157 @@
+"""Test cases for banded SimHash storage and SQL-side candidate lookup."""
+
+import asyncio
+import random
+import sqlite3
+from math import comb
+
+import pytest
+from oopstracker.async_unified_repository import AsyncUnifiedRepository
+from oopstracker.core.simhash import band_neighbors, split_bands, to_signed64
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.unified_repository import UnifiedRepository
+
+
+def _flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+@pytest.fixture
+def repository(manager):
+    return UnifiedRepository(manager, hash_algorithm="xxhash64")
+
+
+@pytest.fixture
+def hashes():
+    rng = random.Random(7)
+    base = [rng.getrandbits(64) for _ in range(20)] + [(1 << 64) - 1, 1 << 63]
+    near = [_flip(value, rng.sample(range(64), rng.randint(1, 9))) for value in base for _ in range(5)]
+    return base + near
+
+
+class TestBands:
+    """Test band helpers."""
+
+    def test_signed_round_trip(self):
+        """Test hashes with the top bit set become negative integers."""
+        assert to_signed64((1 << 64) - 1) == -1
+        assert to_signed64(1 << 63) == -(1 << 63)
+        assert to_signed64(12345) == 12345
+        assert split_bands(-1) == split_bands((1 << 64) - 1) == (0xFFFF,) * 4
+        assert split_bands(0x0004000300020001) == (1, 2, 3, 4)
+
+    def test_band_neighbors(self):
+        """Test neighbors enumerate every band value within the radius."""
+        assert band_neighbors(7, 0) == [7]
+        assert len(set(band_neighbors(7, 2))) == comb(16, 0) + comb(16, 1) + comb(16, 2)
+        assert all(bin(value ^ 7).count("1") <= 2 for value in band_neighbors(7, 2))
+
+
+class TestFindSimhashCandidates:
+    """Test candidate lookup against brute force."""
+
+    def test_matches_brute_force(self, repository, hashes, make_records):
+        """Test every radius returns exactly the records a full scan finds."""
+        repository.bulk_insert_records(make_records(len(hashes), simhash=hashes.__getitem__))
+        ids = {row['code_hash']: row['id'] for row in repository.get_all_code_records().data}
+
+        for query in hashes[:22]:
+            for max_distance in (0, 3, 4, 9):
+                expected = sorted(
+                    ((ids[f"h{i}"], bin(query ^ value).count("1")) for i, value in enumerate(hashes)
+                     if bin(query ^ value).count("1") <= max_distance),
+                    key=lambda match: (match[1], match[0])
+                )
+                assert repository.find_simhash_candidates(query, max_distance).data == expected
+
+    def test_stores_signed_integers(self, repository):
+        """Test simhashes are INTEGERs and read back unsigned."""
+        repository.create_code_record({'code_hash': 'top', 'code_content': "pass", 'simhash': (1 << 64) - 2})
+        row = repository.connection_manager.execute(
+            "SELECT typeof(simhash), simhash, simhash_band3 FROM code_records"
+        ).fetchone()
+
+        assert tuple(row) == ('integer', -2, 0xFFFF)
+        assert repository.get_code_record('top').data['simhash'] == (1 << 64) - 2
+        assert 'simhash_band0' not in repository.get_code_record('top').data
+
+    def test_uses_band_indexes(self, repository):
+        """Test the candidate query is answered from the band indexes."""
+        plan = repository.connection_manager.execute(
+            "EXPLAIN QUERY PLAN " + repository.queries['select_simhash_candidates'], ("[1]",) * 4
+        ).fetchall()
+        details = " ".join(row[3] for row in plan)
+
+        assert "MULTI-INDEX OR" in details
+        assert all(f"idx_simhash_band{band}" in details for band in range(4))
+        assert "SCAN code_records" not in details
+
+    def test_async_repository_agrees(self, repository, hashes, make_records):
+        """Test the async repository finds the same matches."""
+        repository.bulk_insert_records(make_records(len(hashes), simhash=hashes.__getitem__))
+
+        async def lookup():
+            async with AsyncUnifiedRepository(repository.connection_manager.db_path) as async_repository:
+                return (await async_repository.find_simhash_candidates(hashes[3], 6)).data
+
+        assert asyncio.run(lookup()) == repository.find_simhash_candidates(hashes[3], 6).data
+
+
+class TestSimhashMigration:
+    """Test migration of TEXT simhash columns."""
+
+    def test_text_simhashes_are_migrated(self, tmp_path):
+        """Test an old code_records table is rebuilt with INTEGER band columns."""
+        path = str(tmp_path / "old.db")
+        connection = sqlite3.connect(path)
+        connection.execute("""
+            CREATE TABLE code_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code_hash TEXT UNIQUE NOT NULL,
+                code_content TEXT NOT NULL,
+                normalized_code TEXT,
+                function_name TEXT,
+                file_path TEXT,
+                timestamp TEXT NOT NULL,
+                metadata TEXT,
+                simhash TEXT
+            )
+        """)
+        connection.execute("CREATE INDEX idx_simhash ON code_records(simhash)")
+        connection.executemany(
+            "INSERT INTO code_records (code_hash, code_content, function_name, timestamp, simhash) VALUES (?, ?, ?, ?, ?)",
+            [("a", "x", "f", "2024-01-01", str((1 << 64) - 1)), ("b", "y", "g", "2024-01-02", "10"),
+             ("c", "z", "h", "2024-01-03", None)]
+        )
+        connection.commit()
+        connection.close()
+
+        with DatabaseConnectionManager(path) as manager:
+            SchemaManager(manager).initialize_schema()
+            repository = UnifiedRepository(manager, hash_algorithm="xxhash64")
+            records = {row['code_hash']: row for row in repository.get_all_code_records().data}
+            types = manager.execute("SELECT typeof(simhash) FROM code_records ORDER BY id").fetchall()
+
+            assert {code_hash: record['simhash'] for code_hash, record in records.items()} == \
+                {'a': (1 << 64) - 1, 'b': 10, 'c': None}
+            assert records['a']['function_name'] == "f"
+            assert [row[0] for row in types] == ['integer', 'integer', 'null']
+            assert repository.find_simhash_candidates(11, 1).data == [(2, 1)]
+            assert manager.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'code_records_rebuilt'"
+            ).fetchone() is None
+
+    def test_old_schema_version_needs_migration(self, tmp_path):
+        """Test a database recorded at an older schema version reports needing migration."""
+        with DatabaseConnectionManager(str(tmp_path / "old.db")) as manager:
+            schema_manager = SchemaManager(manager)
+            schema_manager.initialize_schema()
+            manager.execute("UPDATE database_info SET value = '1.0' WHERE key = 'schema_version'")
+            manager.commit()
+
+            assert schema_manager.needs_migration()
+            schema_manager.initialize_schema()
+            assert not schema_manager.needs_migration()
+            assert schema_manager.get_schema_version() == SchemaManager.SCHEMA_VERSION
@@ -1,5 +1,6 @@
 """Test cases for SimHash calculator following TDD principles."""
 
+import numpy as np
 import pytest
 from oopstracker.core.simhash.calculator import SimHashCalculator
 
@@ -132,4 +133,81 @@ class TestSimHashCalculator:
         hash_value = calculator.calculate([], [])
         assert isinstance(hash_value, int)
         # Empty features should produce a consistent hash
-        assert hash_value == calculator.calculate([], [])
\ No newline at end of file
+        assert hash_value == calculator.calculate([], [])
+
+    def test_calculate_batch_matches_scalar(self):
+        """Test that batch calculation is bit-for-bit identical to calculate()."""
+        calculator = SimHashCalculator()
+        feature_lists = [
+            ["FUNC:2", "ARG:0:self", "CALL:len", "RETURN"],
+            ["IF", "FOR", "IF", "CALL:len"],
+            "single_feature",
+            [],
+            ["a", "b", "c"],
+        ]
+        weights = [[3, 1, 2, 1], None, None, [], [1, 2]]
+        
+        batch = calculator.calculate_batch(feature_lists, weights)
+        
+        assert batch.dtype == np.uint64
+        expected = [
+            calculator.calculate(list(f) if isinstance(f, list) else f,
+                                 list(w) if w is not None else None)
+            for f, w in zip(feature_lists, weights)
+        ]
+        assert [int(v) for v in batch] == expected
+
+    def test_calculate_batch_spans_chunks(self):
+        """Test that documents split across accumulation chunks are summed correctly."""
+        calculator = SimHashCalculator()
+        calculator.BATCH_CHUNK_SIZE = 5
+        feature_lists = [[f"tok{i % 7}" for i in range(n)] for n in (3, 11, 4, 9)]
+        
+        batch = calculator.calculate_batch(feature_lists)
+        
+        assert [int(v) for v in batch] == [calculator.calculate(f) for f in feature_lists]
+
+    def test_calculate_batch_rejects_wide_hashes(self):
+        """Test that batch calculation requires hashes that fit in uint64."""
+        calculator = SimHashCalculator(hash_size=128)
+        with pytest.raises(ValueError):
+            calculator.calculate_batch([["a"]])
+
+    def test_default_hash_algorithm(self):
+        """Test that 64-bit hashes default to xxhash64 and wider ones to md5."""
+        assert SimHashCalculator().hash_algorithm == "xxhash64"
+        assert SimHashCalculator(hash_size=128).hash_algorithm == "md5"
+
+    def test_md5_backend_is_compatible(self):
+        """Test that the md5 backend reproduces the original MD5 feature hashing."""
+        import hashlib
+        calculator = SimHashCalculator(hash_algorithm="md5")
+        features = ["FUNC:1", "CALL:len", "RETURN"]
+        
+        bit_vector = [0] * 64
+        for feature in features:
+            feature_hash = int(hashlib.md5(feature.encode()).hexdigest(), 16)
+            for i in range(64):
+                bit_vector[i] += 1 if (feature_hash >> i) & 1 else -1
+        expected = sum(1 << i for i in range(64) if bit_vector[i] > 0)
+        
+        assert calculator.calculate(features) == expected
+
+    def test_feature_hashes_are_memoized(self):
+        """Test that repeated tokens hit the shared LRU memo."""
+        calculator = SimHashCalculator()
+        calculator.feature_hasher.cache_clear()
+        
+        calculator.calculate(["IF", "IF", "CALL:len"])
+        calculator.calculate(["IF", "CALL:len"])
+        
+        info = calculator.feature_hasher.cache_info()
+        assert info.misses == 2
+        assert info.hits == 3
+
+    def test_invalid_hash_algorithm(self):
+        """Test that unknown or too narrow backends raise errors."""
+        with pytest.raises(ValueError):
+            SimHashCalculator(hash_algorithm="crc32")
+        with pytest.raises(ValueError):
+            SimHashCalculator(hash_size=128, hash_algorithm="xxhash64")
@@ -0,0 +1,75 @@
+"""Test cases for the multi-index hashing SimHash index."""
+
+import random
+
+import pytest
+from oopstracker.core.simhash import SimHashIndex
+from oopstracker.models import CodeRecord
+
+
+def _flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for position in rng.sample(range(64), count):
+        value ^= 1 << position
+    return value
+
+
+class TestSimHashIndex:
+    """Test cases for SimHashIndex class."""
+
+    def test_query_matches_linear_scan(self):
+        """Test that MIH queries return exactly the brute-force result."""
+        rng = random.Random(42)
+        base = rng.getrandbits(64)
+        hashes = {i: _flip_bits(base, rng.randint(0, 20), rng) for i in range(300)}
+        hashes.update({1000 + i: rng.getrandbits(64) for i in range(300)})
+        index = SimHashIndex()
+        index.build(hashes.items())
+        
+        for radius in (0, 3, 7, 12):
+            expected = sorted(
+                ((record_id, (value ^ base).bit_count()) for record_id, value in hashes.items()
+                 if (value ^ base).bit_count() <= radius),
+                key=lambda match: (match[1], match[0])
+            )
+            assert index.query(base, radius) == expected
+
+    def test_insert_and_delete(self):
+        """Test that deleted records are no longer returned."""
+        index = SimHashIndex()
+        index.insert(1, 0b1011)
+        index.insert(2, 0b1010)
+        
+        assert index.query(0b1011, 1) == [(1, 0), (2, 1)]
+        assert index.delete(1)
+        assert not index.delete(1)
+        assert index.query(0b1011, 1) == [(2, 1)]
+        assert len(index) == 1
+
+    def test_reinsert_replaces_hash(self):
+        """Test that inserting an existing id replaces its hash."""
+        index = SimHashIndex()
+        index.insert(7, 0)
+        index.insert(7, (1 << 64) - 1)
+        
+        assert index.query(0, 3) == []
+        assert index.query((1 << 64) - 1, 0) == [(7, 0)]
+
+    def test_from_records_skips_incomplete_records(self):
+        """Test bulk build from CodeRecord objects."""
+        records = [
+            CodeRecord(id=1, simhash=5),
+            CodeRecord(id=2, simhash=None),
+            CodeRecord(id=None, simhash=5),
+            CodeRecord(id=3, simhash="7"),
+        ]
+        index = SimHashIndex.from_records(records)
+        
+        assert len(index) == 2
+        assert index.query(5, 1) == [(1, 0), (3, 1)]
+
+    def test_invalid_block_count(self):
+        """Test that invalid block counts raise errors."""
+        with pytest.raises(ValueError):
+            SimHashIndex(block_count=0)
+        with pytest.raises(ValueError):
+            SimHashIndex(hash_size=8, block_count=9)
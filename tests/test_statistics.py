@@ -0,0 +1,132 @@
+"""Test cases for the trigger-maintained stats table."""
+
+import os
+import random
+
+import pytest
+from oopstracker.ast_analyzer import ASTAnalyzer
+from oopstracker.ast_database import ASTDatabaseManager
+from oopstracker.database import FileTrackingRepository
+from oopstracker.models import CodeRecord
+from oopstracker.unified_repository import UnifiedRepository
+
+SOURCE = '''
+class Cart{index}:
+    def add_{index}(self, item):
+        if item:
+            self.items.append(item)
+
+
+def total_{index}(items):
+    return sum(len(item) for item in items)
+'''
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = ASTDatabaseManager(str(tmp_path / "stats.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def source_files(tmp_path):
+    paths = []
+    for index in range(4):
+        path = tmp_path / f"module_{index}.py"
+        path.write_text(SOURCE.format(index=index))
+        paths.append(str(path))
+    return paths
+
+
+def _pairs(file_path):
+    return [(CodeRecord(code_content=unit.source_code, function_name=unit.name, file_path=file_path), unit)
+            for unit in ASTAnalyzer().parse_file(file_path)]
+
+
+def _stats(db):
+    return {row['name']: row['value'] for row in db.connection_manager.execute("SELECT name, value FROM stats")}
+
+
+class TestTriggerStatistics:
+    """Test counters stay equal to counting the tables."""
+
+    def test_counters_follow_inserts_updates_and_deletes(self, db, source_files):
+        """Test random writes leave the same counters as a full recount."""
+        rng = random.Random(7)
+        repository = UnifiedRepository(db.connection_manager)
+        for path in source_files:
+            db.insert_records(_pairs(path))
+        repository.bulk_insert_records([
+            {'code_hash': f"h{i}", 'code_content': "pass", 'function_name': rng.choice([None, "f"]),
+             'file_path': rng.choice([None, "a.py", "b.py"])} for i in range(40)
+        ])
+        db.delete_by_file_path(source_files[0])
+        with db.connection_manager.transaction():
+            db.connection_manager.execute("UPDATE code_records SET file_path = 'c.py' WHERE id % 3 = 0")
+            db.connection_manager.execute("DELETE FROM code_records WHERE id % 5 = 0")
+            db.connection_manager.execute("UPDATE ast_code_records SET unit_type = 'class', complexity_score = 9 "
+                                          "WHERE id % 2 = 0")
+        maintained = _stats(db)
+
+        db.schema_manager.rebuild_statistics()
+        recounted = _stats(db)
+
+        # A recount may have missed changes, so it moves the generation on
+        assert recounted.pop('code_records.generation') == maintained.pop('code_records.generation') + 1
+        assert maintained == recounted
+        assert maintained['code_records.total_records'] == repository.execute_custom_query(
+            "SELECT COUNT(*) AS count FROM code_records").data[0]['count']
+
+    def test_statistics_match_table_scans(self, db, source_files):
+        """Test the repository statistics equal the aggregate queries they replace."""
+        for path in source_files:
+            db.insert_records(_pairs(path))
+        row = db.connection_manager.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT file_path), SUM(unit_type = 'function'),
+                   SUM(unit_type = 'class'), AVG(complexity_score)
+            FROM ast_code_records
+        """).fetchone()
+
+        stats = db.get_statistics()
+
+        assert (stats['total_records'], stats['total_files'], stats['total_functions'],
+                stats['total_classes'], stats['average_complexity']) == (*tuple(row)[:4], round(row[4], 2))
+        db.clear_all()
+        assert db.code_records.get_statistics()['total_files'] == 0
+
+    def test_existing_database_is_counted_once(self, tmp_path, source_files):
+        """Test a database without triggers gets them and its counters on open."""
+        path = str(tmp_path / "old.db")
+        with ASTDatabaseManager(path) as db:
+            db.insert_records(_pairs(source_files[0]))
+            with db.connection_manager.transaction():
+                for name in [row[0] for row in db.connection_manager.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall()]:
+                    db.connection_manager.execute(f"DROP TRIGGER {name}")
+                db.connection_manager.execute("DELETE FROM stats")
+            db.insert_records(_pairs(source_files[1]))
+
+        with ASTDatabaseManager(path) as db:
+            assert db.code_records.get_statistics()['total_records'] == 6
+            db.insert_records(_pairs(source_files[2]))
+            assert db.code_records.get_statistics()['total_files'] == 3
+
+
+class TestDeletedFiles:
+    """Test deleted files are counted from scan results."""
+
+    def test_scans_mark_deleted_files(self, db, source_files):
+        """Test missing files found by scans are counted until they are seen again."""
+        db.update_file_tracking_batch([(path, FileTrackingRepository.hash_file(path), 3) for path in source_files])
+        os.remove(source_files[0])
+
+        assert db.get_changed_files(source_files) == []
+        assert db.get_statistics()['deleted_files'] == 1
+        assert db.check_and_mark_deleted_files(set(source_files[2:])) == source_files[:2]
+        assert db.get_statistics()['deleted_files'] == 2
+
+        db.get_changed_files(source_files[1:])
+        assert db.get_statistics()['deleted_files'] == 1
+        db.remove_file_records(source_files[0])
+        assert db.get_statistics()['deleted_files'] == 0
@@ -0,0 +1,154 @@
+"""Test cases for interned structure token IDs."""
+
+import json
+import sqlite3
+from array import array
+
+import pytest
+from oopstracker.ast_analyzer import ASTAnalyzer, CodeUnit
+from oopstracker.core.simhash import SimHashCalculator
+from oopstracker.core.token_vocabulary import (
+    TokenVocabulary,
+    get_token_vocabulary,
+    jaccard_similarity
+)
+from oopstracker.database import DatabaseConnectionManager, SchemaManager
+from oopstracker.exceptions import ConfigurationError
+from oopstracker.parse_cache import ParseCache
+
+SOURCE = '''
+class Cart:
+    def add(self, item):
+        self.items.append(item)
+
+
+def total(items):
+    return sum(len(item) for item in items)
+'''
+
+
+@pytest.fixture
+def connection_manager(tmp_path):
+    manager = DatabaseConnectionManager(str(tmp_path / "tokens.db"))
+    yield manager
+    manager.close()
+
+
+class TestTokenVocabulary:
+    """Test interning, persistence and consumers of token IDs."""
+
+    def test_intern_assigns_dense_stable_ids(self):
+        """Test tokens get consecutive IDs that never change."""
+        vocabulary = TokenVocabulary(["IF", "RETURN"])
+        token_ids = vocabulary.intern_many(["RETURN", "CALL:len", "IF", "CALL:len"])
+
+        assert token_ids == array('I', [1, 2, 0, 2])
+        assert vocabulary.intern("CALL:len") == 2
+        assert vocabulary.join(token_ids) == "RETURN|CALL:len|IF|CALL:len"
+        assert len(vocabulary) == 3 and "IF" in vocabulary
+
+    def test_save_and_load_round_trip(self, connection_manager):
+        """Test a loaded vocabulary keeps the stored IDs and appends after them."""
+        vocabulary = TokenVocabulary.load(connection_manager)
+        stored = vocabulary.intern_many(["FUNC:1", "ARG:0:self", "RETURN"])
+        assert vocabulary.save(connection_manager) == 3
+        assert vocabulary.save(connection_manager) == 0
+
+        loaded = TokenVocabulary.load(connection_manager)
+        assert loaded.tokens(stored) == ["FUNC:1", "ARG:0:self", "RETURN"]
+        assert loaded.intern("YIELD") == 3
+
+    def test_sync_picks_up_other_writers(self, connection_manager):
+        """Test tokens saved by another instance are read before interning."""
+        first = TokenVocabulary.load(connection_manager)
+        second = TokenVocabulary.load(connection_manager)
+        first.intern("IF")
+        first.save(connection_manager)
+
+        assert second.sync(connection_manager) == 1
+        assert second.intern("RETURN") == 1
+        second.save(connection_manager)
+        assert TokenVocabulary.load(connection_manager).tokens([0, 1]) == ["IF", "RETURN"]
+
+    def test_save_refuses_ids_taken_by_another_writer(self, connection_manager):
+        """Test tokens interned before another writer's save are not stored under its IDs."""
+        first = TokenVocabulary.load(connection_manager)
+        second = TokenVocabulary.load(connection_manager)
+        first.intern("IF")
+        first.save(connection_manager)
+        second.intern("RETURN")
+
+        with pytest.raises(ConfigurationError):
+            second.save(connection_manager)
+        assert TokenVocabulary.load(connection_manager).tokens([0]) == ["IF"]
+        assert len(TokenVocabulary.load(connection_manager)) == 1
+
+    def test_immediate_transaction_locks_out_other_writers(self, connection_manager, tmp_path):
+        """Test the write lock is held from the start of an immediate transaction, before any write."""
+        TokenVocabulary.load(connection_manager)
+        other = sqlite3.connect(str(tmp_path / "tokens.db"), timeout=0)
+
+        with connection_manager.transaction(immediate=True):
+            TokenVocabulary.load(connection_manager)
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                other.execute("INSERT INTO token_vocabulary (id, token) VALUES (0, 'IF')")
+        other.execute("INSERT INTO token_vocabulary (id, token) VALUES (0, 'IF')")
+        other.commit()
+        other.close()
+
+    def test_sync_with_unsaved_tokens_fails(self, connection_manager):
+        """Test syncing refuses to renumber tokens that were already handed out."""
+        vocabulary = TokenVocabulary.load(connection_manager)
+        vocabulary.intern("IF")
+        with pytest.raises(ConfigurationError):
+            vocabulary.sync(connection_manager)
+
+    def test_other_vocabulary_version_is_rejected(self, connection_manager):
+        """Test a database vocabulary of another version is not reused."""
+        schema = SchemaManager(connection_manager)
+        schema.create_tables()
+        schema.ensure_token_vocabulary_version("0")
+        with pytest.raises(ConfigurationError):
+            TokenVocabulary.load(connection_manager)
+
+    def test_code_unit_stores_token_ids(self):
+        """Test parsed units hold ID arrays that rebuild their signature."""
+        units = ASTAnalyzer().parse_code(SOURCE)
+        vocabulary = get_token_vocabulary()
+
+        for unit in units:
+            assert isinstance(unit.token_ids, array) and unit.token_ids.typecode == 'I'
+            assert unit.ast_structure == vocabulary.join(unit.token_ids)
+            assert unit.structure_tokens == unit.ast_structure.split("|")
+
+        unit = CodeUnit(name="f", type="function", source_code="pass", ast_structure="IF|RETURN")
+        assert unit.structure_tokens == ["IF", "RETURN"]
+        unit.ast_structure = ""
+        assert unit.token_ids == array('I') and unit.ast_structure == ""
+        assert CodeUnit(name="f", type="function").ast_structure is None
+
+    def test_simhash_of_token_ids_matches_strings(self):
+        """Test calculate_token_ids equals calculate_batch on the token strings."""
+        units = ASTAnalyzer().parse_code(SOURCE)
+        calculator = SimHashCalculator()
+        token_id_arrays = [unit.token_ids for unit in units] + [array('I'), None]
+
+        expected = calculator.calculate_batch([unit.structure_tokens for unit in units] + [[], []])
+        actual = calculator.calculate_token_ids(token_id_arrays, get_token_vocabulary())
+        assert actual.tolist() == expected.tolist()
+
+    def test_parse_cache_stores_ids_of_persisted_vocabulary(self, connection_manager, tmp_path):
+        """Test cached rows hold database token IDs that resolve to the unit tokens."""
+        path = tmp_path / "cart.py"
+        path.write_text(SOURCE)
+        units = ASTAnalyzer(ParseCache(connection_manager)).parse_file(str(path))
+
+        stored = json.loads(connection_manager.execute("SELECT units FROM parse_cache").fetchone()["units"])
+        vocabulary = TokenVocabulary.load(connection_manager)
+        assert all(isinstance(token_id, int) for row in stored for token_id in row[4])
+        assert [vocabulary.tokens(row[4]) for row in stored] == [unit.structure_tokens for unit in units]
+
+    def test_jaccard_similarity(self):
+        """Test Jaccard similarity ignores repeated IDs."""
+        assert jaccard_similarity(array('I', [1, 2, 2, 3]), [2, 3, 4]) == 0.5
+        assert jaccard_similarity([], []) == 1.0
@@ -0,0 +1,136 @@
+"""Test cases for the write-behind queue and the repositories using it."""
+
+import threading
+from datetime import datetime
+
+import pytest
+from oopstracker.database import PooledConnectionManager, SchemaManager, WriteBehindQueue
+from oopstracker.exceptions import DatabaseError, WriteQueueFullError
+from oopstracker.split_rule_repository import SplitRule, SplitRuleRepository
+from oopstracker.unified_repository import UnifiedRepository
+
+INSERT_ITEM = "INSERT INTO items (name) VALUES (?)"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = PooledConnectionManager(str(tmp_path / "queue.db"), readers=2)
+    SchemaManager(manager).initialize_schema()
+    with manager.transaction():
+        manager.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+    yield manager
+    manager.close()
+
+
+def _count(manager, table="items"):
+    return manager.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class TestWriteBehindQueue:
+    """Test batching, flushing and backpressure."""
+
+    def test_writes_are_batched(self, manager):
+        """Test many small submits are committed in few transactions."""
+        with WriteBehindQueue(manager, max_batch_rows=1000, flush_interval=10.0) as queue:
+            for i in range(200):
+                queue.submit([(INSERT_ITEM, [(f"item_{i}",)])])
+            assert queue.flush(timeout=5.0)
+            stats = queue.get_statistics()
+
+        assert _count(manager) == 200
+        assert stats['committed_rows'] == 200
+        assert stats['batches'] < 10
+        assert stats['pending_rows'] == 0
+
+    def test_full_batch_is_written_without_flush(self, manager):
+        """Test reaching max_batch_rows writes the batch before the interval ends."""
+        committed = threading.Event()
+        with WriteBehindQueue(manager, max_batch_rows=5, flush_interval=60.0) as queue:
+            queue.submit([(INSERT_ITEM, [(f"item_{i}",) for i in range(5)])], lambda ok: committed.set())
+            assert committed.wait(5.0)
+        assert _count(manager) == 5
+
+    def test_callbacks_report_outcome(self, manager):
+        """Test on_done gets False for a failed batch and flush re-raises its error."""
+        outcomes = []
+        queue = WriteBehindQueue(manager, flush_interval=0.0)
+        queue.submit([(INSERT_ITEM, [("same",), ("same",)])], outcomes.append)
+
+        with pytest.raises(Exception, match="UNIQUE"):
+            queue.flush(timeout=5.0)
+        queue.submit([(INSERT_ITEM, [("other",)])], outcomes.append)
+        assert queue.flush(timeout=5.0)
+        queue.close()
+
+        assert outcomes == [False, True]
+        assert _count(manager) == 1
+        assert queue.get_statistics()['failed_batches'] == 1
+
+    def test_backpressure(self, manager):
+        """Test submit blocks while max_pending rows wait and times out if they never drain."""
+        queue = WriteBehindQueue(manager, max_pending=3, flush_interval=60.0, submit_timeout=0.2)
+        with manager.transaction():
+            # Holding the writer keeps the queue from draining
+            manager.execute(INSERT_ITEM, ("held",))
+            queue.submit([(INSERT_ITEM, [("a",), ("b",), ("c",)])])
+            with pytest.raises(WriteQueueFullError):
+                queue.submit([(INSERT_ITEM, [("d",)])])
+        assert queue.flush(timeout=5.0)
+
+        queue.submit([(INSERT_ITEM, [("e",)])])
+        queue.close()
+
+        assert _count(manager) == 5
+        assert queue.get_statistics()['backpressure_waits'] == 1
+        with pytest.raises(DatabaseError):
+            queue.submit([(INSERT_ITEM, [("f",)])])
+
+
+class TestQueuedRepositories:
+    """Test read-your-writes through the repository overlays."""
+
+    def test_code_records(self, manager):
+        """Test queued records are visible before and after they are written."""
+        queue = WriteBehindQueue(manager, flush_interval=60.0)
+        repository = UnifiedRepository(manager, write_queue=queue, hash_algorithm="xxhash64")
+        timestamp = datetime(2024, 1, 2, 3, 4, 5)
+
+        result = repository.create_code_record({'code_hash': 'h1', 'code_content': "x = 1",
+                                                'timestamp': timestamp, 'simhash': 2 ** 63 + 1})
+        duplicate = repository.create_code_record({'code_hash': 'h1', 'code_content': "x = 1"})
+        repository.bulk_insert_records([{'code_hash': f"b{i}", 'code_content': "y = 2"} for i in range(3)])
+        queued = repository.get_code_record('h1').data
+
+        assert result.success and not duplicate.success
+        assert _count(manager, "code_records") == 0
+        assert len(repository.get_all_code_records().data) == 4
+
+        assert repository.get_statistics().data['total_records'] == 4
+        stored = repository.get_code_record('h1').data
+        assert {key: value for key, value in stored.items() if key != 'id'} == \
+            {key: value for key, value in queued.items() if key != 'id'}
+        assert stored['simhash'] == 2 ** 63 + 1
+        assert len(repository.get_all_code_records().data) == 4
+        queue.close()
+
+    def test_rule_stats(self, manager):
+        """Test queued rule statistics are counted until they are written."""
+        queue = WriteBehindQueue(manager, flush_interval=60.0)
+        repository = SplitRuleRepository(db_manager=manager, write_queue=queue)
+        repository.save_rule(SplitRule(pattern="^get_", reasoning="getters", created_at=datetime.now()))
+        repository.save_rule(SplitRule(pattern="^set_", reasoning="setters", created_at=datetime(2000, 1, 1)))
+
+        for success in (True, True, False):
+            repository.update_rule_stats("^set_", success)
+        stored = manager.execute("SELECT success_count FROM split_rules WHERE pattern = '^set_'").fetchone()[0]
+        rule = repository.get_rule_by_pattern("^set_")
+
+        assert stored == 0
+        assert (rule.success_count, rule.failure_count) == (2, 1)
+        assert [rule.pattern for rule in repository.get_all_rules()] == ["^set_", "^get_"]
+
+        assert repository.get_statistics()['total_successes'] == 2
+        rule = repository.get_rule_by_pattern("^set_")
+        assert (rule.success_count, rule.failure_count) == (2, 1)
+        assert queue.get_statistics()['batches'] == 1
+        queue.close()